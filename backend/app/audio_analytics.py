@@ -0,0 +1,326 @@
+"""
+Audio Analytics
+Voice metrics for every generated voiceover in a directory, to profile
+energy and pacing across the whole catalog:
+- Audio is streamed from ffmpeg in fixed blocks at an analysis sample rate
+  (16 kHz mono), so memory stays flat however long the narration is
+- Per-block features are vectorized NumPy over frames: RMS energy,
+  voiced/unvoiced, syllable peaks and autocorrelation pitch
+- Files are analyzed in parallel and written as one metrics table (Parquet
+  when pyarrow is installed, otherwise CSV), one row per file
+
+    rows = analyze_directory("output/audio")
+    write_metrics_table(rows, "output/analytics/voice_metrics.parquet")
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import csv
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.encoding_profiles import ffmpeg_exe
+
+# Import pyarrow if available (Parquet output)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# ==================== CONFIGURATION ====================
+
+ANALYSIS_SAMPLE_RATE = int(os.getenv("AUDIO_ANALYSIS_SAMPLE_RATE", "16000"))
+
+# Energy frames (10 ms) and pitch windows (40 ms, long enough for 60 Hz)
+ENERGY_FRAME_SECONDS = 0.01
+PITCH_WINDOW_SECONDS = 0.04
+
+# Audio decoded per read; a whole number of pitch windows
+ANALYSIS_BLOCK_SECONDS = float(os.getenv("AUDIO_ANALYSIS_BLOCK_SECONDS", "30"))
+
+AUDIO_ANALYTICS_WORKERS = int(os.getenv("AUDIO_ANALYTICS_WORKERS", str(os.cpu_count() or 4)))
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".aac", ".ogg", ".flac")
+
+# Speaking pitch range and minimum autocorrelation for a pitched window
+PITCH_MIN_HZ = 60.0
+PITCH_MAX_HZ = 400.0
+PITCH_MIN_CORRELATION = 0.3
+
+# Unvoiced stretches at least this long count as pauses
+PAUSE_MIN_SECONDS = 0.25
+
+METRIC_COLUMNS = [
+    "file",
+    "duration_seconds",
+    "mean_rms",
+    "std_rms",
+    "peak_rms",
+    "voiced_ratio",
+    "pause_count",
+    "pause_seconds",
+    "mean_pause_seconds",
+    "pauses_per_minute",
+    "syllables_per_second",
+    "words",
+    "words_per_minute",
+    "mean_pitch_hz",
+    "median_pitch_hz",
+    "std_pitch_hz",
+    "pitch_range_hz",
+    "error",
+]
+
+
+# ==================== STREAMING DECODE ====================
+
+def stream_blocks(
+    path: str,
+    sample_rate: int = ANALYSIS_SAMPLE_RATE,
+    block_seconds: float = ANALYSIS_BLOCK_SECONDS,
+) -> Iterator[np.ndarray]:
+    """
+    Decode an audio file as mono float blocks in [-1, 1].
+
+    Every block but the last holds a whole number of pitch windows.
+    """
+    window = int(sample_rate * PITCH_WINDOW_SECONDS)
+    block_samples = max(1, round(block_seconds / PITCH_WINDOW_SECONDS)) * window
+    process = subprocess.Popen(
+        [ffmpeg_exe(), "-v", "error", "-i", path, "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            data = process.stdout.read(block_samples * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError(stderr.decode(errors="replace").strip() or "ffmpeg failed")
+
+
+# ==================== FEATURES ====================
+
+def frame_rms(samples: np.ndarray, frame: int) -> np.ndarray:
+    """RMS of each complete frame."""
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def window_pitch(samples: np.ndarray, sample_rate: int, window: int) -> np.ndarray:
+    """
+    Fundamental frequency of each complete window (NaN where unpitched).
+
+    Autocorrelation of all windows at once via one batched FFT; the
+    strongest lag within the speaking range gives the pitch.
+    """
+    count = len(samples) // window
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:count * window].reshape(count, window)
+    frames = frames - frames.mean(axis=1, keepdims=True)
+
+    spectrum = np.fft.rfft(frames, n=2 * window, axis=1)
+    corr = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :window]
+
+    min_lag = int(sample_rate / PITCH_MAX_HZ)
+    max_lag = min(int(sample_rate / PITCH_MIN_HZ), window - 1)
+    lags = corr[:, min_lag:max_lag + 1]
+    best = np.argmax(lags, axis=1)
+    energy = corr[:, 0]
+    strength = lags[np.arange(count), best] / np.where(energy > 0, energy, 1.0)
+
+    pitch = sample_rate / (best + min_lag).astype(np.float32)
+    pitch[(strength < PITCH_MIN_CORRELATION) | (energy <= 1e-6)] = np.nan
+    return pitch
+
+
+def voiced_mask(rms: np.ndarray) -> np.ndarray:
+    """Speech frames: above a threshold between the noise floor and loud passages."""
+    if rms.size == 0:
+        return np.zeros(0, dtype=bool)
+    floor, loud = np.percentile(rms, 10), np.percentile(rms, 95)
+    return rms > max(floor + 0.1 * (loud - floor), 1e-4)
+
+
+def pause_lengths(voiced: np.ndarray, frame_seconds: float = ENERGY_FRAME_SECONDS) -> np.ndarray:
+    """Seconds of each unvoiced run between speech (leading/trailing silence excluded)."""
+    voiced_at = np.flatnonzero(voiced)
+    if voiced_at.size < 2:
+        return np.zeros(0)
+    gaps = (np.diff(voiced_at) - 1) * frame_seconds
+    return gaps[gaps >= PAUSE_MIN_SECONDS]
+
+
+def count_syllables(rms: np.ndarray, voiced: np.ndarray) -> int:
+    """Energy peaks within speech, a proxy for syllable nuclei."""
+    if rms.size < 3:
+        return 0
+    smooth = np.convolve(rms, np.ones(5) / 5, mode="same")
+    middle = smooth[1:-1]
+    peaks = (middle > smooth[:-2]) & (middle >= smooth[2:]) & voiced[1:-1]
+    # Ignore ripples: a peak must stand above the median speech level
+    if voiced.any():
+        peaks &= middle > np.median(smooth[voiced]) * 0.5
+    return int(np.count_nonzero(peaks))
+
+
+def count_words(audio_path: str) -> Optional[int]:
+    """Words in the voiceover's script, from its word timings or a .txt transcript."""
+    try:
+        with open(f"{audio_path}.words.json") as f:
+            return len(json.load(f).get("words") or [])
+    except (OSError, ValueError):
+        pass
+    transcript = Path(audio_path).with_suffix(".txt")
+    if transcript.exists():
+        return len(transcript.read_text().split())
+    return None
+
+
+# ==================== ANALYSIS ====================
+
+def analyze_file(path: str, sample_rate: int = ANALYSIS_SAMPLE_RATE) -> Dict[str, Any]:
+    """
+    Voice metrics for one audio file (one table row).
+
+    Errors are reported in the row's "error" column instead of raised, so
+    one bad file does not stop a catalog run.
+    """
+    row: Dict[str, Any] = {column: None for column in METRIC_COLUMNS}
+    row["file"] = str(path)
+
+    frame = int(sample_rate * ENERGY_FRAME_SECONDS)
+    window = int(sample_rate * PITCH_WINDOW_SECONDS)
+    rms_blocks, pitch_blocks, samples = [], [], 0
+    try:
+        for block in stream_blocks(path, sample_rate):
+            samples += len(block)
+            rms_blocks.append(frame_rms(block, frame))
+            pitch_blocks.append(window_pitch(block, sample_rate, window))
+    except Exception as e:
+        row["error"] = str(e)
+        return row
+
+    rms = np.concatenate(rms_blocks) if rms_blocks else np.zeros(0, dtype=np.float32)
+    pitch = np.concatenate(pitch_blocks) if pitch_blocks else np.zeros(0, dtype=np.float32)
+    duration = samples / sample_rate
+    row["duration_seconds"] = round(duration, 3)
+    if rms.size == 0:
+        row["error"] = "no audio"
+        return row
+
+    voiced = voiced_mask(rms)
+    pauses = pause_lengths(voiced)
+    voiced_seconds = np.count_nonzero(voiced) * ENERGY_FRAME_SECONDS
+    minutes = duration / 60
+
+    # Pitch only where the window is mostly speech
+    per_window = window // frame
+    speech_windows = voiced[:len(pitch) * per_window].reshape(-1, per_window).mean(axis=1) > 0.5
+    pitched = pitch[speech_windows & ~np.isnan(pitch)]
+
+    row.update({
+        "mean_rms": float(rms.mean()),
+        "std_rms": float(rms.std()),
+        "peak_rms": float(rms.max()),
+        "voiced_ratio": round(voiced_seconds / duration, 4) if duration else 0.0,
+        "pause_count": int(pauses.size),
+        "pause_seconds": round(float(pauses.sum()), 3),
+        "mean_pause_seconds": round(float(pauses.mean()), 3) if pauses.size else 0.0,
+        "pauses_per_minute": round(pauses.size / minutes, 2) if minutes else 0.0,
+        "syllables_per_second": round(count_syllables(rms, voiced) / voiced_seconds, 2) if voiced_seconds else 0.0,
+    })
+    if pitched.size:
+        row.update({
+            "mean_pitch_hz": round(float(pitched.mean()), 1),
+            "median_pitch_hz": round(float(np.median(pitched)), 1),
+            "std_pitch_hz": round(float(pitched.std()), 1),
+            "pitch_range_hz": round(float(np.percentile(pitched, 90) - np.percentile(pitched, 10)), 1),
+        })
+
+    words = count_words(path)
+    if words is not None:
+        row["words"] = words
+        row["words_per_minute"] = round(words / minutes, 1) if minutes else 0.0
+    return row
+
+
+def find_audio(directory: str) -> List[str]:
+    """Audio files under a directory (recursive, sorted)."""
+    return sorted(
+        str(path) for path in Path(directory).rglob("*")
+        if path.suffix.lower() in AUDIO_EXTENSIONS and path.is_file() and not path.name.startswith(".")
+    )
+
+
+def analyze_files(paths: List[str], workers: int = AUDIO_ANALYTICS_WORKERS) -> List[Dict[str, Any]]:
+    """
+    Analyze files in parallel; rows come back in input order.
+
+    Decoding runs in ffmpeg processes and the NumPy work releases the GIL,
+    so threads keep every core busy.
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        return list(pool.map(analyze_file, paths))
+
+
+def analyze_directory(directory: str, workers: int = AUDIO_ANALYTICS_WORKERS) -> List[Dict[str, Any]]:
+    return analyze_files(find_audio(directory), workers)
+
+
+# ==================== OUTPUT ====================
+
+def write_metrics_table(rows: List[Dict[str, Any]], output_path: str) -> str:
+    """
+    Write rows as a columnar table: Parquet for a .parquet path (needs
+    pyarrow), otherwise CSV with METRIC_COLUMNS as the header.
+
+    Returns:
+        Path written
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    if output_path.endswith(".parquet"):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required for Parquet output")
+        columns = {column: [row.get(column) for row in rows] for column in METRIC_COLUMNS}
+        pq.write_table(pa.table(columns), output_path)
+        return output_path
+
+    with open(output_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=METRIC_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return output_path
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Catalog-wide mean of each numeric metric over files analyzed without error."""
+    ok = [row for row in rows if not row.get("error")]
+    summary: Dict[str, Any] = {"files": len(rows), "failed": len(rows) - len(ok)}
+    for column in METRIC_COLUMNS:
+        values = [row[column] for row in ok if isinstance(row.get(column), (int, float))]
+        if values:
+            summary[column] = round(float(np.mean(values)), 3)
+    return summary
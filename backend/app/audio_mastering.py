@@ -0,0 +1,278 @@
+"""
+Audio Mastering
+Masters each voiceover once with ffmpeg, so every render muxes the same
+finished audio instead of MoviePy decoding and re-encoding the MP3:
+- Leading/trailing silence trimmed (a short pad is kept)
+- Optional background music, ducked under the voice (sidechain compressor)
+- EBU R128 two-pass loudnorm to a platform target (-14 LUFS by default):
+  pass one measures, pass two applies a linear gain from the measurement
+- Encoded once to AAC (48 kHz) in an .m4a next to the source
+
+The mastered file is named by the source's content and the mastering
+settings, and word timings saved for the source are carried over (shifted
+by the trimmed lead-in). Renderers write video without audio and call
+mux_audio() to copy the AAC stream in.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import json
+import os
+import re
+import subprocess
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.encoding_profiles import ffmpeg_exe
+from app.render_cache import file_digest, hash_inputs
+from app.speech_timing import ALIGN_FRAME_SECONDS, ALIGN_SAMPLE_RATE, alignment_path, decode_audio, voiced_frames
+
+
+# ==================== CONFIGURATION ====================
+
+MASTERING_ENABLED = os.getenv("MASTERING_ENABLED", "true").lower() == "true"
+
+# Integrated loudness target, true-peak ceiling and loudness range
+MASTER_LOUDNESS_LUFS = float(os.getenv("MASTER_LOUDNESS_LUFS", "-14"))
+MASTER_TRUE_PEAK_DB = float(os.getenv("MASTER_TRUE_PEAK_DB", "-1.5"))
+MASTER_LOUDNESS_RANGE = float(os.getenv("MASTER_LOUDNESS_RANGE", "11"))
+
+MASTER_AUDIO_BITRATE = os.getenv("MASTER_AUDIO_BITRATE", "192k")
+MASTER_SAMPLE_RATE = 48000
+
+# Silence kept before the first and after the last word
+MASTER_SILENCE_TRIM = os.getenv("MASTER_SILENCE_TRIM", "true").lower() == "true"
+MASTER_SILENCE_PAD_SECONDS = float(os.getenv("MASTER_SILENCE_PAD_SECONDS", "0.1"))
+
+# Background music bed (looped, ducked under the voice); empty for none
+MASTER_MUSIC_PATH = os.getenv("MASTER_MUSIC_PATH", "")
+MASTER_MUSIC_GAIN_DB = float(os.getenv("MASTER_MUSIC_GAIN_DB", "-18"))
+
+MASTER_TIMEOUT = float(os.getenv("MASTER_TIMEOUT", "300"))
+
+# Bump when the filter chain changes, so old masters are not reused
+MASTER_VERSION = "1"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def music_bed(music_path: Optional[str] = None) -> Optional[str]:
+    """Music to mix under the voice (MASTER_MUSIC_PATH by default), if it exists."""
+    music_path = music_path or MASTER_MUSIC_PATH
+    return music_path if music_path and os.path.exists(music_path) else None
+
+
+def mastering_identity(music_path: Optional[str] = None) -> Dict[str, Any]:
+    """Settings that change the mastered audio (part of video cache keys)."""
+    music_path = music_bed(music_path)
+    return {
+        "enabled": MASTERING_ENABLED,
+        "version": MASTER_VERSION,
+        "loudness": MASTER_LOUDNESS_LUFS,
+        "true_peak": MASTER_TRUE_PEAK_DB,
+        "range": MASTER_LOUDNESS_RANGE,
+        "bitrate": MASTER_AUDIO_BITRATE,
+        "trim": MASTER_SILENCE_TRIM and MASTER_SILENCE_PAD_SECONDS,
+        "music": file_digest(music_path) if music_path else None,
+        "music_gain": MASTER_MUSIC_GAIN_DB if music_path else None,
+    }
+
+
+def mastered_path(src_path: str, music_path: Optional[str] = None) -> str:
+    """Cache path of the master: next to the source, named by content and settings."""
+    key = hash_inputs(source=file_digest(src_path), **mastering_identity(music_path))
+    return f"{os.path.splitext(src_path)[0]}.master-{key[:16]}.m4a"
+
+
+# ==================== ANALYSIS ====================
+
+def speech_bounds(src_path: str) -> Tuple[float, float, float]:
+    """(start, end, duration) of the speech in a file, padded; the whole file if silent."""
+    samples = decode_audio(src_path)
+    duration = len(samples) / ALIGN_SAMPLE_RATE
+    voiced = voiced_frames(samples)
+    if not MASTER_SILENCE_TRIM or not voiced.any():
+        return 0.0, duration, duration
+    voiced_at = voiced.nonzero()[0]
+    start = max(0.0, voiced_at[0] * ALIGN_FRAME_SECONDS - MASTER_SILENCE_PAD_SECONDS)
+    end = min(duration, (voiced_at[-1] + 1) * ALIGN_FRAME_SECONDS + MASTER_SILENCE_PAD_SECONDS)
+    return start, end, duration
+
+
+def _filter_graph(bounds: Tuple[float, float, float], loudnorm: str, music: bool) -> str:
+    """filter_complex from input 0 (voice) and optional input 1 (music) to [out]."""
+    start, end, duration = bounds
+    voice = "[0:a]"
+    if start > 0 or end < duration:
+        voice += f"atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS,"
+    if not music:
+        return f"{voice}{loudnorm}[out]"
+    return (
+        f"{voice}asplit=2[voice][key];"
+        f"[1:a]volume={MASTER_MUSIC_GAIN_DB}dB[music];"
+        "[music][key]sidechaincompress=threshold=0.03:ratio=8:attack=20:release=400[ducked];"
+        f"[voice][ducked]amix=inputs=2:duration=first,{loudnorm}[out]"
+    )
+
+
+def _inputs(src_path: str, music_path: Optional[str]) -> List[str]:
+    inputs = ["-i", src_path]
+    if music_path:
+        inputs += ["-stream_loop", "-1", "-i", music_path]
+    return inputs
+
+
+def _loudnorm(**measured: str) -> str:
+    options = f"loudnorm=I={MASTER_LOUDNESS_LUFS}:TP={MASTER_TRUE_PEAK_DB}:LRA={MASTER_LOUDNESS_RANGE}"
+    if not measured:
+        return options + ":print_format=json"
+    return options + (
+        f":measured_I={measured['input_i']}:measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}:measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}:linear=true"
+    )
+
+
+def measure_loudness(src_path: str, bounds: Tuple[float, float, float], music_path: Optional[str] = None) -> Dict[str, str]:
+    """Loudnorm pass one: measured loudness of the (trimmed, mixed) audio."""
+    result = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-nostats", *_inputs(src_path, music_path),
+         "-filter_complex", _filter_graph(bounds, _loudnorm(), bool(music_path)),
+         "-map", "[out]", "-f", "null", "-"],
+        capture_output=True,
+        check=True,
+        timeout=MASTER_TIMEOUT,
+    )
+    stderr = result.stderr.decode(errors="replace")
+    match = re.search(r"\{[^{}]*\"input_i\"[^{}]*\}", stderr)
+    if not match:
+        raise RuntimeError("loudnorm did not report a measurement")
+    return json.loads(match.group(0))
+
+
+# ==================== MASTERING ====================
+
+def _shift_word_timings(src_path: str, dest_path: str, offset: float, duration: float) -> None:
+    """Copy the source's word timings to the master, moved by the trimmed lead-in."""
+    try:
+        with open(alignment_path(src_path)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    data["words"] = [
+        {
+            **word,
+            "start": round(min(max(word["start"] - offset, 0.0), duration), 3),
+            "end": round(min(max(word["end"] - offset, 0.0), duration), 3),
+        }
+        for word in data.get("words") or []
+    ]
+    with open(alignment_path(dest_path), "w") as f:
+        json.dump(data, f)
+
+
+def master_voiceover(src_path: str, music_path: Optional[str] = None) -> Optional[str]:
+    """
+    Mastered AAC of a voiceover, produced on first use.
+
+    Args:
+        src_path: Voiceover from TTS
+        music_path: Background music to duck under the voice (defaults to
+            MASTER_MUSIC_PATH)
+
+    Returns:
+        Path to the .m4a master, or None if mastering is disabled or ffmpeg
+        failed (callers fall back to the source)
+    """
+    if not MASTERING_ENABLED or not src_path or not os.path.exists(src_path):
+        return None
+    requested = music_path or MASTER_MUSIC_PATH
+    music_path = music_bed(requested)
+    if requested and not music_path:
+        print(f"[audio_mastering] Music {requested} not found, mastering voice only")
+
+    try:
+        dest_path = mastered_path(src_path, music_path)
+    except OSError as e:
+        print(f"[audio_mastering] Could not read {src_path}: {e}")
+        return None
+
+    with _locks_guard:
+        lock = _locks.setdefault(dest_path, threading.Lock())
+
+    # One master per voiceover, even when several renders need it at once
+    with lock:
+        if os.path.exists(dest_path):
+            return dest_path
+
+        staging = f"{dest_path}.{uuid.uuid4().hex}.tmp.m4a"
+        try:
+            bounds = speech_bounds(src_path)
+            measured = measure_loudness(src_path, bounds, music_path)
+            subprocess.run(
+                [ffmpeg_exe(), "-y", "-v", "error", *_inputs(src_path, music_path),
+                 "-filter_complex", _filter_graph(bounds, _loudnorm(**measured), bool(music_path)),
+                 "-map", "[out]", "-ar", str(MASTER_SAMPLE_RATE),
+                 "-c:a", "aac", "-b:a", MASTER_AUDIO_BITRATE, "-movflags", "+faststart", staging],
+                capture_output=True,
+                check=True,
+                timeout=MASTER_TIMEOUT,
+            )
+            start, end, _ = bounds
+            _shift_word_timings(src_path, dest_path, start, end - start)
+            os.replace(staging, dest_path)
+            print(f"[audio_mastering] Mastered {os.path.basename(src_path)}: "
+                  f"{float(measured['input_i']):.1f} -> {MASTER_LOUDNESS_LUFS:.0f} LUFS, "
+                  f"{end - start:.1f}s{' with music' if music_path else ''}")
+            return dest_path
+        except (subprocess.SubprocessError, OSError, ValueError, KeyError, RuntimeError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            print(f"[audio_mastering] Could not master {src_path}: {e} {stderr.decode(errors='ignore')[-200:]}")
+            return None
+        finally:
+            if os.path.exists(staging):
+                os.unlink(staging)
+
+
+# ==================== MUXING ====================
+
+def mux_audio(video_path: str, audio_path: str, duration: Optional[float] = None) -> bool:
+    """
+    Copy an audio stream into a rendered (silent) video, in place.
+
+    Neither stream is re-encoded. The result lasts as long as the video
+    (or `duration`): longer audio is cut, shorter audio ends early.
+
+    Returns:
+        True on success (on failure the video is left as it was)
+    """
+    staging = f"{video_path}.{uuid.uuid4().hex}.tmp.mp4"
+    command = [ffmpeg_exe(), "-y", "-v", "error", "-i", video_path, "-i", audio_path,
+               "-map", "0:v:0", "-map", "1:a:0", "-c", "copy"]
+    if duration:
+        command += ["-t", f"{duration:.3f}"]
+    command += ["-movflags", "+faststart", staging]
+    try:
+        subprocess.run(command, capture_output=True, check=True, timeout=MASTER_TIMEOUT)
+        os.replace(staging, video_path)
+        return True
+    except (subprocess.SubprocessError, OSError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        print(f"[audio_mastering] Could not mux {audio_path}: {e} {stderr.decode(errors='ignore')[-200:]}")
+        return False
+    finally:
+        if os.path.exists(staging):
+            os.unlink(staging)
+
+
+def media_duration(path: str) -> Optional[float]:
+    """Duration of a media file from its container header."""
+    result = subprocess.run([ffmpeg_exe(), "-hide_banner", "-i", path], capture_output=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", result.stderr.decode(errors="replace"))
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
@@ -0,0 +1,149 @@
+"""
+Encoding Profiles
+Named output settings for every video exporter, so the cost of an encode
+matches where the video is going:
+- proxy:   quarter-resolution, low-fps review preview (see preview_renders)
+- draft:   small, fast preview for checking pacing and text
+- review:  540x960 veryfast render for the approval queue
+- publish: full 1080x1920 quality for approved posts
+
+Profiles map to preset, CRF, tune, threads, resolution and frame rate.
+All encodes are CPU libx264 (no GPU required) with browser-safe yuv420p
+and +faststart for streaming.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import os
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+# ==================== CONFIGURATION ====================
+
+# Default thread count for encodes (0 lets x264 pick based on cores)
+ENCODE_THREADS = int(os.getenv("ENCODE_THREADS", str(os.cpu_count() or 4)))
+
+# Profile used when an entry point is not told otherwise
+DEFAULT_ENCODING_PROFILE = os.getenv("DEFAULT_ENCODING_PROFILE", "publish")
+
+# Legacy VIDEO_QUALITY values (M03) mapped onto profiles
+QUALITY_PROFILES = {
+    "low": "draft",
+    "medium": "review",
+    "high": "publish",
+}
+
+# Reference frame size the renderers' font sizes and offsets are designed for
+BASE_WIDTH = 1080
+BASE_HEIGHT = 1920
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """Encoder and output settings for one destination."""
+
+    name: str
+    width: int
+    height: int
+    fps: int
+    preset: str
+    crf: int
+    tune: Optional[str] = None  # set per renderer via with_tune (film, animation, stillimage)
+    threads: int = ENCODE_THREADS
+    audio_bitrate: str = "128k"
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def scale(self) -> float:
+        """Factor to apply to layout values designed for 1080x1920."""
+        return self.height / BASE_HEIGHT
+
+    def with_tune(self, tune: Optional[str]) -> "EncodingProfile":
+        return replace(self, tune=tune)
+
+    def ffmpeg_params(self) -> List[str]:
+        params = ["-crf", str(self.crf), "-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+        if self.tune:
+            params += ["-tune", self.tune]
+        return params
+
+    def write_kwargs(self, audio: bool = True) -> Dict[str, Any]:
+        """Keyword arguments for MoviePy's write_videofile()."""
+        kwargs: Dict[str, Any] = {
+            "fps": self.fps,
+            "codec": "libx264",
+            "preset": self.preset,
+            "threads": self.threads,
+            "audio": audio,
+            "ffmpeg_params": self.ffmpeg_params(),
+        }
+        if audio:
+            kwargs["audio_codec"] = "aac"
+            kwargs["audio_bitrate"] = self.audio_bitrate
+        return kwargs
+
+    def cache_identity(self) -> Dict[str, Any]:
+        """Settings that change the encoded output (threads do not)."""
+        identity = asdict(self)
+        identity.pop("threads")
+        return identity
+
+
+PROFILES: Dict[str, EncodingProfile] = {
+    "proxy": EncodingProfile(
+        name="proxy", width=BASE_WIDTH // 4, height=BASE_HEIGHT // 4, fps=12,
+        preset="ultrafast", crf=30, audio_bitrate="64k",
+    ),
+    "draft": EncodingProfile(
+        name="draft", width=360, height=640, fps=15,
+        preset="ultrafast", crf=32, audio_bitrate="64k",
+    ),
+    "review": EncodingProfile(
+        name="review", width=540, height=960, fps=30,
+        preset="veryfast", crf=26, audio_bitrate="96k",
+    ),
+    "publish": EncodingProfile(
+        name="publish", width=BASE_WIDTH, height=BASE_HEIGHT, fps=30,
+        preset="medium", crf=20, audio_bitrate="192k",
+    ),
+}
+
+
+def get_profile(profile: Union[str, EncodingProfile, None] = None) -> EncodingProfile:
+    """
+    Resolve a profile by name (or VIDEO_QUALITY value).
+
+    Args:
+        profile: Profile name, legacy quality value, an EncodingProfile,
+            or None for DEFAULT_ENCODING_PROFILE
+
+    Raises:
+        ValueError for unknown names
+    """
+    if isinstance(profile, EncodingProfile):
+        return profile
+
+    name = (profile or DEFAULT_ENCODING_PROFILE).strip().lower()
+    name = QUALITY_PROFILES.get(name, name)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown encoding profile '{profile}'. Choose from: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def scaled(value: float, size: Tuple[int, int]) -> int:
+    """Scale a layout value designed for 1080x1920 to the given frame size."""
+    return int(round(value * size[1] / BASE_HEIGHT))
+
+
+def ffmpeg_exe() -> str:
+    """Path to the ffmpeg binary bundled with imageio-ffmpeg, else ffmpeg on PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
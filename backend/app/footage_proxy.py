@@ -0,0 +1,139 @@
+"""
+Footage Proxies
+Normalizes downloaded B-roll once with ffmpeg, so renders read frames that
+are already the output size instead of resizing every frame in Python:
+- Scaled to cover the output size and center-cropped (no distortion of
+  landscape or square sources)
+- Resampled to the output fps, audio dropped
+- Trimmed (or looped) to the needed duration, rounded up to whole seconds
+  so scenes of similar length share a proxy
+
+Proxies are stored in the render cache (kind "footage") keyed by source
+file, size, fps and duration, and evicted with the other cache entries.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import math
+import os
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.encoding_profiles import ffmpeg_exe
+from app.render_cache import SEGMENT_CRF, SEGMENT_PRESET, hash_inputs, render_cache
+
+
+# ==================== CONFIGURATION ====================
+
+FOOTAGE_PROXY_ENABLED = os.getenv("FOOTAGE_PROXY_ENABLED", "true").lower() == "true"
+FOOTAGE_PROXY_TIMEOUT = float(os.getenv("FOOTAGE_PROXY_TIMEOUT", "300"))
+
+# Bump when the transcode settings change, so old proxies are not reused
+PROXY_VERSION = "1"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def proxy_key(src_path: str, size: Tuple[int, int], fps: int, duration: Optional[float]) -> str:
+    """Cache key for a proxy (source identified by path, size and mtime)."""
+    stat = os.stat(src_path)
+    return hash_inputs(
+        kind="footage",
+        version=PROXY_VERSION,
+        source=os.path.realpath(src_path),
+        source_size=stat.st_size,
+        source_mtime=stat.st_mtime_ns,
+        size=list(size),
+        fps=fps,
+        duration=duration,
+    )
+
+
+def proxy_command(
+    src_path: str,
+    dest_path: str,
+    size: Tuple[int, int],
+    fps: int,
+    duration: Optional[float] = None,
+) -> list:
+    """ffmpeg arguments for a cover-scaled, center-cropped, fps-resampled proxy."""
+    width, height = size
+    command = [ffmpeg_exe(), "-y", "-v", "error"]
+    if duration:
+        # Loop short sources so the proxy always covers the duration
+        command += ["-stream_loop", "-1"]
+    command += ["-i", src_path]
+    if duration:
+        command += ["-t", f"{duration:.3f}"]
+    command += [
+        "-an",
+        "-vf", (
+            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},fps={fps},setsar=1"
+        ),
+        "-c:v", "libx264",
+        "-preset", SEGMENT_PRESET,
+        "-crf", SEGMENT_CRF,
+        "-pix_fmt", "yuv420p",
+        dest_path,
+    ]
+    return command
+
+
+def normalize_footage(
+    src_path: str,
+    size: Tuple[int, int],
+    fps: int,
+    duration: Optional[float] = None,
+) -> Optional[str]:
+    """
+    Pre-scaled proxy of a B-roll file, transcoded on first use.
+
+    Args:
+        src_path: Downloaded footage
+        size: Output (width, height)
+        fps: Output frame rate
+        duration: Seconds needed (rounded up to whole seconds); None keeps
+            the full source length
+
+    Returns:
+        Path to the proxy, or None if proxies are disabled or ffmpeg failed
+        (callers fall back to resizing the source)
+    """
+    if not FOOTAGE_PROXY_ENABLED or not src_path or not os.path.exists(src_path):
+        return None
+
+    duration = float(math.ceil(duration)) if duration else None
+    key = proxy_key(src_path, size, fps, duration)
+
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+
+    # One transcode per proxy, even when several scenes need it at once
+    with lock:
+        cached = render_cache.get(key, kind="footage")
+        if cached:
+            return cached
+
+        tmp_path = render_cache.new_temp_path("footage")
+        try:
+            subprocess.run(
+                proxy_command(src_path, tmp_path, size, fps, duration),
+                capture_output=True,
+                check=True,
+                timeout=FOOTAGE_PROXY_TIMEOUT,
+            )
+            path = render_cache.put(key, tmp_path, kind="footage", move=True)
+            print(f"[footage_proxy] Normalized {os.path.basename(src_path)} to "
+                  f"{size[0]}x{size[1]}@{fps}{f' ({duration:.0f}s)' if duration else ''}")
+            return path
+        except (subprocess.SubprocessError, OSError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            print(f"[footage_proxy] Could not normalize {src_path}: {e} {stderr.decode(errors='ignore')[-200:]}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
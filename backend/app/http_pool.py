@@ -0,0 +1,87 @@
+"""
+Shared HTTP Connection Pool
+One long-lived httpx.AsyncClient per event loop, so media downloads and API
+calls reuse TCP/TLS connections instead of opening a new client per request.
+
+A client is bound to the event loop it was created on; background jobs that
+run their own loop (asyncio.run) get their own client automatically.
+provider_slots() caps concurrent requests per API provider the same way.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import weakref
+
+import httpx
+
+
+# ==================== CONFIGURATION ====================
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the pooled client for the running event loop, creating it on first use.
+
+    Callers must not close the returned client or use it as a context manager.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the pooled client for the running event loop (app shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+# ==================== PROVIDER LIMITS ====================
+
+# Concurrent requests allowed per API provider (match the plan's quota)
+PROVIDER_CONCURRENCY = {
+    "elevenlabs": int(os.getenv("ELEVENLABS_CONCURRENCY", "3")),
+    "openai": int(os.getenv("OPENAI_CONCURRENCY", "8")),
+    "pexels": int(os.getenv("PEXELS_CONCURRENCY", "4")),
+    # Offline TTS engine processes (CPU bound)
+    "local": int(os.getenv("LOCAL_TTS_CONCURRENCY", str(os.cpu_count() or 4))),
+}
+
+_provider_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def provider_slots(provider: str) -> asyncio.Semaphore:
+    """
+    Semaphore capping concurrent requests to a provider on the running loop.
+
+        async with provider_slots("elevenlabs"):
+            response = await client.post(...)
+    """
+    slots = _provider_slots.setdefault(asyncio.get_running_loop(), {})
+    if provider not in slots:
+        slots[provider] = asyncio.Semaphore(max(1, PROVIDER_CONCURRENCY.get(provider, 4)))
+    return slots[provider]
@@ -1,125 +1,243 @@
+import asyncio
 import os
-import time
-import requests
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
 from sqlmodel import Session,  select
 from app.database import engine
-from app.models import Article
+from app.http_pool import provider_slots
+from app.media_storage import media_store
+from app.models import Article, Post
+from app.stock_footage import search_videos
+from app.tts_cache import tts_cache, tts_cache_key
+from app.tts_service import VOICE_ENERGY_PRESETS, stream_elevenlabs
+from app.tts_stream import chunk_limit
+from app.voice_selector import RECOMMENDED_VOICES
 
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 PEXELS_API_KEY = os.getenv('PEXELS_API_KEY')
 TEST_MODE = os.getenv('TEST_MODE', 'false').lower() == 'true'
 
-def generate_voice(script: str, retries=3) -> str:
-    """Generate voice using ElevenLabs Rachel voice"""
-    url = "https://api.elevenlabs.io/v1/text-to-speech/21m00Tcm4TlvDq8ikWAM"  # Rachel voice
-    headers = {
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-        "xi-api-key": ELEVENLABS_API_KEY
+# Articles per run (0 = whole backlog), articles worked on at once, and
+# finished articles written per DB commit. Requests to each provider are
+# additionally capped by app.http_pool.provider_slots.
+M02_BATCH_SIZE = int(os.getenv('M02_BATCH_SIZE', '50'))
+M02_CONCURRENCY = int(os.getenv('M02_CONCURRENCY', '5'))
+M02_COMMIT_EVERY = int(os.getenv('M02_COMMIT_EVERY', '10'))
+
+MediaResult = Tuple[int, str, Optional[str]]  # article id, voice url, B-roll url
+
+async def generate_voice(script: str, voice: Optional[str] = None, energy: Optional[str] = None, retries=3) -> str:
+    """
+    Generate voice with ElevenLabs (full script, chunked and streamed).
+
+    Uses the post's assigned voice and energy (see app.jobs.voice_assignment),
+    falling back to Rachel with default settings.
+
+    Returns a media:// reference into durable storage (app.media_storage),
+    so M03 can use the audio from any machine.
+    """
+    voice_id = RECOMMENDED_VOICES.get(voice or "rachel", RECOMMENDED_VOICES["rachel"])["id"]
+    model_id = "eleven_monolingual_v1"
+    voice_settings = {
+        "stability": 0.5,
+        "similarity_boost": 0.75
     }
-    data = {
-        "text": script[:2500],  # Limit to prevent too long audio
-        "model_id": "eleven_monolingual_v1",
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.75
+    if energy in VOICE_ENERGY_PRESETS:
+        preset = VOICE_ENERGY_PRESETS[energy]
+        voice_settings = {
+            "stability": preset["stability"],
+            "similarity_boost": preset["similarity_boost"],
+            "style": preset["style"],
+            "use_speaker_boost": preset["use_speaker_boost"]
         }
-    }
-    
+
+    # Reuse audio already synthesized for the same text and voice
+    key = tts_cache_key("elevenlabs", voice_id, script, model=model_id,
+                        settings={**voice_settings, "chunk_chars": chunk_limit("elevenlabs")})
+
+    async def synthesize(path: str):
+        return await stream_elevenlabs(script, path, voice_id, model_id, voice_settings)
+
     for attempt in range(retries):
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Save audio temporarily
-            audio_path = f"/tmp/voice_{int(time.time())}.mp3"
-            with open(audio_path, 'wb') as f:
-                f.write(response.content)
-            
-            # TODO: Upload to Railway volume or S3
-            # For now, return local path (replace with actual upload)
-            return audio_path
-            
+            with tempfile.TemporaryDirectory(prefix="m02_voice_") as tmp_dir:
+                audio_path = os.path.join(tmp_dir, "voice.mp3")
+                if not await tts_cache.fetch(key, audio_path, synthesize):
+                    raise RuntimeError("no audio returned")
+
+                # Content-addressed, atomically written, shared across machines
+                return await asyncio.to_thread(media_store.store, audio_path, "audio", True)
+
         except Exception as e:
             print(f"ElevenLabs attempt {attempt + 1} failed: {e}")
             if attempt < retries - 1:
-                time.sleep(2 ** attempt)
+                await asyncio.sleep(2 ** attempt)
             else:
                 raise
 
-def search_broll(keywords: str, retries=3) -> str:
-    """Search Pexels for relevant B-roll footage"""
-    url = "https://api.pexels.com/videos/search"
-    headers = {"Authorization": PEXELS_API_KEY}
-    params = {
-        "query": keywords,
-        "per_page": 5,
-        "orientation": "portrait",  # For 9:16 vertical videos
-        "size": "medium"
-    }
-    
+def pick_broll_link(videos: List[Dict[str, Any]]) -> Optional[str]:
+    """Best vertical video file of the top search result"""
+    if not videos:
+        return None
+
+    # Get highest quality vertical video
+    video_files = videos[0]['video_files']
+
+    # Find best vertical video file
+    for vf in video_files:
+        if (vf.get('width') or 0) <= 1080 and (vf.get('height') or 0) >= 1920:
+            return vf['link']
+
+    # Fallback to first available
+    return video_files[0]['link'] if video_files else None
+
+async def search_broll(keywords: str, retries=3) -> Optional[str]:
+    """Search Pexels for relevant B-roll footage (cached, see app.stock_footage)"""
     for attempt in range(retries):
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get('videos'):
+            # Portrait for 9:16 vertical videos
+            async with provider_slots("pexels"):
+                videos = await search_videos(keywords, orientation="portrait", size="medium")
+
+            if not videos:
                 print(f"No videos found for keywords: {keywords}")
                 return None
-            
-            # Get highest quality vertical video
-            video = data['videos'][0]
-            video_files = video['video_files']
-            
-            # Find best vertical video file
-            for vf in video_files:
-                if vf.get('width', 0) <= 1080 and vf.get('height', 0) >= 1920:
-                    return vf['link']
-            
-            # Fallback to first available
-            return video_files[0]['link']
-            
+
+            return pick_broll_link(videos)
+
         except Exception as e:
             print(f"Pexels attempt {attempt + 1} failed: {e}")
             if attempt < retries - 1:
-                time.sleep(2 ** attempt)
+                await asyncio.sleep(2 ** attempt)
             else:
                 raise
 
-def run_m02_job():
+async def produce_media(article_id: int, title: str, script: str,
+                        voice: Optional[str] = None, energy: Optional[str] = None) -> MediaResult:
+    """Voice and B-roll for one article, generated concurrently"""
+    print(f"Processing article {article_id}: {title[:50]}...")
+
+    # Extract keywords from title for B-roll search
+    keywords = " ".join(title.split()[:4])
+    voice_url, broll_url = await asyncio.gather(
+        generate_voice(script, voice, energy),
+        search_broll(keywords),
+        return_exceptions=True
+    )
+    if isinstance(voice_url, BaseException):
+        raise voice_url
+    if isinstance(broll_url, BaseException):
+        # Article will be retried; don't keep its voice referenced meanwhile
+        await asyncio.to_thread(media_store.release, voice_url)
+        raise broll_url
+    print(f"  ✅ Article {article_id}: voice generated, B-roll found ({keywords})")
+    return article_id, voice_url, broll_url
+
+def assigned_voices(session: Session, urls: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """Voice and energy chosen for each article's post, by source URL"""
+    if not urls:
+        return {}
+    rows = session.execute(
+        select(Post.source_url, Post.extra_data).where(Post.source_url.in_(urls))
+    ).all()
+    return {
+        row.source_url: ((row.extra_data or {}).get("selected_voice"), (row.extra_data or {}).get("voice_energy"))
+        for row in rows
+        if (row.extra_data or {}).get("selected_voice")
+    }
+
+def save_media(session: Session, articles: Dict[int, Article], results: List[MediaResult]) -> int:
+    """Write a batch of finished articles in one commit; returns the number saved"""
+    for article_id, voice_url, broll_url in results:
+        article = articles[article_id]
+        article.voice_url = voice_url
+        article.broll_video_url = broll_url
+
+    try:
+        session.commit()
+    except Exception as e:
+        print(f"❌ Saving articles {[r[0] for r in results]} failed: {e}")
+        session.rollback()
+        for _, voice_url, _ in results:
+            media_store.release(voice_url)
+        return 0
+
+    for article_id, _, _ in results:
+        print(f"✅ Article {article_id} media ready")
+    return len(results)
+
+async def run_m02_job(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Generate voice and B-roll for scripted articles.
+
+    Articles are processed concurrently (M02_CONCURRENCY at a time; ElevenLabs
+    and Pexels requests are capped per provider) and saved M02_COMMIT_EVERY
+    at a time.
+
+    Args:
+        batch_size: Articles to process (defaults to M02_BATCH_SIZE; 0 clears
+            the whole backlog)
+
+    Returns:
+        Counts of articles processed, saved and failed
+    """
+    if batch_size is None:
+        batch_size = M02_BATCH_SIZE
+
     with Session(engine) as session:
         # Fetch articles needing media
-        articles = session.execute(
+        query = (
             select(Article)
             .where(Article.is_test == TEST_MODE)
             .where(Article.status == "scripted")
             .where(Article.voice_url == None)
-            .limit(5)
-        ).scalars().all()
-        
+        )
+        if batch_size:
+            query = query.limit(batch_size)
+        articles = {article.id: article for article in session.execute(query).scalars().all()}
+
         print(f"Processing {len(articles)} articles for M02")
-        
-        for article in articles:
-            try:
-                print(f"Processing article {article.id}: {article.title[:50]}...")
-                
-                # Generate voice
-                article.voice_url = generate_voice(article.script)
-                print(f"  ✅ Voice generated")
-                
-                # Extract keywords from title for B-roll search
-                keywords = " ".join(article.title.split()[:4])
-                article.broll_video_url = search_broll(keywords)
-                print(f"  ✅ B-roll found: {keywords}")
-                
-                session.commit()
-                print(f"✅ Article {article.id} media ready")
-                
-            except Exception as e:
-                print(f"❌ Article {article.id} failed: {e}")
-                session.rollback()
+
+        voices = assigned_voices(session, [article.url for article in articles.values() if article.url])
+
+        # Plain values, so the workers never touch the session
+        work = [
+            (article.id, article.title, article.script or "", *voices.get(article.url, (None, None)))
+            for article in articles.values()
+        ]
+        semaphore = asyncio.Semaphore(max(1, M02_CONCURRENCY))
+
+        async def process(article_id: int, title: str, script: str,
+                          voice: Optional[str], energy: Optional[str]) -> Optional[MediaResult]:
+            async with semaphore:
+                try:
+                    return await produce_media(article_id, title, script, voice, energy)
+                except Exception as e:
+                    print(f"❌ Article {article_id} failed: {e}")
+                    return None
+
+        pending: List[MediaResult] = []
+        saved = failed = 0
+
+        for next_done in asyncio.as_completed([process(*item) for item in work]):
+            result = await next_done
+            if result is None:
+                failed += 1
                 continue
+            pending.append(result)
+            if len(pending) >= max(1, M02_COMMIT_EVERY):
+                saved_now = save_media(session, articles, pending)
+                saved += saved_now
+                failed += len(pending) - saved_now
+                pending = []
+
+        if pending:
+            saved_now = save_media(session, articles, pending)
+            saved += saved_now
+            failed += len(pending) - saved_now
+
+        print(f"M02 complete: {saved} saved, {failed} failed")
+        return {"articles_processed": len(work), "media_ready": saved, "failed": failed}
 
 if __name__ == "__main__":
-    run_m02_job()
+    asyncio.run(run_m02_job())
@@ -2,7 +2,16 @@
 M03 Video Assembly Job - Combine Voice + B-roll + Overlays
 
 Takes posts with media_ready status from M02, downloads B-roll footage,
-combines with voice audio, adds text overlays, and generates final videos.
+combines with voice audio, adds text overlays, and generates videos.
+
+By default (PREVIEW_FIRST) posts get a low-resolution proxy render for
+review; the full-quality render runs once the video is approved
+(render_final_video).
+
+Batch mode (M03_BATCH_MODE, the default) plans the whole backlog together:
+shared B-roll is downloaded once, fonts and title overlays are prepared
+up front, and the renders run concurrently in a render pool sized to the
+machine's cores and memory.
 """
 # Fix import path: ensure agents module can be found from repo root
 import sys
@@ -14,7 +23,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 import argparse  # noqa: E402
 import logging  # noqa: E402
 import asyncio  # noqa: E402
-from typing import Dict, Any, List, Optional  # noqa: E402
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union  # noqa: E402
 from pathlib import Path  # noqa: E402
 from datetime import datetime  # noqa: E402
 
@@ -30,8 +39,18 @@ try:
     from app.database import engine
     from app.models import Post, Asset
     from app import video_production
+    from app.audio_mastering import master_voiceover, media_duration, mux_audio
+    from app.encoding_profiles import PROFILES, EncodingProfile, get_profile, scaled
+    from app.footage_proxy import normalize_footage
+    from app.media_downloader import DOWNLOAD_CONCURRENCY
+    from app.media_library import media_library
+    from app.media_storage import media_store
+    from app.overlay_compositor import OverlayCompositor, OverlayLayer
+    from app.preview_renders import PREVIEW_FIRST, PREVIEW_PROFILE, attach_preview, publish_preview
+    from app.render_executor import pool_size_for, render_executor, render_logger, report
+    from app.text_utils import load_bold_font
+    from PIL import Image, ImageDraw
     from sqlmodel import Session, select
-    import httpx
 except ImportError as e:
     logger.error(f"Failed to import backend modules: {e}")
     logger.error("Make sure PYTHONPATH includes the backend directory")
@@ -51,23 +70,37 @@ VIDEO_PATH.mkdir(parents=True, exist_ok=True)
 BROLL_PATH.mkdir(parents=True, exist_ok=True)
 TEMP_PATH.mkdir(parents=True, exist_ok=True)
 
-# Video settings
-VIDEO_QUALITY = os.getenv("VIDEO_QUALITY", "medium")  # low, medium, high
-VIDEO_FPS = int(os.getenv("VIDEO_FPS", "30"))
+# Video settings: low/medium/high map to the draft/review/publish encoding
+# profiles (a profile name works too). Assembled videos are final, so the
+# default is full quality.
+VIDEO_QUALITY = os.getenv("VIDEO_QUALITY", "high")
+
+# Batch mode: render all pending posts in one run (M03_BATCH_LIMIT caps the
+# batch, 0 = whole backlog); false processes --max-posts one after another
+M03_BATCH_MODE = os.getenv("M03_BATCH_MODE", "true").lower() == "true"
+M03_BATCH_LIMIT = int(os.getenv("M03_BATCH_LIMIT", "0"))
+
+MAX_BROLL_PER_POST = 3
+
+# Title caption (values for 1080x1920, scaled to the profile)
+TITLE_FONT_SIZE = 60
+TITLE_BOX_WIDTH = 1000
+TITLE_TOP = 100
+TITLE_SECONDS = 5
 
 
 # ==================== HELPER FUNCTIONS ====================
 
 async def fetch_media_ready_posts(
     session: Session,
-    limit: int = 10
+    limit: Optional[int] = 10
 ) -> List[Post]:
     """
     Fetch posts with media_ready status (ready for video assembly).
 
     Args:
         session: Database session
-        limit: Max number of posts to process
+        limit: Max number of posts to process (None or 0 for all)
 
     Returns:
         List of Post objects
@@ -77,8 +110,9 @@ async def fetch_media_ready_posts(
             select(Post)
             .where(Post.status == "media_ready")
             .order_by(Post.created_at.desc())
-            .limit(limit)
         )
+        if limit:
+            stmt = stmt.limit(limit)
 
         posts = session.exec(stmt).all()
         logger.info(f"Found {len(posts)} posts ready for video assembly")
@@ -97,6 +131,10 @@ async def download_broll_video(
     """
     Download B-roll video from Pexels URL.
 
+    Served from the local media library when the clip (or the same Pexels
+    video in another rendition) was downloaded before; otherwise streamed to
+    disk and added to the library.
+
     Args:
         video_url: Pexels video URL
         post_id: Post ID for file naming
@@ -108,25 +146,15 @@ async def download_broll_video(
     try:
         logger.info(f"Downloading B-roll video {index} for post {post_id}")
 
-        # Download video
-        async with httpx.AsyncClient() as client:
-            response = await client.get(video_url, timeout=120.0, follow_redirects=True)
-            response.raise_for_status()
-
-        # Save to file
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"broll_post{post_id}_idx{index}_{timestamp}.mp4"
-        file_path = BROLL_PATH / filename
+        file_path = await media_library.fetch(video_url)
 
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        if not file_path:
+            logger.error(f"Failed to download B-roll video {index} for post {post_id}")
+            return None
 
-        logger.info(f"Downloaded B-roll video: {file_path} ({len(response.content) / 1024:.1f} KB)")
-        return str(file_path)
+        logger.info(f"Downloaded B-roll video: {file_path} ({os.path.getsize(file_path) / 1024:.1f} KB)")
+        return file_path
 
-    except httpx.HTTPError as e:
-        logger.error(f"HTTP error downloading B-roll video: {e}")
-        return None
     except Exception as e:
         logger.error(f"Error downloading B-roll video: {e}")
         import traceback
@@ -134,9 +162,117 @@ async def download_broll_video(
         return None
 
 
+def load_post_media(session: Session, posts: List[Post]) -> Dict[int, Dict[str, Any]]:
+    """
+    Voice file and B-roll URLs of several posts (one query in total).
+
+    Returns:
+        post_id -> {"voice_path": str or None, "broll_urls": [str, ...]}
+    """
+    media: Dict[int, Dict[str, Any]] = {post.id: {"voice_path": None, "broll_urls": []} for post in posts}
+    if not media:
+        return media
+
+    assets = session.exec(
+        select(Asset)
+        .where(Asset.post_id.in_(list(media)), Asset.type.in_(["audio", "broll_meta"]))
+        .order_by(Asset.id)
+    ).all()
+
+    voice_assets: Dict[int, str] = {}
+    for asset in assets:
+        if asset.type == "audio":
+            voice_assets.setdefault(asset.post_id, asset.path)
+        elif len(media[asset.post_id]["broll_urls"]) < MAX_BROLL_PER_POST:
+            # B-roll URL stored in path field
+            media[asset.post_id]["broll_urls"].append(asset.path)
+
+    for post_id, entry in media.items():
+        voice_ref = voice_assets.get(post_id)
+        # Local paths, or media:// references fetched from durable storage
+        voice_path = media_store.resolve(voice_ref)
+        if not voice_ref:
+            logger.warning(f"No voice asset found for post {post_id}")
+        elif not voice_path:
+            logger.warning(f"Voice file not found: {voice_ref}")
+        else:
+            entry["voice_path"] = voice_path
+            logger.info(f"Voice file: {voice_path}")
+    return media
+
+
+async def download_broll_batch(requests: List[Tuple[str, int]]) -> Dict[str, Optional[str]]:
+    """
+    Download B-roll for one or more posts, each distinct URL once.
+
+    Args:
+        requests: (video_url, post_id) pairs; posts sharing footage share
+            the download
+
+    Returns:
+        video_url -> local path (None if the download failed)
+    """
+    first_post: Dict[str, int] = {}
+    for url, post_id in requests:
+        first_post.setdefault(url, post_id)
+
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+    async def _download(i: int, url: str, post_id: int) -> Tuple[str, Optional[str]]:
+        async with semaphore:
+            return url, await download_broll_video(url, post_id, i)
+
+    if len(first_post) < len(requests):
+        logger.info(f"Downloading {len(first_post)} distinct B-roll videos for {len(requests)} uses")
+    downloaded = await asyncio.gather(*(
+        _download(i, url, post_id) for i, (url, post_id) in enumerate(first_post.items())
+    ))
+    return dict(downloaded)
+
+
+def build_title_layer(title: str, encoding: EncodingProfile) -> Optional[OverlayLayer]:
+    """
+    Title caption for the top of the video (white on black, first seconds).
+
+    Rasterized with PIL (no ImageMagick needed); the font is opened once
+    per size and process.
+    """
+    size = encoding.size
+    font = load_bold_font(scaled(TITLE_FONT_SIZE, size))
+    box_width = scaled(TITLE_BOX_WIDTH, size)
+    padding = scaled(10, size)
+    draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+    # Wrap the (length-limited) title to the caption width
+    lines: List[str] = []
+    for word in title[:50].split():
+        candidate = f"{lines[-1]} {word}" if lines else word
+        if lines and draw.textbbox((0, 0), candidate, font=font)[2] <= box_width - 2 * padding:
+            lines[-1] = candidate
+        else:
+            lines.append(word)
+    if not lines:
+        return None
+
+    line_height = draw.textbbox((0, 0), "Ag", font=font)[3]
+    img = Image.new("RGBA", (box_width, len(lines) * line_height + 2 * padding), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        line_width = draw.textbbox((0, 0), line, font=font)[2]
+        draw.text(((box_width - line_width) // 2, padding + i * line_height), line, font=font, fill="white")
+
+    return OverlayLayer.from_image(
+        img,
+        x=(size[0] - box_width) // 2,
+        y=scaled(TITLE_TOP, size),
+        end=TITLE_SECONDS,
+    )
+
+
 async def assemble_video_for_post(
     session: Session,
-    post: Post
+    post: Post,
+    profile: Union[str, EncodingProfile, None] = None
 ) -> Optional[str]:
     """
     Assemble final video for a post using voice + B-roll + overlays.
@@ -144,80 +280,24 @@ async def assemble_video_for_post(
     Args:
         session: Database session
         post: Post object with media assets
+        profile: Encoding profile (defaults to VIDEO_QUALITY)
 
     Returns:
         Path to assembled video file, or None if failed
     """
     try:
-        logger.info(f"Assembling video for post {post.id}: {post.title}")
-
-        # 1. Get voice asset
-        voice_asset_stmt = select(Asset).where(
-            Asset.post_id == post.id,
-            Asset.type == "audio"
-        ).limit(1)
-        voice_asset = session.exec(voice_asset_stmt).first()
-
-        if not voice_asset:
-            logger.warning(f"No voice asset found for post {post.id}")
-            voice_path = None
-        else:
-            voice_path = voice_asset.path
-            if not os.path.exists(voice_path):
-                logger.warning(f"Voice file not found: {voice_path}")
-                voice_path = None
-            else:
-                logger.info(f"Voice file: {voice_path}")
-
-        # 2. Get B-roll assets
-        broll_assets_stmt = select(Asset).where(
-            Asset.post_id == post.id,
-            Asset.type == "broll_meta"
-        )
-        broll_assets = session.exec(broll_assets_stmt).all()
+        encoding = get_profile(profile or VIDEO_QUALITY)
+        logger.info(f"Assembling video for post {post.id}: {post.title} ({encoding.name} profile)")
 
-        # Download B-roll videos
-        broll_paths = []
-        for i, broll_asset in enumerate(broll_assets[:3]):  # Max 3 B-rolls
-            broll_url = broll_asset.path  # URL stored in path field
-            broll_path = await download_broll_video(broll_url, post.id, i)
-            if broll_path:
-                broll_paths.append(broll_path)
+        # 1-2. Voice asset and B-roll videos (downloaded concurrently)
+        media = load_post_media(session, [post])[post.id]
+        downloaded = await download_broll_batch([(url, post.id) for url in media["broll_urls"]])
+        broll_paths = [downloaded[url] for url in media["broll_urls"] if downloaded.get(url)]
 
         logger.info(f"Downloaded {len(broll_paths)} B-roll videos for post {post.id}")
 
-        # 3. Determine video generation strategy
-        # Check if MoviePy is available
-        try:
-            from moviepy.editor import VideoFileClip  # noqa: F401
-            moviepy_available = True
-        except ImportError:
-            moviepy_available = False
-            logger.warning("MoviePy not available - will use simplified video generation")
-
-        # 4. Generate video
-        if moviepy_available and broll_paths:
-            # Full video assembly with MoviePy
-            result = await _assemble_with_moviepy(
-                post=post,
-                voice_path=voice_path,
-                broll_paths=broll_paths
-            )
-        else:
-            # Simplified approach: Use existing video_production module
-            result = await video_production.generate_video_from_script(
-                script=post.body,
-                title=post.title,
-                add_voiceover=(voice_path is not None)
-            )
-
-        if not result.get("success"):
-            logger.error(f"Video generation failed for post {post.id}: {result.get('error')}")
-            return None
-
-        video_path = result.get("video_path")
-        logger.info(f"✅ Video assembled successfully: {video_path}")
-        return video_path
+        # 3-4. Generate video
+        return await _render_post(post, media["voice_path"], broll_paths, encoding, _moviepy_available())
 
     except Exception as e:
         logger.error(f"Error assembling video for post {post.id}: {e}")
@@ -226,49 +306,135 @@ async def assemble_video_for_post(
         return None
 
 
+def _moviepy_available() -> bool:
+    try:
+        from moviepy.editor import VideoFileClip  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("MoviePy not available - will use simplified video generation")
+        return False
+
+
+async def _render_post(
+    post: Post,
+    voice_path: Optional[str],
+    broll_paths: List[str],
+    encoding: EncodingProfile,
+    moviepy_available: bool,
+    title_layer: Optional[OverlayLayer] = None
+) -> Optional[str]:
+    """
+    Render one post's video from its downloaded media.
+
+    Returns:
+        Path to the video, or None if rendering failed
+    """
+    if moviepy_available and broll_paths:
+        # Full video assembly with MoviePy
+        result = await _assemble_with_moviepy(
+            post=post,
+            voice_path=voice_path,
+            broll_paths=broll_paths,
+            profile=encoding,
+            title_layer=title_layer
+        )
+    else:
+        # Simplified approach: Use existing video_production module
+        result = await video_production.generate_video_from_script(
+            script=post.body,
+            title=post.title,
+            add_voiceover=(voice_path is not None),
+            profile=encoding
+        )
+
+    if not result.get("success"):
+        logger.error(f"Video generation failed for post {post.id}: {result.get('error')}")
+        return None
+
+    video_path = result.get("video_path")
+    logger.info(f"✅ Video assembled successfully: {video_path}")
+    return video_path
+
+
 async def _assemble_with_moviepy(
     post: Post,
     voice_path: Optional[str],
-    broll_paths: List[str]
+    broll_paths: List[str],
+    profile: Union[str, EncodingProfile, None] = None,
+    title_layer: Optional[OverlayLayer] = None
 ) -> Dict[str, Any]:
     """
     Assemble video using MoviePy with B-roll footage.
 
+    The composition and encode run in the render process pool
+    (render_executor), off the job's event loop.
+
     Args:
         post: Post object
         voice_path: Path to voice audio file
         broll_paths: List of B-roll video file paths
+        profile: Encoding profile (resolution, fps and encoder settings)
+        title_layer: Pre-rendered title overlay (built in the render
+            process if not given)
 
     Returns:
         Dict with success status and video path
     """
+    return await render_executor.run(
+        _render_broll_video,
+        post_id=post.id,
+        title=post.title,
+        target_duration=post.video_duration or 20,
+        voice_path=voice_path,
+        broll_paths=broll_paths,
+        profile=get_profile(profile or VIDEO_QUALITY),
+        title_layer=title_layer,
+    )
+
+
+def _render_broll_video(
+    post_id: int,
+    title: str,
+    target_duration: float,
+    voice_path: Optional[str],
+    broll_paths: List[str],
+    profile: EncodingProfile,
+    title_layer: Optional[OverlayLayer] = None,
+) -> Dict[str, Any]:
+    """Render body of _assemble_with_moviepy (runs in a render process)."""
     try:
         from moviepy.editor import (
-            VideoFileClip, AudioFileClip, CompositeVideoClip,
-            concatenate_videoclips, ColorClip, TextClip
+            VideoFileClip, concatenate_videoclips, ColorClip
         )
         from moviepy.video.fx.all import resize, fadein, fadeout
 
-        logger.info("Assembling video with MoviePy")
+        # Live-action B-roll
+        encoding = profile.with_tune("film")
+        width, height = encoding.size
 
-        # Target duration (based on script or default 20s)
-        target_duration = post.video_duration or 20
+        logger.info("Assembling video with MoviePy")
 
         # 1. Load and prepare B-roll clips
         broll_clips = []
         for broll_path in broll_paths:
             try:
-                clip = VideoFileClip(broll_path)
+                # Pre-scaled 9:16 proxy at the profile size and fps (cached)
+                proxy_path = normalize_footage(
+                    broll_path, encoding.size, encoding.fps, target_duration / len(broll_paths)
+                )
+                clip = VideoFileClip(proxy_path or broll_path)
 
-                # Resize to 9:16 aspect ratio (1080x1920)
-                clip = resize(clip, height=1920)
+                if not proxy_path:
+                    # Resize to 9:16 aspect ratio (profile size, 1080x1920 for publish)
+                    clip = resize(clip, height=height)
 
-                # Crop to center if needed
-                if clip.w > 1080:
-                    x_center = clip.w // 2
-                    clip = clip.crop(x1=x_center - 540, x2=x_center + 540)
+                    # Crop to center if needed
+                    if clip.w > width:
+                        x_center = clip.w // 2
+                        clip = clip.crop(x1=x_center - width // 2, x2=x_center + width // 2)
 
                 broll_clips.append(clip)
+                report("footage", len(broll_clips) / len(broll_paths))
             except Exception as e:
                 logger.warning(f"Failed to load B-roll {broll_path}: {e}")
                 continue
@@ -276,7 +442,7 @@ async def _assemble_with_moviepy(
         if not broll_clips:
             logger.warning("No valid B-roll clips, using color background")
             # Create black background
-            bg_clip = ColorClip(size=(1080, 1920), color=(0, 0, 0), duration=target_duration)
+            bg_clip = ColorClip(size=(width, height), color=(0, 0, 0), duration=target_duration)
             broll_clips = [bg_clip]
 
         # 2. Create base video from B-roll
@@ -298,65 +464,45 @@ async def _assemble_with_moviepy(
         # Concatenate B-roll clips
         base_video = concatenate_videoclips(final_clips, method="compose")
 
-        # 3. Add voice audio if available
+        # 3. Master voice audio (loudness, silence trim; once per voiceover)
         if voice_path and os.path.exists(voice_path):
-            try:
-                audio_clip = AudioFileClip(voice_path)
-                # Match audio duration to video
-                if audio_clip.duration < base_video.duration:
-                    # Video longer than audio - trim video
-                    base_video = base_video.subclip(0, audio_clip.duration)
-                elif audio_clip.duration > base_video.duration:
-                    # Audio longer than video - trim audio
-                    audio_clip = audio_clip.subclip(0, base_video.duration)
-
-                base_video = base_video.set_audio(audio_clip)
-                logger.info("Voice audio added to video")
-            except Exception as e:
-                logger.warning(f"Failed to add voice audio: {e}")
+            voice_path = master_voiceover(voice_path) or voice_path
+            voice_duration = media_duration(voice_path)
+            if voice_duration and voice_duration < base_video.duration:
+                # Video longer than audio - trim video
+                base_video = base_video.subclip(0, voice_duration)
+        else:
+            voice_path = None
 
         # 4. Add text overlays (title at top)
         try:
-            # Create title overlay
-            title_text = post.title[:50]  # Limit length
-
-            # Use TextClip if available, otherwise skip
-            try:
-                title_clip = TextClip(
-                    title_text,
-                    fontsize=60,
-                    color='white',
-                    bg_color='black',
-                    size=(1000, None),
-                    method='caption'
-                ).set_position(('center', 100)).set_duration(min(5, base_video.duration))
-
-                # Composite video with title
-                final_video = CompositeVideoClip([base_video, title_clip])
-            except Exception as e:
-                logger.warning(f"TextClip not available or failed: {e}")
-                final_video = base_video
+            if title_layer is None:
+                title_layer = build_title_layer(title, encoding)
+            final_video = OverlayCompositor(encoding.size, layers=[title_layer]).apply(base_video)
         except Exception as e:
             logger.warning(f"Failed to add text overlay: {e}")
             final_video = base_video
 
         # 5. Export video
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"video_post{post.id}_{timestamp}.mp4"
+        filename = f"video_post{post_id}_{timestamp}.mp4"
         output_path = VIDEO_PATH / filename
 
         logger.info(f"Exporting video to: {output_path}")
 
         final_video.write_videofile(
             str(output_path),
-            fps=VIDEO_FPS,
-            codec='libx264',
-            preset='medium',
-            threads=4,
-            audio=True,
-            logger='bar'
+            logger=render_logger(),
+            **encoding.write_kwargs(audio=False)
         )
 
+        # 6. Mux the voice in as is (audio longer than the video is cut)
+        if voice_path:
+            if mux_audio(str(output_path), voice_path, final_video.duration):
+                logger.info("Voice audio added to video")
+            else:
+                logger.warning("Failed to add voice audio")
+
         # Clean up
         final_video.close()
         for clip in broll_clips:
@@ -382,21 +528,174 @@ async def _assemble_with_moviepy(
 
 # ==================== MAIN JOB ====================
 
+async def render_final_video(
+    post_id: int,
+    profile: Optional[str] = None
+) -> Optional[str]:
+    """
+    Full-quality render for an approved post (deferred from M03 previews).
+
+    Args:
+        post_id: Post to render
+        profile: Encoding profile (defaults to VIDEO_QUALITY)
+
+    Returns:
+        Path to the final video, or None if failed
+    """
+    with Session(engine) as session:
+        post = session.get(Post, post_id)
+        if not post:
+            logger.error(f"Post {post_id} not found for final render")
+            return None
+
+        video_path = await assemble_video_for_post(session, post, profile=profile)
+
+        if video_path:
+            session.add(Asset(post_id=post.id, type="video", path=video_path))
+            post.status = "approved"
+            logger.info(f"✅ Final video rendered for post {post.id}")
+        else:
+            post.status = "video_failed"
+            logger.error(f"❌ Final render failed for post {post.id}")
+        post.updated_at = datetime.utcnow()
+        session.add(post)
+        session.commit()
+        return video_path
+
+
+def _record_video(
+    session: Session,
+    post: Post,
+    video_path: Optional[str],
+    profile: Optional[str],
+    preview: bool
+) -> bool:
+    """
+    Store a post's render result: video (or review preview) asset and status.
+
+    Returns:
+        True if the post got a video
+    """
+    if video_path and preview:
+        # Proxy for review; final render waits for approval
+        attach_preview(post, publish_preview(post.id, video_path, get_profile(profile).name))
+    elif video_path:
+        # Create video asset
+        video_asset = Asset(
+            post_id=post.id,
+            type="video",
+            path=video_path
+        )
+        session.add(video_asset)
+
+    # Update post status (ready for M04 review, or failed)
+    post.status = "ready_for_review" if video_path else "video_failed"
+    post.updated_at = datetime.utcnow()
+    session.add(post)
+    session.commit()
+
+    if video_path:
+        logger.info(f"✅ Video created for post {post.id}")
+    else:
+        logger.error(f"❌ Video creation failed for post {post.id}")
+    return bool(video_path)
+
+
+async def assemble_batch(
+    session: Session,
+    posts: List[Post],
+    profile: Union[str, EncodingProfile, None] = None,
+    on_rendered: Optional[Callable[[Post, Optional[str]], None]] = None
+) -> List[Optional[str]]:
+    """
+    Render several posts together, sharing their resources.
+
+    - One asset query and one download per distinct B-roll URL for the batch
+    - Title font opened and title overlays rasterized once, up front
+    - Renders run concurrently in the render pool, sized to the batch and
+      to the machine's cores and memory (pool_size_for)
+
+    Args:
+        session: Database session
+        posts: Posts to render
+        profile: Encoding profile (defaults to VIDEO_QUALITY)
+        on_rendered: Called with each post and its video path (or None) as
+            soon as that render finishes, so results are saved even if the
+            run is stopped before the batch completes
+
+    Returns:
+        Video path (or None if failed) per post, in order
+    """
+    encoding = get_profile(profile or VIDEO_QUALITY)
+    logger.info(f"Planning batch of {len(posts)} posts ({encoding.name} profile)")
+
+    # 1. Media for the whole batch, shared footage downloaded once
+    media = load_post_media(session, posts)
+    downloaded = await download_broll_batch([
+        (url, post.id) for post in posts for url in media[post.id]["broll_urls"]
+    ])
+
+    # 2. Pre-warm: MoviePy import, fonts and title overlays
+    moviepy_available = _moviepy_available()
+    titles = {post.id: build_title_layer(post.title, encoding) for post in posts}
+
+    # 3. Render pool sized to the batch, cores and memory (0 keeps inline renders)
+    workers = pool_size_for(len(posts))
+    if render_executor.max_workers > 0 and workers != render_executor.max_workers:
+        render_executor.resize(workers)
+        logger.info(f"Render pool resized to {workers} processes")
+
+    async def _render(post: Post) -> Optional[str]:
+        entry = media[post.id]
+        broll_paths = [downloaded[url] for url in entry["broll_urls"] if downloaded.get(url)]
+        logger.info(f"Rendering post {post.id}: {post.title} ({len(broll_paths)} B-roll videos)")
+        try:
+            video_path = await _render_post(
+                post, entry["voice_path"], broll_paths, encoding, moviepy_available, title_layer=titles[post.id]
+            )
+        except Exception as e:
+            logger.error(f"Error assembling video for post {post.id}: {e}")
+            video_path = None
+        if on_rendered:
+            on_rendered(post, video_path)
+        return video_path
+
+    return list(await asyncio.gather(*(_render(post) for post in posts)))
+
+
 async def run_m03_video_assembly(
-    max_posts: int = 5
+    max_posts: Optional[int] = None,
+    profile: Optional[str] = None,
+    preview: bool = PREVIEW_FIRST,
+    batch: bool = M03_BATCH_MODE
 ) -> Dict[str, Any]:
     """
     Main M03 job: Assemble videos from media-ready posts.
 
     Args:
-        max_posts: Maximum number of posts to process
+        max_posts: Maximum number of posts to process (defaults to
+            M03_BATCH_LIMIT in batch mode, where 0 is the whole backlog,
+            and 5 otherwise)
+        profile: Encoding profile (defaults to PREVIEW_PROFILE when
+            previewing, VIDEO_QUALITY otherwise)
+        preview: Render review proxies (poster + sprite strip) instead of
+            final videos
+        batch: Render all posts together (assemble_batch) instead of one
+            after another
 
     Returns:
         Job results summary
     """
+    if preview:
+        profile = profile or PREVIEW_PROFILE
+    if max_posts is None:
+        max_posts = M03_BATCH_LIMIT if batch else 5
+
     logger.info("=" * 60)
     logger.info("M03 Video Assembly - Starting")
-    logger.info(f"Max posts: {max_posts}")
+    logger.info(f"Max posts: {max_posts or 'all'}{' (batch)' if batch else ''}")
+    logger.info(f"Encoding profile: {get_profile(profile or VIDEO_QUALITY).name}"
+                f"{' (review preview)' if preview else ''}")
     logger.info("=" * 60)
 
     posts_processed = 0
@@ -420,40 +719,22 @@ async def run_m03_video_assembly(
                     "message": "No posts to process"
                 }
 
-            # 2. Assemble video for each post
-            for post in posts:
-                logger.info(f"Processing post {post.id}: {post.title}")
+            # 2. Assemble videos (whole batch at once, or one post at a time),
+            # committing each result as soon as its render finishes
+            def record(post: Post, video_path: Optional[str]) -> None:
+                nonlocal posts_processed, videos_created
                 posts_processed += 1
-
-                # Assemble video
-                video_path = await assemble_video_for_post(session, post)
-
-                if video_path:
-                    # Create video asset
-                    video_asset = Asset(
-                        post_id=post.id,
-                        type="video",
-                        path=video_path
-                    )
-                    session.add(video_asset)
-
-                    # Update post status
-                    post.status = "ready_for_review"  # Ready for M04 review
-                    post.updated_at = datetime.utcnow()
-                    session.add(post)
-                    session.commit()
-
+                if _record_video(session, post, video_path, profile, preview):
                     videos_created += 1
-                    logger.info(f"✅ Video created for post {post.id}")
                 else:
-                    # Mark post as failed
-                    post.status = "video_failed"
-                    post.updated_at = datetime.utcnow()
-                    session.add(post)
-                    session.commit()
-
                     errors.append(f"Failed to create video for post {post.id}")
-                    logger.error(f"❌ Video creation failed for post {post.id}")
+
+            if batch:
+                await assemble_batch(session, posts, profile=profile, on_rendered=record)
+            else:
+                for post in posts:
+                    logger.info(f"Processing post {post.id}: {post.title}")
+                    record(post, await assemble_video_for_post(session, post, profile=profile))
 
             # Summary
             logger.info("=" * 60)
@@ -491,8 +772,24 @@ def main() -> int:
     parser.add_argument(
         "--max-posts",
         type=int,
-        default=5,
-        help="Maximum number of posts to process"
+        default=None,
+        help="Maximum number of posts to process (default: whole backlog in batch mode, 5 otherwise)"
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Render posts one after another instead of as one batch"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=None,
+        help="Encoding profile (defaults to PREVIEW_PROFILE, or VIDEO_QUALITY with --full)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Render final videos now instead of review previews"
     )
     args = parser.parse_args()
 
@@ -507,7 +804,10 @@ def main() -> int:
 
         # Run async job
         result = asyncio.run(run_m03_video_assembly(
-            max_posts=args.max_posts
+            max_posts=args.max_posts,
+            profile=args.profile,
+            preview=PREVIEW_FIRST and not args.full,
+            batch=M03_BATCH_MODE and not args.sequential
         ))
 
         if result["status"] == "failed":
@@ -0,0 +1,243 @@
+"""
+Voice Assignment Job - Pick a voice for every pending video post
+
+Analyzes each pending video post's script (memoized per post, see
+voice_selector.analyze_post), chooses the top-ranked voice and an energy
+for its style, and writes them to Post.extra_data in one bulk UPDATE.
+Voices picked by hand (/api/voice/select) are kept.
+
+Approved posts then get their voiceover synthesized concurrently through
+tts_service and stored as an "audio" asset, so M03 renders never wait on
+TTS. Drafts are only assigned a voice: paid synthesis is for content that
+ships.
+"""
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app import tts_service, voice_selector
+from app.database import engine
+from app.media_storage import media_store
+from app.models import Article, Asset, Post
+from app.video_production import parse_script_with_timing
+
+# Video posts that have not been rendered yet
+PENDING_VIDEO_STATUSES = ["draft", "approved", "video_production", "media_ready"]
+
+# Approved posts, whose voiceovers are synthesized ahead of M03
+PRESYNTHESIZE_STATUSES = ["approved", "video_production", "media_ready"]
+
+VOICE_PRESYNTHESIS_ENABLED = os.getenv('VOICE_PRESYNTHESIS_ENABLED', 'true').lower() == 'true'
+VOICE_ASSIGN_CONCURRENCY = int(os.getenv('VOICE_ASSIGN_CONCURRENCY', '5'))
+
+# Delivery for each detected script style
+STYLE_ENERGY = {
+    "news-anchor": "professional",
+    "business-professional": "professional",
+    "tech-narrator": "energetic",
+    "neutral-narrator": "professional",
+}
+
+Assignment = Tuple[str, str]  # voice key, energy
+
+
+def choose_voice(analysis: Dict[str, Any]) -> Assignment:
+    """Top-ranked voice and the energy for the script's style"""
+    voice = analysis["recommended_voices"][0]["key"]
+    energy = STYLE_ENERGY.get(analysis["style_analysis"]["style"], tts_service.DEFAULT_ENERGY)
+    return voice, energy
+
+
+def _assignment(extra_data: Dict[str, Any]) -> Assignment:
+    return extra_data["selected_voice"], extra_data.get("voice_energy") or tts_service.DEFAULT_ENERGY
+
+
+def assign_voices(
+    session: Session, posts: List[Any], reassign: bool = False
+) -> Tuple[Dict[int, Assignment], int]:
+    """
+    Choose voices for posts and save them with a single bulk UPDATE.
+
+    Only posts whose analysis or voice changed are written. Their extra_data
+    is re-read (row-locked) at write time and the changes merged into it, so
+    keys written while the job ran are kept, and a voice picked by hand in
+    the meantime wins over the automatic choice.
+
+    Args:
+        session: Database session
+        posts: Snapshot rows (id, title, body, extra_data), not ORM instances
+        reassign: Replace voices that were already chosen
+
+    Returns:
+        (post id -> (voice, energy) for every post, number of voices assigned)
+    """
+    assignments: Dict[int, Assignment] = {}
+    changes: Dict[int, Dict[str, Any]] = {}
+    known_voices: Dict[int, Optional[str]] = {}
+    for post in posts:
+        known_voices[post.id] = post.extra_data.get("selected_voice")
+        cached = post.extra_data.get("voice_analysis")
+        analysis = voice_selector.analyze_post(post)  # memoized in post.extra_data
+        change: Dict[str, Any] = {}
+        if analysis is not cached:
+            change["voice_analysis"] = analysis
+        if reassign or "selected_voice" not in post.extra_data:
+            voice, energy = choose_voice(analysis)
+            change.update(selected_voice=voice, voice_energy=energy, voice_assigned_by="auto")
+        if change:
+            changes[post.id] = change
+        assignments[post.id] = _assignment({**post.extra_data, **change})
+
+    if not changes:
+        return assignments, 0
+
+    current = dict(session.execute(
+        select(Post.id, Post.extra_data).where(Post.id.in_(list(changes))).with_for_update()
+    ).all())
+    updates = []
+    assigned = 0
+    for post_id, change in changes.items():
+        if post_id not in current:
+            continue  # deleted meanwhile
+        extra_data = dict(current[post_id] or {})
+        if "selected_voice" in change:
+            if extra_data.get("selected_voice") != known_voices[post_id]:
+                # Voice chosen since the snapshot was read
+                change = {"voice_analysis": change["voice_analysis"]} if "voice_analysis" in change else {}
+            else:
+                assigned += 1
+        if not change:
+            assignments[post_id] = _assignment(extra_data)
+            continue
+        extra_data.update(change)
+        assignments[post_id] = _assignment(extra_data)
+        updates.append({"id": post_id, "extra_data": extra_data})
+
+    if updates:
+        session.execute(update(Post), updates)
+    session.commit()
+    return assignments, assigned
+
+
+def narration_script(post: Any, article_script: Optional[str] = None) -> str:
+    """
+    Text a post's video narrates: the script M02 voices for its article,
+    else the post body with scene labels removed, as video_production reads
+    it. (voice_selector.post_narration is a shortened sample for analysis.)
+    """
+    if article_script:
+        return article_script
+    body = post.body or ""
+    scenes = parse_script_with_timing(body)
+    return " ".join(scene.get("text", "") for scene in scenes) if scenes else body
+
+
+def article_scripts(session: Session, urls: List[str]) -> Dict[str, str]:
+    """M02 script for each source URL that has one"""
+    if not urls:
+        return {}
+    rows = session.execute(
+        select(Article.url, Article.script).where(Article.url.in_(urls)).where(Article.script != None)
+    ).all()
+    return {row.url: row.script for row in rows if row.script}
+
+
+async def presynthesize(text: str, voice: str, energy: str) -> Optional[str]:
+    """Voiceover for a post in durable storage; returns its media:// reference"""
+    audio_path = await tts_service.generate_voiceover(text, voice=voice, energy=energy, tier="publish")
+    if not audio_path:
+        return None
+    return await asyncio.to_thread(media_store.store, audio_path, "audio")
+
+
+def save_voiceovers(session: Session, refs: Dict[int, str]) -> int:
+    """Add the voiceovers as audio assets in one commit; returns the number saved"""
+    session.add_all([Asset(post_id=post_id, type="audio", path=ref) for post_id, ref in refs.items()])
+    try:
+        session.commit()
+    except Exception as e:
+        print(f"❌ Saving voiceovers for posts {list(refs)} failed: {e}")
+        session.rollback()
+        for ref in refs.values():
+            media_store.release(ref)
+        return 0
+    return len(refs)
+
+
+async def run_voice_assignment_job(reassign: bool = False, presynthesize_audio: Optional[bool] = None) -> Dict[str, int]:
+    """
+    Assign voices to all pending video posts, then pre-synthesize approved ones.
+
+    Args:
+        reassign: Replace voices already chosen (by hand or an earlier run)
+        presynthesize_audio: Synthesize voiceovers (defaults to
+            VOICE_PRESYNTHESIS_ENABLED)
+
+    Returns:
+        Counts of posts analyzed, voices assigned, voiceovers ready and failed
+    """
+    if presynthesize_audio is None:
+        presynthesize_audio = VOICE_PRESYNTHESIS_ENABLED
+
+    with Session(engine) as session:
+        # Plain rows: analysis results go out in the bulk update, not per-object flushes
+        rows = session.execute(
+            select(Post.id, Post.title, Post.body, Post.status, Post.source_url, Post.extra_data)
+            .where(Post.kind == "video")
+            .where(Post.deleted_at == None)
+            .where(Post.status.in_(PENDING_VIDEO_STATUSES))
+        ).all()
+        posts = [
+            SimpleNamespace(id=row.id, title=row.title, body=row.body, status=row.status,
+                            source_url=row.source_url, extra_data=row.extra_data or {})
+            for row in rows
+        ]
+        print(f"Assigning voices for {len(posts)} pending video posts")
+
+        assignments, assigned = assign_voices(session, posts, reassign)
+
+        result = {"posts_analyzed": len(posts), "voices_assigned": assigned, "voiceovers_ready": 0, "failed": 0}
+        if not presynthesize_audio:
+            print(f"Voice assignment complete: {assigned} assigned")
+            return result
+
+        # Approved posts without a voiceover yet
+        candidates = [post for post in posts if post.status in PRESYNTHESIZE_STATUSES]
+        voiced = set(session.exec(
+            select(Asset.post_id)
+            .where(Asset.type == "audio")
+            .where(Asset.post_id.in_([post.id for post in candidates]))
+        ).all()) if candidates else set()
+        work = [post for post in candidates if post.id not in voiced]
+        scripts = article_scripts(session, [post.source_url for post in work if post.source_url])
+
+        semaphore = asyncio.Semaphore(max(1, VOICE_ASSIGN_CONCURRENCY))
+
+        async def process(post: Any) -> Tuple[int, Optional[str]]:
+            voice, energy = assignments[post.id]
+            async with semaphore:
+                try:
+                    script = narration_script(post, scripts.get(post.source_url))
+                    return post.id, await presynthesize(script, voice, energy)
+                except Exception as e:
+                    print(f"❌ Voiceover for post {post.id} failed: {e}")
+                    return post.id, None
+
+        results = await asyncio.gather(*[process(post) for post in work])
+        refs = {post_id: ref for post_id, ref in results if ref}
+
+        result["voiceovers_ready"] = save_voiceovers(session, refs) if refs else 0
+        result["failed"] = len(work) - len(refs)
+        print(f"Voice assignment complete: {assigned} assigned, "
+              f"{result['voiceovers_ready']} voiceovers ready, {result['failed']} failed")
+        return result
+
+
+if __name__ == "__main__":
+    asyncio.run(run_voice_assignment_job())
@@ -1,6 +1,7 @@
 # Deployment test - 2025-11-23T16:52:10+13:00
 from __future__ import annotations
 
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
 # CRITICAL: Load .env file FIRST before any other imports that might use environment variables
 import os
@@ -23,6 +24,8 @@ from app.database import engine  # noqa: E402
 
 from app.models import *  # noqa: F401,F403,E402
 from app import scheduler  # noqa: E402
+from app.http_pool import close_async_client  # noqa: E402
+from app.render_executor import render_executor  # noqa: E402
 from app.routes import router  # noqa: E402
 from app.api.dashboard import router as dashboard_router  # noqa: E402
 
@@ -37,8 +40,10 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     try:
         yield
     finally:
-        # Shutdown: stop scheduler
+        # Shutdown: stop scheduler, release pooled HTTP connections and render processes
         scheduler.stop_scheduler()
+        await close_async_client()
+        render_executor.shutdown(wait=False)
 
 
 app = FastAPI(lifespan=lifespan)  # v1.1.0 - BackgroundTasks fix deployed
@@ -0,0 +1,183 @@
+"""
+Streaming Media Downloader
+Downloads stock footage and other media straight to disk:
+- Streams in fixed-size chunks (bounded memory per download)
+- Shares the pooled HTTP client (see app.http_pool)
+- Verifies the byte count against Content-Length / Content-Range
+- Resumes partial downloads with Range requests on retry
+- Runs several downloads concurrently under a limit
+
+Incomplete data is kept in "<dest>.part" and only renamed to the final path
+once the full length has been received. An exclusive lock on "<dest>.lock"
+is held for the whole download, so render processes fetching the same
+file never write the same part file; the others wait and reuse the result.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.http_pool import get_async_client
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: downloads are only coalesced within a process
+    FCNTL_AVAILABLE = False
+
+
+# ==================== CONFIGURATION ====================
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_KB", "256")) * 1024
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "3"))
+DOWNLOAD_RETRIES = int(os.getenv("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", "120"))
+
+_CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)\s*$")
+
+
+class IncompleteDownload(Exception):
+    """Raised when fewer bytes arrive than the server announced."""
+
+
+def _expected_total(response: httpx.Response, offset: int) -> Optional[int]:
+    """Full file size announced by the server, if any."""
+    if response.status_code == 206:
+        match = _CONTENT_RANGE_TOTAL.search(response.headers.get("content-range", ""))
+        if match:
+            return int(match.group(1))
+    length = response.headers.get("content-length")
+    if length is not None and length.isdigit():
+        return int(length) + (offset if response.status_code == 206 else 0)
+    return None
+
+
+async def _fetch_once(client: httpx.AsyncClient, url: str, part_path: Path) -> int:
+    """
+    Stream url into part_path, continuing from its current size.
+
+    Returns:
+        Total bytes on disk after a verified, complete transfer
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    async with client.stream("GET", url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 416 and offset:
+            # Range not satisfiable: the part file is stale or already complete
+            # but unverifiable, so start over.
+            part_path.unlink()
+            raise IncompleteDownload("range not satisfiable, restarting")
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            offset = 0  # Server ignored the Range header; rewrite from scratch
+        expected = _expected_total(response, offset)
+
+        written = offset
+        with open(part_path, "ab" if offset else "wb") as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+
+    if expected is not None and written != expected:
+        raise IncompleteDownload(f"received {written} of {expected} bytes")
+    return written
+
+
+def _lock(lock_file) -> None:
+    if FCNTL_AVAILABLE:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+
+async def download_to_file(
+    url: str,
+    dest_path: str,
+    client: Optional[httpx.AsyncClient] = None,
+    retries: int = DOWNLOAD_RETRIES,
+) -> Optional[str]:
+    """
+    Download url to dest_path, resuming on retry.
+
+    An existing dest_path is treated as already downloaded. After transient
+    failures the ".part" file is left in place, so a later call for the same
+    dest_path resumes where this one stopped. Calls for the same dest_path
+    (from any process) run one at a time.
+
+    Args:
+        url: Media URL
+        dest_path: Final file path
+        client: HTTP client (defaults to the shared pool)
+        retries: Extra attempts after the first failure
+
+    Returns:
+        dest_path on success, None on failure
+    """
+    dest = Path(dest_path)
+    if dest.exists() and dest.stat().st_size > 0:
+        return str(dest)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part_path = dest.with_name(dest.name + ".part")
+    client = client or get_async_client()
+
+    # Released when the file is closed (also if the process dies)
+    with open(dest.with_name(dest.name + ".lock"), "a") as lock_file:
+        await asyncio.to_thread(_lock, lock_file)
+        if dest.exists() and dest.stat().st_size > 0:
+            return str(dest)  # finished by another process meanwhile
+        return await _download_locked(url, dest, part_path, client, retries)
+
+
+async def _download_locked(
+    url: str, dest: Path, part_path: Path, client: httpx.AsyncClient, retries: int
+) -> Optional[str]:
+    """Body of download_to_file, run while holding the destination's lock."""
+    for attempt in range(retries + 1):
+        try:
+            size = await _fetch_once(client, url, part_path)
+            os.replace(part_path, dest)
+            print(f"[downloader] Saved {dest.name} ({size / 1024:.1f} KB)")
+            return str(dest)
+        except httpx.HTTPStatusError as e:
+            # Client errors will not fix themselves on retry
+            if e.response.status_code < 500:
+                print(f"[downloader] HTTP {e.response.status_code} for {url}")
+                if part_path.exists():
+                    part_path.unlink()
+                return None
+            print(f"[downloader] Attempt {attempt + 1} failed: {e}")
+        except (httpx.TransportError, IncompleteDownload) as e:
+            print(f"[downloader] Attempt {attempt + 1} interrupted: {e}")
+
+        if attempt < retries:
+            await asyncio.sleep(min(2 ** attempt, 8) * 0.5)
+
+    return None
+
+
+async def download_many(
+    items: Sequence[Tuple[str, str]],
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[Optional[str]]:
+    """
+    Download several (url, dest_path) pairs concurrently.
+
+    Returns:
+        Paths in the same order as items (None for failures)
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(url: str, dest_path: str) -> Optional[str]:
+        async with semaphore:
+            return await download_to_file(url, dest_path, client=client)
+
+    return list(await asyncio.gather(*(_one(url, dest) for url, dest in items)))
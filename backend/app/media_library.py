@@ -0,0 +1,342 @@
+"""
+Local B-roll Media Library
+Keeps downloaded stock footage on disk and indexes it in the database
+(MediaItem table) so the same clip is never fetched twice:
+- Exact URL (sha256 of the link)
+- Source video id (different renditions of one Pexels video)
+- Perceptual hash of a frame (same footage behind different URLs)
+- Normalized search query (repeat themes are served without the network)
+
+Disk usage is capped; least recently used files are evicted first.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import hashlib
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.media_downloader import download_to_file
+from app.models import MediaItem
+
+
+# ==================== CONFIGURATION ====================
+
+MEDIA_LIBRARY_DIR = Path(
+    os.getenv("MEDIA_LIBRARY_DIR", str(Path(__file__).parent.parent / "output" / "media_library"))
+)
+MEDIA_LIBRARY_MAX_BYTES = int(os.getenv("MEDIA_LIBRARY_MAX_MB", "4096")) * 1024 * 1024
+
+# Serve repeat search queries from the library instead of searching again
+MEDIA_LIBRARY_QUERY_REUSE = os.getenv("MEDIA_LIBRARY_QUERY_REUSE", "true").lower() == "true"
+
+# Max differing bits (of 64) for two frames to count as the same footage
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "4"))
+
+_PEXELS_ID_PATTERNS = [
+    re.compile(r"/video-files/(\d+)/"),
+    re.compile(r"pexels\.com/videos?/(?:[\w-]*-)?(\d+)"),
+    re.compile(r"/external/(\d+)\."),
+]
+
+
+# ==================== KEYS ====================
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries match."""
+    return " ".join(query.lower().split())
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+def pexels_video_id(url: str) -> Optional[str]:
+    """Extract the Pexels video id from a file or page URL, if present."""
+    for pattern in _PEXELS_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def image_dhash(img: Image.Image) -> str:
+    """64-bit difference hash of an image, as 16 hex characters."""
+    small = np.asarray(img.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def hamming_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def video_dhash(path: str) -> Optional[str]:
+    """Perceptual hash of a representative frame (1s in, or mid-clip)."""
+    try:
+        from moviepy.editor import VideoFileClip
+    except ImportError:
+        return None
+
+    try:
+        clip = VideoFileClip(path, audio=False)
+        try:
+            frame = clip.get_frame(min(1.0, clip.duration / 2))
+        finally:
+            clip.close()
+        return image_dhash(Image.fromarray(frame))
+    except Exception as e:
+        print(f"[media_library] Could not hash {path}: {e}")
+        return None
+
+
+# ==================== LIBRARY ====================
+
+class MediaLibrary:
+    """
+    Deduplicating, size-capped store of downloaded footage.
+
+    Files live at <root>/<hash[:2]>/<hash>.mp4. Several MediaItem rows may
+    point at the same file (aliases found via source id or perceptual hash);
+    only the first row for a file carries its size.
+    """
+
+    def __init__(
+        self,
+        db_engine: Any = engine,
+        root: Path = MEDIA_LIBRARY_DIR,
+        max_bytes: int = MEDIA_LIBRARY_MAX_BYTES,
+    ):
+        self.engine = db_engine
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._table_ready = False
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _session(self) -> Session:
+        if not self._table_ready:
+            # Jobs run outside the API process, so create the table on demand
+            MediaItem.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+        return Session(self.engine)
+
+    def _touch(self, session: Session, item: MediaItem) -> str:
+        item.last_used_at = datetime.utcnow()
+        item.use_count += 1
+        session.add(item)
+        session.commit()
+        return item.path
+
+    def _drop_missing(self, session: Session, item: Optional[MediaItem]) -> Optional[MediaItem]:
+        """Forget rows whose file was deleted outside the library."""
+        if item is None or os.path.exists(item.path):
+            return item
+        for row in session.exec(select(MediaItem).where(MediaItem.path == item.path)).all():
+            session.delete(row)
+        session.commit()
+        return None
+
+    def lookup(self, url: str, source_id: Optional[str] = None) -> Optional[str]:
+        """
+        Find a local copy by exact URL, then by source video id.
+
+        Returns:
+            Local file path, or None on a miss
+        """
+        with self._session() as session:
+            item = session.exec(select(MediaItem).where(MediaItem.url_hash == url_hash(url))).first()
+            item = self._drop_missing(session, item)
+            if item is None and source_id:
+                item = session.exec(
+                    select(MediaItem)
+                    .where(MediaItem.source_id == source_id)
+                    .order_by(MediaItem.last_used_at.desc())
+                ).first()
+                item = self._drop_missing(session, item)
+            return self._touch(session, item) if item else None
+
+    def lookup_query(self, query: str) -> Optional[Tuple[str, str]]:
+        """
+        Find footage previously fetched for an equivalent search query.
+
+        Returns:
+            (local path, original URL), or None on a miss
+        """
+        with self._session() as session:
+            item = session.exec(
+                select(MediaItem)
+                .where(MediaItem.query == normalize_query(query))
+                .order_by(MediaItem.last_used_at.desc())
+            ).first()
+            item = self._drop_missing(session, item)
+            if item is None:
+                return None
+            return self._touch(session, item), item.url
+
+    def has_query(self, query: str) -> bool:
+        """Whether lookup_query() would hit, without marking anything as used."""
+        with self._session() as session:
+            items = session.exec(
+                select(MediaItem).where(MediaItem.query == normalize_query(query))
+            ).all()
+            return any(os.path.exists(item.path) for item in items)
+
+    def _find_similar(self, session: Session, phash: str) -> Optional[MediaItem]:
+        exact = session.exec(select(MediaItem).where(MediaItem.phash == phash)).first()
+        if exact or PHASH_MAX_DISTANCE <= 0:
+            return exact
+        for item in session.exec(select(MediaItem).where(MediaItem.phash.is_not(None))).all():
+            if hamming_distance(item.phash, phash) <= PHASH_MAX_DISTANCE:
+                return item
+        return None
+
+    async def fetch(
+        self,
+        url: str,
+        source_id: Optional[str] = None,
+        query: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Return a local path for url, downloading it only if needed.
+
+        Concurrent calls for the same URL share a single download.
+
+        Args:
+            url: Media URL
+            source_id: Source video id (parsed from Pexels URLs if omitted)
+            query: Search query that produced the URL, for later lookup_query()
+
+        Returns:
+            Local file path, or None if the download failed
+        """
+        source_id = source_id or pexels_video_id(url)
+        path = self.lookup(url, source_id)
+        if path:
+            print(f"[media_library] ♻️  Local hit for {source_id or url[:60]}")
+            return path
+
+        key = url_hash(url)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url, key, source_id, query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _download(
+        self,
+        url: str,
+        key: str,
+        source_id: Optional[str],
+        query: Optional[str],
+    ) -> Optional[str]:
+        dest = self.root / key[:2] / f"{key}.mp4"
+        path = await download_to_file(url, str(dest))
+        if not path:
+            return None
+
+        phash = await asyncio.to_thread(video_dhash, path)
+        size_bytes = os.path.getsize(path)
+
+        with self._session() as session:
+            duplicate = self._drop_missing(session, self._find_similar(session, phash)) if phash else None
+            if duplicate is not None and duplicate.path != path:
+                print("[media_library] Same footage already stored, keeping one copy")
+                os.unlink(path)
+                path, size_bytes = duplicate.path, 0
+
+            session.add(MediaItem(
+                source_id=source_id,
+                url=url,
+                url_hash=key,
+                path=path,
+                size_bytes=size_bytes,
+                phash=phash,
+                query=normalize_query(query) if query else None,
+                use_count=1,
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another render process recorded the same URL first
+                session.rollback()
+                existing = session.exec(select(MediaItem).where(MediaItem.url_hash == key)).first()
+                if existing is None:
+                    raise
+                print("[media_library] Footage recorded by another process, reusing it")
+                return existing.path
+
+        self.evict()
+        return path
+
+    def _files(self, session: Session) -> Dict[str, Dict[str, Any]]:
+        """Per-file totals: size and most recent use across all aliases."""
+        files: Dict[str, Dict[str, Any]] = {}
+        for item in session.exec(select(MediaItem)).all():
+            entry = files.setdefault(item.path, {"size": 0, "last_used": item.last_used_at, "rows": []})
+            entry["size"] += item.size_bytes
+            entry["last_used"] = max(entry["last_used"], item.last_used_at)
+            entry["rows"].append(item)
+        return files
+
+    def evict(self) -> int:
+        """
+        Delete least recently used files until the library fits max_bytes.
+
+        Returns:
+            Number of files removed
+        """
+        with self._session() as session:
+            files = self._files(session)
+            total = sum(entry["size"] for entry in files.values())
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            for path, entry in sorted(files.items(), key=lambda kv: kv[1]["last_used"]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                for row in entry["rows"]:
+                    session.delete(row)
+                total -= entry["size"]
+                removed += 1
+            session.commit()
+
+        if removed:
+            print(f"[media_library] Evicted {removed} files ({total / 1024 / 1024:.1f} MB retained)")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._session() as session:
+            files = self._files(session)
+            return {
+                "files": len(files),
+                "items": sum(len(entry["rows"]) for entry in files.values()),
+                "total_bytes": sum(entry["size"] for entry in files.values()),
+                "max_bytes": self.max_bytes,
+                "root": str(self.root),
+            }
+
+
+# Shared instance used by renderers and jobs
+media_library = MediaLibrary()
@@ -0,0 +1,335 @@
+"""
+Durable Media Storage
+Content-addressed store for generated media (voiceovers first), shared by
+jobs running on different machines:
+- Objects are named by the sha256 of their content, so identical audio is
+  stored once and names never collide
+- Writes are atomic (staged temp file + rename, or a single S3 PUT)
+- Pluggable backend: a local volume, or any S3-compatible API (AWS, MinIO
+  or another local stand-in via MEDIA_S3_ENDPOINT_URL)
+- StoredMedia rows index every object with a reference count; an object is
+  deleted when its last reference is released
+
+Stored media is referred to as "media://<kind>/<sha256><ext>"; resolve()
+turns a reference (or a plain path) into a local file, downloading remote
+objects into a local cache on first use.
+
+    ref = media_store.store(path, kind="audio")
+    local_path = media_store.resolve(ref)
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import StoredMedia
+from app.render_cache import file_digest
+
+# Import boto3 if available (S3 backend)
+try:
+    import boto3
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+
+# ==================== CONFIGURATION ====================
+
+MEDIA_STORAGE_BACKEND = os.getenv("MEDIA_STORAGE_BACKEND", "local").lower()
+MEDIA_STORAGE_DIR = Path(
+    os.getenv("MEDIA_STORAGE_DIR", str(Path(__file__).parent.parent / "output" / "media_store"))
+)
+MEDIA_S3_BUCKET = os.getenv("MEDIA_S3_BUCKET", "")
+MEDIA_S3_PREFIX = os.getenv("MEDIA_S3_PREFIX", "media/")
+MEDIA_S3_ENDPOINT_URL = os.getenv("MEDIA_S3_ENDPOINT_URL", "")
+
+REF_SCHEME = "media://"
+
+
+def media_name(key: str, kind: str, ext: str) -> str:
+    """Object name of content key within the store."""
+    return f"{kind}/{key[:2]}/{key}{ext}"
+
+
+def media_ref(key: str, kind: str, ext: str) -> str:
+    return f"{REF_SCHEME}{kind}/{key}{ext}"
+
+
+def parse_ref(ref: str) -> Optional[Tuple[str, str, str]]:
+    """(key, kind, ext) of a media:// reference, or None for anything else."""
+    if not ref or not ref.startswith(REF_SCHEME):
+        return None
+    kind, _, filename = ref[len(REF_SCHEME):].rpartition("/")
+    key, ext = os.path.splitext(filename)
+    if not kind or not key:
+        return None
+    return key, kind, ext
+
+
+def _atomic_copy(src: str, dest: Path, move: bool = False) -> None:
+    """Put src at dest via a staged file in dest's directory and a rename."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    staging = dest.parent / f".{dest.name}.{uuid.uuid4().hex}.tmp"
+    try:
+        if move:
+            shutil.move(src, staging)
+        else:
+            try:
+                os.link(src, staging)
+            except OSError:
+                shutil.copyfile(src, staging)
+        os.replace(staging, dest)
+    finally:
+        if staging.exists():
+            staging.unlink()
+
+
+# ==================== BACKENDS ====================
+
+class LocalStorageBackend:
+    """Objects as files under a directory (a local or mounted volume)."""
+
+    name = "local"
+
+    def __init__(self, root: Path = MEDIA_STORAGE_DIR):
+        self.root = Path(root)
+
+    def path(self, name: str) -> Path:
+        return self.root / name
+
+    def put(self, name: str, src_path: str) -> None:
+        if not self.exists(name):
+            _atomic_copy(src_path, self.path(name))
+
+    def exists(self, name: str) -> bool:
+        return self.path(name).exists()
+
+    def local_path(self, name: str) -> Optional[str]:
+        path = self.path(name)
+        return str(path) if path.exists() else None
+
+    def delete(self, name: str) -> None:
+        self.path(name).unlink(missing_ok=True)
+
+
+class S3StorageBackend:
+    """
+    Objects in an S3-compatible bucket, with a local read-through cache.
+
+    Uploads are single PUTs (atomic on S3); downloads are staged and renamed
+    into the cache, so readers never see a partial file.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str = MEDIA_S3_BUCKET,
+        prefix: str = MEDIA_S3_PREFIX,
+        endpoint_url: str = MEDIA_S3_ENDPOINT_URL,
+        cache_dir: Path = MEDIA_STORAGE_DIR / "s3_cache",
+        client: Any = None,
+    ):
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("boto3 is not installed")
+            client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = Path(cache_dir)
+
+    def _object_key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def put(self, name: str, src_path: str) -> None:
+        if not self.exists(name):
+            self.client.upload_file(src_path, self.bucket, self._object_key(name))
+        # Keep the local copy, the uploader is likely to read it next
+        cached = self.cache_dir / name
+        if not cached.exists():
+            _atomic_copy(src_path, cached)
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(name))
+            return True
+        except Exception:
+            return False
+
+    def local_path(self, name: str) -> Optional[str]:
+        cached = self.cache_dir / name
+        if cached.exists():
+            return str(cached)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        staging = cached.parent / f".{cached.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.client.download_file(self.bucket, self._object_key(name), str(staging))
+            os.replace(staging, cached)
+            return str(cached)
+        except Exception as e:
+            print(f"[media_storage] Could not download {name}: {e}")
+            return None
+        finally:
+            if staging.exists():
+                staging.unlink()
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(name))
+        (self.cache_dir / name).unlink(missing_ok=True)
+
+
+def default_backend() -> Any:
+    """Backend selected by MEDIA_STORAGE_BACKEND (local if S3 is not usable)."""
+    if MEDIA_STORAGE_BACKEND == "s3":
+        if MEDIA_S3_BUCKET and BOTO3_AVAILABLE:
+            return S3StorageBackend()
+        print("[media_storage] S3 backend needs boto3 and MEDIA_S3_BUCKET, using local storage")
+    return LocalStorageBackend()
+
+
+# ==================== STORE ====================
+
+class MediaStore:
+    """
+    Content-addressed media objects plus their reference-counted index.
+
+    store() adds a reference for the caller; release() drops one and
+    deletes the object once nothing refers to it. Counts are changed with
+    single atomic statements, so concurrent jobs and machines can share
+    objects safely.
+    """
+
+    def __init__(self, backend: Any = None, db_engine: Any = engine):
+        self.backend = backend or default_backend()
+        self.engine = db_engine
+        self._table_ready = False
+
+    def _session(self) -> Session:
+        if not self._table_ready:
+            # Jobs run outside the API process, so create the table on demand
+            StoredMedia.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+        return Session(self.engine)
+
+    def store(self, src_path: str, kind: str = "audio", move: bool = False) -> str:
+        """
+        Add a file to the store (once per distinct content) and reference it.
+
+        Args:
+            src_path: File to store
+            kind: Media kind ("audio", ...), used as a name prefix
+            move: Remove src_path once stored
+
+        Returns:
+            media:// reference
+        """
+        key = file_digest(src_path)
+        ext = os.path.splitext(src_path)[1] or ".bin"
+        name = media_name(key, kind, ext)
+        size_bytes = os.path.getsize(src_path)
+
+        self.backend.put(name, src_path)
+        if move:
+            os.unlink(src_path)
+
+        now = datetime.utcnow()
+        insert = pg_insert if self.engine.dialect.name == "postgresql" else sqlite_insert
+        with self._session() as session:
+            session.exec(
+                insert(StoredMedia)
+                .values(key=key, kind=kind, ext=ext, backend=self.backend.name, size_bytes=size_bytes,
+                        ref_count=1, created_at=now, last_used_at=now)
+                .on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={"ref_count": StoredMedia.ref_count + 1, "last_used_at": now},
+                )
+            )
+            session.commit()
+
+        return media_ref(key, kind, ext)
+
+    def acquire(self, ref: str) -> bool:
+        """Add a reference to stored media; False if it is not in the store."""
+        return self._adjust(ref, +1) is not None
+
+    def release(self, ref: str) -> None:
+        """Drop a reference; the object is deleted when none remain."""
+        ref_count = self._adjust(ref, -1)
+        if ref_count is None or ref_count > 0:
+            return
+        key, kind, ext = parse_ref(ref)
+        # Only the caller whose delete removes the row deletes the object; a
+        # store() that got in first has already raised the count again
+        with self._session() as session:
+            deleted = session.exec(
+                delete(StoredMedia)
+                .where(StoredMedia.key == key, StoredMedia.ref_count <= 0)
+                .returning(StoredMedia.id)
+            ).all()
+            session.commit()
+        if deleted:
+            self.backend.delete(media_name(key, kind, ext))
+            print(f"[media_storage] Deleted unreferenced {kind} {key[:12]}")
+
+    def _adjust(self, ref: str, delta: int) -> Optional[int]:
+        """Change a reference count atomically; returns the new count (None if not stored)."""
+        parsed = parse_ref(ref)
+        if parsed is None:
+            return None
+        query = update(StoredMedia).where(StoredMedia.key == parsed[0])
+        if delta < 0:
+            query = query.where(StoredMedia.ref_count > 0)  # never below zero
+        with self._session() as session:
+            ref_count = session.exec(
+                query
+                .values(ref_count=StoredMedia.ref_count + delta, last_used_at=datetime.utcnow())
+                .returning(StoredMedia.ref_count)
+            ).scalar_one_or_none()
+            session.commit()
+            return ref_count
+
+    def resolve(self, ref: Optional[str]) -> Optional[str]:
+        """
+        Local file for a media:// reference, downloading it if needed.
+
+        Plain paths (and file:// URLs) from before the store existed are
+        returned as-is when the file exists.
+
+        Returns:
+            Local path, or None if the media is unavailable
+        """
+        if not ref:
+            return None
+        parsed = parse_ref(ref)
+        if parsed is None:
+            path = ref[len("file://"):] if ref.startswith("file://") else ref
+            return path if os.path.exists(path) else None
+        key, kind, ext = parsed
+        return self.backend.local_path(media_name(key, kind, ext))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._session() as session:
+            items = session.exec(select(StoredMedia)).all()
+            return {
+                "objects": len(items),
+                "references": sum(item.ref_count for item in items),
+                "total_bytes": sum(item.size_bytes for item in items),
+                "backend": self.backend.name,
+            }
+
+
+# Shared instance used by jobs and renderers
+media_store = MediaStore()
@@ -212,3 +212,102 @@ class IngestionJob(SQLModel, table=True):
     articles_ranked: int = Field(default=0, sa_column=Column(Integer))
     article_ids: Optional[List[int]] = Field(default=None, sa_column=Column(JSON))
     errors: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+
+
+class MediaItem(SQLModel, table=True):
+    """Locally stored stock footage, deduplicated by source id, URL and perceptual hash."""
+    __tablename__ = "media_items"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source: str = Field(default="pexels", index=True)
+    source_id: Optional[str] = Field(default=None, index=True)  # Pexels video id
+    url: str
+    url_hash: str = Field(index=True, unique=True)
+    path: str
+    size_bytes: int = Field(default=0)
+    phash: Optional[str] = Field(default=None, index=True)  # 64-bit dHash of a frame, hex
+    query: Optional[str] = Field(default=None, index=True)  # Normalized search query
+    use_count: int = Field(default=0)
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+    last_used_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), index=True),
+    )
+
+
+class StoredMedia(SQLModel, table=True):
+    """Content-addressed media object in the storage backend, with a reference count."""
+    __tablename__ = "stored_media"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key: str = Field(index=True, unique=True)  # sha256 of the content
+    kind: str = Field(default="audio", index=True)
+    ext: str = Field(default=".mp3")
+    backend: str = Field(default="local")
+    size_bytes: int = Field(default=0)
+    ref_count: int = Field(default=0)
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+    last_used_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), index=True),
+    )
+
+
+class RenderJob(SQLModel, table=True):
+    """Queued video render, claimed by a render worker under a renewable lease."""
+    __tablename__ = "render_jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # post_video, final_render, pro_video, competitor_video
+    kind: str = Field(index=True)
+    post_id: Optional[int] = Field(default=None, foreign_key="posts.id", index=True)
+    payload: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    # queued, running, completed, failed, cancelled
+    status: str = Field(default="queued", index=True)
+    priority: int = Field(default=0, index=True)  # Higher runs first
+    # "<kind>:<post_id>" while queued/running, so a post is only queued once
+    dedupe_key: Optional[str] = Field(default=None, index=True, unique=True)
+    attempts: int = Field(default=0, sa_column=Column(Integer))
+    max_attempts: int = Field(default=3, sa_column=Column(Integer))
+    worker_id: Optional[str] = Field(default=None, index=True)
+    lease_expires_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), index=True)
+    )
+    heartbeat_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
+    started_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    completed_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+
+
+class RenderProgressEvent(SQLModel, table=True):
+    """Progress event reported by a render (stage and completion of that stage)."""
+    __tablename__ = "render_progress"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: int = Field(foreign_key="render_jobs.id", index=True)
+    post_id: Optional[int] = Field(default=None, index=True)
+    # parse, footage, tts, scene, encode, preview; started/completed/failed/cancelled for the job
+    stage: str
+    fraction: Optional[float] = None  # Completion of the stage (0-1)
+    info: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )
@@ -0,0 +1,232 @@
+"""
+Layer Compositor for Text Overlays
+Replaces full-frame RGBA ImageClips with cropped overlay tiles:
+- Each overlay is stored as a tight RGBA tile (premultiplied alpha) plus an offset
+- Per frame, only each active tile's rectangle is blended
+- Blending runs as vectorized NumPy into one reused frame buffer
+
+A 10-word word-by-word scene holds a few hundred KB of tiles instead of
+~80 MB of mostly transparent 1080x1920 frames.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageColor
+
+Color = Union[str, Tuple[int, int, int]]
+Motion = Callable[[float], Tuple[int, int]]
+
+
+def parse_color(color: Color) -> Tuple[int, int, int]:
+    """Convert a colour name, hex string or tuple into an (R, G, B) tuple."""
+    if isinstance(color, str):
+        return ImageColor.getrgb(color)[:3]
+    return tuple(int(c) for c in color[:3])
+
+
+# ==================== OVERLAY LAYERS ====================
+
+class OverlayLayer:
+    """
+    A cropped RGBA tile placed on the frame for a time window.
+
+    Attributes:
+        tile: (h, w, 4) uint8 array, RGB premultiplied by alpha
+        x, y: Top-left offset of the tile in frame coordinates
+        start, end: Visibility window in seconds (end=None for open-ended)
+        fade_in, fade_out: Linear opacity ramps in seconds
+        motion: Optional callable t -> (dx, dy) added to the offset
+    """
+
+    def __init__(
+        self,
+        tile: np.ndarray,
+        x: int,
+        y: int,
+        start: float = 0.0,
+        end: Optional[float] = None,
+        fade_in: float = 0.0,
+        fade_out: float = 0.0,
+        motion: Optional[Motion] = None,
+    ):
+        self.tile = tile
+        self.x = int(x)
+        self.y = int(y)
+        self.start = start
+        self.end = end
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+        self.motion = motion
+
+    @classmethod
+    def from_image(
+        cls,
+        img: Image.Image,
+        x: int = 0,
+        y: int = 0,
+        **kwargs,
+    ) -> Optional["OverlayLayer"]:
+        """
+        Build a layer from an RGBA image placed at (x, y).
+
+        The image is cropped to its non-transparent bounding box, so a
+        full-canvas text render shrinks to the size of the text itself.
+
+        Returns:
+            OverlayLayer, or None if the image is fully transparent
+        """
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+
+        bbox = img.getchannel("A").getbbox()
+        if not bbox:
+            return None
+
+        rgba = np.asarray(img.crop(bbox), dtype=np.uint8)
+        alpha = rgba[..., 3:4].astype(np.uint16)
+        tile = np.empty_like(rgba)
+        tile[..., :3] = (rgba[..., :3].astype(np.uint16) * alpha + 127) // 255
+        tile[..., 3] = rgba[..., 3]
+
+        return cls(tile, x + bbox[0], y + bbox[1], **kwargs)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.tile.shape[1], self.tile.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.tile.nbytes
+
+    def is_active(self, t: float) -> bool:
+        return t >= self.start and (self.end is None or t < self.end)
+
+    def opacity(self, t: float) -> float:
+        """Opacity at time t after fade-in/fade-out ramps."""
+        if not self.is_active(t):
+            return 0.0
+
+        opacity = 1.0
+        local_t = t - self.start
+        if self.fade_in > 0 and local_t < self.fade_in:
+            opacity = min(opacity, local_t / self.fade_in)
+        if self.fade_out > 0 and self.end is not None:
+            remaining = self.end - t
+            if remaining < self.fade_out:
+                opacity = min(opacity, remaining / self.fade_out)
+        return max(0.0, min(1.0, opacity))
+
+    def position(self, t: float) -> Tuple[int, int]:
+        if self.motion is None:
+            return self.x, self.y
+        dx, dy = self.motion(t - self.start)
+        return self.x + int(dx), self.y + int(dy)
+
+
+# ==================== COMPOSITOR ====================
+
+class OverlayCompositor:
+    """
+    Blends overlay layers onto background frames.
+
+    Usage:
+        compositor = OverlayCompositor((1080, 1920), tint=("#FF0050", 0.4))
+        compositor.add(OverlayLayer.from_image(text_img, fade_in=0.3))
+        scene_clip = compositor.apply(background_clip)
+    """
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        layers: Optional[List[OverlayLayer]] = None,
+        tint: Optional[Tuple[Color, float]] = None,
+    ):
+        self.width, self.height = size
+        self.layers: List[OverlayLayer] = [layer for layer in (layers or []) if layer is not None]
+        self.tint = None
+        if tint is not None:
+            color, opacity = tint
+            self.tint = (np.array(parse_color(color), dtype=np.float32) * np.float32(opacity), 1.0 - opacity)
+        self._buffer: Optional[np.ndarray] = None
+
+    def add(self, layer: Optional[OverlayLayer]) -> None:
+        if layer is not None:
+            self.layers.append(layer)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by overlay tiles."""
+        return sum(layer.nbytes for layer in self.layers)
+
+    def _clip_rect(self, layer: OverlayLayer, t: float) -> Optional[Tuple[int, int, int, int]]:
+        x, y = layer.position(t)
+        w, h = layer.size
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def dirty_rect(self, t: float) -> Optional[Tuple[int, int, int, int]]:
+        """Union of all rectangles touched by visible layers at time t."""
+        rects = [
+            rect for layer in self.layers
+            if layer.opacity(t) > 0 and (rect := self._clip_rect(layer, t))
+        ]
+        if not rects:
+            return None
+        return (
+            min(r[0] for r in rects), min(r[1] for r in rects),
+            max(r[2] for r in rects), max(r[3] for r in rects),
+        )
+
+    def compose(self, frame: np.ndarray, t: float) -> np.ndarray:
+        """
+        Blend visible layers over a background frame.
+
+        The background frame is never modified; the result is written to a
+        buffer that is reused across frames, so callers must consume it
+        before requesting the next frame (as MoviePy's writers do).
+        """
+        visible = []
+        for layer in self.layers:
+            opacity = layer.opacity(t)
+            rect = self._clip_rect(layer, t) if opacity > 0 else None
+            if rect is not None:
+                visible.append((layer, opacity, rect))
+        if not visible and self.tint is None:
+            return frame
+
+        shape = (self.height, self.width, 3)
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+        buf = self._buffer
+
+        if self.tint is not None:
+            tint_rgb, keep = self.tint
+            np.copyto(buf, frame[..., :3] * np.float32(keep) + (tint_rgb + 0.5), casting="unsafe")
+        else:
+            np.copyto(buf, frame[..., :3], casting="unsafe")
+
+        for layer, opacity, (x0, y0, x1, y1) in visible:
+            x, y = layer.position(t)
+            tile = layer.tile[y0 - y:y1 - y, x0 - x:x1 - x]
+
+            scale = np.float32(opacity / 255.0)
+            src = tile[..., :3].astype(np.float32)
+            coverage = tile[..., 3:4].astype(np.float32) * scale
+            region = buf[y0:y1, x0:x1]
+
+            # Premultiplied "over": out = src * opacity + dst * (1 - alpha * opacity)
+            out = src * np.float32(opacity) + region * (np.float32(1.0) - coverage)
+            np.copyto(region, out + np.float32(0.5), casting="unsafe")
+
+        return buf
+
+    def apply(self, clip):
+        """Return a MoviePy clip with the layers composited over clip."""
+        return clip.fl(lambda get_frame, t: self.compose(get_frame(t), t))
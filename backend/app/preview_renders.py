@@ -0,0 +1,205 @@
+"""
+Preview Proxy Renders
+Cheap stand-ins for the review queue, produced before anyone has approved
+a video:
+- Proxy video: quarter resolution (270x480), 12 fps, ultrafast encode
+- Poster frame (JPEG) for the player before playback
+- Sprite strip: evenly spaced thumbnails in one image for scrubbing
+
+The full-quality render is deferred until the video is approved
+(/api/content/{id}/approve-video), so rejected drafts never pay for it.
+Previews live under output/previews/<post_id>/ and are recorded in
+Post.extra_data["preview"].
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+
+# ==================== CONFIGURATION ====================
+
+OUTPUT_DIR = Path(__file__).parent.parent / "output"
+PREVIEW_DIR = Path(os.getenv("PREVIEW_DIR", str(OUTPUT_DIR / "previews")))
+
+# Encoding profile used for proxy renders
+PREVIEW_PROFILE = os.getenv("PREVIEW_PROFILE", "proxy")
+
+# Render a proxy for review first; full quality only after approval
+PREVIEW_FIRST = os.getenv("PREVIEW_FIRST", "true").lower() == "true"
+
+# Renderer recorded for previews made by the M03 assembly job
+PREVIEW_RENDERER = "m03"
+
+SPRITE_FRAMES = int(os.getenv("PREVIEW_SPRITE_FRAMES", "10"))
+SPRITE_THUMB_WIDTH = int(os.getenv("PREVIEW_SPRITE_THUMB_WIDTH", "90"))
+POSTER_QUALITY = 80
+
+
+def output_url(path: str) -> str:
+    """Path relative to the /output static mount when possible (as assets are served)."""
+    try:
+        return Path(path).resolve().relative_to(OUTPUT_DIR.resolve()).as_posix()
+    except ValueError:
+        return path
+
+
+def has_preview(post: Any) -> bool:
+    preview = (post.extra_data or {}).get("preview")
+    return bool(preview and os.path.exists(preview.get("video_path", "")))
+
+
+def preview_renderer(post: Any) -> str:
+    """Renderer that made a post's preview (older records are M03 previews)."""
+    preview = (post.extra_data or {}).get("preview") or {}
+    return preview.get("renderer") or PREVIEW_RENDERER
+
+
+# ==================== THUMBNAILS ====================
+
+def sprite_times(duration: float, frames: int = SPRITE_FRAMES) -> List[float]:
+    """Sample times at the middle of `frames` equal slices of the video."""
+    if duration <= 0 or frames <= 0:
+        return []
+    interval = duration / frames
+    return [interval * (i + 0.5) for i in range(frames)]
+
+
+def build_sprite(images: List[Image.Image], thumb_width: int = SPRITE_THUMB_WIDTH) -> Image.Image:
+    """Tile frames left to right into a single strip of equal thumbnails."""
+    first = images[0]
+    thumb_height = max(1, round(first.height * thumb_width / first.width))
+    strip = Image.new("RGB", (thumb_width * len(images), thumb_height))
+    for i, img in enumerate(images):
+        strip.paste(img.convert("RGB").resize((thumb_width, thumb_height), Image.BILINEAR), (i * thumb_width, 0))
+    return strip
+
+
+def extract_thumbnails(
+    video_path: str,
+    out_dir: str,
+    frames: int = SPRITE_FRAMES,
+    thumb_width: int = SPRITE_THUMB_WIDTH,
+) -> Dict[str, Any]:
+    """
+    Write a poster frame and a sprite strip for a video in one decode pass.
+
+    The poster is taken from the hook (1s in, or mid-clip for short videos),
+    at the video's own resolution.
+
+    Returns:
+        Dict with poster_path, sprite_path and sprite layout
+        (frames, thumb_width, thumb_height, interval)
+    """
+    from moviepy.editor import VideoFileClip
+
+    os.makedirs(out_dir, exist_ok=True)
+    poster_path = os.path.join(out_dir, "poster.jpg")
+    sprite_path = os.path.join(out_dir, "sprite.jpg")
+
+    clip = VideoFileClip(video_path, audio=False)
+    try:
+        duration = clip.duration or 0
+        poster = Image.fromarray(clip.get_frame(min(1.0, duration / 2)))
+        times = sprite_times(duration, frames)
+        images = [Image.fromarray(clip.get_frame(t)) for t in times] or [poster]
+    finally:
+        clip.close()
+
+    poster.save(poster_path, "JPEG", quality=POSTER_QUALITY)
+    strip = build_sprite(images, thumb_width)
+    strip.save(sprite_path, "JPEG", quality=POSTER_QUALITY)
+
+    return {
+        "poster_path": poster_path,
+        "sprite_path": sprite_path,
+        "sprite": {
+            "frames": len(images),
+            "thumb_width": thumb_width,
+            "thumb_height": strip.height,
+            "interval": duration / len(images) if duration else 0,
+        },
+        "duration": duration,
+    }
+
+
+# ==================== PREVIEWS ====================
+
+def publish_preview(
+    post_id: int, video_path: str, profile: str = PREVIEW_PROFILE, renderer: str = PREVIEW_RENDERER
+) -> Dict[str, Any]:
+    """
+    Move a proxy render into the post's preview folder and add thumbnails.
+
+    Args:
+        post_id: Post the preview belongs to
+        video_path: Freshly rendered proxy video
+        profile: Encoding profile the proxy was rendered with
+        renderer: Render job kind that made it ("pro_video",
+            "competitor_video" or "m03"); the final render on approval
+            uses the same renderer
+
+    Returns:
+        Preview record for Post.extra_data["preview"] (paths plus /output URLs)
+    """
+    out_dir = PREVIEW_DIR / str(post_id)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dest = out_dir / "preview.mp4"
+    if os.path.abspath(video_path) != os.path.abspath(dest):
+        shutil.move(video_path, dest)
+
+    thumbs = extract_thumbnails(str(dest), str(out_dir))
+    print(f"[preview] Preview ready for post {post_id}: {dest}")
+
+    return {
+        "profile": profile,
+        "renderer": renderer,
+        "video_path": str(dest),
+        "poster_path": thumbs["poster_path"],
+        "sprite_path": thumbs["sprite_path"],
+        "video_url": output_url(str(dest)),
+        "poster_url": output_url(thumbs["poster_path"]),
+        "sprite_url": output_url(thumbs["sprite_path"]),
+        "sprite": thumbs["sprite"],
+        "duration": thumbs["duration"],
+        "rendered_at": datetime.utcnow().isoformat(),
+    }
+
+
+def attach_preview(post: Any, preview: Dict[str, Any]) -> None:
+    """Record a preview on a post (reassigns extra_data so the JSON column is saved)."""
+    post.extra_data = {**(post.extra_data or {}), "preview": preview}
+
+
+def save_post_preview(
+    session: Any, post: Any, video_path: str, profile: str = PREVIEW_PROFILE, renderer: str = PREVIEW_RENDERER
+) -> Dict[str, Any]:
+    """Publish a proxy render as the post's review preview and commit it."""
+    preview = publish_preview(post.id, video_path, profile, renderer)
+    attach_preview(post, preview)
+    post.updated_at = datetime.utcnow()
+    session.add(post)
+    session.commit()
+    return preview
+
+
+def remove_preview(post_id: int) -> None:
+    """Delete a post's preview files (after the full render, or on reject)."""
+    shutil.rmtree(PREVIEW_DIR / str(post_id), ignore_errors=True)
+
+
+def preview_summary(post: Any) -> Optional[Dict[str, Any]]:
+    """Public part of a post's preview record for API responses."""
+    preview = (post.extra_data or {}).get("preview")
+    if not preview:
+        return None
+    return {key: preview.get(key) for key in (
+        "profile", "renderer", "video_url", "poster_url", "sprite_url", "sprite", "duration", "rendered_at",
+    )}
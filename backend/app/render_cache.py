@@ -0,0 +1,258 @@
+"""
+Content-Addressed Render Cache
+Stores encoded scene segments and finished videos on disk, keyed by a hash of
+everything that affects their pixels:
+- Scene text, style, duration and output size
+- Background media identity (footage URL or file digest)
+- Renderer name and RENDERER_VERSION
+
+Unchanged scenes are reused on re-render, and identical full-video requests
+are served straight from the cache. Total size is bounded with LRU eviction
+(least recently used entries are deleted first).
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ==================== CONFIGURATION ====================
+
+RENDER_CACHE_DIR = Path(
+    os.getenv("RENDER_CACHE_DIR", str(Path(__file__).parent.parent / "output" / "render_cache"))
+)
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_MB", "2048")) * 1024 * 1024
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "true").lower() == "true"
+
+# Bump whenever a change to the renderers alters output for the same inputs,
+# so stale segments are never reused.
+RENDERER_VERSION = "3"
+
+# Near-lossless intermediate encode for cached scene segments. They are
+# decoded again when the final video is assembled, so quality matters more
+# than size here.
+SEGMENT_CODEC = "libx264"
+SEGMENT_PRESET = "veryfast"
+SEGMENT_CRF = "16"
+
+
+# ==================== KEY DERIVATION ====================
+
+def hash_inputs(**inputs: Any) -> str:
+    """
+    Derive a stable cache key from render inputs.
+
+    Inputs are serialised as canonical JSON (sorted keys), so dict ordering
+    and tuple/list differences do not change the key.
+    """
+    payload = json.dumps(inputs, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 digest of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scene_cache_key(
+    renderer: str,
+    scene: Dict[str, Any],
+    size: Tuple[int, int],
+    fps: int,
+    style: Optional[Dict[str, Any]] = None,
+    background: Optional[str] = None,
+) -> str:
+    """
+    Cache key for a single rendered scene segment.
+
+    Args:
+        renderer: Renderer module name (e.g. "video_production")
+        scene: Scene dict (type, text, duration, words)
+        size: Output (width, height)
+        fps: Output frame rate
+        style: Text/colour styling applied to the scene
+        background: Identity of the background media (URL or file digest)
+    """
+    return hash_inputs(
+        kind="scene",
+        renderer=renderer,
+        version=RENDERER_VERSION,
+        type=scene.get("type"),
+        text=scene.get("text", ""),
+        words=scene.get("words"),
+        duration=round(float(scene.get("duration", 0)), 3),
+        size=list(size),
+        fps=fps,
+        style=style or {},
+        background=background,
+    )
+
+
+def video_cache_key(renderer: str, **inputs: Any) -> str:
+    """Cache key for a complete video render."""
+    return hash_inputs(kind="video", renderer=renderer, version=RENDERER_VERSION, **inputs)
+
+
+# ==================== CACHE STORE ====================
+
+class RenderCache:
+    """
+    On-disk store of encoded segments with size-bounded LRU eviction.
+
+    Entries live at <root>/<kind>/<key[:2]>/<key>.mp4. File mtimes double as
+    the LRU clock: every hit touches the entry, eviction removes the oldest.
+    """
+
+    def __init__(self, root: Path = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str, kind: str = "scene") -> Path:
+        """Location of a cache entry (whether or not it exists)."""
+        return self.root / kind / key[:2] / f"{key}.mp4"
+
+    def get(self, key: str, kind: str = "scene") -> Optional[str]:
+        """Return the cached file path for key, or None on a miss."""
+        path = self.path_for(key, kind)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path, None)  # Mark as recently used
+        except OSError:
+            pass
+        return str(path)
+
+    def put(self, key: str, src_path: str, kind: str = "scene", move: bool = False) -> str:
+        """
+        Store a rendered file under key and return the cached path.
+
+        The file is staged next to its final location and renamed into place,
+        so concurrent readers never see a partially written entry.
+        """
+        dest = self.path_for(key, kind)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        staging = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+
+        if move:
+            shutil.move(src_path, staging)
+        else:
+            shutil.copyfile(src_path, staging)
+        os.replace(staging, dest)
+
+        self.evict()
+        return str(dest)
+
+    def new_temp_path(self, kind: str = "scene") -> str:
+        """Scratch path inside the cache volume for an in-progress render."""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return str(tmp_dir / f"{kind}_{uuid.uuid4().hex}.mp4")
+
+    def store_clip(self, key: str, clip: Any, fps: int, kind: str = "scene") -> str:
+        """
+        Encode a MoviePy clip (video only) into the cache.
+
+        Returns:
+            Path to the cached segment
+        """
+        tmp_path = self.new_temp_path(kind)
+        try:
+            clip.write_videofile(
+                tmp_path,
+                fps=fps,
+                codec=SEGMENT_CODEC,
+                audio=False,
+                preset=SEGMENT_PRESET,
+                ffmpeg_params=["-crf", SEGMENT_CRF, "-pix_fmt", "yuv420p"],
+                logger=None,
+            )
+            return self.put(key, tmp_path, kind, move=True)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def materialize(self, key: str, dest_path: str, kind: str = "video") -> Optional[str]:
+        """
+        Place a cached entry at dest_path (hard link, falling back to copy).
+
+        Returns:
+            dest_path on a hit, None on a miss
+        """
+        cached = self.get(key, kind)
+        if not cached:
+            return None
+
+        Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(dest_path):
+            os.unlink(dest_path)
+        try:
+            os.link(cached, dest_path)
+        except OSError:
+            shutil.copyfile(cached, dest_path)
+        return dest_path
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob("*/*/*.mp4"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+
+        if removed:
+            print(f"[render_cache] Evicted {removed} entries ({total / 1024 / 1024:.1f} MB retained)")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "root": str(self.root),
+        }
+
+
+# Shared instance used by all renderers
+render_cache = RenderCache()
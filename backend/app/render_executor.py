@@ -0,0 +1,323 @@
+"""
+Render Executor
+Runs CPU-bound media work (MoviePy composition and encodes) in a pool of
+worker processes, so the calling event loop only awaits the result:
+
+    result = await render_executor.run(_generate_video, script=script, title=title)
+
+- Pool size from RENDER_EXECUTOR_WORKERS (0 runs renders inline, e.g. tests)
+- Progress: renderer code calls report(stage, fraction) anywhere, and the
+  events reach the caller's progress callback (or the one installed with
+  tracking(), e.g. by the render worker for the whole job)
+- Encode progress comes from a proglog logger passed to write_videofile
+- Cancellation: cancelling the awaiting task stops the render at its next
+  progress report, and queued renders never start
+
+Functions sent to the pool must be module-level (they are pickled by name);
+async functions are run with asyncio.run inside the worker process.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import contextlib
+import contextvars
+import multiprocessing
+import os
+import queue as queue_module
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+from proglog import ProgressBarLogger
+
+
+# ==================== CONFIGURATION ====================
+
+RENDER_EXECUTOR_WORKERS = int(
+    os.getenv("RENDER_EXECUTOR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+
+# How often the caller collects progress events from running renders
+RENDER_PROGRESS_POLL_SECONDS = float(os.getenv("RENDER_PROGRESS_POLL_SECONDS", "0.25"))
+
+# Encode progress is reported in steps of this fraction (1%)
+ENCODE_PROGRESS_STEP = 0.01
+
+# Peak memory of one render process (1080x1920 MoviePy composition + encode)
+RENDER_MEMORY_PER_WORKER_MB = int(os.getenv("RENDER_MEMORY_PER_WORKER_MB", "1500"))
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class RenderCancelled(Exception):
+    """Raised inside a render when its caller has cancelled it."""
+
+
+# ==================== RENDER CONTEXT ====================
+
+class _RenderContext:
+    """Where progress events go for the render running in this context."""
+
+    def __init__(self, progress: Optional[ProgressCallback] = None, events: Any = None, cancel: Any = None):
+        self.progress = progress
+        self.events = events
+        self.cancel = cancel
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if self.events is not None:
+            self.events.put(event)
+        elif self.progress is not None:
+            self.progress(event)
+
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+
+_context: contextvars.ContextVar[Optional[_RenderContext]] = contextvars.ContextVar("render_context", default=None)
+
+# Set in pool processes, so nested run() calls render inline
+_IN_RENDER_PROCESS = False
+
+
+def report(stage: str, fraction: Optional[float] = None, **info: Any) -> None:
+    """
+    Report render progress (no-op outside a render).
+
+    Args:
+        stage: Render stage, e.g. "parse", "footage", "tts", "scene", "encode"
+        fraction: Completion of the stage (0-1), if known
+        **info: Extra fields for the event (scene index, message, ...)
+
+    Raises:
+        RenderCancelled: If the caller has cancelled this render
+    """
+    context = _context.get()
+    if context is None:
+        return
+    if context.cancelled():
+        raise RenderCancelled(f"Render cancelled during {stage}")
+    context.emit({"stage": stage, "fraction": fraction, **info})
+
+
+class RenderProgressLogger(ProgressBarLogger):
+    """proglog logger for write_videofile that reports frame-encode progress."""
+
+    def __init__(self, stage: str = "encode"):
+        super().__init__()
+        self.stage = stage
+        self._last = -1.0
+
+    def bars_callback(self, bar: str, attr: str, value: Any, old_value: Any = None) -> None:
+        # MoviePy iterates video frames on the "t" bar ("chunk" is audio)
+        if bar != "t" or attr != "index":
+            return
+        total = self.bars[bar].get("total") or 0
+        if not total:
+            return
+        fraction = min(1.0, (value + 1) / total)
+        if fraction - self._last >= ENCODE_PROGRESS_STEP or fraction >= 1.0:
+            self._last = fraction
+            report(self.stage, fraction, frame=value + 1, frames=total)
+
+
+@contextlib.contextmanager
+def tracking(progress: Optional[ProgressCallback]) -> Iterator[None]:
+    """
+    Send progress reported in this context (including renders started from
+    it) to progress. None keeps the current destination.
+    """
+    if progress is None:
+        yield
+        return
+    token = _context.set(_RenderContext(progress=progress))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_progress() -> Optional[ProgressCallback]:
+    """Progress callback installed for this context, if any."""
+    context = _context.get()
+    return context.progress if context is not None else None
+
+
+def render_logger(stage: str = "encode") -> Union[str, RenderProgressLogger]:
+    """Logger argument for write_videofile: progress events inside a render, console bar otherwise."""
+    if _context.get() is None:
+        return "bar"
+    return RenderProgressLogger(stage)
+
+
+# ==================== POOL PROCESS SIDE ====================
+
+def _init_render_process() -> None:
+    global _IN_RENDER_PROCESS
+    _IN_RENDER_PROCESS = True
+
+
+def _call(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    if asyncio.iscoroutinefunction(fn):
+        return asyncio.run(fn(*args, **kwargs))
+    return fn(*args, **kwargs)
+
+
+def _run_in_process(fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], events: Any, cancel: Any) -> Any:
+    if cancel.is_set():
+        raise RenderCancelled("Render cancelled before it started")
+    token = _context.set(_RenderContext(events=events, cancel=cancel))
+    try:
+        return _call(fn, args, kwargs)
+    finally:
+        _context.reset(token)
+
+
+# ==================== POOL SIZING ====================
+
+def available_memory_mb() -> Optional[int]:
+    """Memory available for new processes (MemAvailable on Linux), if known."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def pool_size_for(jobs: int, memory_per_worker_mb: int = RENDER_MEMORY_PER_WORKER_MB) -> int:
+    """
+    Render processes to use for a batch of jobs: one per job, bounded by
+    CPU cores and by how many renders fit in available memory.
+    """
+    workers = min(max(1, jobs), os.cpu_count() or 1)
+    memory = available_memory_mb()
+    if memory is not None and memory_per_worker_mb > 0:
+        workers = min(workers, max(1, memory // memory_per_worker_mb))
+    return workers
+
+
+# ==================== EXECUTOR ====================
+
+class RenderExecutor:
+    """
+    Process pool for renders, created on first use.
+
+    Args:
+        max_workers: Pool size; 0 runs renders inline in the caller
+            (still off the event loop when called from a worker thread)
+    """
+
+    def __init__(self, max_workers: int = RENDER_EXECUTOR_WORKERS):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager: Any = None
+        self._lock = threading.Lock()
+
+    def resize(self, max_workers: int) -> None:
+        """Change the pool size (idle pools are restarted lazily)."""
+        self.shutdown()
+        self.max_workers = max_workers
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                self._manager = context.Manager()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_render_process,
+                )
+                print(f"[render_executor] Started render pool with {self.max_workers} processes")
+            return self._pool
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, manager = self._pool, self._manager
+            self._pool = self._manager = None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        progress: Optional[ProgressCallback] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run a render function in the pool and await its result.
+
+        Args:
+            fn: Module-level function (sync or async) doing the render
+            *args, **kwargs: Its arguments (must be picklable)
+            progress: Called on the event loop with each progress event
+                ({"stage", "fraction", ...}); defaults to the callback
+                installed with tracking()
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            asyncio.CancelledError: If the awaiting task was cancelled (the
+                render is stopped at its next progress report)
+        """
+        if self.max_workers <= 0 or _IN_RENDER_PROCESS:
+            with tracking(progress):
+                result = fn(*args, **kwargs)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                return result
+
+        progress = progress or current_progress()
+        pool = self._get_pool()
+        events = self._manager.Queue()
+        cancel = self._manager.Event()
+        try:
+            future = pool.submit(_run_in_process, fn, args, kwargs, events, cancel)
+        except BrokenProcessPool:
+            # A render process died (e.g. OOM-killed); start a fresh pool
+            self.shutdown(wait=False)
+            pool = self._get_pool()
+            events, cancel = self._manager.Queue(), self._manager.Event()
+            future = pool.submit(_run_in_process, fn, args, kwargs, events, cancel)
+
+        waiter = asyncio.wrap_future(future)
+        try:
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=RENDER_PROGRESS_POLL_SECONDS)
+                _drain(events, progress)
+                if done:
+                    return waiter.result()
+        except asyncio.CancelledError:
+            future.cancel()
+            cancel.set()
+            print(f"[render_executor] Render {getattr(fn, '__name__', fn)} cancelled")
+            raise
+
+
+def _drain(events: Any, progress: Optional[ProgressCallback]) -> None:
+    while True:
+        try:
+            event = events.get_nowait()
+        except queue_module.Empty:
+            return
+        if progress is not None:
+            try:
+                progress(event)
+            except Exception as e:
+                print(f"[render_executor] Progress callback failed: {e}")
+
+
+# Shared executor used by the video renderers
+render_executor = RenderExecutor()
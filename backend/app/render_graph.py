@@ -0,0 +1,132 @@
+"""
+Render Task Graph
+Runs the steps of a render as a dependency graph instead of one after the
+other: every task starts as soon as the tasks it depends on have finished,
+so independent work (TTS, footage downloads, text rasterization) overlaps
+and a render takes about as long as its longest dependency chain.
+
+    graph = RenderGraph()
+    graph.add("tts", generate_voiceover, ...)
+    graph.add("text_1", rasterize, ...)
+    graph.add("scene_1", build_scene, deps=["tts", "text_1"])
+    results = await graph.run()
+
+- Async tasks run on the event loop; sync (CPU-bound) tasks run in threads,
+  at most RENDER_GRAPH_THREADS at a time per graph
+- A task receives its dependencies' results as positional arguments,
+  in the order of deps, after any arguments given to add()
+- If a task fails, the rest of the graph is cancelled and the error raised
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# ==================== CONFIGURATION ====================
+
+# Sync tasks (PIL rasterization, scene composition/caching) running at once
+RENDER_GRAPH_THREADS = int(os.getenv("RENDER_GRAPH_THREADS", str(min(4, os.cpu_count() or 2))))
+
+
+class _Task:
+    def __init__(self, name: str, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], deps: List[str]):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.deps = deps
+
+
+class RenderGraph:
+    """
+    Dependency graph of render tasks.
+
+    Args:
+        max_threads: Sync tasks allowed to run in threads at once
+    """
+
+    def __init__(self, max_threads: int = RENDER_GRAPH_THREADS):
+        self.max_threads = max(1, max_threads)
+        self._tasks: Dict[str, _Task] = {}
+        # Task name -> (start, end) seconds since run() started
+        self.timings: Dict[str, Tuple[float, float]] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        deps: Sequence[str] = (),
+        **kwargs: Any,
+    ) -> str:
+        """
+        Add a task. Dependencies must already be in the graph.
+
+        Returns:
+            The task name (for use in later deps)
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate render task: {name}")
+        missing = [dep for dep in deps if dep not in self._tasks]
+        if missing:
+            raise ValueError(f"Render task {name} depends on unknown tasks: {missing}")
+        self._tasks[name] = _Task(name, fn, args, kwargs, list(deps))
+        return name
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every task once its dependencies are done.
+
+        Returns:
+            Task name -> result
+        """
+        started = time.monotonic()
+        threads = asyncio.Semaphore(self.max_threads)
+        running: Dict[str, asyncio.Task] = {}
+
+        async def execute(task: _Task) -> Any:
+            inputs = [await running[dep] for dep in task.deps]
+            begin = time.monotonic() - started
+            if asyncio.iscoroutinefunction(task.fn):
+                result = await task.fn(*task.args, *inputs, **task.kwargs)
+            else:
+                async with threads:
+                    begin = time.monotonic() - started
+                    # to_thread carries the context, so report() still reaches the caller
+                    result = await asyncio.to_thread(task.fn, *task.args, *inputs, **task.kwargs)
+            self.timings[task.name] = (begin, time.monotonic() - started)
+            return result
+
+        # Tasks were added after their dependencies, so those already exist here
+        for task in self._tasks.values():
+            running[task.name] = asyncio.create_task(execute(task), name=f"render:{task.name}")
+
+        try:
+            await asyncio.gather(*running.values())
+        except BaseException:
+            for pending in running.values():
+                pending.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
+            raise
+
+        print(f"[render_graph] {len(running)} tasks in {time.monotonic() - started:.1f}s "
+              f"(critical path: {' → '.join(self.critical_path())})")
+        return {name: task.result() for name, task in running.items()}
+
+    def critical_path(self) -> List[str]:
+        """Chain of tasks that finished last, i.e. what the render waited on."""
+        if not self.timings:
+            return []
+        path: List[str] = []
+        # Latest finisher; on ties the task completed last (the dependent)
+        name: Optional[str] = max(reversed(list(self.timings)), key=lambda n: self.timings[n][1])
+        while name is not None:
+            path.append(name)
+            deps = [dep for dep in self._tasks[name].deps if dep in self.timings]
+            name = max(deps, key=lambda n: self.timings[n][1]) if deps else None
+        return list(reversed(path))
@@ -0,0 +1,360 @@
+"""
+Render Progress Store
+Structured progress for render jobs, shared between render workers and the
+API through the database (RenderProgressEvent table):
+- Render workers record each report() from the renderers (parse, footage,
+  TTS, per-scene render, encode percentage) plus job start/finish events
+- The API turns a job's events into a snapshot with overall progress, time
+  spent per stage and an ETA, and streams new events over SSE
+
+Encode progress arrives every 1%; writes for a stage are throttled to one
+per RENDER_PROGRESS_WRITE_SECONDS (stage changes and completions always go
+through).
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import RenderJob, RenderProgressEvent
+
+
+# ==================== CONFIGURATION ====================
+
+RENDER_PROGRESS_WRITE_SECONDS = float(os.getenv("RENDER_PROGRESS_WRITE_SECONDS", "1"))
+
+# How often the SSE stream checks for new events, and sends a keep-alive comment
+RENDER_PROGRESS_STREAM_SECONDS = float(os.getenv("RENDER_PROGRESS_STREAM_SECONDS", "1"))
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Completed jobs per kind used to learn how render time splits across stages
+RENDER_PROGRESS_HISTORY = int(os.getenv("RENDER_PROGRESS_HISTORY", "20"))
+STAGE_WEIGHTS_TTL_SECONDS = 300
+
+# No ETA until the render is at least this far along (early rates are noise)
+ETA_MIN_PROGRESS = 0.05
+
+# Render stages in pipeline order, with their default share of render time
+RENDER_STAGES = ("parse", "footage", "tts", "scene", "encode")
+DEFAULT_STAGE_WEIGHTS = {
+    "parse": 0.02,
+    "footage": 0.18,
+    "tts": 0.12,
+    "scene": 0.28,
+    "encode": 0.40,
+}
+
+# Job lifecycle events recorded by the render worker
+JOB_EVENTS = ("started", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime (sqlite returns naive values, postgres aware ones)."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def event_summary(event: RenderProgressEvent) -> Dict[str, Any]:
+    """API representation of a progress event."""
+    return {
+        "id": event.id,
+        "job_id": event.job_id,
+        "stage": event.stage,
+        "fraction": event.fraction,
+        "info": event.info or {},
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+# ==================== ANALYSIS ====================
+
+def stage_timings(events: List[RenderProgressEvent], started_at: Optional[datetime] = None) -> Dict[str, float]:
+    """
+    Seconds spent per stage.
+
+    The time between consecutive events is attributed to the stage of the
+    later event (a stage's report marks the end of the work it describes).
+    """
+    timings: Dict[str, float] = {}
+    previous = _utc_naive(started_at)
+    for event in events:
+        created = _utc_naive(event.created_at)
+        if event.stage not in JOB_EVENTS and previous is not None and created is not None:
+            timings[event.stage] = timings.get(event.stage, 0.0) + max(0.0, (created - previous).total_seconds())
+        previous = created
+    return timings
+
+
+def overall_progress(fractions: Dict[str, float], weights: Dict[str, float]) -> float:
+    """Weighted completion across render stages (0-1)."""
+    total = sum(weights.get(stage, 0.0) for stage in RENDER_STAGES)
+    if total <= 0:
+        return 0.0
+    done = sum(weights.get(stage, 0.0) * min(1.0, fractions.get(stage, 0.0)) for stage in RENDER_STAGES)
+    return done / total
+
+
+def estimate_remaining(elapsed: float, progress: float) -> Optional[float]:
+    """Seconds left at the average rate so far, or None until there is enough progress."""
+    if progress < ETA_MIN_PROGRESS:
+        return None
+    return max(0.0, elapsed * (1 - progress) / progress)
+
+
+# ==================== STORE ====================
+
+class RenderProgressStore:
+    """Record and read RenderProgressEvent rows."""
+
+    def __init__(self, db_engine: Any = engine, write_interval: float = RENDER_PROGRESS_WRITE_SECONDS):
+        self.engine = db_engine
+        self.write_interval = write_interval
+        self._table_ready = False
+        self._last_write: Dict[Tuple[int, str], float] = {}
+        self._weights: Dict[str, Tuple[float, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def _session(self) -> Session:
+        if not self._table_ready:
+            # Workers run outside the API process, so create the table on demand
+            RenderProgressEvent.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+        return Session(self.engine)
+
+    def _throttled(self, job_id: int, stage: str, fraction: Optional[float]) -> bool:
+        now = time.monotonic()
+        key = (job_id, stage)
+        with self._lock:
+            last = self._last_write.get(key)
+            if fraction not in (None, 1.0) and last is not None and now - last < self.write_interval:
+                return True
+            self._last_write[key] = now
+        return False
+
+    def record(
+        self,
+        job_id: int,
+        stage: str,
+        fraction: Optional[float] = None,
+        post_id: Optional[int] = None,
+        **info: Any,
+    ) -> bool:
+        """
+        Record a progress event.
+
+        Returns:
+            True if it was written, False if throttled
+        """
+        if self._throttled(job_id, stage, fraction):
+            return False
+        with self._session() as session:
+            session.add(RenderProgressEvent(
+                job_id=job_id, post_id=post_id, stage=stage, fraction=fraction, info=info or None,
+            ))
+            session.commit()
+        if stage in FINISHED_STATUSES:
+            with self._lock:
+                for key in [key for key in self._last_write if key[0] == job_id]:
+                    del self._last_write[key]
+        return True
+
+    def recorder(self, job_id: int, post_id: Optional[int] = None) -> Callable[[Dict[str, Any]], None]:
+        """Progress callback (render_executor event dicts) that records into the store."""
+        def _record(event: Dict[str, Any]) -> None:
+            info = {key: value for key, value in event.items() if key not in ("stage", "fraction")}
+            try:
+                self.record(job_id, event["stage"], event.get("fraction"), post_id=post_id, **info)
+            except Exception as e:
+                # Progress is best-effort; never fail a render over it
+                print(f"[render_progress] Could not record progress for job {job_id}: {e}")
+        return _record
+
+    def events(self, job_id: int, after_id: int = 0) -> List[RenderProgressEvent]:
+        with self._session() as session:
+            return list(session.exec(
+                select(RenderProgressEvent)
+                .where(RenderProgressEvent.job_id == job_id, RenderProgressEvent.id > after_id)
+                .order_by(RenderProgressEvent.id)
+            ).all())
+
+    def stage_weights(self, kind: str) -> Dict[str, float]:
+        """
+        Share of render time per stage for a job kind, learned from recently
+        completed jobs (DEFAULT_STAGE_WEIGHTS until there is history).
+        """
+        cached = self._weights.get(kind)
+        if cached and time.monotonic() - cached[0] < STAGE_WEIGHTS_TTL_SECONDS:
+            return cached[1]
+
+        with self._session() as session:
+            jobs = session.exec(
+                select(RenderJob)
+                .where(RenderJob.kind == kind, RenderJob.status == "completed")
+                .order_by(RenderJob.id.desc())
+                .limit(RENDER_PROGRESS_HISTORY)
+            ).all()
+            totals: Dict[str, float] = {}
+            for job in jobs:
+                events = session.exec(
+                    select(RenderProgressEvent)
+                    .where(RenderProgressEvent.job_id == job.id)
+                    .order_by(RenderProgressEvent.id)
+                ).all()
+                for stage, seconds in stage_timings(list(events), job.started_at).items():
+                    if stage in RENDER_STAGES:
+                        totals[stage] = totals.get(stage, 0.0) + seconds
+
+        total = sum(totals.values())
+        weights = {stage: seconds / total for stage, seconds in totals.items()} if total > 0 else DEFAULT_STAGE_WEIGHTS
+        self._weights[kind] = (time.monotonic(), weights)
+        return weights
+
+    def snapshot(self, job: RenderJob, events: Optional[List[RenderProgressEvent]] = None) -> Dict[str, Any]:
+        """
+        Current progress of a job: latest stage, overall completion, time per
+        stage and ETA.
+        """
+        if events is None:
+            events = self.events(job.id)
+
+        # Only the current attempt counts (a retried job starts over)
+        attempt_start = 0
+        for i, event in enumerate(events):
+            if event.stage == "started":
+                attempt_start = i
+        events = events[attempt_start:]
+
+        fractions: Dict[str, float] = {}
+        latest = None
+        for event in events:
+            if event.stage in JOB_EVENTS:
+                continue
+            latest = event
+            if event.fraction is not None:
+                fractions[event.stage] = event.fraction
+
+        started_at = _utc_naive(job.started_at) or (_utc_naive(events[0].created_at) if events else None)
+        finished_at = _utc_naive(job.completed_at) if job.status in FINISHED_STATUSES else None
+        elapsed = ((finished_at or datetime.utcnow()) - started_at).total_seconds() if started_at else 0.0
+
+        if job.status == "completed":
+            progress, eta = 1.0, 0.0
+        elif job.status == "running":
+            progress = overall_progress(fractions, self.stage_weights(job.kind))
+            eta = estimate_remaining(elapsed, progress)
+        else:
+            progress = overall_progress(fractions, self.stage_weights(job.kind))
+            eta = None
+
+        timings = stage_timings(events, started_at)
+        return {
+            "job_id": job.id,
+            "post_id": job.post_id,
+            "kind": job.kind,
+            "status": job.status,
+            "stage": latest.stage if latest else None,
+            "stage_fraction": latest.fraction if latest else None,
+            "detail": (latest.info or {}) if latest else {},
+            "progress": round(progress, 4),
+            "elapsed_seconds": round(max(0.0, elapsed), 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "stages": {
+                stage: {"fraction": fractions.get(stage), "seconds": round(timings.get(stage, 0.0), 2)}
+                for stage in dict.fromkeys(list(RENDER_STAGES) + list(timings))
+                if stage in fractions or stage in timings
+            },
+            "last_event_id": events[-1].id if events else None,
+        }
+
+
+# Shared instance used by the API and render workers
+render_progress = RenderProgressStore()
+
+
+def store_for(db_engine: Any) -> RenderProgressStore:
+    """Progress store on the same database as a render queue."""
+    if db_engine is render_progress.engine:
+        return render_progress
+    return RenderProgressStore(db_engine=db_engine)
+
+
+# ==================== STREAMING ====================
+
+def sse_message(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format one server-sent event."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, default=str)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream_progress(
+    get_job: Callable[[], Optional[RenderJob]],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    store: Optional[RenderProgressStore] = None,
+    last_event_id: int = 0,
+    poll_seconds: float = RENDER_PROGRESS_STREAM_SECONDS,
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for a render job until it finishes.
+
+    Sends a "progress" message (snapshot plus the events since the last
+    message) whenever new events arrive, then "done" with the final snapshot.
+    Message ids are progress event ids, so a reconnecting client resumes
+    from its Last-Event-ID.
+
+    Args:
+        get_job: Returns the job to follow (None while it is not queued yet)
+        is_disconnected: Awaitable check for the client going away
+        store: Progress store (defaults to render_progress)
+        last_event_id: Resume after this event id
+        poll_seconds: How often to check for new events
+    """
+    store = store or render_progress
+    events: List[RenderProgressEvent] = []
+    job_id: Optional[int] = None
+    last_sent = time.monotonic()
+    first = True
+
+    while not await is_disconnected():
+        job = get_job()
+        if job is not None and job.id != job_id:
+            # Following a (new) job: load its history for the snapshot
+            job_id = job.id
+            events = store.events(job.id)
+            first = True
+        elif job is not None:
+            events += store.events(job.id, after_id=events[-1].id if events else 0)
+
+        if job is not None:
+            new_events = [event for event in events if event.id > last_event_id]
+            finished = job.status in FINISHED_STATUSES
+            if new_events or first or finished:
+                snapshot = store.snapshot(job, events)
+                if new_events:
+                    last_event_id = new_events[-1].id
+                yield sse_message(
+                    "done" if finished else "progress",
+                    {**snapshot, "events": [event_summary(event) for event in new_events]},
+                    event_id=last_event_id or None,
+                )
+                last_sent = time.monotonic()
+                first = False
+                if finished:
+                    return
+
+        if time.monotonic() - last_sent >= STREAM_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(poll_seconds)
@@ -0,0 +1,385 @@
+"""
+Render Job Queue
+Database-backed queue (RenderJob table) that moves video renders out of
+API requests and the scheduler tick:
+- API endpoints enqueue a job and return 202 with its id
+- Render workers (app.render_worker) claim jobs under a lease and renew it
+  with heartbeats while rendering
+- A worker that dies stops heartbeating; once its lease expires the job is
+  claimed again, up to max_attempts
+
+Claims are compare-and-set UPDATEs, so any number of workers on any number
+of machines can share one database without double-rendering a job.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Post, RenderJob
+
+
+# ==================== CONFIGURATION ====================
+
+RENDER_LEASE_SECONDS = int(os.getenv("RENDER_LEASE_SECONDS", "120"))
+RENDER_HEARTBEAT_SECONDS = int(os.getenv("RENDER_HEARTBEAT_SECONDS", "30"))
+RENDER_MAX_ATTEMPTS = int(os.getenv("RENDER_MAX_ATTEMPTS", "3"))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Post status once its render job fails for good, or is cancelled, so the
+# scheduler does not queue the post again
+FAILED_POST_STATUS = {
+    "post_video": "failed",
+    "final_render": "video_failed",
+}
+CANCELLED_POST_STATUS = {
+    "post_video": "draft",
+    "final_render": "ready_for_review",
+}
+
+
+def dedupe_key(kind: str, post_id: Optional[int]) -> Optional[str]:
+    return f"{kind}:{post_id}" if post_id is not None else None
+
+
+def job_summary(job: RenderJob) -> Dict[str, Any]:
+    """API representation of a job."""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "post_id": job.post_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "worker_id": job.worker_id,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+# ==================== QUEUE ====================
+
+class RenderQueue:
+    """Enqueue, claim, heartbeat and finish RenderJob rows."""
+
+    def __init__(self, db_engine: Any = engine, lease_seconds: int = RENDER_LEASE_SECONDS):
+        self.engine = db_engine
+        self.lease_seconds = lease_seconds
+        self._table_ready = False
+
+    def _session(self) -> Session:
+        if not self._table_ready:
+            # Workers run outside the API process, so create the table on demand
+            RenderJob.__table__.create(self.engine, checkfirst=True)
+            self._table_ready = True
+        return Session(self.engine)
+
+    def enqueue(
+        self,
+        kind: str,
+        post_id: Optional[int] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        max_attempts: int = RENDER_MAX_ATTEMPTS,
+    ) -> RenderJob:
+        """
+        Queue a render. A post already queued or running for the same kind
+        returns the existing job instead of a duplicate.
+
+        Args:
+            kind: Job kind (see app.render_worker.HANDLERS)
+            post_id: Post to render, if any
+            payload: Handler arguments (profile, preview, ...)
+            priority: Higher values are claimed first
+
+        Returns:
+            The queued (or already active) job
+        """
+        key = dedupe_key(kind, post_id)
+        with self._session() as session:
+            job = RenderJob(
+                kind=kind,
+                post_id=post_id,
+                payload=payload or {},
+                priority=priority,
+                max_attempts=max_attempts,
+                dedupe_key=key,
+            )
+            session.add(job)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                job = session.exec(select(RenderJob).where(RenderJob.dedupe_key == key)).first()
+                if job is None:
+                    # The active job finished in between; queue a fresh one
+                    return self.enqueue(kind, post_id, payload, priority, max_attempts)
+                print(f"[render_queue] {key} already {job.status} as job {job.id}")
+                return job
+            session.refresh(job)
+            print(f"[render_queue] Queued {kind} job {job.id} (post {post_id})")
+            return job
+
+    def get(self, job_id: int) -> Optional[RenderJob]:
+        with self._session() as session:
+            return session.get(RenderJob, job_id)
+
+    def active_job(self, kind: str, post_id: int) -> Optional[RenderJob]:
+        with self._session() as session:
+            return session.exec(
+                select(RenderJob).where(RenderJob.dedupe_key == dedupe_key(kind, post_id))
+            ).first()
+
+    def _claimable(self, now: datetime) -> Any:
+        expired = and_(
+            RenderJob.status == "running",
+            RenderJob.lease_expires_at < now,
+            RenderJob.attempts < RenderJob.max_attempts,
+        )
+        return or_(RenderJob.status == "queued", expired)
+
+    def set_post_status(self, kind: str, post_id: Optional[int], statuses: Dict[str, str]) -> None:
+        """Move a job's post out of the render queue (see FAILED/CANCELLED_POST_STATUS)."""
+        status = statuses.get(kind)
+        if not status or post_id is None:
+            return
+        with self._session() as session:
+            post = session.get(Post, post_id)
+            if post:
+                post.status = status
+                post.updated_at = datetime.utcnow()
+                session.add(post)
+                session.commit()
+
+    def reap_expired(self) -> int:
+        """Fail jobs whose lease expired on their last attempt (and their posts)."""
+        now = datetime.utcnow()
+        with self._session() as session:
+            reaped = session.exec(
+                update(RenderJob)
+                .where(
+                    RenderJob.status == "running",
+                    RenderJob.lease_expires_at < now,
+                    RenderJob.attempts >= RenderJob.max_attempts,
+                )
+                .values(
+                    status="failed",
+                    error="Lease expired (worker stopped heartbeating)",
+                    dedupe_key=None,
+                    completed_at=now,
+                )
+                .returning(RenderJob.kind, RenderJob.post_id)
+            ).all()
+            session.commit()
+
+        for kind, post_id in reaped:
+            self.set_post_status(kind, post_id, FAILED_POST_STATUS)
+        return len(reaped)
+
+    def claim(self, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[RenderJob]:
+        """
+        Atomically take the next job (highest priority, then oldest).
+
+        Queued jobs and running jobs with an expired lease are claimable.
+        The claim is one UPDATE ... WHERE id = (next claimable) RETURNING
+        statement; on PostgreSQL the subquery uses FOR UPDATE SKIP LOCKED so
+        concurrent workers pass over each other's rows instead of waiting,
+        and SQLite serializes writers. Either way a job has exactly one owner.
+
+        Returns:
+            The claimed job, or None when the queue is empty
+        """
+        self.reap_expired()
+        now = datetime.utcnow()
+
+        next_job = (
+            select(RenderJob.id)
+            .where(self._claimable(now))
+            .order_by(RenderJob.priority.desc(), RenderJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if kinds:
+            next_job = next_job.where(RenderJob.kind.in_(list(kinds)))
+
+        with self._session() as session:
+            job_id = session.exec(
+                update(RenderJob)
+                .where(RenderJob.id == next_job.scalar_subquery(), self._claimable(now))
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    attempts=RenderJob.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    heartbeat_at=now,
+                    started_at=now,
+                )
+                .returning(RenderJob.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            session.commit()
+            if job_id is None:
+                return None
+
+            job = session.get(RenderJob, job_id)
+            print(f"[render_queue] {worker_id} claimed job {job.id} ({job.kind}, attempt {job.attempts})")
+            return job
+
+    def enqueue_posts(self, kind: str, post_ids: Iterable[int], payload: Optional[Dict[str, Any]] = None) -> List[int]:
+        """
+        Queue a job per post in one INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+        Posts that already have an active job for this kind are skipped
+        atomically by the dedupe_key unique index, so concurrent callers
+        (one scheduler per uvicorn worker) never queue a post twice.
+
+        Returns:
+            Ids of the posts that were queued by this call
+        """
+        rows = [
+            {
+                "kind": kind,
+                "post_id": post_id,
+                "payload": payload or {},
+                "status": "queued",
+                "priority": 0,
+                "dedupe_key": dedupe_key(kind, post_id),
+                "attempts": 0,
+                "max_attempts": RENDER_MAX_ATTEMPTS,
+                "created_at": datetime.utcnow(),
+            }
+            for post_id in post_ids
+        ]
+        if not rows:
+            return []
+
+        insert = pg_insert if self.engine.dialect.name == "postgresql" else sqlite_insert
+        with self._session() as session:
+            queued = session.exec(
+                insert(RenderJob)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["dedupe_key"])
+                .returning(RenderJob.post_id)
+            ).scalars().all()
+            session.commit()
+
+        if queued:
+            print(f"[render_queue] Queued {kind} jobs for posts {queued}")
+        return list(queued)
+
+    def _owned(self, job_id: int, worker_id: str) -> Any:
+        return and_(RenderJob.id == job_id, RenderJob.worker_id == worker_id, RenderJob.status == "running")
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease on a running job.
+
+        Returns:
+            False if the worker no longer owns the job (lease lost or cancelled)
+        """
+        now = datetime.utcnow()
+        with self._session() as session:
+            result = session.exec(
+                update(RenderJob)
+                .where(self._owned(job_id, worker_id))
+                .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a job completed. Returns False if the worker lost the job meanwhile."""
+        now = datetime.utcnow()
+        with self._session() as session:
+            updated = session.exec(
+                update(RenderJob)
+                .where(self._owned(job_id, worker_id))
+                .values(
+                    status="completed",
+                    result=result or {},
+                    error=None,
+                    dedupe_key=None,
+                    lease_expires_at=None,
+                    completed_at=now,
+                )
+            )
+            session.commit()
+            return updated.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt; the job is queued again until max_attempts,
+        then its post is marked failed.
+
+        Returns:
+            New status ("queued" or "failed"), or None if the worker lost the job
+        """
+        now = datetime.utcnow()
+        with self._session() as session:
+            job = session.get(RenderJob, job_id)
+            if job is None or job.worker_id != worker_id or job.status != "running":
+                return None
+            kind, post_id = job.kind, job.post_id
+
+            if retry and job.attempts < job.max_attempts:
+                values: Dict[str, Any] = {"status": "queued", "worker_id": None, "lease_expires_at": None}
+            else:
+                values = {"status": "failed", "dedupe_key": None, "lease_expires_at": None, "completed_at": now}
+
+            updated = session.exec(
+                update(RenderJob).where(self._owned(job_id, worker_id)).values(error=error[:2000], **values)
+            )
+            session.commit()
+            if updated.rowcount != 1:
+                return None
+
+        if values["status"] == "failed":
+            self.set_post_status(kind, post_id, FAILED_POST_STATUS)
+        return values["status"]
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job (a running render's result is discarded)."""
+        with self._session() as session:
+            cancelled = session.exec(
+                update(RenderJob)
+                .where(RenderJob.id == job_id, RenderJob.status.in_(ACTIVE_STATUSES))
+                .values(status="cancelled", dedupe_key=None, lease_expires_at=None,
+                        completed_at=datetime.utcnow())
+                .returning(RenderJob.kind, RenderJob.post_id)
+            ).first()
+            session.commit()
+
+        if cancelled is None:
+            return False
+        self.set_post_status(cancelled.kind, cancelled.post_id, CANCELLED_POST_STATUS)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._session() as session:
+            rows = session.exec(select(RenderJob.status, func.count()).group_by(RenderJob.status)).all()
+            return {status: count for status, count in rows}
+
+    def list_jobs(self, post_id: Optional[int] = None, limit: int = 20) -> List[RenderJob]:
+        with self._session() as session:
+            stmt = select(RenderJob).order_by(RenderJob.id.desc()).limit(limit)
+            if post_id is not None:
+                stmt = stmt.where(RenderJob.post_id == post_id)
+            return list(session.exec(stmt).all())
+
+
+# Shared instance used by the API and render workers
+render_queue = RenderQueue()
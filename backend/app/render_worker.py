@@ -0,0 +1,342 @@
+"""
+Render Worker
+Separate entry point that runs video renders from the RenderJob queue, so
+MoviePy encodes never block the API:
+
+    python -m app.render_worker --workers 2
+
+Each worker is its own process with one claim loop; the CPU-bound encode
+itself runs in the worker's render process (render_executor), so the loop
+and its heartbeat stay responsive. While a job renders, a heartbeat thread
+renews its lease; if the process dies the lease expires and another worker
+picks the job up. If the lease is lost (expired or cancelled through the
+API) the running render is cancelled. Workers on several machines can
+share the same database.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlmodel import Session
+
+from app.database import engine
+from app.models import Asset, Post, RenderJob
+from app.render_executor import render_executor, report, tracking
+from app.render_progress import RenderProgressStore, store_for
+from app.render_queue import RENDER_HEARTBEAT_SECONDS, RenderQueue, render_queue
+
+
+# ==================== CONFIGURATION ====================
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_POLL_SECONDS = float(os.getenv("RENDER_POLL_SECONDS", "2"))
+
+# Render processes per worker (each worker runs one job at a time)
+RENDER_WORKER_EXECUTOR_SIZE = int(os.getenv("RENDER_WORKER_EXECUTOR_SIZE", "1"))
+
+Handler = Callable[[RenderJob], Awaitable[Dict[str, Any]]]
+
+
+def _load_post(session: Session, job: RenderJob) -> Post:
+    post = session.get(Post, job.post_id)
+    if not post:
+        raise RuntimeError(f"Post {job.post_id} not found")
+    return post
+
+
+# ==================== HANDLERS ====================
+
+async def render_post_video(job: RenderJob) -> Dict[str, Any]:
+    """Video for a newly approved post (replaces the inline approve render)."""
+    from app import video_generator
+
+    with Session(engine) as session:
+        post = _load_post(session, job)
+    result = await video_generator.generate_video_for_post(post)
+    return {"video_url": result.get("video_url"), "asset_id": result.get("asset_id")}
+
+
+async def _render_script(
+    job: RenderJob,
+    generate: Callable[..., Awaitable[Dict[str, Any]]],
+    extra_args: Callable[[Post], Dict[str, Any]],
+) -> Dict[str, Any]:
+    from app import preview_renders
+
+    payload = job.payload or {}
+    with Session(engine) as session:
+        post = _load_post(session, job)
+        if not post.body:
+            raise RuntimeError("Post has no script")
+
+        result = await generate(script=post.body, profile=payload.get("profile"), **extra_args(post))
+        if not result.get("success"):
+            raise RuntimeError(result.get("error", "Unknown error"))
+
+        output = {"video_path": result["video_path"], "profile": result.get("profile"),
+                  "duration": result.get("duration"), "scenes": result.get("scenes")}
+        if payload.get("preview"):
+            preview = preview_renders.save_post_preview(
+                session, post, result["video_path"], result.get("profile"), renderer=job.kind
+            )
+            output["video_path"] = preview["video_path"]
+            output["preview"] = preview_renders.preview_summary(post)
+            report("preview", 1.0)
+        return output
+
+
+async def render_pro_video(job: RenderJob) -> Dict[str, Any]:
+    """Scene-by-scene render (video_production), optionally as a review preview."""
+    from app import video_production
+
+    return await _render_script(
+        job, video_production.generate_video_from_script,
+        extra_args=lambda post: {"title": post.title or "Untitled"},
+    )
+
+
+async def render_competitor_video(job: RenderJob) -> Dict[str, Any]:
+    """Competitor-style 30s render, optionally as a review preview."""
+    from app import video_competitor_exact
+
+    return await _render_script(
+        job, video_competitor_exact.generate_exact_competitor_video,
+        extra_args=lambda post: {"title": post.title or "AI News", "add_voiceover": True},
+    )
+
+
+# Preview renderer -> handler that renders its full-quality version
+SCRIPT_RENDERERS: Dict[str, Handler] = {
+    "pro_video": render_pro_video,
+    "competitor_video": render_competitor_video,
+}
+
+
+async def render_final(job: RenderJob) -> Dict[str, Any]:
+    """
+    Full-quality render deferred from a review preview.
+
+    Uses the renderer that made the preview, so the approved video is the
+    one that ships (M03 previews go through the M03 assembly).
+    """
+    from app import preview_renders
+
+    with Session(engine) as session:
+        renderer = preview_renders.preview_renderer(_load_post(session, job))
+
+    handler = SCRIPT_RENDERERS.get(renderer)
+    if handler is None:
+        from app.jobs.m03_video_assembly import render_final_video
+
+        video_path = await render_final_video(job.post_id, (job.payload or {}).get("profile"))
+        if not video_path:
+            raise RuntimeError("Final render failed")
+        return {"video_path": video_path}
+
+    output = await handler(job)
+    with Session(engine) as session:
+        post = _load_post(session, job)
+        session.add(Asset(post_id=post.id, type="video", path=output["video_path"]))
+        post.status = "approved"
+        post.updated_at = datetime.utcnow()
+        session.add(post)
+        session.commit()
+    return {**output, "renderer": renderer}
+
+
+HANDLERS: Dict[str, Handler] = {
+    "post_video": render_post_video,
+    "final_render": render_final,
+    "pro_video": render_pro_video,
+    "competitor_video": render_competitor_video,
+}
+
+
+# ==================== WORKER ====================
+
+class Heartbeat(threading.Thread):
+    """
+    Renews a job's lease from a thread, so it keeps beating even if a
+    handler blocks the event loop. on_lost is called (from this thread)
+    when the lease can no longer be renewed.
+    """
+
+    def __init__(
+        self,
+        queue: RenderQueue,
+        job_id: int,
+        worker_id: str,
+        interval: float = RENDER_HEARTBEAT_SECONDS,
+        on_lost: Optional[Callable[[], None]] = None,
+    ):
+        super().__init__(daemon=True, name=f"heartbeat-{job_id}")
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.on_lost = on_lost
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.job_id, self.worker_id):
+                    print(f"[render_worker] {self.worker_id} lost job {self.job_id} (lease expired or cancelled)")
+                    self.lost = True
+                    if self.on_lost:
+                        self.on_lost()
+                    return
+            except Exception as e:
+                print(f"[render_worker] Heartbeat failed for job {self.job_id}: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+async def run_job(
+    queue: RenderQueue,
+    job: RenderJob,
+    worker_id: str,
+    heartbeat_seconds: float = RENDER_HEARTBEAT_SECONDS,
+    progress_store: Optional[RenderProgressStore] = None,
+) -> Optional[str]:
+    """
+    Run one claimed job to completion or failure.
+
+    Progress reported by the handler and its renders is recorded in the
+    progress store, bracketed by started/completed/failed/cancelled events.
+
+    Returns:
+        Final status recorded for the job, or None if the worker lost it
+    """
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        return queue.fail(job.id, worker_id, f"Unknown job kind '{job.kind}'", retry=False)
+
+    progress = (progress_store or store_for(queue.engine)).recorder(job.id, job.post_id)
+    progress({"stage": "started", "attempt": job.attempts, "worker_id": worker_id})
+
+    loop = asyncio.get_running_loop()
+    with tracking(progress):
+        task = asyncio.ensure_future(handler(job))
+    heartbeat = Heartbeat(
+        queue, job.id, worker_id, interval=heartbeat_seconds,
+        on_lost=lambda: loop.call_soon_threadsafe(task.cancel),
+    )
+    heartbeat.start()
+    try:
+        result = await task
+    except asyncio.CancelledError:
+        if not heartbeat.lost:
+            raise
+        print(f"[render_worker] Job {job.id} ({job.kind}) render cancelled")
+        progress({"stage": "cancelled"})
+        return None
+    except Exception as e:
+        print(f"[render_worker] Job {job.id} ({job.kind}) failed: {e}")
+        status = queue.fail(job.id, worker_id, str(e))
+        progress({"stage": "failed", "error": str(e), "retrying": status == "queued"})
+        return status
+    finally:
+        heartbeat.stop()
+
+    if queue.complete(job.id, worker_id, result):
+        print(f"[render_worker] ✅ Job {job.id} ({job.kind}) completed")
+        progress({"stage": "completed"})
+        return "completed"
+    print(f"[render_worker] Job {job.id} finished after its lease was lost; result discarded")
+    return None
+
+
+async def worker_loop(
+    worker_id: str,
+    queue: RenderQueue = render_queue,
+    kinds: Optional[List[str]] = None,
+    poll_seconds: float = RENDER_POLL_SECONDS,
+    max_jobs: Optional[int] = None,
+) -> int:
+    """
+    Claim and run jobs until stopped (or until max_jobs have run).
+
+    Returns:
+        Number of jobs run
+    """
+    print(f"[render_worker] {worker_id} started")
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id, kinds)
+        if job is None:
+            if max_jobs is not None:
+                break
+            await asyncio.sleep(poll_seconds)
+            continue
+        await run_job(queue, job, worker_id)
+        processed += 1
+    return processed
+
+
+def _worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def run_worker_process(index: int, kinds: Optional[List[str]] = None) -> None:
+    render_executor.resize(RENDER_WORKER_EXECUTOR_SIZE)
+    try:
+        asyncio.run(worker_loop(_worker_id(index), kinds=kinds))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        render_executor.shutdown(wait=False)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run video render workers")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=RENDER_WORKERS,
+        help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--kinds",
+        nargs="*",
+        choices=list(HANDLERS),
+        default=None,
+        help="Only run these job kinds (default: all)"
+    )
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker_process(0, args.kinds)
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker_process, args=(i, args.kinds), name=f"render-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"[render_worker] Started {len(processes)} workers")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,18 +7,23 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Body, Request
+from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI
 from sqlmodel import Session, select, func
 
 from app.database import engine
 from app.models import Post
 from app import publishing
-from app import video_generator
 from app import content_scraper
 from app import scheduler
 from app import video_production
 from app import video_competitor_exact
+from app import encoding_profiles
+from app import preview_renders
+from app.render_executor import render_executor, render_logger
+from app.render_progress import event_summary, render_progress, stream_progress
+from app.render_queue import job_summary, render_queue
 from app import schemas_news
 
 # Create router
@@ -26,16 +31,29 @@ router = APIRouter()
 
 # Import job functions
 from app.jobs.m02_media_production import run_m02_job
+from app.jobs.voice_assignment import run_voice_assignment_job
 
 @router.post("/api/jobs/m02")
 async def trigger_m02_job(
     background_tasks: BackgroundTasks,
+    batch_size: Optional[int] = Query(None, ge=0, description="Articles to process (0 = whole backlog)"),
 ):
     """Trigger M02 media production job in background."""
     print("[api] POST /api/jobs/m02 called")
-    background_tasks.add_task(run_m02_job)
+    background_tasks.add_task(run_m02_job, batch_size)
     return {"message": "M02 job triggered in background"}
 
+@router.post("/api/jobs/voice-assignment")
+async def trigger_voice_assignment_job(
+    background_tasks: BackgroundTasks,
+    reassign: bool = Query(False, description="Replace voices already chosen"),
+    presynthesize: Optional[bool] = Query(None, description="Synthesize voiceovers for approved posts"),
+):
+    """Trigger bulk voice assignment (and voiceover pre-synthesis) in background."""
+    print("[api] POST /api/jobs/voice-assignment called")
+    background_tasks.add_task(run_voice_assignment_job, reassign, presynthesize)
+    return {"message": "Voice assignment job triggered in background"}
+
 @router.post("/api/admin/migrate")
 async def trigger_migration():
     """Run database migrations to add new columns."""
@@ -195,6 +213,8 @@ async def get_queue(
                     "updated_at": post.updated_at.isoformat() if post.updated_at else None,
                     # Include video assets
                     "assets": assets_map.get(post.id, []),
+                    # Proxy render (video, poster, sprite strip) awaiting review
+                    "preview": preview_renders.preview_summary(post),
                 }
                 for post in posts
             ],
@@ -280,6 +300,7 @@ async def approve_post(
 
         # If it's a text post, create a corresponding video post
         video_post_id = None
+        render_job_id = None
         if post.kind == "text":
             # Generate video script from the text post
             try:
@@ -337,19 +358,11 @@ async def approve_post(
                 print(
                     f"[api] Created video post {video_post_id} for text post {post_id}")
 
-                # Now trigger video generation IMMEDIATELY
+                # Queue video generation for the render workers
+                render_job = render_queue.enqueue("post_video", video_post_id)
+                render_job_id = render_job.id
                 print(
-                    f"[api] Starting video generation for post {video_post_id}...")
-                try:
-                    video_result = await video_generator.generate_video_for_post(video_post)
-                    print(
-                        f"[api] ✅ Video generated successfully: {video_result.get('video_url', 'No URL')}")
-                except Exception as video_error:
-                    print(
-                        f"[api] ❌ Video generation failed: {str(video_error)}")
-                    import traceback
-                    traceback.print_exc()
-                    # Post stays in video_production status - will retry via scheduler
+                    f"[api] Queued video generation for post {video_post_id} (job {render_job_id})")
             except Exception as e:
                 print(f"[api] Error generating video script: {str(e)}")
                 import traceback
@@ -363,6 +376,7 @@ async def approve_post(
         return {
             "message": "Post approved successfully. Video creation started." if post.kind == "text" and video_post_id else "Post approved successfully",
             "video_post_id": video_post_id,
+            "render_job_id": render_job_id,
             "scheduled_at": post.scheduled_at.isoformat() if post.scheduled_at else None,
         }
     except HTTPException:
@@ -396,6 +410,9 @@ async def reject_post(
         session.add(post)
         session.commit()
 
+        # Rejected drafts never get a full render; drop the proxy too
+        preview_renders.remove_preview(post_id)
+
         return {"message": "Post rejected (soft deleted) successfully"}
     except HTTPException:
         raise
@@ -684,7 +701,11 @@ async def approve_video(
     body_data: Dict[str, Any] = Body(...),
     session: Session = Depends(get_session)
 ) -> Dict[str, Any]:
-    """Approve a video post and trigger video generation."""
+    """
+    Approve a video post and trigger video generation.
+
+    Posts reviewed from a proxy preview get their full-quality render now.
+    """
     try:
         print(f"[api] POST /api/content/{post_id}/approve-video called")
 
@@ -701,8 +722,15 @@ async def approve_video(
 
         schedule_immediately = body_data.get("schedule_immediately", False)
 
+        from app.models import Asset
+        has_final_video = session.exec(
+            select(Asset).where(Asset.post_id == post_id, Asset.type == "video")
+        ).first() is not None
+        render_final = preview_renders.has_preview(post) and not has_final_video
+
         # Update status - video posts go to video_production first
-        post.status = "video_production"
+        # (video_rendering while the deferred full render runs)
+        post.status = "video_rendering" if render_final else "video_production"
 
         # Set scheduled_at based on schedule_immediately flag
         if schedule_immediately:
@@ -718,9 +746,19 @@ async def approve_video(
 
         print(f"[api] Video post {post_id} approved, status: {post.status}")
 
+        # Rendered by the same renderer as the preview (see render_worker.render_final)
+        render_job = (
+            render_queue.enqueue("final_render", post_id, payload={"profile": "publish"})
+            if render_final else None
+        )
+        if render_job:
+            print(f"[api] Full-quality render queued for post {post_id} (job {render_job.id})")
+
         return {
             "message": "Video post approved and queued for production",
             "status": post.status,
+            "full_render_started": render_final,
+            "render_job_id": render_job.id if render_job else None,
             "scheduled_at": post.scheduled_at.isoformat() if post.scheduled_at else None,
         }
     except HTTPException:
@@ -928,9 +966,9 @@ async def regenerate_video(
             session.commit()
             session.refresh(post)
 
-            # Video regeneration will be processed by scheduler
+            render_job = render_queue.enqueue("post_video", post_id)
             print(
-                f"[api] Video regeneration queued for post {post_id} (status: video_production)")
+                f"[api] Video regeneration queued for post {post_id} (job {render_job.id})")
 
             print(
                 f"[api] Regenerated video script for post {post_id}, preserved context")
@@ -939,6 +977,7 @@ async def regenerate_video(
                 "message": "Video script regenerated successfully, video generation started",
                 "status": post.status,
                 "post_id": post_id,
+                "job_id": render_job.id,
                 "updated_post": {
                     "id": post.id,
                     "body": post.body,
@@ -1028,12 +1067,16 @@ async def get_video_status(
                                    post_id, Asset.type == "video")
         assets = session.exec(stmt).all()
 
+        latest_job = _latest_render_job(post_id)
+
         return {
             "post_id": post_id,
             "status": post.status,
             "has_video": len(assets) > 0,
             "video_url": assets[0].path if assets else None,
             "asset_id": assets[0].id if assets else None,
+            "render": render_progress.snapshot(latest_job) if latest_job else None,
+            "stream_url": f"/api/content/{post_id}/video-status/stream",
         }
     except HTTPException:
         raise
@@ -1043,7 +1086,49 @@ async def get_video_status(
             status_code=500, detail=f"Error fetching video status: {str(e)}")
 
 
-@router.post("/api/content/{post_id}/generate-video")
+def _latest_render_job(post_id: int):
+    jobs = render_queue.list_jobs(post_id=post_id, limit=1)
+    return jobs[0] if jobs else None
+
+
+def _progress_stream_response(request: Request, get_job, last_event_id: Optional[str]) -> StreamingResponse:
+    try:
+        resume_after = int(last_event_id or 0)
+    except ValueError:
+        resume_after = 0
+    return StreamingResponse(
+        stream_progress(get_job, request.is_disconnected, last_event_id=resume_after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/api/content/{post_id}/video-status/stream")
+async def stream_video_status(
+    post_id: int,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    session: Session = Depends(get_session)
+) -> StreamingResponse:
+    """
+    Server-sent render progress for a post's latest render job.
+
+    Waits for a job if the post is not queued yet, then streams "progress"
+    messages (stage, overall progress, ETA) until a final "done".
+    """
+    try:
+        if not session.get(Post, post_id):
+            raise HTTPException(status_code=404, detail="Post not found")
+        return _progress_stream_response(request, lambda: _latest_render_job(post_id), last_event_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[api] Error streaming video status: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error streaming video status: {str(e)}")
+
+
+@router.post("/api/content/{post_id}/generate-video", status_code=202)
 async def trigger_video_generation(
     post_id: int,
     session: Session = Depends(get_session)
@@ -1066,15 +1151,15 @@ async def trigger_video_generation(
         session.commit()
         session.refresh(post)
 
-        # Video generation will be processed by scheduler automatically
-        # Status is set to video_production, scheduler will process it
+        render_job = render_queue.enqueue("post_video", post_id)
         print(
-            f"[api] Video generation queued for post {post_id} (status: video_production)")
+            f"[api] Video generation queued for post {post_id} (job {render_job.id})")
 
         return {
             "message": "Video generation started",
             "status": post.status,
             "post_id": post_id,
+            "job_id": render_job.id,
         }
     except HTTPException:
         raise
@@ -1084,6 +1169,101 @@ async def trigger_video_generation(
             status_code=500, detail=f"Error triggering video generation: {str(e)}")
 
 
+# ==================== Render Jobs ====================
+
+@router.get("/api/render-jobs")
+async def list_render_jobs(
+    post_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=100)
+) -> Dict[str, Any]:
+    """List recent render jobs (optionally for one post) with queue totals."""
+    try:
+        jobs = render_queue.list_jobs(post_id=post_id, limit=limit)
+        return {
+            "jobs": [job_summary(job) for job in jobs],
+            "counts": render_queue.stats(),
+        }
+    except Exception as e:
+        print(f"[api] Error listing render jobs: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error listing render jobs: {str(e)}")
+
+
+@router.get("/api/render-jobs/{job_id}")
+async def get_render_job(job_id: int) -> Dict[str, Any]:
+    """Get the status (and result once completed) of a render job."""
+    try:
+        job = render_queue.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Render job not found")
+        return job_summary(job)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[api] Error fetching render job: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching render job: {str(e)}")
+
+
+@router.get("/api/render-jobs/{job_id}/progress")
+async def get_render_job_progress(job_id: int) -> Dict[str, Any]:
+    """Progress snapshot (stage, ETA, seconds per stage) and the event log of a render job."""
+    try:
+        job = render_queue.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Render job not found")
+        events = render_progress.events(job_id)
+        return {
+            "job": job_summary(job),
+            "progress": render_progress.snapshot(job, events),
+            "events": [event_summary(event) for event in events],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[api] Error fetching render progress: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching render progress: {str(e)}")
+
+
+@router.get("/api/render-jobs/{job_id}/stream")
+async def stream_render_job_progress(
+    job_id: int,
+    request: Request,
+    last_event_id: Optional[str] = Header(None)
+) -> StreamingResponse:
+    """Server-sent progress for a render job until it completes, fails or is cancelled."""
+    try:
+        if not render_queue.get(job_id):
+            raise HTTPException(status_code=404, detail="Render job not found")
+        return _progress_stream_response(request, lambda: render_queue.get(job_id), last_event_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[api] Error streaming render progress: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error streaming render progress: {str(e)}")
+
+
+@router.post("/api/render-jobs/{job_id}/cancel")
+async def cancel_render_job(job_id: int) -> Dict[str, Any]:
+    """Cancel a queued or running render job."""
+    try:
+        job = render_queue.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Render job not found")
+        if not render_queue.cancel(job_id):
+            raise HTTPException(
+                status_code=409, detail=f"Render job is already {job.status}")
+        return job_summary(render_queue.get(job_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[api] Error cancelling render job: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error cancelling render job: {str(e)}")
+
+
 # ==================== Publish Post ====================
 
 @router.post("/api/publish/{post_id}")
@@ -1162,6 +1342,234 @@ async def debug_posts() -> Dict[str, Any]:
 
 # ==================== TEST VIDEO GENERATION (COMPETITOR STYLE) ====================
 
+def _render_competitor_test_video(post_id: int, title: str, audio_path: Optional[str]) -> str:
+    """
+    Steps 4-9 of the competitor-test route: scenes, audio and export.
+
+    CPU-bound MoviePy work, so the route runs it in the render process pool.
+
+    Returns:
+        Path of the exported video
+    """
+    import traceback
+    import numpy as np
+    from moviepy.editor import ImageClip, concatenate_videoclips
+    from PIL import Image, ImageDraw, ImageFont
+
+    # Step 4: Define helper functions for PIL text rendering
+    def _load_bold_font(fontsize: int) -> ImageFont.FreeTypeFont:
+        """Load a bold font, trying multiple common paths."""
+        font_paths = [
+            "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+            "/Library/Fonts/Arial Bold.ttf",
+            "/System/Library/Fonts/Helvetica.ttc",
+            "/System/Library/Fonts/Supplemental/Impact.ttf",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+            "C:\\Windows\\Fonts\\arialbd.ttf",
+        ]
+        for path in font_paths:
+            if os.path.exists(path):
+                try:
+                    return ImageFont.truetype(path, fontsize)
+                except Exception:
+                    continue
+        try:
+            return ImageFont.load_default()
+        except Exception:
+            return ImageFont.load_default()
+
+    def create_text_image_pil(text: str, fontsize: int, color: str, stroke_color: str, stroke_width: int, size=(1080, 1920), max_width=900):
+        """Create text image using PIL (no ImageMagick required)."""
+        img = Image.new('RGBA', size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        font = _load_bold_font(fontsize)
+
+        # Handle multi-line text wrapping
+        words = text.split()
+        lines = []
+        current_line = ""
+        for word in words:
+            test_line = current_line + " " + word if current_line else word
+            bbox = draw.textbbox((0, 0), test_line, font=font)
+            test_width = bbox[2] - bbox[0]
+            if test_width <= max_width:
+                current_line = test_line
+            else:
+                if current_line:
+                    lines.append(current_line)
+                current_line = word
+        if current_line:
+            lines.append(current_line)
+
+        # Calculate total height
+        line_heights = []
+        line_widths = []
+        for line in lines:
+            bbox = draw.textbbox((0, 0), line, font=font)
+            line_widths.append(bbox[2] - bbox[0])
+            line_heights.append(bbox[3] - bbox[1])
+
+        total_height = sum(line_heights) + (len(lines) - 1) * 20
+        start_y = (size[1] - total_height) // 2
+
+        # Draw each line
+        current_y = start_y
+        for line, line_width, line_height in zip(lines, line_widths, line_heights):
+            x = (size[0] - line_width) // 2
+            if stroke_width > 0:
+                for adj_x in range(-stroke_width, stroke_width + 1):
+                    for adj_y in range(-stroke_width, stroke_width + 1):
+                        draw.text((x + adj_x, current_y + adj_y), line, font=font, fill=stroke_color)
+            draw.text((x, current_y), line, font=font, fill=color)
+            current_y += line_height + 20
+
+        # Return RGBA image (MoviePy's ImageClip handles transparency correctly)
+        return img  # Keep RGBA for transparency
+
+    # Step 5: Create scenes
+    print("\n[STEP 4] Creating scene structure...")
+    SCENES = [
+        {"duration": 6, "text": "🚨 BREAKING NEWS", "color": "#000000",
+            "size": 100, "keywords": ["ai", "technology"]},  # Black text on yellow bg
+        {"duration": 6, "text": title[:50], "color": "#FFFFFF", "size": 60, "keywords": [
+            "developer", "coding"]},  # White text on blue bg
+        {"duration": 6, "text": "KEY DETAILS", "color": "#000000",
+            "size": 90, "keywords": ["artificial intelligence"]},  # Black text on green bg
+        {"duration": 6, "text": "WHY THIS MATTERS", "color": "#FFFFFF",
+            "size": 70, "keywords": ["business tech"]},  # White text on red bg
+        {"duration": 6, "text": "FOLLOW @XSELLER.AI",
+            "color": "#000000", "size": 65, "keywords": ["social media"]}  # Black text on white bg
+    ]
+    print(f"✅ Created {len(SCENES)} scenes")
+
+    # Step 5: Generate clips
+    print("\n[STEP 5] Generating video clips...")
+    clips = []
+    # Vibrant colors matching competitor videos (bright, eye-catching)
+    colors = ['#FFFF00', '#0066FF', '#00FF00', '#FF0000', '#FFFFFF']  # Yellow, Blue, Green, Red, White
+
+    for i, scene in enumerate(SCENES):
+        print(f"\n  Scene {i+1}/{len(SCENES)}: {scene['text']}")
+
+        try:
+            # Create text using PIL (no ImageMagick needed)
+            print(f"    - Creating text on {colors[i]} background...")
+            text_img = create_text_image_pil(
+                text=scene["text"],
+                fontsize=scene["size"],
+                color=scene["color"],
+                stroke_color='black',
+                stroke_width=5,
+                size=(1080, 1920),  # PIL format: (width, height)
+                max_width=900
+            )
+
+            # Convert RGBA text image to RGB by compositing over the background color
+            text_array = np.array(text_img)
+
+            # Create RGB image by compositing RGBA text over the colored background
+            if text_array.shape[2] == 4:  # RGBA
+                # Get background color for this scene
+                hex_color = colors[i].lstrip('#')
+                bg_color = tuple(int(hex_color[j:j+2], 16) for j in (0, 2, 4))
+
+                # Create RGB background
+                rgb_img = np.ones((text_array.shape[0], text_array.shape[1], 3), dtype=np.uint8)
+                rgb_img[:, :] = bg_color
+
+                # Alpha composite: result = foreground * alpha + background * (1 - alpha)
+                alpha = text_array[:, :, 3:4] / 255.0  # Normalize alpha to 0-1
+                foreground = text_array[:, :, :3]
+                rgb_img = (foreground * alpha + rgb_img * (1 - alpha)).astype(np.uint8)
+
+                scene_clip = ImageClip(rgb_img).set_duration(scene["duration"])
+                print(f"    ✅ Scene created: text composited onto {colors[i]} background")
+            else:
+                scene_clip = ImageClip(text_array).set_duration(scene["duration"])
+
+            clips.append(scene_clip)
+            print(f"    ✅ Scene {i+1} complete: {scene_clip.size}, {scene_clip.duration}s")
+
+        except Exception as e:
+            print(f"    ❌ Scene {i+1} FAILED: {e}")
+            print(f"    Traceback: {traceback.format_exc()}")
+            raise
+
+    # Step 6: Concatenate
+    print(f"\n[STEP 6] Concatenating {len(clips)} clips...")
+    for i, clip in enumerate(clips):
+        try:
+            frame = clip.get_frame(0)
+            print(f"   Clip {i+1}: size={clip.size}, duration={clip.duration}s, frame shape={frame.shape}")
+        except Exception as e:
+            print(f"   Clip {i+1}: ERROR getting frame - {e}")
+    try:
+        final = concatenate_videoclips(clips, method="compose")
+        print(f"✅ Final video: {final.size}, {final.duration}s")
+    except Exception as e:
+        print(f"❌ Concatenation FAILED: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise
+
+    # Step 8: Add audio to video if available
+    if audio_path and os.path.exists(audio_path):
+        print("\n[STEP 8] Adding audio to video...")
+        try:
+            from moviepy.editor import AudioFileClip
+            audio_clip = AudioFileClip(audio_path)
+
+            # Match audio duration to video or vice versa
+            if audio_clip.duration > final.duration:
+                print(f"   Trimming audio from {audio_clip.duration}s to {final.duration}s")
+                audio_clip = audio_clip.subclip(0, final.duration)
+            elif audio_clip.duration < final.duration:
+                print(f"   Video duration ({final.duration}s) > audio duration ({audio_clip.duration}s)")
+                print("   Trimming video to match audio")
+                final = final.subclip(0, audio_clip.duration)
+
+            final = final.set_audio(audio_clip)
+            print(f"✅ Audio synced to video ({audio_clip.duration}s)")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not add audio: {e}")
+            traceback.print_exc()
+
+    # Step 9: Export
+    print("\n[STEP 9] Exporting video...")
+    try:
+        # Create output directory relative to backend root
+        output_dir = os.path.join(os.path.dirname(
+            os.path.dirname(__file__)), "output", "test_videos")
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(
+            output_dir, f"competitor_test_{post_id}.mp4")
+        print(f"   Output directory: {output_dir}")
+        print(f"   Output path: {output_path}")
+        print(f"   Has audio: {final.audio is not None}")
+
+        final.write_videofile(
+            output_path,
+            fps=30,
+            codec='libx264',
+            audio=True if final.audio is not None else False,
+            preset='medium',
+            threads=2,
+            logger=render_logger(),
+            ffmpeg_params=[
+                '-pix_fmt', 'yuv420p',  # Browser-compatible pixel format
+                '-profile:v', 'baseline',  # H.264 baseline profile (most compatible)
+                '-level', '3.0',  # H.264 level 3.0
+                '-movflags', '+faststart'  # Enable streaming (move moov atom to beginning)
+            ]
+        )
+        print("✅ Export complete!")
+    except Exception as e:
+        print(f"❌ Export FAILED: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise
+
+    return output_path
+
+
 @router.post("/api/video/competitor-test/{post_id}")
 async def test_competitor_style_video(post_id: int):
     import traceback
@@ -1189,10 +1597,12 @@ async def test_competitor_style_video(post_id: int):
         # Step 2: Check dependencies
         print("\n[STEP 2] Checking dependencies...")
         try:
-            from moviepy.editor import ImageClip, concatenate_videoclips
-            import numpy as np
-            from PIL import Image, ImageDraw, ImageFont
-            print("✅ MoviePy and PIL imported")
+            import importlib.util
+            missing = [name for name in ("moviepy.editor", "numpy", "PIL")
+                       if importlib.util.find_spec(name) is None]
+            if missing:
+                raise ImportError(f"missing {', '.join(missing)}")
+            print("✅ MoviePy and PIL available")
         except Exception as e:
             print(f"❌ Import failed: {e}")
             raise HTTPException(
@@ -1213,166 +1623,6 @@ async def test_competitor_style_video(post_id: int):
         else:
             print("⚠️ WARNING: No Pexels API key - will use fallback colors")
 
-        # Step 4: Define helper functions for PIL text rendering
-        def _load_bold_font(fontsize: int) -> ImageFont.FreeTypeFont:
-            """Load a bold font, trying multiple common paths."""
-            font_paths = [
-                "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-                "/Library/Fonts/Arial Bold.ttf",
-                "/System/Library/Fonts/Helvetica.ttc",
-                "/System/Library/Fonts/Supplemental/Impact.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-                "C:\\Windows\\Fonts\\arialbd.ttf",
-            ]
-            for path in font_paths:
-                if os.path.exists(path):
-                    try:
-                        return ImageFont.truetype(path, fontsize)
-                    except Exception:
-                        continue
-            try:
-                return ImageFont.load_default()
-            except Exception:
-                return ImageFont.load_default()
-
-        def create_text_image_pil(text: str, fontsize: int, color: str, stroke_color: str, stroke_width: int, size=(1080, 1920), max_width=900):
-            """Create text image using PIL (no ImageMagick required)."""
-            print(f"    DEBUG: Creating text image with size {size}")
-            img = Image.new('RGBA', size, (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-            font = _load_bold_font(fontsize)
-            print(f"    DEBUG: Font loaded: {type(font)}")
-
-            # Handle multi-line text wrapping
-            words = text.split()
-            lines = []
-            current_line = ""
-            for word in words:
-                test_line = current_line + " " + word if current_line else word
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                test_width = bbox[2] - bbox[0]
-                if test_width <= max_width:
-                    current_line = test_line
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                    current_line = word
-            if current_line:
-                lines.append(current_line)
-
-            # Calculate total height
-            line_heights = []
-            line_widths = []
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                line_widths.append(bbox[2] - bbox[0])
-                line_heights.append(bbox[3] - bbox[1])
-
-            total_height = sum(line_heights) + (len(lines) - 1) * 20
-            start_y = (size[1] - total_height) // 2
-
-            # Draw each line
-            current_y = start_y
-            for line, line_width, line_height in zip(lines, line_widths, line_heights):
-                x = (size[0] - line_width) // 2
-                if stroke_width > 0:
-                    for adj_x in range(-stroke_width, stroke_width + 1):
-                        for adj_y in range(-stroke_width, stroke_width + 1):
-                            draw.text((x + adj_x, current_y + adj_y), line, font=font, fill=stroke_color)
-                draw.text((x, current_y), line, font=font, fill=color)
-                current_y += line_height + 20
-
-            # Return RGBA image (MoviePy's ImageClip handles transparency correctly)
-            print(f"    DEBUG: Final image mode: {img.mode}, size: {img.size}")
-            return img  # Keep RGBA for transparency
-
-        # Step 5: Create scenes
-        print("\n[STEP 4] Creating scene structure...")
-        SCENES = [
-            {"duration": 6, "text": "🚨 BREAKING NEWS", "color": "#000000",
-                "size": 100, "keywords": ["ai", "technology"]},  # Black text on yellow bg
-            {"duration": 6, "text": post.title[:50], "color": "#FFFFFF", "size": 60, "keywords": [
-                "developer", "coding"]},  # White text on blue bg
-            {"duration": 6, "text": "KEY DETAILS", "color": "#000000",
-                "size": 90, "keywords": ["artificial intelligence"]},  # Black text on green bg
-            {"duration": 6, "text": "WHY THIS MATTERS", "color": "#FFFFFF",
-                "size": 70, "keywords": ["business tech"]},  # White text on red bg
-            {"duration": 6, "text": "FOLLOW @XSELLER.AI",
-                "color": "#000000", "size": 65, "keywords": ["social media"]}  # Black text on white bg
-        ]
-        print(f"✅ Created {len(SCENES)} scenes")
-
-        # Step 5: Generate clips
-        print("\n[STEP 5] Generating video clips...")
-        clips = []
-        # Vibrant colors matching competitor videos (bright, eye-catching)
-        colors = ['#FFFF00', '#0066FF', '#00FF00', '#FF0000', '#FFFFFF']  # Yellow, Blue, Green, Red, White
-
-        for i, scene in enumerate(SCENES):
-            print(f"\n  Scene {i+1}/{len(SCENES)}: {scene['text']}")
-
-            try:
-                # Create text using PIL (no ImageMagick needed)
-                print(f"    - Creating text on {colors[i]} background...")
-                text_img = create_text_image_pil(
-                    text=scene["text"],
-                    fontsize=scene["size"],
-                    color=scene["color"],
-                    stroke_color='black',
-                    stroke_width=5,
-                    size=(1080, 1920),  # PIL format: (width, height)
-                    max_width=900
-                )
-
-                # Convert RGBA text image to RGB by compositing over the background color
-                text_array = np.array(text_img)
-                print(f"    DEBUG: PIL image size: {text_img.size}, numpy array shape: {text_array.shape}")
-
-                # Create RGB image by compositing RGBA text over the colored background
-                if text_array.shape[2] == 4:  # RGBA
-                    # Get background color for this scene
-                    hex_color = colors[i].lstrip('#')
-                    bg_color = tuple(int(hex_color[j:j+2], 16) for j in (0, 2, 4))
-                    print(f"    DEBUG: Hex {colors[i]} -> RGB {bg_color}")
-
-                    # Create RGB background
-                    rgb_img = np.ones((text_array.shape[0], text_array.shape[1], 3), dtype=np.uint8)
-                    rgb_img[:, :] = bg_color
-
-                    # Alpha composite: result = foreground * alpha + background * (1 - alpha)
-                    alpha = text_array[:, :, 3:4] / 255.0  # Normalize alpha to 0-1
-                    foreground = text_array[:, :, :3]
-                    rgb_img = (foreground * alpha + rgb_img * (1 - alpha)).astype(np.uint8)
-
-                    scene_clip = ImageClip(rgb_img).set_duration(scene["duration"])
-                    print(f"    ✅ Scene created: text composited onto {colors[i]} background")
-                else:
-                    scene_clip = ImageClip(text_array).set_duration(scene["duration"])
-
-                clips.append(scene_clip)
-                print(f"    ✅ Scene {i+1} complete: {scene_clip.size}, {scene_clip.duration}s")
-
-            except Exception as e:
-                print(f"    ❌ Scene {i+1} FAILED: {e}")
-                print(f"    Traceback: {traceback.format_exc()}")
-                raise
-
-        # Step 6: Concatenate
-        print(f"\n[STEP 6] Concatenating {len(clips)} clips...")
-        for i, clip in enumerate(clips):
-            try:
-                frame = clip.get_frame(0)
-                print(f"   Clip {i+1}: size={clip.size}, duration={clip.duration}s, frame shape={frame.shape}")
-            except Exception as e:
-                print(f"   Clip {i+1}: ERROR getting frame - {e}")
-        try:
-            final = concatenate_videoclips(clips, method="compose")
-            print(f"✅ Final video: {final.size}, {final.duration}s")
-        except Exception as e:
-            print(f"❌ Concatenation FAILED: {e}")
-            print(f"Traceback: {traceback.format_exc()}")
-            raise
-
         # Step 7: Generate TTS voiceover
         print("\n[STEP 7] Generating TTS voiceover...")
         audio_path = None
@@ -1412,66 +1662,16 @@ async def test_competitor_style_video(post_id: int):
                 print("⚠️ Voiceover generation skipped (no provider available)")
         except Exception as e:
             print(f"⚠️ Warning: Voiceover generation failed: {e}")
-            import traceback
             traceback.print_exc()
             audio_path = None
 
-        # Step 8: Add audio to video if available
-        if audio_path and os.path.exists(audio_path):
-            print("\n[STEP 8] Adding audio to video...")
-            try:
-                from moviepy.editor import AudioFileClip
-                audio_clip = AudioFileClip(audio_path)
-
-                # Match audio duration to video or vice versa
-                if audio_clip.duration > final.duration:
-                    print(f"   Trimming audio from {audio_clip.duration}s to {final.duration}s")
-                    audio_clip = audio_clip.subclip(0, final.duration)
-                elif audio_clip.duration < final.duration:
-                    print(f"   Video duration ({final.duration}s) > audio duration ({audio_clip.duration}s)")
-                    print("   Trimming video to match audio")
-                    final = final.subclip(0, audio_clip.duration)
-
-                final = final.set_audio(audio_clip)
-                print(f"✅ Audio synced to video ({audio_clip.duration}s)")
-            except Exception as e:
-                print(f"⚠️ Warning: Could not add audio: {e}")
-                import traceback
-                traceback.print_exc()
-
-        # Step 9: Export
-        print("\n[STEP 9] Exporting video...")
-        try:
-            # Create output directory relative to backend root
-            output_dir = os.path.join(os.path.dirname(
-                os.path.dirname(__file__)), "output", "test_videos")
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(
-                output_dir, f"competitor_test_{post_id}.mp4")
-            print(f"   Output directory: {output_dir}")
-            print(f"   Output path: {output_path}")
-            print(f"   Has audio: {final.audio is not None}")
-
-            final.write_videofile(
-                output_path,
-                fps=30,
-                codec='libx264',
-                audio=True if final.audio is not None else False,
-                preset='medium',
-                threads=2,
-                logger='bar',
-                ffmpeg_params=[
-                    '-pix_fmt', 'yuv420p',  # Browser-compatible pixel format
-                    '-profile:v', 'baseline',  # H.264 baseline profile (most compatible)
-                    '-level', '3.0',  # H.264 level 3.0
-                    '-movflags', '+faststart'  # Enable streaming (move moov atom to beginning)
-                ]
-            )
-            print("✅ Export complete!")
-        except Exception as e:
-            print(f"❌ Export FAILED: {e}")
-            print(f"Traceback: {traceback.format_exc()}")
-            raise
+        # Steps 4-9: render off the event loop
+        output_path = await render_executor.run(
+            _render_competitor_test_video,
+            post_id=post_id,
+            title=post.title,
+            audio_path=audio_path,
+        )
 
         print("\n" + "="*80)
         print("🎉 SUCCESS - Video generated!")
@@ -1625,71 +1825,79 @@ async def test_generate_from_scraping(
 
 # ==================== NEW VIDEO GENERATION SYSTEM ====================
 
-@router.post("/api/video/generate-pro/{post_id}")
+def _resolve_profile(profile: Optional[str]) -> encoding_profiles.EncodingProfile:
+    """Resolve an encoding profile name from a request, or fail with 400."""
+    try:
+        return encoding_profiles.get_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _queue_post_render(
+    kind: str,
+    post_id: int,
+    profile: Optional[str],
+    preview: bool,
+    session: Session
+) -> Dict[str, Any]:
+    """Validate a video post and queue a render job for it (202 response body)."""
+    post = session.get(Post, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if post.kind != "video":
+        raise HTTPException(status_code=400, detail="Post is not a video type")
+
+    if not post.body:
+        raise HTTPException(status_code=400, detail="Post has no script")
+
+    encoding = _resolve_profile(preview_renders.PREVIEW_PROFILE if preview else profile)
+    job = render_queue.enqueue(kind, post_id, payload={"profile": encoding.name, "preview": preview})
+
+    return {
+        "status": "accepted",
+        "message": "Preview render queued" if preview else "Video render queued",
+        "job_id": job.id,
+        "job_status": job.status,
+        "status_url": f"/api/render-jobs/{job.id}",
+        "stream_url": f"/api/render-jobs/{job.id}/stream",
+        "profile": encoding.name,
+        "post_id": post_id,
+    }
+
+
+@router.post("/api/video/generate-pro/{post_id}", status_code=202)
 async def generate_professional_video(
     post_id: int,
+    profile: Optional[str] = Query(None, description="Encoding profile: proxy, draft, review or publish"),
+    preview: bool = Query(False, description="Render a proxy preview (with poster and sprite strip) for review"),
     session: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """
-    Generate professional competitor-style video from post script.
+    Queue a professional competitor-style video render for a post script.
 
     Uses scene-by-scene rendering with:
     - Text overlays with animations
     - Stock footage backgrounds (Pexels)
     - Proper timing and transitions
+
+    Returns 202 with a render job id; poll /api/render-jobs/{job_id}.
     """
     try:
-        print(f"\n{'='*80}")
-        print(f"🎬 GENERATING PROFESSIONAL VIDEO FOR POST {post_id}")
-        print(f"{'='*80}\n")
-
-        # Get post
-        post = session.get(Post, post_id)
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        if post.kind != "video":
-            raise HTTPException(status_code=400, detail="Post is not a video type")
-
-        # Get script
-        script = post.body
-        if not script:
-            raise HTTPException(status_code=400, detail="Post has no script")
-
-        # Generate video
-        result = await video_production.generate_video_from_script(
-            script=script,
-            title=post.title or "Untitled"
-        )
-
-        if result.get("success"):
-            return {
-                "success": True,
-                "message": "Video generated successfully!",
-                "video_path": result["video_path"],
-                "duration": result.get("duration"),
-                "scenes": result.get("scenes"),
-                "post_id": post_id,
-            }
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Video generation failed: {result.get('error', 'Unknown error')}"
-            )
-
+        print(f"[api] POST /api/video/generate-pro/{post_id} called")
+        return _queue_post_render("pro_video", post_id, profile, preview, session)
     except HTTPException:
         raise
     except Exception as e:
         print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue video render: {str(e)}")
 
 
 @router.post("/api/video/generate-test")
 async def test_video_generation(
     script: str = Body(..., embed=True),
-    title: str = Body("Test Video", embed=True)
+    title: str = Body("Test Video", embed=True),
+    profile: Optional[str] = Body(None, embed=True)
 ) -> Dict[str, Any]:
     """
     Test endpoint to generate video from custom script.
@@ -1697,7 +1905,8 @@ async def test_video_generation(
     Example request body:
     {
         "script": "Hook (0-2s): Did you know AI can now...\nMain (3-10s): Here's what's happening...",
-        "title": "My Test Video"
+        "title": "My Test Video",
+        "profile": "review"
     }
     """
     try:
@@ -1707,7 +1916,8 @@ async def test_video_generation(
 
         result = await video_production.generate_video_from_script(
             script=script,
-            title=title
+            title=title,
+            profile=_resolve_profile(profile)
         )
 
         if result.get("success"):
@@ -1717,6 +1927,7 @@ async def test_video_generation(
                 "video_path": result["video_path"],
                 "duration": result.get("duration"),
                 "scenes": result.get("scenes"),
+                "profile": result.get("profile"),
             }
         else:
             raise HTTPException(
@@ -1738,13 +1949,15 @@ async def test_video_generation(
 
 # ==================== COMPETITOR-EXACT VIDEO (30s Viral Style) ====================
 
-@router.post("/api/video/competitor/{post_id}")
+@router.post("/api/video/competitor/{post_id}", status_code=202)
 async def generate_competitor_exact_video(
     post_id: int,
+    profile: Optional[str] = Query(None, description="Encoding profile: proxy, draft, review or publish"),
+    preview: bool = Query(False, description="Render a proxy preview (with poster and sprite strip) for review"),
     session: Session = Depends(get_session)
 ) -> Dict[str, Any]:
     """
-    Generate EXACT competitor-style 30s video from post.
+    Queue an EXACT competitor-style 30s video render for a post.
 
     Matches viral tech shorts structure:
     0-3s: Hook (Question + shocking visual)
@@ -1754,60 +1967,24 @@ async def generate_competitor_exact_video(
     24-30s: CTA (Link in bio)
 
     Uses 100% relevant stock footage based on script keywords.
+
+    Returns 202 with a render job id; poll /api/render-jobs/{job_id}.
     """
     try:
-        print(f"\n{'='*80}")
-        print(f"🎬 COMPETITOR-EXACT VIDEO GENERATION FOR POST {post_id}")
-        print(f"{'='*80}\n")
-
-        # Get post
-        post = session.get(Post, post_id)
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        if post.kind != "video":
-            raise HTTPException(status_code=400, detail="Post is not a video type")
-
-        # Get script
-        script = post.body
-        if not script:
-            raise HTTPException(status_code=400, detail="Post has no script")
-
-        # Generate competitor-style video
-        result = await video_competitor_exact.generate_exact_competitor_video(
-            script=script,
-            title=post.title or "AI News",
-            add_voiceover=True
-        )
-
-        if result.get("success"):
-            return {
-                "success": True,
-                "message": "Competitor-style video generated!",
-                "video_path": result["video_path"],
-                "duration": 30,
-                "structure": "Hook/Demo/Proof/Impact/CTA",
-                "post_id": post_id,
-            }
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Video generation failed: {result.get('error', 'Unknown error')}"
-            )
-
+        print(f"[api] POST /api/video/competitor/{post_id} called")
+        return _queue_post_render("competitor_video", post_id, profile, preview, session)
     except HTTPException:
         raise
     except Exception as e:
         print(f"❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue video render: {str(e)}")
 
 
 @router.post("/api/video/competitor-test")
 async def test_competitor_video(
     script: str = Body(..., embed=True),
-    title: str = Body("AI Innovation", embed=True)
+    title: str = Body("AI Innovation", embed=True),
+    profile: Optional[str] = Body(None, embed=True)
 ) -> Dict[str, Any]:
     """
     Test COMPETITOR-EXACT 30s video generation with custom script.
@@ -1827,7 +2004,8 @@ async def test_competitor_video(
         result = await video_competitor_exact.generate_exact_competitor_video(
             script=script,
             title=title,
-            add_voiceover=True
+            add_voiceover=True,
+            profile=_resolve_profile(profile)
         )
 
         if result.get("success"):
@@ -1838,6 +2016,7 @@ async def test_competitor_video(
                 "duration": 30,
                 "structure": "Hook/Demo/Proof/Impact/CTA",
                 "scenes": 5,
+                "profile": result.get("profile"),
             }
         else:
             raise HTTPException(
@@ -1877,24 +2056,28 @@ async def analyze_voice_for_post(
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
 
-        # Create narration text from post
-        narration_text = f"{post.title}. {post.body[:500]}"
-
         # Import voice selector
         from app import voice_selector
 
-        # Analyze script
-        style_analysis = voice_selector.analyze_script_style(narration_text)
+        # Create narration text from post
+        narration_text = voice_selector.post_narration(post)
 
-        # Get recommendations
-        recommendations = voice_selector.get_voice_recommendations(narration_text)
+        # Analyze script and rank voices (memoized on the post until its text changes)
+        cached_hash = (post.extra_data or {}).get("voice_analysis", {}).get("content_hash")
+        analysis = voice_selector.analyze_post(post)
+        if analysis["content_hash"] != cached_hash:
+            session.add(post)
+            session.commit()
+
+        recommendations = analysis["recommended_voices"]
 
         return {
             "post_id": post_id,
             "script_preview": narration_text[:200] + "...",
-            "style_analysis": style_analysis,
+            "style_analysis": analysis["style_analysis"],
             "recommended_voices": recommendations[:6],  # Top 6
-            "total_voices": len(recommendations)
+            "total_voices": len(recommendations),
+            "cached": analysis["content_hash"] == cached_hash,
         }
 
     except HTTPException:
@@ -1936,36 +2119,35 @@ async def generate_voice_previews(
         # Import voice selector
         from app import voice_selector
 
-        # Generate previews
-        previews = {}
+        # Generate all previews concurrently (cached by voice + text)
+        selected = {}
         for voice_key in voices:
             if voice_key not in voice_selector.RECOMMENDED_VOICES:
                 print(f"⚠️  Voice '{voice_key}' not found, skipping...")
                 continue
+            selected[voice_key] = voice_selector.RECOMMENDED_VOICES[voice_key]
 
-            voice_info = voice_selector.RECOMMENDED_VOICES[voice_key]
-            preview_path = await voice_selector.generate_voice_preview(
-                voice_id=voice_info['id'],
-                voice_name=voice_info['name'],
-                sample_text=sample_text
-            )
+        preview_paths = await voice_selector.generate_previews(selected, sample_text)
 
-            if preview_path:
-                # Convert absolute path to relative URL
-                # e.g., /Users/.../backend/output/voice_previews/preview_adam.mp3
-                # -> /api/voice/preview-file/preview_adam.mp3
-                filename = os.path.basename(preview_path)
-                preview_url = f"/api/voice/preview-file/{filename}"
-
-                previews[voice_key] = {
-                    "name": voice_info['name'],
-                    "gender": voice_info['gender'],
-                    "accent": voice_info['accent'],
-                    "style": voice_info['style'],
-                    "use_case": voice_info['use_case'],
-                    "preview_url": preview_url,
-                    "preview_path": preview_path
-                }
+        previews = {}
+        for voice_key, preview_path in preview_paths.items():
+            voice_info = selected[voice_key]
+
+            # Convert absolute path to relative URL
+            # e.g., /Users/.../backend/output/voice_previews/preview_adam_<hash>.mp3
+            # -> /api/voice/preview-file/preview_adam_<hash>.mp3
+            filename = os.path.basename(preview_path)
+            preview_url = f"/api/voice/preview-file/{filename}"
+
+            previews[voice_key] = {
+                "name": voice_info['name'],
+                "gender": voice_info['gender'],
+                "accent": voice_info['accent'],
+                "style": voice_info['style'],
+                "use_case": voice_info['use_case'],
+                "preview_url": preview_url,
+                "preview_path": preview_path
+            }
 
         return {
             "post_id": post_id,
@@ -50,7 +50,8 @@ def start_scheduler() -> None:
             replace_existing=True,
         )
         
-        # Process video generation queue every 2 minutes (async job)
+        # Queue renders for video_production posts every 2 minutes
+        # (render workers do the rendering, see app.render_worker)
         async def process_queue():
             await video_generator.process_video_generation_queue()
         
@@ -59,6 +60,8 @@ def start_scheduler() -> None:
             CronTrigger(minute="*/2"),  # Every 2 minutes
             name="process_video_queue",
             replace_existing=True,
+            max_instances=1,  # A slow tick is skipped, not stacked
+            coalesce=True,
         )
         
         _scheduler.start()
@@ -0,0 +1,277 @@
+"""
+Speech-Driven Scene Timing
+Derives scene boundaries and per-word timing from the voiceover itself,
+instead of fixed script durations plus trimming/speeding the audio to fit:
+- Provider alignment: ElevenLabs /with-timestamps returns character timings,
+  saved next to the MP3 as <audio>.words.json
+- Local fallback: energy-based aligner on the decoded audio. Words are
+  spread over voiced frames only (pauses excluded), weighted by length.
+
+Each scene then lasts from its first spoken word to the next scene's first
+word (the last scene runs to the end of the audio), so the video is exactly
+as long as the speech and word pops land on the words.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import base64
+import json
+import os
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.encoding_profiles import ffmpeg_exe
+
+
+# ==================== CONFIGURATION ====================
+
+SPEECH_TIMING_ENABLED = os.getenv("SPEECH_TIMING_ENABLED", "true").lower() == "true"
+
+ALIGN_SAMPLE_RATE = 16000
+ALIGN_FRAME_SECONDS = 0.01
+
+# Silences shorter than this are treated as part of the surrounding speech
+MIN_PAUSE_SECONDS = 0.08
+
+# Hold the last frame this long after the final word
+SCENE_TAIL_SECONDS = 0.15
+
+WORD_PUNCTUATION = ".,!?;:\"'()[]…-–—"
+
+WordTiming = Dict[str, Any]  # {"word": str, "start": float, "end": float}
+
+
+def tokenize(text: str) -> List[str]:
+    """Words as spoken in the voiceover (whitespace-separated, as sent to TTS)."""
+    return text.split()
+
+
+# ==================== PROVIDER ALIGNMENT ====================
+
+def words_from_characters(characters: List[str], starts: List[float], ends: List[float]) -> List[WordTiming]:
+    """Group character-level alignment (ElevenLabs) into word timings."""
+    words: List[WordTiming] = []
+    current: Optional[WordTiming] = None
+    for char, start, end in zip(characters, starts, ends):
+        if char.isspace():
+            current = None
+            continue
+        if current is None:
+            current = {"word": char, "start": float(start), "end": float(end)}
+            words.append(current)
+        else:
+            current["word"] += char
+            current["end"] = float(end)
+    return words
+
+
+def alignment_path(audio_path: str) -> str:
+    return f"{audio_path}.words.json"
+
+
+def save_word_timings(audio_path: str, text: str, words: List[WordTiming], source: str) -> None:
+    with open(alignment_path(audio_path), "w") as f:
+        json.dump({"source": source, "text": text, "words": words}, f)
+
+
+def load_word_timings(audio_path: str, text: str) -> Optional[List[WordTiming]]:
+    """Saved word timings for this audio, if they were made for the same text."""
+    try:
+        with open(alignment_path(audio_path)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    words = data.get("words") or []
+    if tokenize(data.get("text", "")) != tokenize(text) or len(words) != len(tokenize(text)):
+        return None
+    return words
+
+
+def save_timestamped_speech(response: Dict[str, Any], output_path: str, text: str) -> str:
+    """
+    Write an ElevenLabs /with-timestamps response: the MP3 plus its word
+    timings (<audio>.words.json).
+
+    Returns:
+        Path to the audio file
+    """
+    with open(output_path, "wb") as f:
+        f.write(base64.b64decode(response["audio_base64"]))
+
+    alignment = response.get("normalized_alignment") or response.get("alignment") or {}
+    words = words_from_characters(
+        alignment.get("characters", []),
+        alignment.get("character_start_times_seconds", []),
+        alignment.get("character_end_times_seconds", []),
+    )
+    if len(words) == len(tokenize(text)):
+        # Keep the script's spelling so scene word counts match
+        for word, token in zip(words, tokenize(text)):
+            word["word"] = token
+        save_word_timings(output_path, text, words, source="elevenlabs")
+    return output_path
+
+
+# ==================== LOCAL ALIGNER ====================
+
+def decode_audio(path: str, sample_rate: int = ALIGN_SAMPLE_RATE) -> np.ndarray:
+    """Decode an audio file to mono float samples in [-1, 1]."""
+    result = subprocess.run(
+        [ffmpeg_exe(), "-v", "error", "-i", path, "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"],
+        capture_output=True,
+        check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def voiced_frames(
+    samples: np.ndarray,
+    sample_rate: int = ALIGN_SAMPLE_RATE,
+    frame_seconds: float = ALIGN_FRAME_SECONDS,
+) -> np.ndarray:
+    """
+    Boolean speech mask per frame from RMS energy.
+
+    The threshold adapts to the recording (between its noise floor and its
+    loud passages); pauses shorter than MIN_PAUSE_SECONDS are filled in.
+    """
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+
+    rms = np.sqrt(np.mean(samples[:count * frame].reshape(count, frame) ** 2, axis=1))
+    floor, loud = np.percentile(rms, 10), np.percentile(rms, 95)
+    threshold = max(floor + 0.1 * (loud - floor), 1e-4)
+    voiced = rms > threshold
+
+    # Fill short gaps between voiced frames
+    min_gap = int(round(MIN_PAUSE_SECONDS / frame_seconds))
+    voiced_at = np.flatnonzero(voiced)
+    gaps = np.diff(voiced_at) - 1
+    for i in np.flatnonzero((gaps > 0) & (gaps < min_gap)):
+        voiced[voiced_at[i] + 1:voiced_at[i + 1]] = True
+    return voiced
+
+
+def align_words_by_energy(
+    words: List[str],
+    samples: np.ndarray,
+    sample_rate: int = ALIGN_SAMPLE_RATE,
+    frame_seconds: float = ALIGN_FRAME_SECONDS,
+) -> List[WordTiming]:
+    """
+    Forced-align words to audio using energy only.
+
+    Voiced time is shared between words in proportion to their length, so
+    pauses (sentence ends, commas) never shift later words.
+    """
+    if not words:
+        return []
+    voiced = voiced_frames(samples, sample_rate, frame_seconds)
+    duration = len(samples) / sample_rate
+    if not voiced.any():
+        voiced = np.ones(max(1, len(voiced)), dtype=bool)
+
+    weights = np.array([len(word.strip(WORD_PUNCTUATION)) + 1 for word in words], dtype=float)
+    bounds = np.concatenate([[0.0], np.cumsum(weights) / weights.sum()])
+
+    # Voiced frames elapsed at the end of each frame, and each word's share
+    spoken = np.cumsum(voiced)
+    targets = np.round(bounds * spoken[-1])
+
+    timings = []
+    for i, word in enumerate(words):
+        start_frame = int(np.searchsorted(spoken, targets[i], side="right"))
+        end_frame = int(np.searchsorted(spoken, targets[i + 1], side="left"))
+        start = min(start_frame * frame_seconds, duration)
+        end = min(max(end_frame + 1, start_frame + 1) * frame_seconds, duration)
+        timings.append({"word": word, "start": round(start, 3), "end": round(end, 3)})
+    return timings
+
+
+def align_audio(audio_path: str, text: str, samples: Optional[np.ndarray] = None) -> List[WordTiming]:
+    """Word timings for a voiceover: provider alignment if saved, else the local aligner (then saved)."""
+    words = load_word_timings(audio_path, text)
+    if words is not None:
+        return words
+    if samples is None:
+        samples = decode_audio(audio_path)
+    words = align_words_by_energy(tokenize(text), samples)
+    try:
+        save_word_timings(audio_path, text, words, source="energy")
+    except OSError:
+        pass
+    return words
+
+
+# ==================== SCENE TIMING ====================
+
+def apply_word_timings(
+    scenes: List[Dict[str, Any]],
+    words: List[WordTiming],
+    audio_duration: float,
+) -> List[Dict[str, Any]]:
+    """
+    Set scene start/end/duration from word timings.
+
+    Each scene gets "word_times" (word start offsets within the scene) for
+    word-by-word animation. Scenes without words are dropped. Returns the
+    scenes unchanged if the words do not match the scene texts.
+    """
+    counts = [len(tokenize(scene.get("text", ""))) for scene in scenes]
+    if sum(counts) != len(words) or not words:
+        print(f"[speech_timing] {len(words)} aligned words for {sum(counts)} script words; keeping script timing")
+        return scenes
+
+    spans: List[Tuple[Dict[str, Any], List[WordTiming]]] = []
+    index = 0
+    for scene, count in zip(scenes, counts):
+        if count:
+            spans.append((scene, words[index:index + count]))
+        index += count
+
+    end_of_speech = max(audio_duration, words[-1]["end"] + SCENE_TAIL_SECONDS)
+    timed = []
+    for i, (scene, scene_words) in enumerate(spans):
+        start = 0.0 if i == 0 else spans[i][1][0]["start"]
+        end = spans[i + 1][1][0]["start"] if i + 1 < len(spans) else end_of_speech
+        timed.append({
+            **scene,
+            "start_time": round(start, 3),
+            "end_time": round(end, 3),
+            "duration": round(end - start, 3),
+            "word_times": [round(max(0.0, word["start"] - start), 3) for word in scene_words],
+            "timing": "speech",
+        })
+    return timed
+
+
+def retime_scenes(scenes: List[Dict[str, Any]], audio_path: str) -> List[Dict[str, Any]]:
+    """
+    Time scenes to their voiceover (the concatenated scene texts).
+
+    Returns:
+        Retimed scenes, or the original scenes if timing is disabled or the
+        audio cannot be analysed
+    """
+    if not SPEECH_TIMING_ENABLED or not audio_path or not os.path.exists(audio_path):
+        return scenes
+    try:
+        samples = decode_audio(audio_path)
+        text = " ".join(scene.get("text", "") for scene in scenes)
+        words = align_audio(audio_path, text, samples)
+        timed = apply_word_timings(scenes, words, len(samples) / ALIGN_SAMPLE_RATE)
+    except Exception as e:
+        print(f"[speech_timing] Could not time scenes to {audio_path}: {e}")
+        return scenes
+    if timed is not scenes:
+        print(f"[speech_timing] Timed {len(timed)} scenes to speech ({timed[-1]['end_time']:.1f}s)")
+    return timed
+
+
+def is_speech_timed(scenes: List[Dict[str, Any]]) -> bool:
+    return bool(scenes) and all(scene.get("timing") == "speech" for scene in scenes)
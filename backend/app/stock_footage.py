@@ -0,0 +1,240 @@
+"""
+Stock Footage Search Service
+Single entry point for Pexels video searches used by the renderers and jobs:
+- TTL cache keyed by normalized query + orientation (+ size filter)
+- Identical in-flight searches share one API call
+- prefetch() runs all of a video's scene queries concurrently up front
+
+Every caller requests the same page size, so a query searched by one
+renderer is a cache hit for the others. Only the fields the callers use
+are kept in the cache.
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from app.http_pool import get_async_client
+from app.media_library import normalize_query
+
+
+# ==================== CONFIGURATION ====================
+
+PEXELS_API_KEY = os.getenv("PEXELS_API_KEY", "")
+PEXELS_VIDEO_SEARCH_URL = "https://api.pexels.com/videos/search"
+
+STOCK_SEARCH_PER_PAGE = int(os.getenv("STOCK_SEARCH_PER_PAGE", "10"))
+STOCK_SEARCH_TTL = int(os.getenv("STOCK_SEARCH_TTL_SECONDS", str(6 * 3600)))
+STOCK_SEARCH_CACHE_SIZE = int(os.getenv("STOCK_SEARCH_CACHE_SIZE", "512"))
+STOCK_SEARCH_CONCURRENCY = int(os.getenv("STOCK_SEARCH_CONCURRENCY", "4"))
+
+SearchKey = Tuple[str, str, str]
+
+
+def search_key(query: str, orientation: str = "portrait", size: Optional[str] = None) -> SearchKey:
+    return normalize_query(query), orientation or "", size or ""
+
+
+def _slim_videos(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Keep only the fields used to pick a clip."""
+    videos = []
+    for video in data.get("videos", []):
+        videos.append({
+            "id": video.get("id"),
+            "duration": video.get("duration", 0),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "video_files": [
+                {
+                    "quality": f.get("quality"),
+                    "width": f.get("width"),
+                    "height": f.get("height"),
+                    "link": f.get("link"),
+                }
+                for f in video.get("video_files", [])
+            ],
+        })
+    return videos
+
+
+# ==================== CACHE ====================
+
+class SearchCache:
+    """Thread-safe TTL + LRU map of search key -> video list."""
+
+    def __init__(self, ttl: int = STOCK_SEARCH_TTL, max_entries: int = STOCK_SEARCH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[SearchKey, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: SearchKey) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: SearchKey, videos: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), videos)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+search_cache = SearchCache()
+_inflight: Dict[SearchKey, asyncio.Task] = {}
+
+
+def _params(key: SearchKey) -> Dict[str, Any]:
+    query, orientation, size = key
+    params: Dict[str, Any] = {"query": query, "per_page": STOCK_SEARCH_PER_PAGE}
+    if orientation:
+        params["orientation"] = orientation
+    if size:
+        params["size"] = size
+    return params
+
+
+# ==================== SEARCH ====================
+
+async def _search_api(key: SearchKey) -> List[Dict[str, Any]]:
+    client = get_async_client()
+    print(f"[stock_footage] Searching Pexels for: '{key[0]}'")
+    response = await client.get(
+        PEXELS_VIDEO_SEARCH_URL,
+        headers={"Authorization": PEXELS_API_KEY},
+        params=_params(key),
+        timeout=15.0,
+    )
+    response.raise_for_status()
+    videos = _slim_videos(response.json())
+    search_cache.put(key, videos)
+    return videos
+
+
+async def search_videos(
+    query: str,
+    orientation: str = "portrait",
+    size: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search Pexels videos, served from cache when possible.
+
+    Args:
+        query: Search query
+        orientation: portrait, landscape or square
+        size: Optional Pexels size filter (small, medium, large)
+
+    Returns:
+        List of videos (id, duration, width, height, video_files)
+
+    Raises:
+        httpx.HTTPError on API failures (failures are not cached)
+    """
+    key = search_key(query, orientation, size)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_search_api(key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def cached_search(
+    query: str,
+    orientation: str = "portrait",
+    size: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Cached results for a query without searching (None on a miss)."""
+    return search_cache.get(search_key(query, orientation, size))
+
+
+def search_videos_sync(
+    query: str,
+    orientation: str = "portrait",
+    size: Optional[str] = None,
+    timeout: float = 30,
+) -> List[Dict[str, Any]]:
+    """Blocking variant of search_videos() for synchronous jobs (same cache)."""
+    key = search_key(query, orientation, size)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    response = requests.get(
+        PEXELS_VIDEO_SEARCH_URL,
+        headers={"Authorization": PEXELS_API_KEY},
+        params=_params(key),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    videos = _slim_videos(response.json())
+    search_cache.put(key, videos)
+    return videos
+
+
+async def prefetch(
+    queries: Iterable[str],
+    orientation: str = "portrait",
+    size: Optional[str] = None,
+    concurrency: int = STOCK_SEARCH_CONCURRENCY,
+) -> int:
+    """
+    Warm the cache for all queries of a video concurrently.
+
+    Duplicate and already cached queries are skipped; failures are ignored
+    here and surface again when the scene searches for real.
+
+    Returns:
+        Number of API searches issued
+    """
+    if not PEXELS_API_KEY:
+        return 0
+
+    keys = []
+    for query in queries:
+        key = search_key(query, orientation, size)
+        if key[0] and key not in keys and search_cache.get(key) is None:
+            keys.append(key)
+    if not keys:
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(key: SearchKey) -> None:
+        async with semaphore:
+            try:
+                await search_videos(*key)
+            except Exception as e:
+                print(f"[stock_footage] Prefetch failed for '{key[0]}': {e}")
+
+    await asyncio.gather(*(_one(key) for key in keys))
+    print(f"[stock_footage] Prefetched {len(keys)} searches")
+    return len(keys)
@@ -4,6 +4,7 @@ Provides TextClip-like functionality without external dependencies
 """
 
 import os
+from functools import lru_cache
 import numpy as np
 from typing import Tuple, Optional
 from PIL import Image, ImageDraw, ImageFont
@@ -53,7 +54,7 @@ def create_text_clip_pil(
     draw = ImageDraw.Draw(img)
 
     # Load font
-    font = _load_bold_font(fontsize)
+    font = load_bold_font(fontsize)
 
     # Handle multi-line text
     lines = text.split('\n')
@@ -93,6 +94,12 @@ def create_text_clip_pil(
     return clip
 
 
+@lru_cache(maxsize=64)
+def load_bold_font(fontsize: int) -> ImageFont.FreeTypeFont:
+    """Bold font at fontsize, opened once per process and size."""
+    return _load_bold_font(fontsize)
+
+
 def _load_bold_font(fontsize: int) -> ImageFont.FreeTypeFont:
     """
     Load a bold font, trying multiple common paths.
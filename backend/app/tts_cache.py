@@ -0,0 +1,284 @@
+"""
+Content-Addressed TTS Cache
+Stores synthesized voiceovers on disk, keyed by everything that affects the
+audio:
+- Provider, voice id and model
+- Voice settings (energy preset: stability, similarity, style, speed)
+- Normalized text (Unicode NFKC, collapsed whitespace)
+
+Every voice entry point (tts_service, the three renderers, video_generator,
+M02) synthesizes through it, so regenerations and renders of the same post
+in another style reuse the audio instead of paying for another API call.
+Word timings saved next to the audio (<audio>.words.json) are cached with
+it. Total size is bounded with LRU eviction (file mtimes are the clock).
+
+    path = await tts_cache.fetch(key, output_path, synthesize)
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import shutil
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.render_cache import hash_inputs
+from app.speech_timing import alignment_path
+
+
+# ==================== CONFIGURATION ====================
+
+TTS_CACHE_DIR = Path(
+    os.getenv("TTS_CACHE_DIR", str(Path(__file__).parent.parent / "output" / "tts_cache"))
+)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+
+# Voiceovers handed to renderers (named by cache key, never by timestamp)
+AUDIO_OUTPUT_DIR = Path(__file__).parent.parent / "output" / "audio"
+
+# Writes audio to the given path; returns it (or None on failure)
+Synthesize = Callable[[str], Awaitable[Optional[str]]]
+
+
+# ==================== KEYS ====================
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form of TTS input: NFKC, single spaces, trimmed."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def tts_cache_key(
+    provider: str,
+    voice: str,
+    text: str,
+    model: Optional[str] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    audio_format: str = "mp3",
+) -> str:
+    """
+    Cache key for one synthesis.
+
+    Args:
+        provider: "elevenlabs", "openai", "gtts", ...
+        voice: Provider voice id (not the display name)
+        text: Text exactly as sent to the provider
+        model: Provider model id
+        settings: Voice settings / energy preset values sent with the request
+        audio_format: Output format
+    """
+    return hash_inputs(
+        kind="tts",
+        provider=provider,
+        voice=voice,
+        model=model,
+        settings=settings or {},
+        format=audio_format,
+        text=normalize_tts_text(text),
+    )
+
+
+def audio_output_path(key: str, prefix: str = "voice") -> str:
+    """
+    Content-addressed output file for a synthesis, in output/audio.
+
+    Identical requests map to the same file (with identical audio), so
+    concurrent renders never overwrite each other's voiceovers.
+    """
+    AUDIO_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    return str(AUDIO_OUTPUT_DIR / f"{prefix}_{key[:24]}.mp3")
+
+
+# ==================== CACHE STORE ====================
+
+class TTSCache:
+    """
+    On-disk voiceover store with size-bounded LRU eviction.
+
+    Entries live at <root>/<key[:2]>/<key>.mp3, with optional word timings
+    at <entry>.words.json. Callers get a hard link (or copy) at their own
+    output path, so evicting an entry never removes audio in use.
+    """
+
+    def __init__(self, root: Path = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.mp3"
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached audio path for key, or None on a miss."""
+        path = self.path_for(key)
+        if not TTS_CACHE_ENABLED or not path.exists():
+            return None
+        try:
+            os.utime(path, None)  # Mark as recently used
+        except OSError:
+            pass
+        return str(path)
+
+    def put(self, key: str, src_path: str) -> str:
+        """
+        Move synthesized audio (and its word timings, if any) into the cache.
+
+        Returns:
+            Cached audio path
+        """
+        dest = self.path_for(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        src_alignment = alignment_path(src_path)
+        if os.path.exists(src_alignment):
+            _place(src_alignment, alignment_path(str(dest)), move=True)
+        _place(src_path, str(dest), move=True)
+
+        self.evict()
+        return str(dest)
+
+    def materialize(self, key: str, output_path: str) -> Optional[str]:
+        """
+        Place cached audio (and word timings) at output_path.
+
+        Returns:
+            output_path on a hit, None on a miss
+        """
+        cached = self.get(key)
+        if not cached:
+            return None
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.abspath(cached) != os.path.abspath(output_path):
+            _link(cached, output_path)
+            if os.path.exists(alignment_path(cached)):
+                _link(alignment_path(cached), alignment_path(output_path))
+        return output_path
+
+    def new_temp_path(self) -> str:
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return str(tmp_dir / f"tts_{uuid.uuid4().hex}.mp3")
+
+    def store(self, key: str, audio_path: str, output_path: str) -> str:
+        """Cache audio synthesized at audio_path and place it at output_path."""
+        if not TTS_CACHE_ENABLED:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            _place(audio_path, output_path, move=True)
+            return output_path
+        self.put(key, audio_path)
+        return self.materialize(key, output_path) or output_path
+
+    async def fetch(self, key: str, output_path: str, synthesize: Synthesize) -> Optional[str]:
+        """
+        Voiceover for key at output_path: from the cache, or synthesized once
+        (concurrent requests for the same key share one synthesis).
+
+        Args:
+            key: tts_cache_key() of the request
+            output_path: Where the caller wants the audio
+            synthesize: Writes the audio to the path it is given
+
+        Returns:
+            output_path, or None if synthesis failed
+        """
+        if not TTS_CACHE_ENABLED:
+            return await synthesize(output_path)
+
+        if self.materialize(key, output_path):
+            print(f"[tts_cache] ♻️  Reusing cached voiceover {key[:12]}")
+            return output_path
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._synthesize(key, synthesize))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        cached = await asyncio.shield(task)
+        if not cached:
+            return None
+        return self.materialize(key, output_path)
+
+    async def _synthesize(self, key: str, synthesize: Synthesize) -> Optional[str]:
+        tmp_path = self.new_temp_path()
+        try:
+            result = await synthesize(tmp_path)
+            if not result or not os.path.exists(result):
+                return None
+            return self.put(key, result)
+        finally:
+            for leftover in (tmp_path, alignment_path(tmp_path)):
+                if os.path.exists(leftover):
+                    os.unlink(leftover)
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob("*/*.mp3"):
+            if path.parent.name == "tmp":
+                continue  # Synthesis in progress
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            size = stat.st_size
+            sidecar = Path(alignment_path(str(path)))
+            if sidecar.exists():
+                size += sidecar.stat().st_size
+            entries.append((stat.st_mtime, size, path))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                Path(alignment_path(str(path))).unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            print(f"[tts_cache] Evicted {removed} voiceovers")
+        return removed
+
+
+def _place(src: str, dest: str, move: bool) -> None:
+    """Atomically put src at dest (staged next to dest, then renamed)."""
+    staging = f"{dest}.{uuid.uuid4().hex}.tmp"
+    if move:
+        shutil.move(src, staging)
+    else:
+        shutil.copyfile(src, staging)
+    os.replace(staging, dest)
+
+
+def _link(src: str, dest: str) -> None:
+    """Hard link src at dest, falling back to a copy (e.g. across volumes)."""
+    staging = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, staging)
+    except OSError:
+        shutil.copyfile(src, staging)
+    os.replace(staging, dest)
+
+
+# Shared cache used by every voice entry point
+tts_cache = TTSCache()
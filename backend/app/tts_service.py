@@ -4,16 +4,30 @@ Supports multiple TTS providers with automatic fallback:
 - ElevenLabs (premium quality)
 - OpenAI TTS (high quality, cost-effective)
 - gTTS (free fallback)
+- Local engine (offline: Piper or espeak-ng, no API cost)
+
+Providers are grouped into tiers: drafts (proxy/draft/review renders, CI,
+benchmarks) use the local engine, and only publish renders spend paid
+characters on premium voices.
+
+Scripts of any length are synthesized in sentence-aligned chunks that run
+concurrently and stream to disk (see app.tts_stream).
 """
 from __future__ import annotations
 
 # from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import asyncio
 import os
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, Literal
-import httpx
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, Optional, Literal, Tuple
+
+from app.encoding_profiles import ffmpeg_exe
+from app.http_pool import provider_slots
+from app.tts_cache import audio_output_path, tts_cache, tts_cache_key
+from app.tts_stream import chunk_limit, stream_to_file, synthesize_chunked
 
 # Import gTTS if available
 try:
@@ -22,19 +36,13 @@ try:
 except ImportError:
     GTTS_AVAILABLE = False
 
-# Import OpenAI if available
-try:
-    from openai import AsyncOpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
 
 # ==================== CONFIGURATION ====================
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 ELEVENLABS_API_BASE = "https://api.elevenlabs.io/v1"
+OPENAI_API_BASE = "https://api.openai.com/v1"
 
 # Voice configurations
 ELEVENLABS_VOICES = {
@@ -44,6 +52,8 @@ ELEVENLABS_VOICES = {
     "antoni": "ErXwobaYiN019PkySvjV",  # Male, well-rounded
     "charlotte": "XB0fDUnXU5powFXDhCwa",  # British female, professional
     "charlie": "IKne3meq5aSn9XLyUdCD",    # British male, energetic
+    "joseph": "Zlb1dXrM653N07WRdFW3",     # British male, news anchor
+    "daniel": "onwK4e9ZLuTAKqWW03F9",     # British male, authoritative
 }
 
 OPENAI_VOICES = {
@@ -62,6 +72,27 @@ DEFAULT_OPENAI_VOICE = "fable"          # British male, expressive
 # TTS provider priority (will try in order)
 TTS_PROVIDER_PRIORITY = ["elevenlabs", "openai", "gtts"]
 
+# Providers per tier: drafts stay offline and free, premium voices only for
+# content that ships
+TTS_TIERS = {
+    "draft": os.getenv("TTS_DRAFT_PROVIDERS", "local,gtts").split(","),
+    "publish": os.getenv("TTS_PUBLISH_PROVIDERS", ",".join(TTS_PROVIDER_PRIORITY)).split(","),
+}
+
+# Tier used when a caller does not say (CI and benchmarks can set "draft")
+DEFAULT_TTS_TIER = os.getenv("TTS_DEFAULT_TIER", "publish")
+
+# Encoding profiles whose renders are published; all others are drafts
+TTS_PUBLISH_PROFILES = os.getenv("TTS_PUBLISH_PROFILES", "publish").split(",")
+
+# Local engine: "auto" (Piper if a model is configured, else espeak-ng),
+# "piper" or "espeak"
+LOCAL_TTS_ENGINE = os.getenv("LOCAL_TTS_ENGINE", "auto").lower()
+PIPER_BIN = os.getenv("PIPER_BIN", "piper")
+PIPER_MODEL = os.getenv("PIPER_MODEL", "")
+ESPEAK_VOICE = os.getenv("ESPEAK_VOICE", "en-gb")
+LOCAL_TTS_TIMEOUT = int(os.getenv("LOCAL_TTS_TIMEOUT", "120"))
+
 # Voice energy/tone presets
 VOICE_ENERGY_PRESETS = {
     "professional": {
@@ -92,9 +123,59 @@ VOICE_ENERGY_PRESETS = {
 
 DEFAULT_ENERGY = "professional"
 
+# Energy presets for the local engine: espeak-ng rate (words per minute),
+# pitch and pitch range (0-100); Piper length scale (lower is faster) and
+# phoneme noise (more is livelier)
+LOCAL_ENERGY_PRESETS = {
+    "professional": {"words_per_minute": 165, "pitch": 45, "pitch_range": 40,
+                     "length_scale": 1.0, "noise_scale": 0.5},
+    "energetic": {"words_per_minute": 175, "pitch": 55, "pitch_range": 65,
+                  "length_scale": 0.95, "noise_scale": 0.667},
+    "viral": {"words_per_minute": 185, "pitch": 60, "pitch_range": 85,
+              "length_scale": 0.9, "noise_scale": 0.8},
+}
+
 
 # ==================== TTS PROVIDER FUNCTIONS ====================
 
+async def stream_elevenlabs(
+    text: str,
+    output_path: str,
+    voice_id: str,
+    model_id: str,
+    voice_settings: Dict[str, object]
+) -> Optional[str]:
+    """
+    Synthesize text with ElevenLabs, chunked and streamed to output_path.
+
+    Chunks are sent with their neighbouring text so intonation carries
+    across the joins.
+
+    Returns:
+        output_path or None on failure
+    """
+    headers = {
+        "xi-api-key": ELEVENLABS_API_KEY,
+        "Content-Type": "application/json"
+    }
+    url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}/stream"
+
+    async def synthesize_chunk(chunk: str, path: str, previous: str, following: str) -> Optional[str]:
+        payload = {
+            "text": chunk,
+            "model_id": model_id,
+            "voice_settings": voice_settings
+        }
+        if previous:
+            payload["previous_text"] = previous
+        if following:
+            payload["next_text"] = following
+        async with provider_slots("elevenlabs"):
+            return await stream_to_file(url, path, headers, payload, timeout=60.0, tag="TTS")
+
+    return await synthesize_chunked(text, output_path, synthesize_chunk, chunk_limit("elevenlabs"))
+
+
 async def generate_tts_elevenlabs(
     text: str,
     voice: str = DEFAULT_ELEVENLABS_VOICE,
@@ -123,43 +204,27 @@ async def generate_tts_elevenlabs(
         # Get energy preset
         energy_preset = VOICE_ENERGY_PRESETS.get(energy.lower(), VOICE_ENERGY_PRESETS[DEFAULT_ENERGY])
 
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            }
-
-            url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}"
-            payload = {
-                "text": text[:5000],  # Limit to 5000 chars
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": energy_preset["stability"],
-                    "similarity_boost": energy_preset["similarity_boost"],
-                    "style": energy_preset["style"],
-                    "use_speaker_boost": energy_preset["use_speaker_boost"]
-                }
-            }
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": energy_preset["stability"],
+            "similarity_boost": energy_preset["similarity_boost"],
+            "style": energy_preset["style"],
+            "use_speaker_boost": energy_preset["use_speaker_boost"]
+        }
 
+        async def synthesize(path: str) -> Optional[str]:
             print(f"[TTS] Generating ElevenLabs TTS with voice: {voice}, energy: {energy} ({energy_preset['description']})")
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
-
-            if response.status_code == 200:
-                # Save audio file
-                if not output_path:
-                    audio_dir = Path(__file__).parent.parent / "output" / "audio"
-                    audio_dir.mkdir(parents=True, exist_ok=True)
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_path = str(audio_dir / f"elevenlabs_{timestamp}.mp3")
-
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
+            return await stream_elevenlabs(text, path, voice_id, model_id, voice_settings)
 
-                print(f"[TTS] ✅ ElevenLabs TTS generated: {output_path}")
-                return output_path
-            else:
-                print(f"[TTS] ElevenLabs API error: {response.status_code} - {response.text}")
-                return None
+        key = tts_cache_key(
+            "elevenlabs", voice_id, text, model=model_id,
+            settings={**voice_settings, "chunk_chars": chunk_limit("elevenlabs")},
+        )
+        output_path = output_path or audio_output_path(key, "elevenlabs")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[TTS] ✅ ElevenLabs TTS generated: {output_path}")
+        return result
 
     except Exception as e:
         print(f"[TTS] ElevenLabs error: {e}")
@@ -184,8 +249,8 @@ async def generate_tts_openai(
     Returns:
         Path to generated audio file or None on failure
     """
-    if not OPENAI_AVAILABLE or not OPENAI_API_KEY:
-        print("[TTS] OpenAI not available or API key not configured")
+    if not OPENAI_API_KEY:
+        print("[TTS] OpenAI API key not configured")
         return None
 
     try:
@@ -195,30 +260,39 @@ async def generate_tts_openai(
         # Get energy preset for speed adjustment
         energy_preset = VOICE_ENERGY_PRESETS.get(energy.lower(), VOICE_ENERGY_PRESETS[DEFAULT_ENERGY])
 
-        # Initialize OpenAI client
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-
-        print(f"[TTS] Generating OpenAI TTS with voice: {voice_name}, energy: {energy} ({energy_preset['description']})")
-        response = await client.audio.speech.create(
-            model="tts-1-hd",  # Higher quality model for more natural sound
-            voice=voice_name,
-            input=text[:4096],  # OpenAI limit
-            speed=energy_preset["speed"]  # Adjust speed based on energy mode
-        )
+        model = "tts-1-hd"  # Higher quality model for more natural sound
+        speed = energy_preset["speed"]  # Adjust speed based on energy mode
 
-        # Save audio file
-        if not output_path:
-            audio_dir = Path(__file__).parent.parent / "output" / "audio"
-            audio_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = str(audio_dir / f"openai_{timestamp}.mp3")
+        async def synthesize_chunk(chunk: str, path: str, previous: str, following: str) -> Optional[str]:
+            headers = {
+                "Authorization": f"Bearer {OPENAI_API_KEY}",
+                "Content-Type": "application/json"
+            }
+            payload = {
+                "model": model,
+                "voice": voice_name,
+                "input": chunk,
+                "speed": speed,
+                "response_format": "mp3"
+            }
+            async with provider_slots("openai"):
+                return await stream_to_file(
+                    f"{OPENAI_API_BASE}/audio/speech", path, headers, payload, timeout=60.0, tag="TTS"
+                )
 
-        # Write audio content
-        with open(output_path, "wb") as f:
-            f.write(response.content)
+        async def synthesize(path: str) -> Optional[str]:
+            print(f"[TTS] Generating OpenAI TTS with voice: {voice_name}, energy: {energy} ({energy_preset['description']})")
+            return await synthesize_chunked(text, path, synthesize_chunk, chunk_limit("openai"))
 
-        print(f"[TTS] ✅ OpenAI TTS generated: {output_path}")
-        return output_path
+        key = tts_cache_key(
+            "openai", voice_name, text, model=model,
+            settings={"speed": speed, "chunk_chars": chunk_limit("openai")},
+        )
+        output_path = output_path or audio_output_path(key, "openai")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[TTS] ✅ OpenAI TTS generated: {output_path}")
+        return result
 
     except Exception as e:
         print(f"[TTS] OpenAI error: {e}")
@@ -248,46 +322,134 @@ async def generate_tts_gtts(
         return None
 
     try:
-        print("[TTS] Generating gTTS with British accent (free fallback)")
+        async def synthesize_chunk(chunk: str, path: str, previous: str, following: str) -> Optional[str]:
+            # Create TTS with British accent
+            tts = gTTS(text=chunk, lang=lang, tld=tld, slow=False)
+            async with provider_slots("gtts"):
+                await asyncio.to_thread(tts.save, path)
+            return path
+
+        async def synthesize(path: str) -> Optional[str]:
+            print("[TTS] Generating gTTS with British accent (free fallback)")
+            return await synthesize_chunked(text, path, synthesize_chunk, chunk_limit("gtts"))
+
+        key = tts_cache_key("gtts", f"{lang}-{tld}", text, settings={"chunk_chars": chunk_limit("gtts")})
+        output_path = output_path or audio_output_path(key, "gtts")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[TTS] ✅ gTTS generated: {output_path}")
+        return result
+
+    except Exception as e:
+        print(f"[TTS] gTTS error: {e}")
+        return None
+
+
+def local_engine() -> Optional[Tuple[str, str]]:
+    """(engine, binary) of the installed local TTS engine, or None."""
+    if LOCAL_TTS_ENGINE in ("auto", "piper") and PIPER_MODEL:
+        binary = shutil.which(PIPER_BIN)
+        if binary:
+            return "piper", binary
+    if LOCAL_TTS_ENGINE in ("auto", "espeak"):
+        for name in ("espeak-ng", "espeak"):
+            binary = shutil.which(name)
+            if binary:
+                return "espeak", binary
+    return None
 
-        # Create TTS with British accent
-        tts = gTTS(text=text[:5000], lang=lang, tld=tld, slow=False)
 
-        # Save audio file
-        if not output_path:
-            audio_dir = Path(__file__).parent.parent / "output" / "audio"
-            audio_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = str(audio_dir / f"gtts_{timestamp}.mp3")
+def _local_command(engine: str, binary: str, wav_path: str, preset: Dict[str, float]) -> list[str]:
+    """Command that reads text on stdin and writes speech to wav_path."""
+    if engine == "piper":
+        return [binary, "--model", PIPER_MODEL, "--output_file", wav_path,
+                "--length_scale", str(preset["length_scale"]),
+                "--noise_scale", str(preset["noise_scale"])]
+    return [binary, "-v", ESPEAK_VOICE, "-s", str(preset["words_per_minute"]),
+            "-p", str(preset["pitch"]), "-P", str(preset["pitch_range"]),
+            "-w", wav_path, "--stdin"]
 
-        tts.save(output_path)
 
-        print(f"[TTS] ✅ gTTS generated: {output_path}")
-        return output_path
+async def generate_tts_local(
+    text: str,
+    output_path: Optional[str] = None,
+    energy: str = DEFAULT_ENERGY
+) -> Optional[str]:
+    """
+    Generate TTS with a local engine (offline, free; for drafts and tests).
+
+    Args:
+        text: Text to convert to speech
+        output_path: Optional output file path
+        energy: Energy mode (professional, energetic, viral)
+
+    Returns:
+        Path to generated audio file or None on failure
+    """
+    found = local_engine()
+    if not found:
+        print("[TTS] No local TTS engine installed (piper or espeak-ng)")
+        return None
+    engine, binary = found
+
+    try:
+        preset = LOCAL_ENERGY_PRESETS.get(energy.lower(), LOCAL_ENERGY_PRESETS[DEFAULT_ENERGY])
+
+        def run(path: str) -> str:
+            with tempfile.TemporaryDirectory(prefix="local_tts_") as tmp_dir:
+                wav_path = os.path.join(tmp_dir, "speech.wav")
+                subprocess.run(_local_command(engine, binary, wav_path, preset), input=text.encode(),
+                               capture_output=True, check=True, timeout=LOCAL_TTS_TIMEOUT)
+                # MP3 like every other provider
+                subprocess.run([ffmpeg_exe(), "-y", "-v", "error", "-i", wav_path,
+                                "-c:a", "libmp3lame", "-b:a", "128k", path],
+                               capture_output=True, check=True, timeout=LOCAL_TTS_TIMEOUT)
+            return path
+
+        async def synthesize(path: str) -> Optional[str]:
+            print(f"[TTS] Generating local TTS with {engine}, energy: {energy}")
+            async with provider_slots("local"):
+                return await asyncio.to_thread(run, path)
+
+        voice = os.path.basename(PIPER_MODEL) if engine == "piper" else ESPEAK_VOICE
+        key = tts_cache_key("local", f"{engine}:{voice}", text, settings=preset)
+        output_path = output_path or audio_output_path(key, "local")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[TTS] ✅ Local TTS generated: {output_path}")
+        return result
 
     except Exception as e:
-        print(f"[TTS] gTTS error: {e}")
+        print(f"[TTS] Local TTS error: {e}")
         return None
 
 
 # ==================== MAIN TTS INTERFACE ====================
 
+def tier_for_profile(profile: str) -> str:
+    """TTS tier for a render's encoding profile ("publish" or "draft")."""
+    return "publish" if profile in TTS_PUBLISH_PROFILES else "draft"
+
+
 async def generate_voiceover(
     text: str,
-    provider: Optional[Literal["elevenlabs", "openai", "gtts", "auto"]] = "auto",
+    provider: Optional[Literal["elevenlabs", "openai", "gtts", "local", "auto"]] = "auto",
     voice: Optional[str] = None,
     output_path: Optional[str] = None,
-    energy: str = DEFAULT_ENERGY
+    energy: str = DEFAULT_ENERGY,
+    tier: Optional[Literal["draft", "publish"]] = None
 ) -> Optional[str]:
     """
     Generate voiceover with automatic provider fallback.
 
     Args:
         text: Text to convert to speech
-        provider: TTS provider to use ("elevenlabs", "openai", "gtts", "auto")
+        provider: TTS provider to use ("elevenlabs", "openai", "gtts", "local", "auto")
         voice: Voice name (provider-specific)
         output_path: Optional output file path
         energy: Energy mode - "professional" (neutral, clear), "energetic" (warm, engaging), "viral" (high-energy)
+        tier: With provider "auto", which providers to try: "draft" (local,
+            free) or "publish" (premium); defaults to DEFAULT_TTS_TIER
 
     Returns:
         Path to generated audio file or None on failure
@@ -299,6 +461,9 @@ async def generate_voiceover(
         # Use energetic delivery for viral content
         audio_path = await generate_voiceover("Hello world!", energy="energetic")
 
+        # Draft render: offline voice, no paid characters
+        audio_path = await generate_voiceover("Hello world!", tier="draft")
+
         # Use specific provider with viral energy
         audio_path = await generate_voiceover("Hello world!", provider="elevenlabs", voice="charlotte", energy="viral")
     """
@@ -309,9 +474,9 @@ async def generate_voiceover(
     # Clean text
     text = text.strip()
 
-    # Auto-select provider
+    # Auto-select provider from the tier
     if provider == "auto":
-        providers_to_try = TTS_PROVIDER_PRIORITY
+        providers_to_try = TTS_TIERS.get(tier or DEFAULT_TTS_TIER, TTS_PROVIDER_PRIORITY)
     else:
         providers_to_try = [provider]
 
@@ -348,6 +513,15 @@ async def generate_voiceover(
                 if result:
                     return result
 
+            elif provider_name == "local":
+                result = await generate_tts_local(
+                    text=text,
+                    output_path=output_path,
+                    energy=energy
+                )
+                if result:
+                    return result
+
         except Exception as e:
             print(f"[TTS] Error with {provider_name}: {e}")
             continue
@@ -364,10 +538,12 @@ def get_available_providers() -> list[str]:
 
     if ELEVENLABS_API_KEY:
         providers.append("elevenlabs")
-    if OPENAI_AVAILABLE and OPENAI_API_KEY:
+    if OPENAI_API_KEY:
         providers.append("openai")
     if GTTS_AVAILABLE:
         providers.append("gtts")
+    if local_engine():
+        providers.append("local")
 
     return providers
 
@@ -378,7 +554,7 @@ def get_available_voices(provider: str) -> list[str]:
         return list(ELEVENLABS_VOICES.keys())
     elif provider == "openai":
         return list(OPENAI_VOICES.keys())
-    elif provider == "gtts":
+    elif provider in ("gtts", "local"):
         return ["default"]
     else:
         return []
@@ -409,5 +585,4 @@ async def test_tts():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(test_tts())
@@ -0,0 +1,200 @@
+"""
+Chunked Streaming TTS
+Long scripts are synthesized in pieces instead of being cut at the provider's
+character limit:
+- Text is split at sentence boundaries into chunks of TTS_CHUNK_CHARS
+- Chunks are synthesized concurrently (callers hold provider_slots)
+- Response bodies stream straight to disk, never buffered whole in memory
+- Segments are joined with ffmpeg's concat demuxer (stream copy, gapless)
+
+    path = await synthesize_chunked(text, output_path, synthesize_chunk, max_chars)
+"""
+from __future__ import annotations
+
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
+
+import asyncio
+import os
+import re
+import subprocess
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.encoding_profiles import ffmpeg_exe
+from app.http_pool import get_async_client
+
+
+# ==================== CONFIGURATION ====================
+
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "1500"))
+TTS_STREAM_CHUNK_BYTES = int(os.getenv("TTS_STREAM_CHUNK_KB", "64")) * 1024
+TTS_CONCAT_TIMEOUT = float(os.getenv("TTS_CONCAT_TIMEOUT", "120"))
+
+# Hard per-request limits of each provider
+PROVIDER_MAX_CHARS = {
+    "elevenlabs": 5000,
+    "openai": 4096,
+    "gtts": 5000,
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:–—])\s+")
+
+# (chunk text, output path, previous chunk, next chunk) -> path or None
+SynthesizeChunk = Callable[[str, str, str, str], Awaitable[Optional[str]]]
+
+
+def chunk_limit(provider: str) -> int:
+    """Chunk size for a provider: TTS_CHUNK_CHARS, within its request limit."""
+    return max(1, min(TTS_CHUNK_CHARS, PROVIDER_MAX_CHARS.get(provider, TTS_CHUNK_CHARS)))
+
+
+# ==================== TEXT SPLITTING ====================
+
+def _split_long(piece: str, max_chars: int) -> List[str]:
+    """Split one over-long sentence at clause breaks, then at word breaks."""
+    if len(piece) <= max_chars:
+        return [piece]
+    parts = [p for p in _CLAUSE_END.split(piece) if p]
+    if len(parts) == 1:
+        parts = piece.split()
+        if len(parts) == 1:
+            return [piece[i:i + max_chars] for i in range(0, len(piece), max_chars)]
+    return _pack([p for part in parts for p in _split_long(part, max_chars)], max_chars)
+
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """Greedily join pieces with spaces into chunks of at most max_chars."""
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, breaking between sentences
+    where possible (then between clauses, then between words).
+
+    Args:
+        text: Script text
+        max_chars: Chunk size limit
+
+    Returns:
+        Chunks in order; joined with spaces they reproduce the text
+        (whitespace collapsed)
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+    sentences = [s for s in _SENTENCE_END.split(text) if s]
+    pieces = [p for sentence in sentences for p in _split_long(sentence, max_chars)]
+    return _pack(pieces, max_chars)
+
+
+# ==================== STREAMING ====================
+
+async def stream_to_file(
+    url: str,
+    output_path: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float = 60.0,
+    tag: str = "TTS",
+) -> Optional[str]:
+    """
+    POST a TTS request and stream the audio body to output_path.
+
+    Returns:
+        output_path, or None on an API error (logged)
+    """
+    client = get_async_client()
+    async with client.stream("POST", url, headers=headers, json=payload, timeout=timeout) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            print(f"[{tag}] API error: {response.status_code} - {body.decode(errors='ignore')[:300]}")
+            return None
+        with open(output_path, "wb") as f:
+            async for chunk in response.aiter_bytes(TTS_STREAM_CHUNK_BYTES):
+                f.write(chunk)
+    return output_path
+
+
+# ==================== JOINING ====================
+
+def concat_audio(paths: List[str], output_path: str) -> str:
+    """Join audio segments of the same format without re-encoding."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as listing:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [ffmpeg_exe(), "-y", "-v", "error", "-f", "concat", "-safe", "0",
+             "-i", listing.name, "-c", "copy", output_path],
+            capture_output=True,
+            check=True,
+            timeout=TTS_CONCAT_TIMEOUT,
+        )
+    finally:
+        os.unlink(listing.name)
+    return output_path
+
+
+async def synthesize_chunked(
+    text: str,
+    output_path: str,
+    synthesize_chunk: SynthesizeChunk,
+    max_chars: int = TTS_CHUNK_CHARS,
+) -> Optional[str]:
+    """
+    Synthesize text of any length as concurrently generated, joined chunks.
+
+    Args:
+        text: Full script
+        output_path: Where the joined audio goes
+        synthesize_chunk: Writes one chunk's audio to the given path; also
+            receives the neighbouring chunks (for providers that use them
+            to keep intonation continuous)
+        max_chars: Chunk size limit
+
+    Returns:
+        output_path, or None if any chunk failed
+    """
+    chunks = split_text(text, max_chars)
+    if not chunks:
+        return None
+    if len(chunks) == 1:
+        return await synthesize_chunk(chunks[0], output_path, "", "")
+
+    print(f"[tts_stream] Synthesizing {len(chunks)} chunks ({len(text)} chars)")
+    base, ext = os.path.splitext(output_path)
+    parts = [f"{base}.part{i}{ext or '.mp3'}" for i in range(len(chunks))]
+    try:
+        results = await asyncio.gather(*[
+            synthesize_chunk(
+                chunk,
+                part,
+                chunks[i - 1] if i > 0 else "",
+                chunks[i + 1] if i + 1 < len(chunks) else "",
+            )
+            for i, (chunk, part) in enumerate(zip(chunks, parts))
+        ], return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if not all(results):
+            return None
+        await asyncio.to_thread(concat_audio, parts, output_path)
+        return output_path
+    finally:
+        for part in parts:
+            if os.path.exists(part):
+                os.unlink(part)
@@ -13,19 +13,19 @@ from __future__ import annotations
 
 # from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import asyncio
 import os
-import tempfile
+import threading
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
 try:
     from moviepy.editor import (
         VideoFileClip, ColorClip, CompositeVideoClip,
-        concatenate_videoclips, AudioFileClip, ImageClip
+        concatenate_videoclips
     )
-    from moviepy.video.fx.all import fadein, fadeout, resize  # noqa: F401
-    import numpy as np
+    from moviepy.video.fx.all import fadein, fadeout, loop, resize  # noqa: F401
     MOVIEPY_AVAILABLE = True
 except ImportError:
     MOVIEPY_AVAILABLE = False
@@ -33,6 +33,23 @@ except ImportError:
 from PIL import Image, ImageDraw, ImageFont
 import httpx
 
+from app.media_library import MEDIA_LIBRARY_QUERY_REUSE, media_library
+from app.encoding_profiles import EncodingProfile, get_profile, scaled
+from app.footage_proxy import normalize_footage
+from app.overlay_compositor import OverlayCompositor, OverlayLayer, parse_color
+from app.render_executor import ProgressCallback, render_executor, render_logger, report
+from app.render_graph import RenderGraph
+from app.speech_timing import retime_scenes, save_timestamped_speech
+from app.stock_footage import cached_search, prefetch, search_videos
+from app import tts_service
+from app.audio_mastering import (
+    MASTERING_ENABLED, master_voiceover, mastering_identity, media_duration, mux_audio
+)
+from app.tts_cache import audio_output_path, tts_cache, tts_cache_key
+from app.render_cache import (
+    RENDER_CACHE_ENABLED, render_cache, scene_cache_key, video_cache_key
+)
+
 
 # ==================== CONFIGURATION ====================
 
@@ -230,6 +247,8 @@ def create_text_image_pil(
 ) -> Image.Image:
     """
     Create text image using PIL (no ImageMagick required).
+
+    Returns a transparent RGBA canvas; overlays are blended by the compositor.
     """
     if max_width is None:
         max_width = size[0] - 100  # Default padding
@@ -269,7 +288,8 @@ def create_text_image_pil(
         line_widths.append(bbox[2] - bbox[0])
         line_heights.append(bbox[3] - bbox[1])
 
-    total_height = sum(line_heights) + (len(lines) - 1) * 20  # 20px spacing
+    line_spacing = scaled(20, size)  # 20px at 1080x1920
+    total_height = sum(line_heights) + (len(lines) - 1) * line_spacing
 
     # Start position (centered vertically)
     start_y = (size[1] - total_height) // 2
@@ -288,76 +308,76 @@ def create_text_image_pil(
         # Draw main text
         draw.text((x, current_y), line, font=font, fill=color)
 
-        current_y += line_height + 20
+        current_y += line_height + line_spacing
 
-    # Convert RGBA to RGB for MoviePy compatibility
-    # Create a black background and composite the RGBA image on it
-    rgb_img = Image.new('RGB', size, (0, 0, 0))
-    rgb_img.paste(img, (0, 0), img)  # Use img as mask for transparency
+    return img
 
-    return rgb_img
+
+def render_text_image(
+    text: str,
+    style_name: str,
+    size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT)
+) -> Image.Image:
+    """Rasterize scene text with EXACT competitor styling (independent of scene timing)."""
+    style = TEXT_STYLES.get(style_name, TEXT_STYLES["demo"])
+
+    # Style values are for 1080x1920
+    return create_text_image_pil(
+        text=text,
+        fontsize=scaled(style["size"], size),
+        color=style["color"],
+        stroke_color=style["stroke_color"],
+        stroke_width=max(1, scaled(style["stroke_width"], size)),
+        size=size,
+        max_width=size[0] - scaled(100, size)  # Padding
+    )
 
 
 def create_text_exact_style(
     text: str,
     style_name: str,
     duration: float,
-    size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT)
-) -> ImageClip:
-    """
-    Create text with EXACT competitor styling using PIL (no ImageMagick required).
+    size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
+    text_img: Optional[Image.Image] = None,
+) -> Optional[OverlayLayer]:
     """
-    if not MOVIEPY_AVAILABLE:
-        raise ImportError("MoviePy not available")
+    Create text layer with EXACT competitor styling using PIL (no ImageMagick required).
 
+    text_img is the already rasterized text (render_text_image), if any.
+    """
     style = TEXT_STYLES.get(style_name, TEXT_STYLES["demo"])
 
     try:
-        # Create text image using PIL
-        text_img = create_text_image_pil(
-            text=text,
-            fontsize=style["size"],
-            color=style["color"],
-            stroke_color=style["stroke_color"],
-            stroke_width=style["stroke_width"],
-            size=size,
-            max_width=size[0] - 100  # Padding
-        )
+        if text_img is None:
+            text_img = render_text_image(text, style_name, size)
 
-        # Convert PIL image to ImageClip
-        txt = ImageClip(np.array(text_img)).set_duration(duration)
-
-        # Position based on style
-        position = style["position"]
-        if position == "center":
-            txt = txt.set_position('center')
-        elif position == "top":
-            txt = txt.set_position(('center', 100))
-        elif position == "bottom":
-            # Lower third
-            txt = txt.set_position(('center', size[1] - 250))
+        # Position based on style (lower third for "bottom")
+        offset_y = {
+            "top": scaled(100, size),
+            "bottom": size[1] - scaled(250, size),
+        }.get(style["position"], 0)
 
         # Animations
-        txt = txt.crossfadein(0.2)
-        if duration > 0.5:
-            txt = txt.crossfadeout(0.2)
-
-        return txt
+        return OverlayLayer.from_image(
+            text_img,
+            y=offset_y,
+            end=duration,
+            fade_in=0.2,
+            fade_out=0.2 if duration > 0.5 else 0.0,
+        )
 
     except Exception as e:
         print(f"[competitor] Error creating text: {e}")
         # Fallback: simple text with PIL
         text_img = create_text_image_pil(
             text=text,
-            fontsize=60,
+            fontsize=scaled(60, size),
             color='white',
             stroke_color='black',
-            stroke_width=2,
+            stroke_width=max(1, scaled(2, size)),
             size=size
         )
-        txt = ImageClip(np.array(text_img)).set_duration(duration)
-        txt = txt.set_position('center')
-        return txt
+        return OverlayLayer.from_image(text_img, end=duration)
 
 
 # ==================== SMART VIDEO FETCHING ====================
@@ -400,6 +420,25 @@ def extract_smart_keywords(text: str, title: str) -> List[str]:
     return title_words[:2] if title_words else ['technology', 'innovation']
 
 
+def build_search_queries(keywords: List[str]) -> List[str]:
+    """Keyword combinations to try, most specific first."""
+    return [
+        ' '.join(keywords),  # All keywords together
+        keywords[0] if keywords else 'technology',  # First keyword
+        f"{keywords[0]} demo" if keywords else 'tech demo',  # Keyword + demo
+    ]
+
+
+def _pick_hd_video(videos: List[Dict[str, Any]], duration: float) -> Optional[str]:
+    """First full-HD portrait file of a long enough clip."""
+    for video in videos:
+        if video.get("duration", 0) >= duration:
+            for file in video.get("video_files", []):
+                if file.get("quality") == "hd" and file.get("width") == 1080:
+                    return file.get("link")
+    return None
+
+
 async def fetch_relevant_pexels_video(keywords: List[str], duration: int = 5) -> Optional[str]:
     """
     Fetch SPECIFIC video from Pexels based on script keywords.
@@ -409,60 +448,107 @@ async def fetch_relevant_pexels_video(keywords: List[str], duration: int = 5) ->
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {"Authorization": PEXELS_API_KEY}
-
-            # Try each keyword combination
-            search_queries = [
-                ' '.join(keywords),  # All keywords together
-                keywords[0] if keywords else 'technology',  # First keyword
-                f"{keywords[0]} demo" if keywords else 'tech demo',  # Keyword + demo
-            ]
-
-            for query in search_queries:
-                print(f"[competitor] Searching Pexels for: '{query}'")
-
-                response = await client.get(
-                    "https://api.pexels.com/videos/search",
-                    headers=headers,
-                    params={
-                        "query": query,
-                        "per_page": 5,
-                        "orientation": "portrait",
-                    },
-                    timeout=15.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    videos = data.get("videos", [])
-
-                    for video in videos:
-                        if video.get("duration", 0) >= duration:
-                            # Get HD video file
-                            for file in video.get("video_files", []):
-                                if file.get("quality") == "hd" and file.get("width") == 1080:
-                                    print(f"[competitor] ✅ Found relevant video for '{query}'")
-                                    return file.get("link")
-
-            print("[competitor] No specific video found, using solid background")
-            return None
+        # Try each keyword combination (searches are cached and shared)
+        for query in build_search_queries(keywords):
+            videos = await search_videos(query, orientation="portrait")
+            link = _pick_hd_video(videos, duration)
+            if link:
+                print(f"[competitor] ✅ Found relevant video for '{query}'")
+                return link
+
+        print("[competitor] No specific video found, using solid background")
+        return None
 
     except Exception as e:
         print(f"[competitor] Pexels error: {e}")
         return None
 
 
+async def plan_footage_searches(scenes: List[Dict[str, Any]], title: str) -> None:
+    """
+    Issue every scene's footage searches up front, concurrently.
+
+    Fallback queries are only searched for scenes whose more specific query
+    found nothing usable, so a 5-scene video usually needs 5 searches or
+    fewer (duplicates and cached queries are free).
+    """
+    if not PEXELS_API_KEY:
+        return
+
+    pending = []
+    for scene in scenes:
+        keywords = extract_smart_keywords(scene.get("text", ""), title)
+        if MEDIA_LIBRARY_QUERY_REUSE and media_library.has_query(" ".join(keywords)):
+            continue
+        pending.append((build_search_queries(keywords), scene.get("duration", 3.0)))
+
+    for rank in range(3):
+        if not pending:
+            break
+        await prefetch(queries[rank] for queries, _ in pending)
+
+        unresolved = []
+        for queries, duration in pending:
+            videos = cached_search(queries[rank], "portrait")
+            if videos is None or not _pick_hd_video(videos, duration):
+                unresolved.append((queries, duration))
+        pending = unresolved
+
+
 # ==================== SCENE CREATION ====================
 
-async def create_competitor_scene(
+# Background colors per scene type
+SCENE_BG_COLORS = {
+    "hook": "#FF0050",  # Vibrant red
+    "demo": "#0066FF",  # Tech blue
+    "proof": "#6B46FF",  # Purple
+    "impact": "#00D9FF",  # Cyan
+    "cta": "#00FF88",  # Green
+}
+
+
+async def fetch_scene_footage(scene: Dict[str, Any], title: str = "") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find and download RELEVANT stock footage for a scene.
+
+    Returns:
+        (video_url, local_path); either may be None (solid background)
+    """
+    scene_type = scene.get("type", "demo")
+    keywords = extract_smart_keywords(scene.get("text", ""), title)
+    print(f"[competitor] Keywords for {scene_type}: {keywords}")
+
+    # Footage already in the local library for these keywords skips the search
+    footage_query = " ".join(keywords)
+    local_hit = media_library.lookup_query(footage_query) if MEDIA_LIBRARY_QUERY_REUSE else None
+    if local_hit:
+        return local_hit[1], local_hit[0]
+
+    video_url = await fetch_relevant_pexels_video(keywords, scene.get("duration", 3.0))
+    if not video_url:
+        return None, None
+    try:
+        # Local library copy (downloaded on first use)
+        return video_url, await media_library.fetch(video_url, query=footage_query)
+    except Exception as e:
+        print(f"[competitor] Could not download video: {e}")
+        return video_url, None
+
+
+def build_competitor_scene(
     scene: Dict[str, Any],
-    title: str = "",
+    footage: Tuple[Optional[str], Optional[str]] = (None, None),
+    text_img: Optional[Image.Image] = None,
     size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
-    use_specific_footage: bool = True
+    fps: int = VIDEO_FPS,
+    fallbacks: Optional[List[str]] = None,
 ) -> CompositeVideoClip:
     """
-    Create scene matching exact competitor style.
+    Compose a scene from its (already fetched) footage and rasterized text.
+
+    Synchronous, so the render graph can build several scenes in threads.
+    Scene types that fall back to a solid background are appended to
+    fallbacks (the final video is then not cached).
     """
     if not MOVIEPY_AVAILABLE:
         raise ImportError("MoviePy not available")
@@ -470,123 +556,254 @@ async def create_competitor_scene(
     scene_type = scene.get("type", "demo")
     text = scene.get("text", "")
     duration = scene.get("duration", 3.0)
+    video_url, video_path = footage
 
     print(f"[competitor] Creating {scene_type} scene ({duration}s)")
 
-    # Background colors per scene type
-    bg_colors = {
-        "hook": "#FF0050",  # Vibrant red
-        "demo": "#0066FF",  # Tech blue
-        "proof": "#6B46FF",  # Purple
-        "impact": "#00D9FF",  # Cyan
-        "cta": "#00FF88",  # Green
-    }
+    bg_color = SCENE_BG_COLORS.get(scene_type, COLORS["dark_bg"])
 
-    bg_color = bg_colors.get(scene_type, COLORS["dark_bg"])
+    # Reuse a previously rendered segment when nothing about the scene changed
+    cache_key = scene_cache_key(
+        renderer="video_competitor_exact",
+        scene=scene,
+        size=size,
+        fps=fps,
+        style={"bg_color": bg_color, "text": TEXT_STYLES.get(scene_type, TEXT_STYLES["demo"])},
+        background=video_url,
+    )
+    if RENDER_CACHE_ENABLED:
+        cached_segment = render_cache.get(cache_key)
+        if cached_segment:
+            print(f"[competitor] ♻️  Reusing cached {scene_type} scene")
+            return VideoFileClip(cached_segment)
 
-    # Try to get RELEVANT stock footage based on script content
     bg = None
-    if use_specific_footage:
-        keywords = extract_smart_keywords(text, title)
-        print(f"[competitor] Keywords for {scene_type}: {keywords}")
-
-        video_url = await fetch_relevant_pexels_video(keywords, duration)
-
-        if video_url:
-            try:
-                # Download video
-                temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(video_url, timeout=30.0)
-                    temp_video.write(response.content)
-                    temp_video.close()
-
-                # Load and process video
-                video_clip = VideoFileClip(temp_video.name)
-
-                # Trim to duration
-                if video_clip.duration > duration:
-                    video_clip = video_clip.subclip(0, duration)
-
-                # Resize to fit
+    tint = None
+    load_failed = bool(video_url and not video_path)  # download failed
+    if video_path:
+        try:
+            # Pre-scaled, cropped and looped to length by ffmpeg (cached)
+            proxy_path = normalize_footage(video_path, size, fps, duration)
+            video_clip = VideoFileClip(proxy_path or video_path)
+
+            # Trim to duration (footage is picked before speech timing, so it may be short)
+            if video_clip.duration > duration:
+                video_clip = video_clip.subclip(0, duration)
+            elif video_clip.duration < duration:
+                video_clip = video_clip.fx(loop, duration=duration)
+
+            # Resize to fit (proxies already are the output size)
+            if not proxy_path:
                 video_clip = video_clip.resize(size)
 
-                # Add color overlay for brand consistency (30% opacity)
-                overlay = ColorClip(size=size, color=bg_color, duration=duration).set_opacity(0.3)
-                bg = CompositeVideoClip([video_clip, overlay])
-
-                # Clean up temp file
-                os.unlink(temp_video.name)
+            # Add color overlay for brand consistency (30% opacity, blended by the compositor)
+            bg = video_clip
+            tint = (bg_color, 0.3)
 
-                print(f"[competitor] ✅ Using relevant footage for {scene_type}")
-            except Exception as e:
-                print(f"[competitor] Could not load video: {e}")
-                bg = None
+            print(f"[competitor] ✅ Using relevant footage for {scene_type}")
+        except Exception as e:
+            print(f"[competitor] Could not load video: {e}")
+            bg = None
+            tint = None
+            load_failed = True
 
     # Fallback: solid color background
     if bg is None:
-        bg = ColorClip(size=size, color=bg_color, duration=duration)
+        bg = ColorClip(size=size, color=parse_color(bg_color), duration=duration)
         print(f"[competitor] Using solid background for {scene_type}")
+        if fallbacks is not None:
+            fallbacks.append(scene_type)
 
     # Create text with exact style
-    text_clip = create_text_exact_style(
+    text_layer = create_text_exact_style(
         text=text,
         style_name=scene_type,
         duration=duration,
-        size=size
+        size=size,
+        text_img=text_img,
     )
 
     # Composite
-    final = CompositeVideoClip([bg, text_clip], size=size)
+    final = OverlayCompositor(size, layers=[text_layer], tint=tint).apply(bg)
+
+    # A solid stand-in must not be cached under the footage's key
+    if RENDER_CACHE_ENABLED and not load_failed:
+        try:
+            segment_path = render_cache.store_clip(cache_key, final, fps=fps)
+            final.close()
+            return VideoFileClip(segment_path)
+        except Exception as e:
+            print(f"[competitor] Warning: Could not cache scene: {e}")
 
     return final
 
 
+async def create_competitor_scene(
+    scene: Dict[str, Any],
+    title: str = "",
+    size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
+    use_specific_footage: bool = True,
+    fps: int = VIDEO_FPS,
+) -> CompositeVideoClip:
+    """
+    Create scene matching exact competitor style.
+    """
+    if not MOVIEPY_AVAILABLE:
+        raise ImportError("MoviePy not available")
+
+    footage = await fetch_scene_footage(scene, title) if use_specific_footage else (None, None)
+    return build_competitor_scene(scene, footage, size=size, fps=fps)
+
+
+# ==================== RENDER GRAPH ====================
+
+class _StageCounter:
+    """Reports stage progress as concurrently running tasks finish."""
+
+    def __init__(self, stage: str, total: int):
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def finished(self, **info: Any) -> None:
+        with self._lock:
+            self.done += 1
+            done = self.done
+        report(self.stage, done / self.total, **info)
+
+
+async def render_competitor_scenes(
+    scenes: List[Dict[str, Any]],
+    title: str,
+    encoding: EncodingProfile,
+    add_voiceover: bool = True,
+    fallbacks: Optional[List[str]] = None,
+) -> Tuple[List[Any], Optional[str], List[Dict[str, Any]]]:
+    """
+    Voiceover, footage, text and scene clips as one dependency graph.
+
+    TTS, every scene's footage search/download and text rasterization start
+    together; each scene is composed as soon as the voiceover timing, its
+    footage and its text are ready:
+
+        voiceover ─────────────────┐
+        searches ── footage_i ─────┼── scene_i
+        text_i ────────────────────┘
+
+    Stand-ins (solid backgrounds, an unmastered voiceover) are recorded in
+    fallbacks.
+
+    Returns:
+        (scene clips, voiceover path or None, scenes timed to the voiceover)
+    """
+    footage_done = _StageCounter("footage", len(scenes))
+    scenes_done = _StageCounter("scene", len(scenes))
+
+    async def voiceover() -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        if not add_voiceover:
+            return None, scenes
+        voiceover_path = await generate_voiceover(
+            ' '.join(s.get('text', '') for s in scenes), tier=tts_service.tier_for_profile(encoding.name)
+        )
+        report("tts", 1.0)
+        if not voiceover_path:
+            return None, scenes
+        mastered = await asyncio.to_thread(master_voiceover, voiceover_path)
+        if MASTERING_ENABLED and not mastered and fallbacks is not None:
+            fallbacks.append("mastering")
+        voiceover_path = mastered or voiceover_path
+        # Scene lengths follow the voiceover instead of the fixed 3/6/9/6/6s grid
+        return voiceover_path, retime_scenes(scenes, voiceover_path)
+
+    async def footage(scene: Dict[str, Any], _planned: None) -> Tuple[Optional[str], Optional[str]]:
+        result = await fetch_scene_footage(scene, title)
+        footage_done.finished(scene_type=scene["type"])
+        return result
+
+    def scene_clip(
+        index: int,
+        timing: Tuple[Optional[str], List[Dict[str, Any]]],
+        scene_footage: Tuple[Optional[str], Optional[str]],
+        text_img: Image.Image,
+    ) -> Any:
+        scene = timing[1][index]
+        print(f"\n[competitor] Creating scene {index + 1}/{len(scenes)}: {scene['type'].upper()}")
+        clip = build_competitor_scene(
+            scene, scene_footage, text_img, size=encoding.size, fps=encoding.fps, fallbacks=fallbacks
+        )
+        scenes_done.finished(scene=index + 1, scenes=len(scenes))
+        return clip
+
+    graph = RenderGraph()
+    graph.add("voiceover", voiceover)
+    # Searches use the script durations; fallbacks only for scenes that need them
+    graph.add("searches", plan_footage_searches, scenes, title)
+    for i, scene in enumerate(scenes):
+        graph.add(f"footage_{i}", footage, scene, deps=["searches"])
+        graph.add(f"text_{i}", render_text_image, scene.get("text", ""), scene["type"], encoding.size)
+        graph.add(f"scene_{i}", scene_clip, i, deps=["voiceover", f"footage_{i}", f"text_{i}"])
+
+    results = await graph.run()
+    voiceover_path, timed_scenes = results["voiceover"]
+    return [results[f"scene_{i}"] for i in range(len(scenes))], voiceover_path, timed_scenes
+
+
 # ==================== VOICEOVER ====================
 
-async def generate_voiceover(text: str) -> Optional[str]:
-    """Generate voiceover with Eleven Labs."""
+async def generate_voiceover(text: str, tier: str = "publish") -> Optional[str]:
+    """Generate voiceover with Eleven Labs (drafts use the free local tier)."""
+    if tier != "publish":
+        return await tts_service.generate_voiceover(text, tier=tier)
+
     if not ELEVENLABS_API_KEY:
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            }
+        voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel - clear, professional
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": 0.6,  # Slightly more stable for clarity
+            "similarity_boost": 0.8,
+            "style": 0.2,  # Slight expressiveness
+        }
+
+        async def synthesize(path: str) -> Optional[str]:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "xi-api-key": ELEVENLABS_API_KEY,
+                    "Content-Type": "application/json"
+                }
 
-            voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel - clear, professional
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+                # with-timestamps also returns character timings for scene timing
+                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/with-timestamps"
 
-            payload = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.6,  # Slightly more stable for clarity
-                    "similarity_boost": 0.8,
-                    "style": 0.2,  # Slight expressiveness
+                payload = {
+                    "text": text,
+                    "model_id": model_id,
+                    "voice_settings": voice_settings
                 }
-            }
 
-            print("[competitor] Generating voiceover...")
+                print("[competitor] Generating voiceover...")
 
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
+                response = await client.post(url, headers=headers, json=payload, timeout=60.0)
 
-            if response.status_code == 200:
-                audio_dir = Path(__file__).parent.parent / "output" / "audio"
-                audio_dir.mkdir(parents=True, exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_path = str(audio_dir / f"voice_{timestamp}.mp3")
+                if response.status_code != 200:
+                    print(f"[competitor] Voiceover API error: {response.status_code}")
+                    return None
 
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
+                save_timestamped_speech(response.json(), path, text)
+                return path
 
-                print(f"[competitor] ✅ Voiceover saved: {output_path}")
-                return output_path
-            else:
-                print(f"[competitor] Voiceover API error: {response.status_code}")
-                return None
+        key = tts_cache_key(
+            "elevenlabs", voice_id, text, model=model_id,
+            settings={**voice_settings, "timestamps": True},
+        )
+        output_path = audio_output_path(key, "voice")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[competitor] ✅ Voiceover saved: {output_path}")
+        return result
 
     except Exception as e:
         print(f"[competitor] Voiceover error: {e}")
@@ -599,13 +816,36 @@ async def generate_exact_competitor_video(
     script: str,
     title: str,
     output_path: Optional[str] = None,
-    add_voiceover: bool = True
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Dict[str, Any]:
     """
     Generate EXACT 30-second competitor-style video.
 
-    Matches viral tech shorts structure perfectly.
+    Matches viral tech shorts structure perfectly. profile selects the
+    encoding profile (draft, review, publish). Renders in the render process
+    pool; progress receives render progress events.
     """
+    return await render_executor.run(
+        _generate_exact_competitor_video,
+        script=script,
+        title=title,
+        output_path=output_path,
+        add_voiceover=add_voiceover,
+        profile=profile,
+        progress=progress,
+    )
+
+
+async def _generate_exact_competitor_video(
+    script: str,
+    title: str,
+    output_path: Optional[str] = None,
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+) -> Dict[str, Any]:
+    """Render body of generate_exact_competitor_video (runs in a render process)."""
     if not MOVIEPY_AVAILABLE:
         return {"success": False, "error": "MoviePy not installed"}
 
@@ -615,88 +855,96 @@ async def generate_exact_competitor_video(
     print(f"{'='*80}\n")
 
     try:
+        # Relevant stock footage behind every scene
+        encoding = get_profile(profile).with_tune("film")
+
         # Step 1: Parse into 30s structure
         scenes = parse_30s_structure(script, title)
+        report("parse", 1.0, scenes=len(scenes))
 
-        # Step 2: Generate voiceover
-        voiceover_path = None
-        if add_voiceover:
-            full_text = ' '.join([s.get('text', '') for s in scenes])
-            voiceover_path = await generate_voiceover(full_text)
-
-        # Step 3: Create all 5 scenes with RELEVANT footage
-        scene_clips = []
-        for i, scene in enumerate(scenes):
-            print(f"\n[competitor] Creating scene {i+1}/5: {scene['type'].upper()}")
-            clip = await create_competitor_scene(
-                scene=scene,
-                title=title,  # Pass title for smart keyword extraction
-                use_specific_footage=True  # Enable relevant video matching
-            )
-            scene_clips.append(clip)
-
-        # Step 4: Concatenate scenes
-        print(f"\n[competitor] Assembling {len(scene_clips)} scenes...")
-        final_video = concatenate_videoclips(scene_clips, method="compose")
-
-        # Step 5: Add voiceover
-        if voiceover_path and os.path.exists(voiceover_path):
-            try:
-                audio = AudioFileClip(voiceover_path)
-
-                # Trim or extend audio to match video
-                if audio.duration > final_video.duration:
-                    audio = audio.subclip(0, final_video.duration)
-                elif audio.duration < final_video.duration:
-                    # Speed up slightly if audio is too short
-                    speed_factor = audio.duration / final_video.duration
-                    if speed_factor > 0.9:  # Only if close
-                        audio = audio.fx(lambda clip: clip.speedx(1 / speed_factor))
-
-                final_video = final_video.set_audio(audio)
-                print("[competitor] ✅ Voiceover synced to video")
-            except Exception as e:
-                print(f"[competitor] Audio warning: {e}")
-
-        # Step 6: Export
         if not output_path:
             output_dir = Path(__file__).parent.parent / "output" / "videos"
             output_dir.mkdir(parents=True, exist_ok=True)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = str(output_dir / f"competitor_{timestamp}.mp4")
 
+        # Identical requests are served from the render cache
+        video_key = video_cache_key(
+            "video_competitor_exact",
+            script=script,
+            title=title,
+            add_voiceover=add_voiceover,
+            encoding=encoding.cache_identity(),
+            mastering=mastering_identity(),
+        )
+        if RENDER_CACHE_ENABLED and render_cache.materialize(video_key, output_path):
+            print(f"[competitor] ♻️  Served cached video: {output_path}")
+            return {
+                "success": True,
+                "video_path": output_path,
+                # Speech-timed length of the cached render, not the 30s grid
+                "duration": round(media_duration(output_path) or sum(s["duration"] for s in scenes), 2),
+                "scenes": len(scenes),
+                "structure": "Hook/Demo/Proof/Impact/CTA",
+                "profile": encoding.name,
+                "cached": True,
+            }
+
+        # Steps 2-3: Voiceover, RELEVANT footage and text for all 5 scenes, concurrently.
+        # Renders missing a voiceover, mastering or footage are not cached,
+        # so a provider outage is not served again for identical requests.
+        fallbacks: List[str] = []
+        scene_clips, voiceover_path, scenes = await render_competitor_scenes(
+            scenes, title, encoding, add_voiceover=add_voiceover, fallbacks=fallbacks,
+        )
+        degraded = bool(fallbacks) or (add_voiceover and not voiceover_path)
+
+        # Step 4: Concatenate scenes
+        print(f"\n[competitor] Assembling {len(scene_clips)} scenes...")
+        final_video = concatenate_videoclips(scene_clips, method="compose")
+
+        # Step 5: Export
         print(f"\n[competitor] Exporting final video to: {output_path}")
         print("[competitor] This may take 2-3 minutes...")
 
         final_video.write_videofile(
             output_path,
-            fps=VIDEO_FPS,
-            codec='libx264',
-            preset='medium',
-            threads=4,
-            logger='bar',
-            audio_codec='aac'
+            logger=render_logger(),
+            **encoding.write_kwargs(audio=False),
         )
 
+        # Step 6: Add the mastered voiceover (muxed without re-encoding)
+        if voiceover_path and os.path.exists(voiceover_path):
+            if mux_audio(output_path, voiceover_path, final_video.duration):
+                print("[competitor] ✅ Voiceover synced to video")
+            else:
+                degraded = True
+
         # Cleanup
         final_video.close()
         for clip in scene_clips:
             clip.close()
 
+        if RENDER_CACHE_ENABLED and not degraded:
+            render_cache.put(video_key, output_path, kind="video")
+        elif degraded:
+            print("[competitor] Render degraded (voiceover or footage missing), not cached")
+
         print(f"\n{'='*80}")
         print("✅ COMPETITOR VIDEO COMPLETE!")
         print(f"{'='*80}")
         print(f"📍 Location: {output_path}")
-        print("⏱️  Duration: 30 seconds")
+        print(f"⏱️  Duration: {final_video.duration:.1f} seconds")
         print("🎬 Scenes: 5 (Hook → Demo → Proof → Impact → CTA)")
         print(f"{'='*80}\n")
 
         return {
             "success": True,
             "video_path": output_path,
-            "duration": 30,
-            "scenes": 5,
-            "structure": "Hook/Demo/Proof/Impact/CTA"
+            "duration": round(sum(s["duration"] for s in scenes), 2),
+            "scenes": len(scenes),
+            "structure": "Hook/Demo/Proof/Impact/CTA",
+            "profile": encoding.name,
         }
 
     except Exception as e:
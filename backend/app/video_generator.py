@@ -4,12 +4,15 @@ from __future__ import annotations
 
 import os
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from sqlalchemy import exists
 from sqlmodel import Session, select
 from app.database import engine
-from app.models import Post, Asset
+from app.models import Post, Asset, RenderJob
+from app.render_executor import report
+from app.tts_cache import audio_output_path, tts_cache, tts_cache_key
 
 
 # API Configuration
@@ -18,6 +21,9 @@ STOCKSTACK_API_KEY = os.getenv("STOCKSTACK_API_KEY", "")
 ELEVENLABS_API_BASE = "https://api.elevenlabs.io/v1"
 STOCKSTACK_API_BASE = "https://api.stockstack.com/v1"
 
+# Max video_production posts queued for rendering per scheduler tick
+VIDEO_QUEUE_BATCH_SIZE = int(os.getenv("VIDEO_QUEUE_BATCH_SIZE", "10"))
+
 
 async def generate_video_for_post(post: Post) -> Dict[str, Any]:
     """
@@ -31,12 +37,15 @@ async def generate_video_for_post(post: Post) -> Dict[str, Any]:
         
         # Step 1: Extract script sections
         script_sections = parse_video_script(post.body)
+        report("parse", 1.0)
         
         # Step 2: Get stock video clips from StockStack
         video_clips = await get_stock_video_clips(script_sections, post.title)
+        report("footage", 1.0, clips=len(video_clips))
         
         # Step 3: Generate voiceover with Eleven Labs
         voiceover_url = await generate_voiceover(script_sections["full_text"], post.title)
+        report("tts", 1.0)
         
         # Step 4: Combine video and audio (simplified - in production use FFmpeg)
         # For now, we'll just save the video clip URL and voiceover URL
@@ -271,58 +280,58 @@ async def generate_voiceover(script_text: str, title: str) -> str:
         if not text.strip():
             text = title  # Fallback to title if script is empty
         
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            }
-            
-            # Use default voice (Rachel) or you can get available voices from /voices endpoint
-            voice_id = "21m00Tcm4TlvDq8ikWAM"  # Default voice (Rachel)
-            
-            # Generate speech
-            url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}"
-            payload = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5,
-                    "style": 0.0,
-                    "use_speaker_boost": True
+        # Use default voice (Rachel) or you can get available voices from /voices endpoint
+        voice_id = "21m00Tcm4TlvDq8ikWAM"  # Default voice (Rachel)
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.5,
+            "style": 0.0,
+            "use_speaker_boost": True
+        }
+        
+        async def synthesize(path: str) -> Optional[str]:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "xi-api-key": ELEVENLABS_API_KEY,
+                    "Content-Type": "application/json"
                 }
-            }
-            
-            response = await client.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=60.0
-            )
-            
-            if response.status_code == 200:
-                # Save audio file to disk (in production, upload to S3/cloud storage)
-                import os
-                os.makedirs("/tmp/xseller_audio", exist_ok=True)
-                
-                audio_filename = f"voiceover_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.mp3"
-                audio_path = f"/tmp/xseller_audio/{audio_filename}"
                 
-                # Write audio data to file
-                with open(audio_path, "wb") as f:
-                    f.write(response.content)
+                # Generate speech
+                url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}"
+                payload = {
+                    "text": text,
+                    "model_id": model_id,
+                    "voice_settings": voice_settings
+                }
                 
-                print(f"[video] Voiceover saved to {audio_path}")
+                response = await client.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=60.0
+                )
                 
-                # In production, upload to cloud storage and return public URL
-                # For now, return the file path (would need to serve it or upload to CDN)
-                # Return a placeholder that indicates voiceover was generated
-                return f"file://{audio_path}"  # Local file path - in production use CDN URL
+                if response.status_code != 200:
+                    print(f"[video] Eleven Labs API error {response.status_code}: {response.text}")
+                    return None
                 
-            else:
-                error_text = response.text
-                print(f"[video] Eleven Labs API error {response.status_code}: {error_text}")
-                return ""
+                # Write audio data to file
+                with open(path, "wb") as f:
+                    f.write(response.content)
+                return path
+        
+        key = tts_cache_key("elevenlabs", voice_id, text, model=model_id, settings=voice_settings)
+        audio_path = audio_output_path(key, "voiceover")  # Content-addressed, no collisions
+        if not await tts_cache.fetch(key, audio_path, synthesize):
+            return ""
+        
+        print(f"[video] Voiceover saved to {audio_path}")
+        
+        # In production, upload to cloud storage and return public URL
+        # For now, return the file path (would need to serve it or upload to CDN)
+        # Return a placeholder that indicates voiceover was generated
+        return f"file://{audio_path}"  # Local file path - in production use CDN URL
                 
     except Exception as e:
         print(f"[video] Error generating voiceover: {str(e)}")
@@ -331,31 +340,46 @@ async def generate_voiceover(script_text: str, title: str) -> str:
         return ""
 
 
-async def process_video_generation_queue():
-    """Process all posts with status 'video_production'."""
-    print("[video] Processing video generation queue...")
+async def process_video_generation_queue(batch_size: int = VIDEO_QUEUE_BATCH_SIZE) -> List[int]:
+    """
+    Queue renders for posts with status 'video_production'.
+
+    Safe to run from every uvicorn worker's scheduler at once: candidates
+    exclude posts that already have an active render job, and the claim is
+    a single INSERT ... ON CONFLICT DO NOTHING RETURNING on the job's
+    dedupe key, so each post is queued by exactly one caller. Rendering
+    (and its lease/heartbeat) happens in the render workers.
+
+    Args:
+        batch_size: Max posts claimed per tick (oldest first)
+
+    Returns:
+        Ids of the posts queued by this tick
+    """
+    from app.render_queue import ACTIVE_STATUSES, render_queue
+
     with Session(engine) as session:
-        stmt = select(Post).where(
-            Post.kind == "video",
-            Post.status == "video_production",
-            Post.deleted_at.is_(None)
+        has_active_job = exists().where(
+            RenderJob.post_id == Post.id,
+            RenderJob.kind == "post_video",
+            RenderJob.status.in_(ACTIVE_STATUSES),
         )
-        posts = session.exec(stmt).all()
-        
-        print(f"[video] Found {len(posts)} videos to generate")
-        
-        for post in posts:
-            try:
-                print(f"[video] Generating video for post {post.id}...")
-                await generate_video_for_post(post)
-            except Exception as e:
-                print(f"[video] Failed to generate video for post {post.id}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                # Update status to failed
-                db_post = session.get(Post, post.id)
-                if db_post:
-                    db_post.status = "failed"
-                    session.add(db_post)
-                    session.commit()
+        stmt = (
+            select(Post.id)
+            .where(
+                Post.kind == "video",
+                Post.status == "video_production",
+                Post.deleted_at.is_(None),
+                ~has_active_job,
+            )
+            .order_by(Post.updated_at, Post.id)
+            .limit(batch_size)
+        )
+        post_ids = session.exec(stmt).all()
+
+    if not post_ids:
+        return []
 
+    queued = render_queue.enqueue_posts("post_video", post_ids)
+    print(f"[video] Queued {len(queued)} of {len(post_ids)} videos to generate (batch limit {batch_size})")
+    return queued
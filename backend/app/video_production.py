@@ -10,21 +10,20 @@ from __future__ import annotations
 
 # from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import asyncio
 import os
 import re
-import tempfile
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
 # Video generation imports
 try:
     from moviepy.editor import (
         VideoFileClip, ColorClip, CompositeVideoClip,
-        concatenate_videoclips, AudioFileClip, ImageClip
+        concatenate_videoclips
     )
     from moviepy.video.fx.all import fadein, fadeout  # noqa: F401
-    import numpy as np
     MOVIEPY_AVAILABLE = True
 except ImportError:
     MOVIEPY_AVAILABLE = False
@@ -33,6 +32,22 @@ except ImportError:
 import httpx
 from PIL import Image, ImageDraw, ImageFont
 
+from app.encoding_profiles import EncodingProfile, get_profile, scaled
+from app.footage_proxy import normalize_footage
+from app.media_library import MEDIA_LIBRARY_QUERY_REUSE, media_library
+from app.overlay_compositor import OverlayCompositor, OverlayLayer, parse_color
+from app.render_executor import ProgressCallback, render_executor, render_logger, report
+from app.speech_timing import retime_scenes, save_timestamped_speech
+from app.stock_footage import prefetch, search_videos
+from app import tts_service
+from app.audio_mastering import (
+    MASTERING_ENABLED, master_voiceover, mastering_identity, media_duration, mux_audio
+)
+from app.tts_cache import audio_output_path, tts_cache, tts_cache_key
+from app.render_cache import (
+    RENDER_CACHE_ENABLED, render_cache, scene_cache_key, video_cache_key
+)
+
 
 # ==================== CONFIGURATION ====================
 
@@ -161,47 +176,26 @@ async def get_pexels_video(query: str, duration: int = 5) -> Optional[str]:
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "Authorization": PEXELS_API_KEY
-            }
-
-            # Search for videos
-            response = await client.get(
-                "https://api.pexels.com/videos/search",
-                headers=headers,
-                params={
-                    "query": query,
-                    "per_page": 10,
-                    "orientation": "portrait",  # Vertical for social media
-                },
-                timeout=15.0
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                videos = data.get("videos", [])
-
-                # Find video with suitable duration
-                for video in videos:
-                    video_duration = video.get("duration", 0)
-                    if video_duration >= duration:
-                        # Get HD video file
-                        video_files = video.get("video_files", [])
-                        for file in video_files:
-                            if file.get("quality") == "hd" and file.get("width") == 1080:
-                                return file.get("link")
-
-                        # Fallback: any HD video
-                        for file in video_files:
-                            if file.get("quality") == "hd":
-                                return file.get("link")
-
-                print(f"[video_production] No suitable video found for '{query}'")
-                return None
-            else:
-                print(f"[video_production] Pexels API error: {response.status_code}")
-                return None
+        # Search for videos (cached and shared with the other renderers)
+        videos = await search_videos(query, orientation="portrait")  # Vertical for social media
+
+        # Find video with suitable duration
+        for video in videos:
+            video_duration = video.get("duration", 0)
+            if video_duration >= duration:
+                # Get HD video file
+                video_files = video.get("video_files", [])
+                for file in video_files:
+                    if file.get("quality") == "hd" and file.get("width") == 1080:
+                        return file.get("link")
+
+                # Fallback: any HD video
+                for file in video_files:
+                    if file.get("quality") == "hd":
+                        return file.get("link")
+
+        print(f"[video_production] No suitable video found for '{query}'")
+        return None
 
     except Exception as e:
         print(f"[video_production] Error fetching Pexels video: {str(e)}")
@@ -272,6 +266,8 @@ def create_text_image_pil(
 ) -> Image.Image:
     """
     Create text image using PIL (no ImageMagick required).
+
+    Returns a transparent RGBA canvas; overlays are blended by the compositor.
     """
     if max_width is None:
         max_width = size[0] - 100  # Default padding
@@ -294,7 +290,8 @@ def create_text_image_pil(
         line_widths.append(bbox[2] - bbox[0])
         line_heights.append(bbox[3] - bbox[1])
 
-    total_height = sum(line_heights) + (len(lines) - 1) * 20  # 20px spacing
+    line_spacing = scaled(20, size)  # 20px at 1080x1920
+    total_height = sum(line_heights) + (len(lines) - 1) * line_spacing
 
     # Start position (centered vertically)
     start_y = (size[1] - total_height) // 2
@@ -313,26 +310,21 @@ def create_text_image_pil(
         # Draw main text
         draw.text((x, current_y), line, font=font, fill=color)
 
-        current_y += line_height + 20
-
-    # Convert RGBA to RGB for MoviePy compatibility
-    # Create a black background and composite the RGBA image on it
-    rgb_img = Image.new('RGB', size, (0, 0, 0))
-    rgb_img.paste(img, (0, 0), img)  # Use img as mask for transparency
+        current_y += line_height + line_spacing
 
-    return rgb_img
+    return img
 
 
-def create_text_clip(
+def create_text_layer(
     text: str,
     duration: float,
     size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
     fontsize: int = 80,
     color: str = TEXT_COLOR,
     position: str = "center",
-) -> ImageClip:
+) -> Optional[OverlayLayer]:
     """
-    Create animated text clip with styling using PIL (no ImageMagick required).
+    Create animated text overlay layer using PIL (no ImageMagick required).
 
     Args:
         text: Text to display
@@ -343,11 +335,8 @@ def create_text_clip(
         position: Position ('center', 'top', 'bottom')
 
     Returns:
-        ImageClip object
+        OverlayLayer cropped to the text, or None for empty text
     """
-    if not MOVIEPY_AVAILABLE:
-        raise ImportError("MoviePy not available")
-
     # Split long text into multiple lines
     words = text.split()
     lines = []
@@ -377,36 +366,34 @@ def create_text_clip(
         fontsize=fontsize,
         color=color,
         stroke_color=TEXT_STROKE_COLOR,
-        stroke_width=TEXT_STROKE_WIDTH,
+        stroke_width=max(1, scaled(TEXT_STROKE_WIDTH, size)),
         size=size,
-        max_width=size[0] - 100  # Padding
+        max_width=size[0] - scaled(100, size)  # Padding
     )
 
-    # Convert PIL image to ImageClip
-    txt_clip = ImageClip(np.array(text_img)).set_duration(duration)
-
-    # Position text
-    if position == "center":
-        txt_clip = txt_clip.set_position('center')
-    elif position == "top":
-        txt_clip = txt_clip.set_position(('center', 100))
-    elif position == "bottom":
-        txt_clip = txt_clip.set_position(('center', size[1] - 300))
+    # Position text (offset of the full canvas on the frame)
+    offset_y = {
+        "top": scaled(100, size),
+        "bottom": size[1] - scaled(300, size),
+    }.get(position, 0)
 
     # Add fade in/out animations
-    txt_clip = txt_clip.crossfadein(0.3)
-
-    if duration > 0.5:
-        txt_clip = txt_clip.crossfadeout(0.3)
-
-    return txt_clip
+    return OverlayLayer.from_image(
+        text_img,
+        y=offset_y,
+        end=duration,
+        fade_in=0.3,
+        fade_out=0.3 if duration > 0.5 else 0.0,
+    )
 
 
 # ==================== SCENE GENERATION ====================
 
 async def create_scene(
     scene: Dict[str, Any],
-    output_size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT)
+    output_size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
+    fps: int = VIDEO_FPS,
+    fallbacks: Optional[List[str]] = None,
 ) -> CompositeVideoClip:
     """
     Create a single scene with background and text overlay.
@@ -414,6 +401,9 @@ async def create_scene(
     Args:
         scene: Scene dict with type, text, duration
         output_size: Output video dimensions
+        fps: Output frame rate (for the cached segment)
+        fallbacks: Scene types that fell back to a solid background are
+            appended here (the final video is then not cached)
 
     Returns:
         CompositeVideoClip
@@ -437,54 +427,74 @@ async def create_scene(
 
     bg_color = scene_colors.get(scene_type, "#1a1a2e")
 
-    # Try to get stock footage
+    # Text overlay size (designed for 1080x1920, scaled to the output)
+    fontsize = scaled({
+        "hook": 90,  # Larger for hook
+        "main": 70,
+        "why": 70,
+        "cta": 80,
+    }.get(scene_type, 70), output_size)
+
+    # Try to get stock footage (footage already in the local library skips the search)
     keywords = get_scene_keywords(scene_type, text)
-    stock_video_url = await get_pexels_video(keywords, duration)
+    local_hit = media_library.lookup_query(keywords) if MEDIA_LIBRARY_QUERY_REUSE else None
+    stock_video_url = local_hit[1] if local_hit else await get_pexels_video(keywords, duration)
+
+    # Reuse a previously rendered segment when nothing about the scene changed
+    cache_key = scene_cache_key(
+        renderer="video_production",
+        scene=scene,
+        size=output_size,
+        fps=fps,
+        style={"bg_color": bg_color, "fontsize": fontsize},
+        background=stock_video_url,
+    )
+    if RENDER_CACHE_ENABLED:
+        cached_segment = render_cache.get(cache_key)
+        if cached_segment:
+            print(f"[video_production] ♻️  Reusing cached {scene_type} scene")
+            return VideoFileClip(cached_segment)
 
     # Create background
+    tint = None
+    load_failed = False
     if stock_video_url:
         try:
-            # Download and use stock video
-            temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-            async with httpx.AsyncClient() as client:
-                response = await client.get(stock_video_url, timeout=30.0)
-                temp_video.write(response.content)
-                temp_video.close()
+            # Use stock video from the local library (downloaded on first use)
+            video_path = local_hit[0] if local_hit else await media_library.fetch(stock_video_url, query=keywords)
+            if not video_path:
+                raise RuntimeError("download failed")
 
-            bg_clip = VideoFileClip(temp_video.name)
+            # Pre-scaled and cropped to the output size by ffmpeg (cached)
+            proxy_path = await asyncio.to_thread(normalize_footage, video_path, output_size, fps, duration)
+            bg_clip = VideoFileClip(proxy_path or video_path)
 
             # Trim to required duration
             if bg_clip.duration > duration:
                 bg_clip = bg_clip.subclip(0, duration)
 
-            # Resize to fit
-            bg_clip = bg_clip.resize(output_size)
-
-            # Apply color overlay for brand consistency
-            overlay = ColorClip(size=output_size, color=bg_color, duration=duration).set_opacity(0.4)
-            bg_clip = CompositeVideoClip([bg_clip, overlay])
+            # Resize to fit (proxies already are the output size)
+            if not proxy_path:
+                bg_clip = bg_clip.resize(output_size)
 
-            # Clean up temp file
-            os.unlink(temp_video.name)
+            # Apply color overlay for brand consistency (blended by the compositor)
+            tint = (bg_color, 0.4)
 
             print(f"[video_production] Using stock footage for {scene_type}")
         except Exception as e:
             print(f"[video_production] Failed to load stock video: {e}, using color background")
-            bg_clip = ColorClip(size=output_size, color=bg_color, duration=duration)
+            bg_clip = ColorClip(size=output_size, color=parse_color(bg_color), duration=duration)
+            tint = None
+            load_failed = True
     else:
         # Fallback: solid color background
-        bg_clip = ColorClip(size=output_size, color=bg_color, duration=duration)
+        bg_clip = ColorClip(size=output_size, color=parse_color(bg_color), duration=duration)
         print(f"[video_production] Using color background for {scene_type}")
+    if (load_failed or not stock_video_url) and fallbacks is not None:
+        fallbacks.append(scene_type)
 
     # Create text overlay
-    fontsize = {
-        "hook": 90,  # Larger for hook
-        "main": 70,
-        "why": 70,
-        "cta": 80,
-    }.get(scene_type, 70)
-
-    text_clip = create_text_clip(
+    text_layer = create_text_layer(
         text=text,
         duration=duration,
         size=output_size,
@@ -493,7 +503,17 @@ async def create_scene(
     )
 
     # Composite scene
-    scene_clip = CompositeVideoClip([bg_clip, text_clip], size=output_size)
+    compositor = OverlayCompositor(output_size, layers=[text_layer], tint=tint)
+    scene_clip = compositor.apply(bg_clip)
+
+    # A color stand-in must not be cached under the footage's key
+    if RENDER_CACHE_ENABLED and not load_failed:
+        try:
+            segment_path = render_cache.store_clip(cache_key, scene_clip, fps=fps)
+            scene_clip.close()
+            return VideoFileClip(segment_path)
+        except Exception as e:
+            print(f"[video_production] Warning: Could not cache scene: {e}")
 
     return scene_clip
 
@@ -502,7 +522,8 @@ async def create_scene(
 
 async def generate_voiceover_elevenlabs(
     text: str,
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    tier: str = "publish"
 ) -> Optional[str]:
     """
     Generate voiceover using Eleven Labs API.
@@ -510,62 +531,71 @@ async def generate_voiceover_elevenlabs(
     Args:
         text: Script text to convert to speech
         output_path: Optional output file path
+        tier: "draft" renders use the free local voice instead
+            (see tts_service.TTS_TIERS)
 
     Returns:
         Path to generated audio file or None
     """
+    if tier != "publish":
+        return await tts_service.generate_voiceover(text, output_path=output_path, tier=tier)
+
     if not ELEVENLABS_API_KEY:
         print("[video_production] Eleven Labs API key not configured")
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            }
+        # Use default voice (Rachel) - professional, clear
+        voice_id = "21m00Tcm4TlvDq8ikWAM"
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+            "style": 0.0,
+            "use_speaker_boost": True
+        }
 
-            # Use default voice (Rachel) - professional, clear
-            voice_id = "21m00Tcm4TlvDq8ikWAM"
-
-            # Generate speech
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-            payload = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                    "style": 0.0,
-                    "use_speaker_boost": True
+        async def synthesize(path: str) -> Optional[str]:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "xi-api-key": ELEVENLABS_API_KEY,
+                    "Content-Type": "application/json"
                 }
-            }
 
-            print(f"[video_production] Generating voiceover ({len(text)} chars)...")
+                # Generate speech (with-timestamps also returns character timings)
+                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/with-timestamps"
+                payload = {
+                    "text": text,
+                    "model_id": model_id,
+                    "voice_settings": voice_settings
+                }
 
-            response = await client.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=60.0
-            )
+                print(f"[video_production] Generating voiceover ({len(text)} chars)...")
 
-            if response.status_code == 200:
-                # Save audio file
-                if not output_path:
-                    audio_dir = Path(__file__).parent.parent / "output" / "audio"
-                    audio_dir.mkdir(parents=True, exist_ok=True)
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_path = str(audio_dir / f"voiceover_{timestamp}.mp3")
+                response = await client.post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=60.0
+                )
 
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
+                if response.status_code != 200:
+                    print(f"[video_production] Eleven Labs API error: {response.status_code} - {response.text}")
+                    return None
 
-                print(f"[video_production] ✅ Voiceover saved to {output_path}")
-                return output_path
-            else:
-                print(f"[video_production] Eleven Labs API error: {response.status_code} - {response.text}")
-                return None
+                save_timestamped_speech(response.json(), path, text)
+                return path
+
+        # Cached with its word timings (timestamped entries are keyed separately)
+        key = tts_cache_key(
+            "elevenlabs", voice_id, text, model=model_id,
+            settings={**voice_settings, "timestamps": True},
+        )
+        output_path = output_path or audio_output_path(key, "voiceover")
+        result = await tts_cache.fetch(key, output_path, synthesize)
+        if result:
+            print(f"[video_production] ✅ Voiceover saved to {output_path}")
+        return result
 
     except Exception as e:
         print(f"[video_production] Error generating voiceover: {str(e)}")
@@ -580,19 +610,46 @@ async def generate_video_from_script(
     script: str,
     title: str,
     output_path: Optional[str] = None,
-    add_voiceover: bool = True
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Dict[str, Any]:
     """
     Generate complete video from script.
 
+    The render runs in the render process pool (render_executor), so the
+    calling event loop stays responsive; cancelling the awaiting task stops it.
+
     Args:
         script: Video script with timing
         title: Video title
         output_path: Optional output file path
+        profile: Encoding profile name (draft, review, publish); defaults to
+            DEFAULT_ENCODING_PROFILE
+        progress: Optional callback for render progress events
 
     Returns:
         Dict with success status and file path
     """
+    return await render_executor.run(
+        _generate_video_from_script,
+        script=script,
+        title=title,
+        output_path=output_path,
+        add_voiceover=add_voiceover,
+        profile=profile,
+        progress=progress,
+    )
+
+
+async def _generate_video_from_script(
+    script: str,
+    title: str,
+    output_path: Optional[str] = None,
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+) -> Dict[str, Any]:
+    """Render body of generate_video_from_script (runs in a render process)."""
     if not MOVIEPY_AVAILABLE:
         return {
             "success": False,
@@ -602,8 +659,12 @@ async def generate_video_from_script(
     print(f"[video_production] Starting video generation for: {title}")
 
     try:
+        # Stock footage backgrounds (solid colour only as a fallback)
+        encoding = get_profile(profile).with_tune("film")
+
         # Step 1: Parse script
         scenes = parse_script_with_timing(script)
+        report("parse", 1.0, scenes=len(scenes))
 
         if not scenes:
             return {
@@ -611,59 +672,101 @@ async def generate_video_from_script(
                 "error": "No scenes found in script"
             }
 
-        # Step 2: Generate scenes
-        scene_clips = []
-        for scene in scenes:
-            scene_clip = await create_scene(scene)
-            scene_clips.append(scene_clip)
+        if not output_path:
+            output_dir = Path(__file__).parent.parent / "output" / "videos"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = str(output_dir / f"video_{timestamp}.mp4")
 
-        # Step 3: Generate voiceover (if enabled)
+        # Identical requests are served from the render cache
+        video_key = video_cache_key(
+            "video_production",
+            script=script,
+            add_voiceover=add_voiceover,
+            encoding=encoding.cache_identity(),
+            mastering=mastering_identity(),
+        )
+        if RENDER_CACHE_ENABLED and render_cache.materialize(video_key, output_path):
+            print(f"[video_production] ♻️  Served cached video: {output_path}")
+            return {
+                "success": True,
+                "video_path": output_path,
+                # Speech-timed length of the cached render, not the script timing
+                "duration": round(media_duration(output_path) or sum(s.get("duration", 0) for s in scenes), 2),
+                "scenes": len(scenes),
+                "profile": encoding.name,
+                "cached": True,
+            }
+
+        # Step 2: Generate voiceover (if enabled); scene lengths follow it.
+        # Renders missing a voiceover, mastering or footage are not cached,
+        # so a provider outage is not served again for identical requests.
+        degraded = False
         voiceover_path = None
         if add_voiceover:
             # Extract full text from script (remove timing labels)
             full_text = ' '.join([scene.get('text', '') for scene in scenes])
-            voiceover_path = await generate_voiceover_elevenlabs(full_text)
+            voiceover_path = await generate_voiceover_elevenlabs(
+                full_text, tier=tts_service.tier_for_profile(encoding.name)
+            )
+            report("tts", 1.0)
+            if voiceover_path:
+                # Loudness-normalized, trimmed AAC, mastered once per voiceover
+                mastered = await asyncio.to_thread(master_voiceover, voiceover_path)
+                degraded = degraded or (MASTERING_ENABLED and not mastered)
+                voiceover_path = mastered or voiceover_path
+                scenes = retime_scenes(scenes, voiceover_path)
+            else:
+                degraded = True
+
+        # Step 3: Generate scenes (all footage searches issued up front, concurrently)
+        await prefetch(
+            query for query in (
+                get_scene_keywords(s.get("type", "main"), s.get("text", "")) for s in scenes
+            )
+            if not (MEDIA_LIBRARY_QUERY_REUSE and media_library.has_query(query))
+        )
+        report("footage", 1.0)
+
+        scene_clips = []
+        fallbacks: List[str] = []
+        for i, scene in enumerate(scenes):
+            scene_clip = await create_scene(scene, output_size=encoding.size, fps=encoding.fps, fallbacks=fallbacks)
+            scene_clips.append(scene_clip)
+            report("scene", (i + 1) / len(scenes), scene=i + 1, scenes=len(scenes))
 
         # Step 4: Concatenate scenes
         print(f"[video_production] Concatenating {len(scene_clips)} scenes...")
         final_video = concatenate_videoclips(scene_clips, method="compose")
 
-        # Step 5: Add voiceover audio
-        if voiceover_path and os.path.exists(voiceover_path):
-            try:
-                audio_clip = AudioFileClip(voiceover_path)
-                # Match audio duration to video (trim or extend as needed)
-                if audio_clip.duration > final_video.duration:
-                    audio_clip = audio_clip.subclip(0, final_video.duration)
-                final_video = final_video.set_audio(audio_clip)
-                print("[video_production] ✅ Voiceover added to video")
-            except Exception as e:
-                print(f"[video_production] Warning: Could not add audio: {e}")
-
-        # Step 6: Export video
-        if not output_path:
-            output_dir = Path(__file__).parent.parent / "output" / "videos"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = str(output_dir / f"video_{timestamp}.mp4")
-
-        print(f"[video_production] Exporting video to: {output_path}")
+        # Step 5: Export video
+        print(f"[video_production] Exporting video to: {output_path} ({encoding.name} profile)")
 
         final_video.write_videofile(
             output_path,
-            fps=VIDEO_FPS,
-            codec='libx264',
-            audio=False,  # No audio for now
-            preset='medium',
-            threads=4,
-            logger='bar'
+            logger=render_logger(),
+            **encoding.write_kwargs(audio=False),
         )
 
+        # Step 6: Add voiceover audio (muxed as is, no second encode; audio
+        # beyond the video is cut when scenes follow the script timing)
+        if voiceover_path and os.path.exists(voiceover_path):
+            if mux_audio(output_path, voiceover_path, final_video.duration):
+                print("[video_production] ✅ Voiceover added to video")
+            else:
+                degraded = True
+
         # Clean up
         final_video.close()
         for clip in scene_clips:
             clip.close()
 
+        degraded = degraded or bool(fallbacks)
+        if RENDER_CACHE_ENABLED and not degraded:
+            render_cache.put(video_key, output_path, kind="video")
+        elif degraded:
+            print("[video_production] Render degraded (voiceover or footage missing), not cached")
+
         print(f"[video_production] ✅ Video generated successfully: {output_path}")
 
         return {
@@ -671,6 +774,7 @@ async def generate_video_from_script(
             "video_path": output_path,
             "duration": sum(s.get("duration", 0) for s in scenes),
             "scenes": len(scenes),
+            "profile": encoding.name,
         }
 
     except Exception as e:
@@ -11,21 +11,21 @@ from __future__ import annotations
 
 # from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import asyncio
 import os
 import re
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
 # Video generation imports
 try:
     from moviepy.editor import (
         VideoFileClip, ColorClip, TextClip, CompositeVideoClip,  # noqa: F401
-        concatenate_videoclips, AudioFileClip, ImageClip
+        concatenate_videoclips
     )
     from moviepy.video.fx.all import fadein, fadeout, resize  # noqa: F401
     from moviepy.video.fx.all import crop  # noqa: F401
-    import numpy as np
     MOVIEPY_AVAILABLE = True
 except ImportError:
     MOVIEPY_AVAILABLE = False
@@ -33,6 +33,19 @@ except ImportError:
 import httpx
 from PIL import Image, ImageDraw, ImageFont
 
+from app.encoding_profiles import EncodingProfile, get_profile, scaled
+from app.overlay_compositor import OverlayCompositor, OverlayLayer, parse_color
+from app.render_executor import ProgressCallback, render_executor, render_logger, report
+from app.speech_timing import retime_scenes, save_timestamped_speech
+from app import tts_service
+from app.audio_mastering import (
+    MASTERING_ENABLED, master_voiceover, mastering_identity, media_duration, mux_audio
+)
+from app.tts_cache import audio_output_path, tts_cache, tts_cache_key
+from app.render_cache import (
+    RENDER_CACHE_ENABLED, render_cache, scene_cache_key, video_cache_key
+)
+
 
 # ==================== CONFIGURATION ====================
 
@@ -54,7 +67,7 @@ def create_text_image_pil(
 ) -> Image.Image:
     """
     Create text image using PIL (no ImageMagick required).
-    Returns a PIL Image that can be converted to ImageClip.
+    Returns a transparent PIL Image for OverlayLayer.from_image().
     """
     # Create image
     img = Image.new('RGBA', size, (0, 0, 0, 0) if not bg_color else bg_color)
@@ -220,26 +233,29 @@ def create_word_by_word_clip(
     color: str = COLORS["white"],
     bg_color: str = COLORS["dark_bg"],
     highlight_color: str = COLORS["yellow_highlight"],
+    word_times: Optional[List[float]] = None,
 ) -> CompositeVideoClip:
     """
     Create competitor-style word-by-word animation.
-    Each word pops in with emphasis.
+    Each word pops in with emphasis, at its spoken start time when
+    word_times (offsets within the clip, from speech_timing) are given.
     """
+    if word_times is not None and len(word_times) != len(words):
+        word_times = None
     if not MOVIEPY_AVAILABLE:
         raise ImportError("MoviePy not available")
 
     # Background
-    bg = ColorClip(size=size, color=bg_color, duration=duration)
+    bg = ColorClip(size=size, color=parse_color(bg_color), duration=duration)
 
     # Calculate timing for each word
     time_per_word = duration / len(words)
 
-    text_clips = []
+    compositor = OverlayCompositor(size)
 
     for i, word in enumerate(words):
-        # Word appears at this time
-        start_time = i * time_per_word
-        word_duration = duration - start_time
+        # Word appears when it is spoken (evenly spaced without timings)
+        start_time = word_times[i] if word_times is not None else i * time_per_word
 
         # Create text clip with emphasis
         # Make current word larger/highlighted
@@ -253,30 +269,28 @@ def create_word_by_word_clip(
                 fontsize=word_fontsize,
                 color=word_color,
                 stroke_color="black",
-                stroke_width=4,
+                stroke_width=max(1, scaled(4, size)),
                 size=size
             )
 
-            # Convert PIL image to MoviePy ImageClip
-            txt = ImageClip(np.array(text_img)).set_duration(word_duration)
-
             # Position words flowing down the screen
-            y_position = 'center' if len(words) <= 3 else 400 + (i * 150)
-
-            txt = txt.set_position(('center', y_position))
-            txt = txt.set_start(start_time)
+            y_position = 0 if len(words) <= 3 else scaled(400 + (i * 150), size)
 
             # Add pop-in animation (scale effect)
-            txt = txt.crossfadein(0.1)
-
-            text_clips.append(txt)
+            compositor.add(OverlayLayer.from_image(
+                text_img,
+                y=y_position,
+                start=start_time,
+                end=duration,
+                fade_in=0.1,
+            ))
         except Exception as e:
             print(f"[video_pro] Warning: Could not create text for '{word}': {e}")
             continue
 
     # Composite all elements
-    if text_clips:
-        final = CompositeVideoClip([bg] + text_clips, size=size)
+    if compositor.layers:
+        final = compositor.apply(bg)
     else:
         final = bg
 
@@ -299,7 +313,7 @@ def create_bold_text_clip(
         raise ImportError("MoviePy not available")
 
     # Background
-    bg = ColorClip(size=size, color=bg_color, duration=duration)
+    bg = ColorClip(size=size, color=parse_color(bg_color), duration=duration)
 
     # Split text into lines if too long
     words = text.split()
@@ -329,22 +343,19 @@ def create_bold_text_clip(
             fontsize=fontsize,
             color=color,
             stroke_color="black",
-            stroke_width=4,
+            stroke_width=max(1, scaled(4, size)),
             size=size
         )
 
-        # Convert PIL image to MoviePy ImageClip
-        txt = ImageClip(np.array(text_img)).set_duration(duration)
-        txt = txt.set_position('center')
-        txt = txt.set_duration(duration)
-
         # Apply animation
+        layer_options = {"end": duration}
         if animation_style == "fade":
-            txt = txt.crossfadein(0.2).crossfadeout(0.2)
+            layer_options.update(fade_in=0.2, fade_out=0.2)
         elif animation_style == "slide":
-            txt = txt.set_position(lambda t: ('center', min(960, -200 + t * 400)))
+            layer_options["motion"] = lambda t: (0, scaled(min(960, -200 + t * 400), size))
 
-        final = CompositeVideoClip([bg, txt], size=size)
+        text_layer = OverlayLayer.from_image(text_img, **layer_options)
+        final = OverlayCompositor(size, layers=[text_layer]).apply(bg)
     except Exception as e:
         print(f"[video_pro] Error creating text clip: {e}")
         final = bg
@@ -357,7 +368,8 @@ def create_bold_text_clip(
 async def create_competitor_scene(
     scene: Dict[str, Any],
     output_size: Tuple[int, int] = (VIDEO_WIDTH, VIDEO_HEIGHT),
-    use_word_by_word: bool = True
+    use_word_by_word: bool = True,
+    fps: int = VIDEO_FPS,
 ) -> CompositeVideoClip:
     """
     Create scene in competitor style (tech focus, clean).
@@ -382,15 +394,30 @@ async def create_competitor_scene(
 
     scheme = color_schemes.get(scene_type, {"bg": COLORS["dark_bg"], "text": COLORS["white"]})
 
+    # Reuse a previously rendered segment when nothing about the scene changed
+    cache_key = scene_cache_key(
+        renderer="video_production_pro",
+        scene={**scene, "words": words},
+        size=output_size,
+        fps=fps,
+        style={**scheme, "word_by_word": use_word_by_word},
+    )
+    if RENDER_CACHE_ENABLED:
+        cached_segment = render_cache.get(cache_key)
+        if cached_segment:
+            print(f"[video_pro] ♻️  Reusing cached {scene_type} scene")
+            return VideoFileClip(cached_segment)
+
     # Create scene with word-by-word animation for short text
     if use_word_by_word and len(words) <= 8 and duration <= 4:
         scene_clip = create_word_by_word_clip(
             words=words,
             duration=duration,
             size=output_size,
-            fontsize=TEXT_SIZE_LARGE,
+            fontsize=scaled(TEXT_SIZE_LARGE, output_size),
             color=scheme["text"],
             bg_color=scheme["bg"],
+            word_times=scene.get("word_times"),
         )
     else:
         # Use bold centered text for longer content
@@ -398,54 +425,73 @@ async def create_competitor_scene(
             text=text,
             duration=duration,
             size=output_size,
-            fontsize=TEXT_SIZE_MEDIUM,
+            fontsize=scaled(TEXT_SIZE_MEDIUM, output_size),
             color=scheme["text"],
             bg_color=scheme["bg"],
             animation_style="fade"
         )
 
+    if RENDER_CACHE_ENABLED:
+        try:
+            segment_path = render_cache.store_clip(cache_key, scene_clip, fps=fps)
+            scene_clip.close()
+            return VideoFileClip(segment_path)
+        except Exception as e:
+            print(f"[video_pro] Warning: Could not cache scene: {e}")
+
     return scene_clip
 
 
 # ==================== VOICEOVER (from original) ====================
 
-async def generate_voiceover_elevenlabs(text: str) -> Optional[str]:
-    """Generate voiceover using Eleven Labs."""
+async def generate_voiceover_elevenlabs(text: str, tier: str = "publish") -> Optional[str]:
+    """Generate voiceover using Eleven Labs (drafts use the free local tier)."""
+    if tier != "publish":
+        return await tts_service.generate_voiceover(text, tier=tier)
+
     if not ELEVENLABS_API_KEY:
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json"
-            }
+        voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+        }
 
-            voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+        async def synthesize(path: str) -> Optional[str]:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "xi-api-key": ELEVENLABS_API_KEY,
+                    "Content-Type": "application/json"
+                }
+
+                # with-timestamps also returns character timings for scene timing
+                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/with-timestamps"
 
-            payload = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
+                payload = {
+                    "text": text,
+                    "model_id": model_id,
+                    "voice_settings": voice_settings
                 }
-            }
 
-            response = await client.post(url, headers=headers, json=payload, timeout=60.0)
+                response = await client.post(url, headers=headers, json=payload, timeout=60.0)
 
-            if response.status_code == 200:
-                audio_dir = Path(__file__).parent.parent / "output" / "audio"
-                audio_dir.mkdir(parents=True, exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_path = str(audio_dir / f"voiceover_{timestamp}.mp3")
+                if response.status_code != 200:
+                    return None
 
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
+                save_timestamped_speech(response.json(), path, text)
+                return path
 
-                print(f"[video_pro] ✅ Voiceover generated: {output_path}")
-                return output_path
+        key = tts_cache_key(
+            "elevenlabs", voice_id, text, model=model_id,
+            settings={**voice_settings, "timestamps": True},
+        )
+        output_path = audio_output_path(key, "voiceover")
+        if await tts_cache.fetch(key, output_path, synthesize):
+            print(f"[video_pro] ✅ Voiceover generated: {output_path}")
+            return output_path
 
     except Exception as e:
         print(f"[video_pro] Voiceover error: {e}")
@@ -459,11 +505,35 @@ async def generate_competitor_video(
     script: str,
     title: str,
     output_path: Optional[str] = None,
-    add_voiceover: bool = True
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Dict[str, Any]:
     """
     Generate competitor-style video (tech focus, clean aesthetic).
+
+    profile selects the encoding profile (draft, review, publish). Renders in
+    the render process pool; progress receives render progress events.
     """
+    return await render_executor.run(
+        _generate_competitor_video,
+        script=script,
+        title=title,
+        output_path=output_path,
+        add_voiceover=add_voiceover,
+        profile=profile,
+        progress=progress,
+    )
+
+
+async def _generate_competitor_video(
+    script: str,
+    title: str,
+    output_path: Optional[str] = None,
+    add_voiceover: bool = True,
+    profile: Union[str, EncodingProfile, None] = None,
+) -> Dict[str, Any]:
+    """Render body of generate_competitor_video (runs in a render process)."""
     if not MOVIEPY_AVAILABLE:
         return {"success": False, "error": "MoviePy not installed"}
 
@@ -472,63 +542,99 @@ async def generate_competitor_video(
     print(f"{'='*80}\n")
 
     try:
+        # Flat colour backgrounds with text compress best with the animation tune
+        encoding = get_profile(profile).with_tune("animation")
+
         # Step 1: Parse script into rapid scenes
         scenes = parse_script_competitor_style(script)
+        report("parse", 1.0, scenes=len(scenes))
 
         if not scenes:
             return {"success": False, "error": "No scenes parsed"}
 
-        # Step 2: Generate voiceover
+        if not output_path:
+            output_dir = Path(__file__).parent.parent / "output" / "videos"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = str(output_dir / f"video_pro_{timestamp}.mp4")
+
+        # Identical requests are served from the render cache
+        video_key = video_cache_key(
+            "video_production_pro",
+            script=script,
+            add_voiceover=add_voiceover,
+            encoding=encoding.cache_identity(),
+            mastering=mastering_identity(),
+        )
+        if RENDER_CACHE_ENABLED and render_cache.materialize(video_key, output_path):
+            print(f"[video_pro] ♻️  Served cached video: {output_path}")
+            return {
+                "success": True,
+                "video_path": output_path,
+                # Speech-timed length of the cached render, not the script timing
+                "duration": round(media_duration(output_path) or sum(s.get("duration", 0) for s in scenes), 2),
+                "scenes": len(scenes),
+                "profile": encoding.name,
+                "cached": True,
+            }
+
+        # Step 2: Generate voiceover. Renders missing the voiceover or its
+        # mastering are not cached, so a TTS outage is not served again.
+        degraded = False
         voiceover_path = None
         if add_voiceover:
             full_text = ' '.join([s.get('text', '') for s in scenes])
-            voiceover_path = await generate_voiceover_elevenlabs(full_text)
+            voiceover_path = await generate_voiceover_elevenlabs(
+                full_text, tier=tts_service.tier_for_profile(encoding.name)
+            )
+            report("tts", 1.0)
+            degraded = not voiceover_path
+
+        # Scene lengths and word pops follow the (mastered) voiceover
+        if voiceover_path:
+            mastered = await asyncio.to_thread(master_voiceover, voiceover_path)
+            degraded = degraded or (MASTERING_ENABLED and not mastered)
+            voiceover_path = mastered or voiceover_path
+            scenes = retime_scenes(scenes, voiceover_path)
 
         # Step 3: Create scenes
         scene_clips = []
         for i, scene in enumerate(scenes):
             print(f"[video_pro] Creating scene {i+1}/{len(scenes)}...")
-            clip = await create_competitor_scene(scene)
+            clip = await create_competitor_scene(scene, output_size=encoding.size, fps=encoding.fps)
             scene_clips.append(clip)
+            report("scene", (i + 1) / len(scenes), scene=i + 1, scenes=len(scenes))
 
         # Step 4: Concatenate with smooth transitions
         print(f"[video_pro] Combining {len(scene_clips)} scenes...")
         final_video = concatenate_videoclips(scene_clips, method="compose")
 
-        # Step 5: Add voiceover
-        if voiceover_path and os.path.exists(voiceover_path):
-            try:
-                audio = AudioFileClip(voiceover_path)
-                if audio.duration > final_video.duration:
-                    audio = audio.subclip(0, final_video.duration)
-                final_video = final_video.set_audio(audio)
-                print("[video_pro] ✅ Audio synced")
-            except Exception as e:
-                print(f"[video_pro] Audio warning: {e}")
-
-        # Step 6: Export
-        if not output_path:
-            output_dir = Path(__file__).parent.parent / "output" / "videos"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = str(output_dir / f"video_pro_{timestamp}.mp4")
-
-        print(f"\n[video_pro] Exporting to: {output_path}")
+        # Step 5: Export
+        print(f"\n[video_pro] Exporting to: {output_path} ({encoding.name} profile)")
 
         final_video.write_videofile(
             output_path,
-            fps=VIDEO_FPS,
-            codec='libx264',
-            preset='medium',
-            threads=4,
-            logger='bar'
+            logger=render_logger(),
+            **encoding.write_kwargs(audio=False),
         )
 
+        # Step 6: Add voiceover (muxed without re-encoding)
+        if voiceover_path and os.path.exists(voiceover_path):
+            if mux_audio(output_path, voiceover_path, final_video.duration):
+                print("[video_pro] ✅ Audio synced")
+            else:
+                degraded = True
+
         # Cleanup
         final_video.close()
         for clip in scene_clips:
             clip.close()
 
+        if RENDER_CACHE_ENABLED and not degraded:
+            render_cache.put(video_key, output_path, kind="video")
+        elif degraded:
+            print("[video_pro] Render degraded (voiceover missing), not cached")
+
         print(f"\n{'='*80}")
         print("✅ VIDEO GENERATION COMPLETE!")
         print(f"{'='*80}")
@@ -538,6 +644,7 @@ async def generate_competitor_video(
             "video_path": output_path,
             "duration": sum(s.get("duration", 0) for s in scenes),
             "scenes": len(scenes),
+            "profile": encoding.name,
         }
 
     except Exception as e:
@@ -1,15 +1,25 @@
 """
 Voice Selection System for TTS
 Allows users to preview and select voices from ElevenLabs
+
+Script analysis is one compiled regex pass over the text; a post's analysis
+and recommendations are memoized in Post.extra_data["voice_analysis"] under
+a hash of its narration, so they are recomputed only when the post changes.
 """
 from __future__ import annotations
 
 # from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import asyncio
+import hashlib
 import os
-from typing import Dict, List, Optional
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
-import httpx
+
+from app.http_pool import get_async_client, provider_slots
+from app.tts_cache import normalize_tts_text, tts_cache, tts_cache_key
 
 
 # ==================== CONFIGURATION ====================
@@ -72,6 +82,37 @@ RECOMMENDED_VOICES = {
 
 # ==================== VOICE ANALYSIS ====================
 
+# Content keywords per category (matched anywhere in the lowercased text)
+STYLE_KEYWORDS = {
+    "news": ['breaking', 'news', 'reported', 'according to', 'announced'],
+    "tech": ['ai', 'technology', 'app', 'software', 'tech', 'digital'],
+    "business": ['company', 'market', 'business', 'revenue', 'ceo'],
+}
+
+# One pass over the text: a zero-width lookahead at every position reports
+# each keyword occurrence, including ones overlapping another keyword
+_STYLE_PATTERN = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{category}>{'|'.join(re.escape(word) for word in words)})"
+        for category, words in STYLE_KEYWORDS.items()
+    ) + ")"
+)
+
+# Bump when the analysis or scoring changes, so memoized results are redone
+VOICE_ANALYSIS_VERSION = "1"
+
+
+@lru_cache(maxsize=1024)
+def _detect_categories(script_lower: str) -> Tuple[bool, bool, bool]:
+    """(is_news, is_tech, is_business), stopping once all three are found."""
+    found = set()
+    for match in _STYLE_PATTERN.finditer(script_lower):
+        found.add(match.lastgroup)
+        if len(found) == len(STYLE_KEYWORDS):
+            break
+    return "news" in found, "tech" in found, "business" in found
+
+
 def analyze_script_style(script: str) -> Dict[str, str]:
     """
     Analyze script to determine the best voice style.
@@ -79,12 +120,8 @@ def analyze_script_style(script: str) -> Dict[str, str]:
     Returns:
         Dict with style, tone, and recommended characteristics
     """
-    script_lower = script.lower()
-
     # Detect content type
-    is_news = any(word in script_lower for word in ['breaking', 'news', 'reported', 'according to', 'announced'])
-    is_tech = any(word in script_lower for word in ['ai', 'technology', 'app', 'software', 'tech', 'digital'])
-    is_business = any(word in script_lower for word in ['company', 'market', 'business', 'revenue', 'ceo'])
+    is_news, is_tech, is_business = _detect_categories(script.lower())
 
     # Determine style
     if is_news:
@@ -119,8 +156,52 @@ def analyze_script_style(script: str) -> Dict[str, str]:
     }
 
 
+def post_narration(post: Any) -> str:
+    """Narration text a post is analyzed on (title plus the start of the body)."""
+    return f"{post.title}. {(post.body or '')[:500]}"
+
+
+def content_hash(text: str) -> str:
+    """Hash of the analyzed text (whitespace/Unicode variants hash the same)."""
+    payload = f"{VOICE_ANALYSIS_VERSION}:{normalize_tts_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def analyze_post(post: Any) -> Dict[str, Any]:
+    """
+    Style analysis and ranked voices for a post, memoized on the post.
+
+    The result is stored in post.extra_data["voice_analysis"] with the hash
+    of the narration it was computed from; a changed title or body no longer
+    matches, so the analysis is redone. The caller commits the post.
+
+    Returns:
+        Dict with content_hash, style_analysis and recommended_voices
+    """
+    text = post_narration(post)
+    key = content_hash(text)
+    cached = (post.extra_data or {}).get("voice_analysis")
+    if cached and cached.get("content_hash") == key:
+        return cached
+
+    style_analysis = analyze_script_style(text)
+    analysis = {
+        "content_hash": key,
+        "style_analysis": style_analysis,
+        "recommended_voices": get_voice_recommendations(text, style_analysis),
+    }
+    # New dict, so the JSON column change is detected
+    post.extra_data = {**(post.extra_data or {}), "voice_analysis": analysis}
+    return analysis
+
+
 # ==================== VOICE PREVIEW GENERATION ====================
 
+def preview_path_for(voice_name: str, key: str, output_dir: Path) -> Path:
+    """Preview file named by voice and content hash (no clashes between posts)."""
+    return output_dir / f"preview_{voice_name.lower()}_{key[:16]}.mp3"
+
+
 async def generate_voice_preview(
     voice_id: str,
     voice_name: str,
@@ -130,6 +211,9 @@ async def generate_voice_preview(
     """
     Generate a preview audio file for a specific voice.
 
+    Previews are content-addressed: the same voice and text reuse the
+    existing file (or TTS cache entry) instead of calling ElevenLabs again.
+
     Args:
         voice_id: ElevenLabs voice ID
         voice_name: Name of the voice (for filename)
@@ -144,7 +228,24 @@ async def generate_voice_preview(
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
+        if not output_dir:
+            output_dir = Path(__file__).parent.parent / "output" / "voice_previews"
+        else:
+            output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        text = sample_text[:500]  # Limit preview length
+        model_id = "eleven_monolingual_v1"
+        voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+        }
+        key = tts_cache_key("elevenlabs", voice_id, text, model=model_id, settings=voice_settings)
+        output_path = preview_path_for(voice_name, key, output_dir)
+        if output_path.exists():
+            return str(output_path)
+
+        async def synthesize(path: str) -> Optional[str]:
             headers = {
                 "xi-api-key": ELEVENLABS_API_KEY,
                 "Content-Type": "application/json"
@@ -152,41 +253,66 @@ async def generate_voice_preview(
 
             url = f"{ELEVENLABS_API_BASE}/text-to-speech/{voice_id}"
             payload = {
-                "text": sample_text[:500],  # Limit preview length
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                }
+                "text": text,
+                "model_id": model_id,
+                "voice_settings": voice_settings
             }
 
-            print(f"[VoiceSelector] Generating preview for {voice_name}...")
-            response = await client.post(url, headers=headers, json=payload, timeout=30.0)
+            async with provider_slots("elevenlabs"):
+                print(f"[VoiceSelector] Generating preview for {voice_name}...")
+                response = await get_async_client().post(url, headers=headers, json=payload, timeout=30.0)
 
-            if response.status_code == 200:
-                # Save preview audio
-                if not output_dir:
-                    output_dir = Path(__file__).parent.parent / "output" / "voice_previews"
-                else:
-                    output_dir = Path(output_dir)
+            if response.status_code != 200:
+                print(f"[VoiceSelector] API error for {voice_name}: {response.status_code}")
+                return None
 
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / f"preview_{voice_name.lower()}.mp3"
+            with open(path, "wb") as f:
+                f.write(response.content)
+            return path
 
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
+        if not await tts_cache.fetch(key, str(output_path), synthesize):
+            return None
 
-                print(f"[VoiceSelector] ✅ Preview generated: {output_path}")
-                return str(output_path)
-            else:
-                print(f"[VoiceSelector] API error for {voice_name}: {response.status_code}")
-                return None
+        print(f"[VoiceSelector] ✅ Preview generated: {output_path}")
+        return str(output_path)
 
     except Exception as e:
         print(f"[VoiceSelector] Error generating preview for {voice_name}: {e}")
         return None
 
 
+async def generate_previews(
+    voices: Dict[str, Dict],
+    sample_text: str,
+    output_dir: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Generate previews for several voices concurrently.
+
+    Requests share the pooled HTTP client and are capped at the ElevenLabs
+    concurrency limit (ELEVENLABS_CONCURRENCY), so the whole set takes about
+    one round trip when it fits the quota.
+
+    Args:
+        voices: Voice key -> voice info (from RECOMMENDED_VOICES)
+        sample_text: Text to synthesize
+        output_dir: Optional output directory
+
+    Returns:
+        Dict mapping voice keys to preview file paths (failures omitted)
+    """
+    paths = await asyncio.gather(*[
+        generate_voice_preview(
+            voice_id=voice_info['id'],
+            voice_name=voice_info['name'],
+            sample_text=sample_text,
+            output_dir=output_dir
+        )
+        for voice_info in voices.values()
+    ])
+    return {voice_key: path for voice_key, path in zip(voices, paths) if path}
+
+
 async def generate_all_previews(
     script: str,
     recommended_only: bool = True
@@ -217,9 +343,6 @@ async def generate_all_previews(
     words = script.split()[:100]
     sample_text = " ".join(words)
 
-    # Generate previews
-    previews = {}
-
     # Filter voices based on analysis if recommended_only
     voices_to_preview = RECOMMENDED_VOICES.copy()
 
@@ -232,40 +355,50 @@ async def generate_all_previews(
 
     print(f"🎙️ Generating {len(voices_to_preview)} voice previews...\n")
 
-    for voice_key, voice_info in voices_to_preview.items():
-        preview_path = await generate_voice_preview(
-            voice_id=voice_info['id'],
-            voice_name=voice_info['name'],
-            sample_text=sample_text
-        )
+    return await generate_previews(voices_to_preview, sample_text)
 
-        if preview_path:
-            previews[voice_key] = preview_path
 
-    return previews
+# ==================== VOICE SELECTION ====================
 
+def _voice_traits(voice_info: Dict) -> Dict[str, Any]:
+    """Scoring traits of a voice, derived once from its description."""
+    style = voice_info['style'].lower()
+    return {
+        "gender": voice_info['gender'].lower(),
+        "news": 'news' in voice_info['use_case'].lower(),
+        "tech": any(word in style for word in ['clear', 'engaging']),
+        "business": 'professional' in style,
+    }
 
-# ==================== VOICE SELECTION ====================
 
-def get_voice_recommendations(script: str) -> List[Dict]:
+_VOICE_TRAITS = {voice_key: _voice_traits(voice_info) for voice_key, voice_info in RECOMMENDED_VOICES.items()}
+
+
+def get_voice_recommendations(script: str, style_analysis: Optional[Dict] = None) -> List[Dict]:
     """
     Get recommended voices based on script analysis.
 
+    Args:
+        script: Script text
+        style_analysis: analyze_script_style() result, if already computed
+
     Returns:
         List of recommended voice configs sorted by relevance
     """
-    style_analysis = analyze_script_style(script)
+    if style_analysis is None:
+        style_analysis = analyze_script_style(script)
 
     recommendations = []
 
     for voice_key, voice_info in RECOMMENDED_VOICES.items():
+        traits = _VOICE_TRAITS.get(voice_key) or _voice_traits(voice_info)
         score = 0
         reasons = []
 
         # Gender match
         if style_analysis['recommended_gender'] == 'either':
             score += 5
-        elif style_analysis['recommended_gender'].lower() == voice_info['gender'].lower():
+        elif style_analysis['recommended_gender'].lower() == traits['gender']:
             score += 10
             reasons.append(f"Matches recommended gender ({voice_info['gender']})")
 
@@ -275,15 +408,15 @@ def get_voice_recommendations(script: str) -> List[Dict]:
             reasons.append(f"Matches recommended accent ({voice_info['accent']})")
 
         # Style/use case match
-        if style_analysis['is_news'] and 'news' in voice_info['use_case'].lower():
+        if style_analysis['is_news'] and traits['news']:
             score += 10
             reasons.append("Perfect for news content")
 
-        if style_analysis['is_tech'] and any(word in voice_info['style'].lower() for word in ['clear', 'engaging']):
+        if style_analysis['is_tech'] and traits['tech']:
             score += 8
             reasons.append("Great for tech content")
 
-        if style_analysis['is_business'] and 'professional' in voice_info['style'].lower():
+        if style_analysis['is_business'] and traits['business']:
             score += 10
             reasons.append("Professional tone for business")
 
@@ -333,17 +466,8 @@ async def test_voice_selector(script: str):
     print("🎙️ GENERATING PREVIEW AUDIO (Top 3 Voices)")
     print(f"{'='*80}\n")
 
-    top_3 = recommendations[:3]
-    previews = {}
-
-    for voice in top_3:
-        preview_path = await generate_voice_preview(
-            voice_id=voice['id'],
-            voice_name=voice['name'],
-            sample_text=script[:200]
-        )
-        if preview_path:
-            previews[voice['key']] = preview_path
+    top_3 = {voice['key']: voice for voice in recommendations[:3]}
+    previews = await generate_previews(top_3, script[:200])
 
     print(f"\n{'='*80}")
     print("✅ PREVIEW GENERATION COMPLETE")
@@ -358,8 +482,6 @@ async def test_voice_selector(script: str):
 
 
 if __name__ == "__main__":
-    import asyncio
-
     # Test with a sample news script
     test_script = """
     Breaking News: OpenAI has just announced a major update to their AI technology.
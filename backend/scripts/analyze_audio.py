@@ -1,68 +1,81 @@
-import json
-from pathlib import Path
-
-import librosa
-import numpy as np
+"""
+Voice metrics for generated voiceovers (see app.audio_analytics).
 
-BASE_DIR = Path(__file__).resolve().parents[1] / "output" / "competitor_analysis"
-AUDIO_PATH = BASE_DIR / "audio" / "narration.wav"
-TRANSCRIPT_PATH = BASE_DIR / "transcript.txt"
-REPORT_PATH = BASE_DIR / "voice_profile.json"
+    python scripts/analyze_audio.py                       # every file in output/audio
+    python scripts/analyze_audio.py output/tts_cache clip.mp3 --output metrics.parquet
+    python scripts/analyze_audio.py --voice-profile       # competitor narration profile
+"""
+# from agents.checks.router import should_offload, offload_to_gemini  # noqa: F401
 
+import argparse
+import json
+import sys
+from pathlib import Path
 
-def load_audio(path: Path):
-    if not path.exists():
-        raise FileNotFoundError(f"Audio file not found at {path}")
-    signal, sr = librosa.load(path, sr=44100)
-    return signal, sr
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
 
+from app.audio_analytics import (  # noqa: E402
+    AUDIO_ANALYTICS_WORKERS,
+    analyze_files,
+    find_audio,
+    summarize,
+    write_metrics_table,
+)
 
-def compute_voice_metrics(signal: np.ndarray, sr: int) -> dict:
-    duration = len(signal) / sr
-    rms = librosa.feature.rms(y=signal)[0]
-    rms_mean = float(np.mean(rms))
-    rms_std = float(np.std(rms))
+OUTPUT_DIR = BACKEND_DIR / "output"
+DEFAULT_AUDIO_DIR = OUTPUT_DIR / "audio"
+DEFAULT_TABLE_PATH = OUTPUT_DIR / "analytics" / "voice_metrics.csv"
 
-    tempo, _ = librosa.beat.beat_track(y=signal, sr=sr)
+COMPETITOR_DIR = OUTPUT_DIR / "competitor_analysis"
+COMPETITOR_AUDIO_PATH = COMPETITOR_DIR / "audio" / "narration.wav"
+COMPETITOR_TRANSCRIPT_PATH = COMPETITOR_DIR / "transcript.txt"
+VOICE_PROFILE_PATH = COMPETITOR_DIR / "voice_profile.json"
 
-    pitches, magnitudes = librosa.piptrack(y=signal, sr=sr)
-    pitch = pitches[magnitudes > np.median(magnitudes)]
-    mean_pitch = float(np.mean(pitch)) if pitch.size else 0.0
 
-    return {
-        "duration_seconds": duration,
-        "tempo_bpm": tempo,
-        "mean_rms": rms_mean,
-        "std_rms": rms_std,
-        "mean_pitch_hz": mean_pitch,
-    }
+def collect(paths):
+    files = []
+    for path in paths:
+        files.extend(find_audio(path) if Path(path).is_dir() else [str(path)])
+    return files
 
 
-def estimate_words_per_minute(transcript: Path, duration: float) -> float:
-    if not transcript.exists():
-        return 0.0
-    words = transcript.read_text().split()
-    minutes = duration / 60 if duration else 1
-    return len(words) / minutes
+def write_voice_profile():
+    """Single-file profile of the competitor narration, read by summarize_metrics.py."""
+    if not COMPETITOR_AUDIO_PATH.exists():
+        raise FileNotFoundError(f"Audio file not found at {COMPETITOR_AUDIO_PATH}")
+    row = analyze_files([str(COMPETITOR_AUDIO_PATH)])[0]
+    if row["error"]:
+        raise RuntimeError(row["error"])
+    if row["words"] is None and COMPETITOR_TRANSCRIPT_PATH.exists():
+        row["words"] = len(COMPETITOR_TRANSCRIPT_PATH.read_text().split())
+        row["words_per_minute"] = row["words"] / (row["duration_seconds"] / 60 or 1)
+    VOICE_PROFILE_PATH.write_text(json.dumps(row, indent=2))
+    print(f"Voice profile saved to {VOICE_PROFILE_PATH}")
 
 
 def main():
-    signal, sr = load_audio(AUDIO_PATH)
-    metrics = compute_voice_metrics(signal, sr)
-    metrics["words_per_minute"] = estimate_words_per_minute(
-        TRANSCRIPT_PATH, metrics["duration_seconds"]
-    )
-
-    serializable = {}
-    for key, value in metrics.items():
-        if isinstance(value, np.ndarray):
-            serializable[key] = float(np.mean(value))
-        elif isinstance(value, np.floating):
-            serializable[key] = float(value)
-        else:
-            serializable[key] = value
-    REPORT_PATH.write_text(json.dumps(serializable, indent=2))
-    print(f"Voice profile saved to {REPORT_PATH}")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=[str(DEFAULT_AUDIO_DIR)],
+                        help="Audio files or directories (searched recursively)")
+    parser.add_argument("--output", default=str(DEFAULT_TABLE_PATH),
+                        help="Metrics table (.csv, or .parquet with pyarrow)")
+    parser.add_argument("--workers", type=int, default=AUDIO_ANALYTICS_WORKERS)
+    parser.add_argument("--voice-profile", action="store_true",
+                        help="Only profile the competitor narration into voice_profile.json")
+    args = parser.parse_args()
+
+    if args.voice_profile:
+        write_voice_profile()
+        return
+
+    files = collect(args.paths)
+    print(f"Analyzing {len(files)} audio files with {args.workers} workers...")
+    rows = analyze_files(files, args.workers)
+    write_metrics_table(rows, args.output)
+
+    print(json.dumps(summarize(rows), indent=2))
+    print(f"Metrics table saved to {args.output}")
 
 
 if __name__ == "__main__":
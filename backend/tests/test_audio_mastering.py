@@ -0,0 +1,88 @@
+"""
+Test suite for once-per-asset voiceover mastering and stream-copy muxing.
+"""
+import json
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app import audio_mastering
+from app.audio_mastering import master_voiceover, measure_loudness, media_duration, mux_audio
+from app.encoding_profiles import ffmpeg_exe
+from app.speech_timing import alignment_path
+
+
+def ffmpeg(*args):
+    subprocess.run([ffmpeg_exe(), "-y", "-v", "error", *args], check=True)
+
+
+@pytest.fixture
+def voice(tmp_path):
+    """Quiet 2 s tone between 0.6 s of leading and 0.8 s of trailing silence, with word timings."""
+    path = str(tmp_path / "voice.mp3")
+    ffmpeg("-f", "lavfi", "-i", "anullsrc=r=22050:cl=mono:d=0.6",
+           "-f", "lavfi", "-i", "sine=frequency=220:duration=2:sample_rate=22050",
+           "-f", "lavfi", "-i", "anullsrc=r=22050:cl=mono:d=0.8",
+           "-filter_complex", "[1:a]volume=0.05[s];[0:a][s][2:a]concat=n=3:v=0:a=1",
+           "-c:a", "libmp3lame", path)
+    with open(alignment_path(path), "w") as f:
+        json.dump({"source": "elevenlabs", "text": "Hello there",
+                   "words": [{"word": "Hello", "start": 0.6, "end": 1.5},
+                             {"word": "there", "start": 1.6, "end": 2.6}]}, f)
+    return path
+
+
+def test_master_normalizes_trims_and_is_cached(voice):
+    """Test the master hits the loudness target, drops edge silence and is made once."""
+    mastered = master_voiceover(voice)
+
+    assert mastered.endswith(".m4a")
+    assert float(measure_loudness(mastered, (0.0, 1.0, 1.0))["input_i"]) == pytest.approx(-14, abs=1)
+    assert media_duration(mastered) == pytest.approx(2.2, abs=0.1)
+
+    with open(alignment_path(mastered)) as f:
+        words = json.load(f)["words"]
+    assert words[0]["start"] == pytest.approx(0.1, abs=0.05)
+    assert words[1]["end"] == pytest.approx(2.1, abs=0.05)
+
+    with patch.object(audio_mastering.subprocess, "run") as run:
+        assert master_voiceover(voice) == mastered
+    run.assert_not_called()
+
+
+def test_music_bed_gets_its_own_master(voice, tmp_path):
+    """Test ducked music changes the cache name and still meets the target."""
+    music = str(tmp_path / "music.wav")
+    ffmpeg("-f", "lavfi", "-i", "sine=frequency=80:duration=1", music)
+
+    plain = master_voiceover(voice)
+    with_music = master_voiceover(voice, music_path=music)
+
+    assert with_music != plain
+    assert media_duration(with_music) == pytest.approx(media_duration(plain), abs=0.1)
+    assert float(measure_loudness(with_music, (0.0, 1.0, 1.0))["input_i"]) == pytest.approx(-14, abs=1)
+
+
+def test_disabled_or_missing_source_falls_back(voice, tmp_path):
+    """Test callers get None (and keep the source) when mastering is off or impossible."""
+    assert master_voiceover(str(tmp_path / "missing.mp3")) is None
+    with patch.object(audio_mastering, "MASTERING_ENABLED", False):
+        assert master_voiceover(voice) is None
+
+
+def test_mux_copies_audio_into_silent_video(voice, tmp_path):
+    """Test the AAC stream is copied in and cut to the video length."""
+    video = str(tmp_path / "video.mp4")
+    ffmpeg("-f", "lavfi", "-i", "testsrc=size=90x160:rate=10:duration=1.5",
+           "-c:v", "libx264", "-pix_fmt", "yuv420p", video)
+    mastered = master_voiceover(voice)
+
+    assert mux_audio(video, mastered, 1.5)
+
+    info = subprocess.run([ffmpeg_exe(), "-hide_banner", "-i", video],
+                          capture_output=True, text=True).stderr
+    assert "Audio: aac" in info and "Video: h264" in info
+    assert media_duration(video) == pytest.approx(1.5, abs=0.1)
+    assert not mux_audio(video, str(tmp_path / "missing.m4a"))
+    assert media_duration(video) == pytest.approx(1.5, abs=0.1)
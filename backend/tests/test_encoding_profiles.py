@@ -0,0 +1,66 @@
+"""
+Test suite for named encoding profiles.
+"""
+import pytest
+
+from app.encoding_profiles import PROFILES, get_profile, scaled
+
+
+def test_get_profile_names_and_aliases():
+    """Test profiles resolve by name, legacy quality value and instance."""
+    assert get_profile("draft").name == "draft"
+    assert get_profile(" Review ").name == "review"
+    assert get_profile("high") is PROFILES["publish"]
+    assert get_profile("low") is PROFILES["draft"]
+    assert get_profile(PROFILES["review"]) is PROFILES["review"]
+    assert get_profile().name == "publish"
+
+    with pytest.raises(ValueError):
+        get_profile("ultra")
+
+
+def test_profiles_get_cheaper_towards_draft():
+    """Test draft renders fewer pixels and frames than publish."""
+    draft, review, publish = PROFILES["draft"], PROFILES["review"], PROFILES["publish"]
+
+    assert publish.size == (1080, 1920)
+    assert draft.width * draft.height < review.width * review.height < publish.width * publish.height
+    assert draft.fps < publish.fps
+    assert draft.crf > review.crf > publish.crf
+    for profile in PROFILES.values():
+        assert profile.width % 2 == 0 and profile.height % 2 == 0  # yuv420p needs even sizes
+
+
+def test_write_kwargs():
+    """Test MoviePy arguments carry preset, CRF, tune and audio settings."""
+    profile = get_profile("review").with_tune("animation")
+    kwargs = profile.write_kwargs()
+
+    assert kwargs["fps"] == 30
+    assert kwargs["preset"] == "veryfast"
+    assert kwargs["audio_codec"] == "aac"
+    params = kwargs["ffmpeg_params"]
+    assert params[params.index("-crf") + 1] == "26"
+    assert params[params.index("-tune") + 1] == "animation"
+    assert "+faststart" in params
+
+    silent = get_profile("publish").write_kwargs(audio=False)
+    assert silent["audio"] is False
+    assert "audio_codec" not in silent
+    assert "-tune" not in silent["ffmpeg_params"]
+
+
+def test_cache_identity_ignores_threads():
+    """Test thread count does not change the render cache key, tune does."""
+    publish = get_profile("publish")
+    more_threads = type(publish)(**{**publish.cache_identity(), "threads": publish.threads + 4})
+
+    assert more_threads.cache_identity() == publish.cache_identity()
+    assert publish.with_tune("film").cache_identity() != publish.cache_identity()
+
+
+def test_scaled_layout_values():
+    """Test layout values designed for 1080x1920 scale with frame height."""
+    assert scaled(60, (1080, 1920)) == 60
+    assert scaled(60, (540, 960)) == 30
+    assert scaled(70, (360, 640)) == 23
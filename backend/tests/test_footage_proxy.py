@@ -0,0 +1,78 @@
+"""
+Test suite for pre-scaled B-roll proxies (ffmpeg normalization + caching).
+"""
+import subprocess
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app import footage_proxy
+from app.footage_proxy import normalize_footage
+from app.render_cache import RenderCache
+
+SIZE = (90, 160)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RenderCache(root=tmp_path / "cache", max_bytes=10**9)
+    with patch.object(footage_proxy, "render_cache", cache):
+        yield cache
+
+
+@pytest.fixture
+def landscape_clip(tmp_path):
+    """2s 320x180 clip: green center stripe, red edges."""
+    from moviepy.editor import VideoClip
+
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+    frame[:, :] = (255, 0, 0)
+    frame[:, 100:220] = (0, 255, 0)
+
+    path = str(tmp_path / "landscape.mp4")
+    clip = VideoClip(lambda t: frame, duration=2)
+    clip.write_videofile(path, fps=24, logger=None, audio=False)
+    clip.close()
+    return path
+
+
+def test_proxy_is_cropped_to_size_fps_and_duration(cache, landscape_clip):
+    """Test landscape footage is cover-scaled and center-cropped, not stretched, and looped to length."""
+    from moviepy.editor import VideoFileClip
+
+    proxy = normalize_footage(landscape_clip, SIZE, fps=10, duration=2.4)
+
+    clip = VideoFileClip(proxy)
+    try:
+        assert tuple(clip.size) == SIZE
+        assert clip.fps == 10
+        assert clip.duration == pytest.approx(3.0, abs=0.15)  # Rounded up, source looped
+        frame = clip.get_frame(0.5).astype(int)
+    finally:
+        clip.close()
+
+    # Only the green center of the source is in frame
+    assert frame[:, :, 1].min() > 200 and frame[:, :, 0].max() < 60
+
+
+def test_proxy_is_transcoded_once(cache, landscape_clip):
+    """Test repeat requests (including nearby durations) reuse the cached proxy."""
+    first = normalize_footage(landscape_clip, SIZE, fps=10, duration=2.2)
+
+    with patch.object(footage_proxy.subprocess, "run") as run:
+        assert normalize_footage(landscape_clip, SIZE, fps=10, duration=2.9) == first
+        assert run.call_count == 0
+
+    assert normalize_footage(landscape_clip, SIZE, fps=15, duration=2.9) != first
+
+
+def test_failed_transcode_falls_back_to_source(cache, landscape_clip):
+    """Test an ffmpeg failure returns None and leaves nothing in the cache."""
+    error = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"bad input")
+
+    with patch.object(footage_proxy.subprocess, "run", side_effect=error):
+        assert normalize_footage(landscape_clip, SIZE, fps=10, duration=2) is None
+
+    assert cache.total_bytes() == 0
+    assert normalize_footage(landscape_clip + ".missing", SIZE, fps=10) is None
@@ -0,0 +1,143 @@
+"""
+Test suite for the async M02 media production job.
+"""
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.jobs import m02_media_production as m02
+from app.models import Article, Post
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm02.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(12):
+            session.add(Article(
+                source_name="mock",
+                external_id=f"a{i}",
+                title=f"Article {i} about new chips",
+                url=f"https://news.example/{i}",
+                published_at=datetime(2025, 1, 1),
+                status="scripted",
+                is_test=m02.TEST_MODE,
+                script=f"Script {i}.",
+            ))
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def providers():
+    """Fake voice/B-roll calls that record peak concurrency."""
+    state = {"active": 0, "peak": 0, "voices": {}}
+
+    async def busy():
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+
+    async def generate_voice(script, voice=None, energy=None):
+        await busy()
+        state["voices"][script] = (voice, energy)
+        if script == "Script 3.":
+            raise RuntimeError("quota exceeded")
+        return f"/voices/{script}.mp3"
+
+    async def search_broll(keywords):
+        await busy()
+        return "https://videos.pexels.com/clip.mp4"
+
+    with patch.object(m02, "generate_voice", side_effect=generate_voice), \
+            patch.object(m02, "search_broll", side_effect=search_broll):
+        yield state
+
+
+def test_job_processes_articles_concurrently_and_saves_in_batches(engine, providers):
+    """Test articles run in parallel, failures are isolated, and results are committed in batches."""
+    commits = []
+    real_save = m02.save_media
+
+    def save_media(session, articles, results):
+        commits.append(len(results))
+        return real_save(session, articles, results)
+
+    with patch.object(m02, "engine", engine), \
+            patch.object(m02, "M02_CONCURRENCY", 4), \
+            patch.object(m02, "M02_COMMIT_EVERY", 5), \
+            patch.object(m02, "save_media", side_effect=save_media):
+        result = asyncio.run(m02.run_m02_job(batch_size=0))
+
+    assert result == {"articles_processed": 12, "media_ready": 11, "failed": 1}
+    assert commits == [5, 5, 1]
+    assert providers["peak"] == 8  # 4 articles, voice and B-roll each at once
+
+    with Session(engine) as session:
+        articles = {a.external_id: a for a in session.exec(select(Article))}
+    assert articles["a3"].voice_url is None
+    assert articles["a0"].voice_url == "/voices/Script 0..mp3"
+    assert articles["a0"].broll_video_url == "https://videos.pexels.com/clip.mp4"
+
+
+def test_failed_commit_counts_its_articles_as_failed(engine, providers):
+    """Test articles lost to a failed commit are reported as failed, not dropped."""
+    real_save = m02.save_media
+    calls = []
+
+    def save_media(session, articles, results):
+        calls.append(len(results))
+        if len(calls) == 1:
+            with patch.object(session, "commit", side_effect=RuntimeError("database is locked")):
+                return real_save(session, articles, results)
+        return real_save(session, articles, results)
+
+    with patch.object(m02, "engine", engine), \
+            patch.object(m02, "M02_COMMIT_EVERY", 5), \
+            patch.object(m02, "save_media", side_effect=save_media):
+        result = asyncio.run(m02.run_m02_job(batch_size=0))
+
+    assert result == {"articles_processed": 12, "media_ready": 6, "failed": 6}
+
+
+def test_batch_size_limits_the_run(engine, providers):
+    """Test batch_size caps how many articles one run takes."""
+    with patch.object(m02, "engine", engine):
+        result = asyncio.run(m02.run_m02_job(batch_size=4))
+        again = asyncio.run(m02.run_m02_job(batch_size=4))
+
+    assert result["articles_processed"] == again["articles_processed"] == 4
+    # Saved articles are not picked up again; the failed one is retried
+    with Session(engine) as session:
+        done = [a for a in session.exec(select(Article)) if a.voice_url]
+    assert len(done) == 6
+
+
+def test_articles_use_their_posts_assigned_voice(engine, providers):
+    """Test a voice assigned to the article's post is used; others keep the default."""
+    with Session(engine) as session:
+        session.add(Post(kind="video", title="Chips", body="Body", source_url="https://news.example/1",
+                         extra_data={"selected_voice": "adam", "voice_energy": "energetic"}))
+        session.commit()
+
+    with patch.object(m02, "engine", engine):
+        asyncio.run(m02.run_m02_job(batch_size=0))
+
+    assert providers["voices"]["Script 1."] == ("adam", "energetic")
+    assert providers["voices"]["Script 0."] == (None, None)
+
+
+def test_pick_broll_link_prefers_vertical_file():
+    """Test the vertical rendition of the top result is chosen, else the first file."""
+    videos = [{"video_files": [
+        {"width": 1920, "height": 1080, "link": "landscape"},
+        {"width": 1080, "height": 1920, "link": "vertical"},
+    ]}]
+    assert m02.pick_broll_link(videos) == "vertical"
+    assert m02.pick_broll_link([{"video_files": [{"width": None, "height": None, "link": "any"}]}]) == "any"
+    assert m02.pick_broll_link([]) is None
@@ -0,0 +1,136 @@
+"""
+Test suite for M03 batch rendering (shared downloads, overlays, pool sizing).
+"""
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+os.environ.setdefault("MEDIA_BASE_PATH", tempfile.mkdtemp(prefix="m03_media_"))
+
+from app import render_executor as render_executor_module  # noqa: E402
+from app.encoding_profiles import get_profile  # noqa: E402
+from app.jobs import m03_video_assembly as m03  # noqa: E402
+from app.models import Asset, Post  # noqa: E402
+from app.render_executor import pool_size_for  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm03.db'}")
+    SQLModel.metadata.create_all(engine)
+    voice = tmp_path / "voice.mp3"
+    voice.write_bytes(b"ID3")
+    with Session(engine) as session:
+        for i in range(7):
+            post = Post(kind="video", title=f"Post {i}", body="Body", status="media_ready")
+            session.add(post)
+            session.commit()
+            session.add(Asset(post_id=post.id, type="audio", path=str(voice)))
+            # Every post uses the shared clip plus one of its own
+            session.add(Asset(post_id=post.id, type="broll_meta", path="https://videos.pexels.com/shared.mp4"))
+            session.add(Asset(post_id=post.id, type="broll_meta", path=f"https://videos.pexels.com/own{i}.mp4"))
+        session.commit()
+    return engine
+
+
+def test_batch_downloads_shared_broll_once(engine):
+    """Test a batch fetches each distinct B-roll URL once and hands every post its clips."""
+    fetched = []
+    rendered = {}
+
+    async def fetch(url):
+        fetched.append(url)
+        await asyncio.sleep(0.01)
+        return "/lib/" + url.rsplit("/", 1)[1]
+
+    async def render(post, voice_path, broll_paths, encoding, moviepy_available, title_layer=None):
+        rendered[post.id] = (voice_path, broll_paths, title_layer)
+        return f"/videos/{post.id}.mp4"
+
+    with Session(engine) as session, \
+            patch.object(m03.media_library, "fetch", side_effect=fetch), \
+            patch.object(m03, "_render_post", side_effect=render), \
+            patch.object(m03.render_executor, "max_workers", 0), \
+            patch.object(m03.os.path, "getsize", return_value=1024):
+        posts = session.exec(select(Post)).all()
+        paths = asyncio.run(m03.assemble_batch(session, posts, profile="draft"))
+
+    assert paths == [f"/videos/{post.id}.mp4" for post in posts]
+    assert len(fetched) == len(set(fetched)) == 8
+    voice_path, broll_paths, title_layer = rendered[posts[3].id]
+    assert voice_path.endswith("voice.mp3")
+    assert broll_paths == ["/lib/shared.mp4", "/lib/own3.mp4"]
+    assert title_layer is not None
+
+
+def test_run_processes_whole_backlog_in_batch_mode(engine):
+    """Test batch mode renders every pending post in one run and records each result."""
+    async def render(post, *args, **kwargs):
+        return None if post.title == "Post 2" else f"/videos/{post.id}.mp4"
+
+    with patch.object(m03, "engine", engine), \
+            patch.object(m03, "download_broll_batch", return_value={}), \
+            patch.object(m03, "_render_post", side_effect=render), \
+            patch.object(m03.render_executor, "max_workers", 0):
+        result = asyncio.run(m03.run_m03_video_assembly(preview=False, batch=True))
+
+    assert result["posts_processed"] == 7 and result["videos_created"] == 6
+    with Session(engine) as session:
+        statuses = {post.title: post.status for post in session.exec(select(Post))}
+        videos = session.exec(select(Asset).where(Asset.type == "video")).all()
+    assert statuses["Post 2"] == "video_failed"
+    assert list(statuses.values()).count("ready_for_review") == 6
+    assert len(videos) == 6
+
+
+def test_batch_commits_each_post_as_it_finishes(engine):
+    """Test finished renders are saved while slower ones are still running."""
+    seen_while_rendering = {}
+
+    async def render(post, *args, **kwargs):
+        if post.title == "Post 6":
+            await asyncio.sleep(0.05)
+            with Session(engine) as other:
+                seen_while_rendering.update(
+                    {p.title: p.status for p in other.exec(select(Post).where(Post.title != "Post 6"))}
+                )
+        return f"/videos/{post.id}.mp4"
+
+    with patch.object(m03, "engine", engine), \
+            patch.object(m03, "download_broll_batch", return_value={}), \
+            patch.object(m03, "_render_post", side_effect=render), \
+            patch.object(m03.render_executor, "max_workers", 0):
+        result = asyncio.run(m03.run_m03_video_assembly(preview=False, batch=True))
+
+    assert result["videos_created"] == 7
+    assert len(seen_while_rendering) == 6
+    assert set(seen_while_rendering.values()) == {"ready_for_review"}
+
+
+def test_pool_size_bounded_by_cores_and_memory():
+    """Test the batch render pool fits the batch, the CPU count and available memory."""
+    with patch.object(render_executor_module.os, "cpu_count", return_value=8), \
+            patch.object(render_executor_module, "available_memory_mb", return_value=4000):
+        assert pool_size_for(1, memory_per_worker_mb=1500) == 1
+        assert pool_size_for(20, memory_per_worker_mb=1500) == 2
+        assert pool_size_for(20, memory_per_worker_mb=100) == 8
+    with patch.object(render_executor_module, "available_memory_mb", return_value=500):
+        assert pool_size_for(4, memory_per_worker_mb=1500) == 1
+
+
+def test_title_layer_fits_top_of_frame():
+    """Test the pre-rendered title caption wraps inside the frame near the top."""
+    encoding = get_profile("draft")
+    width, height = encoding.size
+
+    layer = m03.build_title_layer("A fairly long headline about new AI video tools", encoding)
+
+    x, y = layer.position(0)
+    layer_width, layer_height = layer.size
+    assert 0 <= x and x + layer_width <= width
+    assert y < height // 4
+    assert layer.is_active(1) and not layer.is_active(m03.TITLE_SECONDS + 1)
@@ -0,0 +1,165 @@
+"""
+Test suite for the streaming media downloader.
+"""
+import asyncio
+import fcntl
+
+import httpx
+
+from app.media_downloader import download_many, download_to_file
+
+PAYLOAD = bytes(range(256)) * 40  # 10 KB
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _serve_range(request, payload=PAYLOAD):
+    """Minimal Range-aware file server."""
+    range_header = request.headers.get("range")
+    if range_header:
+        start = int(range_header.split("=")[1].rstrip("-"))
+        return httpx.Response(
+            206,
+            content=payload[start:],
+            headers={"content-range": f"bytes {start}-{len(payload) - 1}/{len(payload)}"},
+        )
+    return httpx.Response(200, content=payload)
+
+
+def test_download_streams_to_file(tmp_path):
+    """Test a plain download lands at the destination with no leftovers."""
+    dest = tmp_path / "broll" / "clip.mp4"
+
+    async def run():
+        async with _client(_serve_range) as client:
+            return await download_to_file("https://media/clip.mp4", str(dest), client=client)
+
+    assert asyncio.run(run()) == str(dest)
+    assert dest.read_bytes() == PAYLOAD
+    assert not (tmp_path / "broll" / "clip.mp4.part").exists()
+
+
+def test_resumes_partial_download_with_range(tmp_path):
+    """Test an existing .part file is continued, not re-downloaded."""
+    dest = tmp_path / "clip.mp4"
+    (tmp_path / "clip.mp4.part").write_bytes(PAYLOAD[:4000])
+    ranges = []
+
+    def handler(request):
+        ranges.append(request.headers.get("range"))
+        return _serve_range(request)
+
+    async def run():
+        async with _client(handler) as client:
+            return await download_to_file("https://media/clip.mp4", str(dest), client=client)
+
+    assert asyncio.run(run()) == str(dest)
+    assert ranges == ["bytes=4000-"]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_short_body_is_retried_and_resumed(tmp_path):
+    """Test a truncated transfer fails length verification and resumes."""
+    dest = tmp_path / "clip.mp4"
+    calls = []
+
+    def handler(request):
+        calls.append(request.headers.get("range"))
+        if len(calls) == 1:
+            # Announce the full length but deliver only part of it
+            return httpx.Response(
+                206,
+                content=PAYLOAD[:3000],
+                headers={"content-range": f"bytes 0-{len(PAYLOAD) - 1}/{len(PAYLOAD)}"},
+            )
+        return _serve_range(request)
+
+    async def run():
+        async with _client(handler) as client:
+            return await download_to_file("https://media/clip.mp4", str(dest), client=client, retries=1)
+
+    assert asyncio.run(run()) == str(dest)
+    assert calls == [None, "bytes=3000-"]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_server_ignoring_range_restarts(tmp_path):
+    """Test a 200 reply to a Range request overwrites the partial file."""
+    dest = tmp_path / "clip.mp4"
+    (tmp_path / "clip.mp4.part").write_bytes(b"stale-bytes")
+
+    async def run():
+        async with _client(lambda request: httpx.Response(200, content=PAYLOAD)) as client:
+            return await download_to_file("https://media/clip.mp4", str(dest), client=client)
+
+    assert asyncio.run(run()) == str(dest)
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_client_error_is_not_retried(tmp_path):
+    """Test 4xx responses fail fast without a destination file."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    async def run():
+        async with _client(handler) as client:
+            return await download_to_file("https://media/missing.mp4", str(tmp_path / "x.mp4"), client=client)
+
+    assert asyncio.run(run()) is None
+    assert len(calls) == 1
+    assert not (tmp_path / "x.mp4").exists()
+
+
+def test_download_many_limits_concurrency(tmp_path):
+    """Test concurrent downloads respect the limit and keep result order."""
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if request.url.path == "/bad.mp4":
+            return httpx.Response(404)
+        return httpx.Response(200, content=PAYLOAD)
+
+    items = [(f"https://media/{name}.mp4", str(tmp_path / f"{name}.mp4")) for name in ("a", "bad", "c", "d")]
+
+    async def run():
+        async with _client(handler) as client:
+            return await download_many(items, concurrency=2, client=client)
+
+    results = asyncio.run(run())
+    assert results == [items[0][1], None, items[2][1], items[3][1]]
+    assert peak <= 2
+
+
+def test_waits_for_another_process_downloading_the_same_file(tmp_path):
+    """Test a download locked by another process is reused instead of written twice."""
+    dest = tmp_path / "clip.mp4"
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return _serve_range(request)
+
+    async def run():
+        with open(tmp_path / "clip.mp4.lock", "a") as other:
+            fcntl.flock(other.fileno(), fcntl.LOCK_EX)  # another render process
+            async with _client(handler) as client:
+                task = asyncio.create_task(download_to_file("https://media/clip.mp4", str(dest), client=client))
+                await asyncio.sleep(0.2)
+                assert not task.done()
+                dest.write_bytes(PAYLOAD)
+                fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+                return await task
+
+    assert asyncio.run(run()) == str(dest)
+    assert requests == []
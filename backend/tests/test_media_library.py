@@ -0,0 +1,140 @@
+"""
+Test suite for the local B-roll media library.
+"""
+import asyncio
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlmodel import create_engine
+
+from app.media_library import (
+    MediaLibrary,
+    hamming_distance,
+    image_dhash,
+    normalize_query,
+    pexels_video_id,
+)
+
+PEXELS_HD = "https://videos.pexels.com/video-files/3129671/3129671-hd_1080_1920_30fps.mp4"
+PEXELS_SD = "https://videos.pexels.com/video-files/3129671/3129671-sd_540_960_25fps.mp4"
+
+
+@pytest.fixture
+def library(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'library.db'}")
+    return MediaLibrary(db_engine=engine, root=tmp_path / "media", max_bytes=10_000)
+
+
+@pytest.fixture
+def downloads():
+    """Fake downloader that writes 1 KB per URL and records calls."""
+    calls = []
+
+    async def fake_download(url, dest_path):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open(dest_path, "wb") as f:
+            f.write(b"\0" * 1000)
+        return dest_path
+
+    with patch("app.media_library.download_to_file", fake_download):
+        yield calls
+
+
+def test_keys():
+    """Test query normalization and Pexels id extraction."""
+    assert normalize_query("  Artificial   Intelligence ") == "artificial intelligence"
+    assert pexels_video_id(PEXELS_HD) == "3129671"
+    assert pexels_video_id("https://www.pexels.com/video/robot-arm-855418/") == "855418"
+    assert pexels_video_id("https://example.com/clip.mp4") is None
+
+
+def test_image_dhash_is_robust_to_small_changes():
+    """Test near-identical frames hash close together, different ones far apart."""
+    gradient = np.tile(np.linspace(0, 255, 90, dtype=np.uint8), (80, 1))
+    noisy = np.clip(gradient.astype(int) + np.random.default_rng(0).integers(-3, 4, gradient.shape), 0, 255)
+
+    base = image_dhash(Image.fromarray(gradient))
+    assert hamming_distance(base, image_dhash(Image.fromarray(noisy.astype(np.uint8)))) <= 4
+    assert hamming_distance(base, image_dhash(Image.fromarray(gradient[:, ::-1].copy()))) > 32
+
+
+def test_repeat_fetches_are_served_locally(library, downloads):
+    """Test same URL, other renditions and repeat queries skip the network."""
+    with patch("app.media_library.video_dhash", return_value=None):
+        first = asyncio.run(library.fetch(PEXELS_HD, query="AI  Technology"))
+        assert asyncio.run(library.fetch(PEXELS_HD)) == first
+        assert asyncio.run(library.fetch(PEXELS_SD)) == first  # Same Pexels video id
+
+    assert downloads == [PEXELS_HD]
+    assert library.lookup_query("ai technology") == (first, PEXELS_HD)
+    assert library.lookup_query("business") is None
+
+
+def test_perceptual_duplicates_share_one_file(library, downloads):
+    """Test different URLs with matching frames keep a single copy."""
+    with patch("app.media_library.video_dhash", side_effect=["ff00ff00ff00ff00", "ff00ff00ff00ff01"]):
+        first = asyncio.run(library.fetch("https://cdn-a.example/clip.mp4"))
+        second = asyncio.run(library.fetch("https://cdn-b.example/clip.mp4"))
+
+    assert first == second
+    assert len(downloads) == 2
+    stats = library.stats()
+    assert (stats["files"], stats["items"], stats["total_bytes"]) == (1, 2, 1000)
+
+
+def test_concurrent_fetches_share_download(library, downloads):
+    """Test identical in-flight fetches download once."""
+    async def run():
+        return await asyncio.gather(*(library.fetch(PEXELS_HD) for _ in range(3)))
+
+    with patch("app.media_library.video_dhash", return_value=None):
+        paths = asyncio.run(run())
+
+    assert len(set(paths)) == 1
+    assert downloads == [PEXELS_HD]
+
+
+def test_missing_file_is_downloaded_again(library, downloads):
+    """Test rows for files deleted outside the library are forgotten."""
+    with patch("app.media_library.video_dhash", return_value=None):
+        path = asyncio.run(library.fetch(PEXELS_HD))
+        os.unlink(path)
+        assert asyncio.run(library.fetch(PEXELS_HD)) == path
+
+    assert downloads == [PEXELS_HD, PEXELS_HD]
+
+
+def test_lru_eviction(tmp_path, downloads):
+    """Test the least recently used file is evicted when over the cap."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'library.db'}")
+    library = MediaLibrary(db_engine=engine, root=tmp_path / "media", max_bytes=2500)
+    urls = [f"https://example.com/{name}.mp4" for name in ("a", "b", "c")]
+
+    with patch("app.media_library.video_dhash", return_value=None):
+        paths = [asyncio.run(library.fetch(urls[0])), asyncio.run(library.fetch(urls[1]))]
+        library.lookup(urls[0])  # a is now more recent than b
+        paths.append(asyncio.run(library.fetch(urls[2])))
+
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[2])
+    assert library.lookup(urls[1]) is None
+    assert library.stats()["total_bytes"] <= 2500
+
+
+def test_fetch_recorded_by_another_process_is_reused(library, downloads):
+    """Test a second process fetching the same URL reuses the first one's row."""
+    other = MediaLibrary(db_engine=library.engine, root=library.root, max_bytes=10_000)
+
+    async def run():
+        return await asyncio.gather(library.fetch(PEXELS_HD), other.fetch(PEXELS_HD))
+
+    with patch("app.media_library.video_dhash", return_value=None):
+        first, second = asyncio.run(run())
+    assert first == second and os.path.exists(first)
+    assert library.stats()["items"] == 1
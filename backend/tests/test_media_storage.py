@@ -0,0 +1,144 @@
+"""
+Test suite for content-addressed durable media storage.
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlmodel import create_engine
+
+from app.media_storage import LocalStorageBackend, MediaStore, S3StorageBackend, parse_ref
+
+
+class FakeS3:
+    """In-memory stand-in for the boto3 S3 client calls the backend uses."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, "rb") as f:
+            self.objects[(bucket, key)] = f.read()
+
+    def download_file(self, bucket, key, filename):
+        with open(filename, "wb") as f:
+            f.write(self.objects[(bucket, key)])
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise KeyError(Key)
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'media.db'}")
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_identical_content_is_stored_once(tmp_path, engine):
+    """Test equal audio gets one object and one row, with a reference per store."""
+    store = MediaStore(LocalStorageBackend(tmp_path / "store"), db_engine=engine)
+    first = store.store(write(tmp_path / "a.mp3", b"voice"), "audio")
+    second = store.store(write(tmp_path / "b.mp3", b"voice"), "audio")
+    other = store.store(write(tmp_path / "c.mp3", b"other voice"), "audio")
+
+    assert first == second != other
+    assert first.startswith("media://audio/") and first.endswith(".mp3")
+    assert store.stats() == {"objects": 2, "references": 3, "total_bytes": 16, "backend": "local"}
+
+    files = [p for p in (tmp_path / "store").rglob("*") if p.is_file()]
+    assert len(files) == 2
+    assert not any(p.name.endswith(".tmp") for p in files)
+
+
+def test_release_deletes_last_reference_only(tmp_path, engine):
+    """Test an object survives until its last reference is released."""
+    store = MediaStore(LocalStorageBackend(tmp_path / "store"), db_engine=engine)
+    ref = store.store(write(tmp_path / "a.mp3", b"voice"), "audio")
+    assert store.acquire(ref)
+
+    store.release(ref)
+    path = store.resolve(ref)
+    assert path and open(path, "rb").read() == b"voice"
+
+    store.release(ref)
+    assert store.resolve(ref) is None
+    assert store.stats()["objects"] == 0
+    assert not store.acquire(ref)
+
+
+def test_move_removes_source(tmp_path, engine):
+    """Test move=True leaves only the stored copy."""
+    store = MediaStore(LocalStorageBackend(tmp_path / "store"), db_engine=engine)
+    src = write(tmp_path / "voice.mp3", b"voice")
+    ref = store.store(src, "audio", move=True)
+
+    assert not os.path.exists(src)
+    assert open(store.resolve(ref), "rb").read() == b"voice"
+
+
+def test_s3_backend_downloads_into_cache(tmp_path, engine):
+    """Test objects go to the bucket and another machine reads them via its cache."""
+    client = FakeS3()
+    uploader = MediaStore(
+        S3StorageBackend("bucket", "media/", cache_dir=tmp_path / "cache_a", client=client),
+        db_engine=engine,
+    )
+    ref = uploader.store(write(tmp_path / "voice.mp3", b"voice"), "audio")
+    key = parse_ref(ref)[0]
+    assert ("bucket", f"media/audio/{key[:2]}/{key}.mp3") in client.objects
+
+    reader = MediaStore(
+        S3StorageBackend("bucket", "media/", cache_dir=tmp_path / "cache_b", client=client),
+        db_engine=engine,
+    )
+    shutil.rmtree(tmp_path / "cache_a")
+    path = reader.resolve(ref)
+    assert path.startswith(str(tmp_path / "cache_b"))
+    assert open(path, "rb").read() == b"voice"
+
+    reader.release(ref)
+    assert client.objects == {}
+
+
+def test_resolve_accepts_legacy_paths(tmp_path, engine):
+    """Test plain paths and file:// URLs still resolve, missing files do not."""
+    store = MediaStore(LocalStorageBackend(tmp_path / "store"), db_engine=engine)
+    path = write(tmp_path / "old.mp3", b"voice")
+
+    assert store.resolve(path) == path
+    assert store.resolve(f"file://{path}") == path
+    assert store.resolve(str(tmp_path / "missing.mp3")) is None
+    assert store.resolve(None) is None
+    assert parse_ref("https://example.com/a.mp3") is None
+
+
+def test_concurrent_stores_count_every_reference(tmp_path, engine):
+    """Test parallel stores of the same content each add a reference, and releases balance them."""
+    store = MediaStore(LocalStorageBackend(tmp_path / "store"), db_engine=engine)
+    sources = [write(tmp_path / f"{i}.mp3", b"voice") for i in range(8)]
+    store.store(write(tmp_path / "seed.mp3", b"seed"), "audio")  # table created up front
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        refs = list(pool.map(lambda path: store.store(path, "audio"), sources))
+
+    assert len(set(refs)) == 1
+    assert store.stats()["references"] == 9
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(store.release, refs[:7]))
+    assert store.resolve(refs[0])  # one reference left
+
+    store.release(refs[0])
+    assert store.resolve(refs[0]) is None
+    assert store.stats()["objects"] == 1
@@ -0,0 +1,95 @@
+"""
+Test suite for the NumPy overlay compositor.
+"""
+import numpy as np
+from PIL import Image
+
+from app.overlay_compositor import OverlayCompositor, OverlayLayer, parse_color
+
+
+def _reference_over(bg, img, opacity=1.0):
+    """Straight-alpha "over" blend of a full-size RGBA image onto bg."""
+    rgba = np.asarray(img, dtype=np.float64)
+    alpha = rgba[..., 3:4] / 255.0 * opacity
+    return rgba[..., :3] * alpha + bg.astype(np.float64) * (1 - alpha)
+
+
+def _text_like_image(size=(64, 48)):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    img.paste((255, 200, 0, 255), (10, 20, 30, 28))
+    img.paste((0, 0, 0, 128), (30, 20, 40, 28))  # Semi-transparent stroke
+    return img
+
+
+def test_parse_color():
+    """Test hex, named and tuple colours all become RGB tuples."""
+    assert parse_color("#FF0050") == (255, 0, 80)
+    assert parse_color("white") == (255, 255, 255)
+    assert parse_color((1, 2, 3, 4)) == (1, 2, 3)
+
+
+def test_layer_is_cropped_to_visible_pixels():
+    """Test that transparent canvas margins are not stored."""
+    layer = OverlayLayer.from_image(_text_like_image(), y=5)
+
+    assert layer.size == (30, 8)
+    assert (layer.x, layer.y) == (10, 25)
+    assert OverlayLayer.from_image(Image.new("RGBA", (10, 10))) is None
+
+
+def test_compose_matches_reference_blend():
+    """Test premultiplied blending matches a straight-alpha reference."""
+    img = _text_like_image()
+    bg = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    compositor = OverlayCompositor((64, 48), layers=[OverlayLayer.from_image(img)])
+
+    out = compositor.compose(bg, 0.0)
+
+    assert np.abs(out.astype(int) - _reference_over(bg, img)).max() <= 1
+    assert np.array_equal(out[:20], bg[:20])  # Untouched outside the tile
+
+
+def test_fades_and_time_window():
+    """Test opacity ramps and start/end visibility."""
+    layer = OverlayLayer.from_image(_text_like_image(), start=1.0, end=3.0, fade_in=0.5, fade_out=0.5)
+
+    assert layer.opacity(0.5) == 0.0
+    assert layer.opacity(1.25) == 0.5
+    assert layer.opacity(2.0) == 1.0
+    assert layer.opacity(2.75) == 0.5
+    assert layer.opacity(3.0) == 0.0
+
+    img = _text_like_image()
+    bg = np.zeros((48, 64, 3), dtype=np.uint8)
+    compositor = OverlayCompositor((64, 48), layers=[layer])
+    assert compositor.compose(bg, 0.5) is bg  # Nothing visible, frame passed through
+    out = compositor.compose(bg, 1.25)
+    assert np.abs(out.astype(int) - _reference_over(bg, img, opacity=0.5)).max() <= 1
+
+
+def test_dirty_rect_clips_to_frame_and_follows_motion():
+    """Test dirty rectangles are clipped to the frame and track motion."""
+    layer = OverlayLayer.from_image(_text_like_image(), motion=lambda t: (0, int(t * 100)))
+    compositor = OverlayCompositor((64, 48), layers=[layer])
+
+    assert compositor.dirty_rect(0.0) == (10, 20, 40, 28)
+    assert compositor.dirty_rect(0.25) == (10, 45, 40, 48)
+    assert compositor.dirty_rect(1.0) is None
+
+    bg = np.zeros((48, 64, 3), dtype=np.uint8)
+    assert compositor.compose(bg, 1.0) is bg
+
+
+def test_buffer_reused_and_background_untouched():
+    """Test frames are written into one reused buffer, never into the source."""
+    compositor = OverlayCompositor(
+        (64, 48), layers=[OverlayLayer.from_image(_text_like_image())], tint=("#FF0000", 0.5)
+    )
+    bg = np.full((48, 64, 3), 100, dtype=np.uint8)
+
+    first = compositor.compose(bg, 0.0)
+    second = compositor.compose(bg, 0.1)
+
+    assert first is second
+    assert (bg == 100).all()
+    assert tuple(second[0, 0]) == (178, 50, 50)  # Tint applied outside the tile
@@ -0,0 +1,97 @@
+"""
+Test suite for review preview proxies (poster frame + sprite strip).
+"""
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app import preview_renders
+from app.encoding_profiles import get_profile
+from app.preview_renders import (
+    attach_preview,
+    build_sprite,
+    has_preview,
+    preview_renderer,
+    preview_summary,
+    publish_preview,
+    sprite_times,
+)
+
+
+@pytest.fixture
+def proxy_video(tmp_path):
+    """2s proxy-sized clip that fades from black to white."""
+    from moviepy.editor import VideoClip
+
+    profile = get_profile("proxy")
+    width, height = profile.size
+
+    def make_frame(t):
+        return np.full((height, width, 3), int(255 * t / 2), dtype=np.uint8)
+
+    path = str(tmp_path / "render.mp4")
+    clip = VideoClip(make_frame, duration=2)
+    clip.write_videofile(path, logger=None, **profile.write_kwargs(audio=False))
+    clip.close()
+    return path
+
+
+def test_proxy_profile_is_quarter_resolution():
+    """Test the proxy profile is a quarter of 1080x1920 at a low frame rate."""
+    proxy, publish = get_profile("proxy"), get_profile("publish")
+    assert proxy.size == (publish.width // 4, publish.height // 4)
+    assert proxy.fps < publish.fps
+
+
+def test_sprite_times_and_layout():
+    """Test thumbnails sample slice midpoints and tile left to right."""
+    assert sprite_times(10, 5) == [1.0, 3.0, 5.0, 7.0, 9.0]
+    assert sprite_times(0, 5) == []
+
+    frames = [Image.new("RGB", (270, 480), (v, v, v)) for v in (0, 255)]
+    strip = build_sprite(frames, thumb_width=90)
+    assert strip.size == (180, 160)
+    assert strip.getpixel((45, 80)) == (0, 0, 0)
+    assert strip.getpixel((135, 80)) == (255, 255, 255)
+
+
+def test_publish_preview_writes_poster_and_sprite(tmp_path, proxy_video):
+    """Test a proxy render is moved into the preview folder with thumbnails."""
+    with patch.object(preview_renders, "PREVIEW_DIR", tmp_path / "previews"), \
+            patch.object(preview_renders, "OUTPUT_DIR", tmp_path):
+        preview = publish_preview(7, proxy_video, "proxy", renderer="competitor_video")
+
+    assert not os.path.exists(proxy_video)
+    assert preview["video_url"] == "previews/7/preview.mp4"
+    assert preview["renderer"] == "competitor_video"
+    assert preview["poster_url"] == "previews/7/poster.jpg"
+    assert Image.open(preview["poster_path"]).size == (270, 480)
+
+    sprite = Image.open(preview["sprite_path"])
+    layout = preview["sprite"]
+    assert sprite.size == (layout["frames"] * layout["thumb_width"], layout["thumb_height"])
+    assert layout["frames"] == preview_renders.SPRITE_FRAMES
+    # Thumbnails follow the fade from dark to light
+    first, last = sprite.getpixel((5, 5))[0], sprite.getpixel((sprite.width - 5, 5))[0]
+    assert first < 40 and last > 200
+
+
+def test_attach_preview_keeps_other_extra_data(tmp_path):
+    """Test the preview record is merged into extra_data and summarized for the API."""
+    video = tmp_path / "preview.mp4"
+    video.write_bytes(b"\0")
+    post = SimpleNamespace(extra_data={"selected_voice": "adam"})
+    assert not has_preview(post)
+
+    attach_preview(post, {"profile": "proxy", "video_path": str(video), "video_url": "previews/1/preview.mp4"})
+
+    assert post.extra_data["selected_voice"] == "adam"
+    assert has_preview(post)
+    summary = preview_summary(post)
+    assert summary["video_url"] == "previews/1/preview.mp4"
+    assert "video_path" not in summary
+    assert preview_renderer(post) == "m03"  # records without a renderer came from M03
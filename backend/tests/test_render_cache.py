@@ -0,0 +1,110 @@
+"""
+Test suite for the content-addressed render cache.
+"""
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+from unittest.mock import patch
+
+from app import video_competitor_exact as competitor
+from app.encoding_profiles import ffmpeg_exe
+from app.render_cache import RenderCache, hash_inputs, scene_cache_key
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return str(path)
+
+
+def test_hash_inputs_is_order_independent():
+    """Test that key derivation ignores dict ordering."""
+    assert hash_inputs(a=1, b={"x": 1, "y": 2}) == hash_inputs(b={"y": 2, "x": 1}, a=1)
+    assert hash_inputs(a=1) != hash_inputs(a=2)
+
+
+def test_scene_key_changes_with_inputs():
+    """Test that any render input change produces a new scene key."""
+    scene = {"type": "hook", "text": "Did you know?", "duration": 3}
+    base = scene_cache_key("video_production", scene, (1080, 1920), 30, background="https://x/1.mp4")
+
+    assert base == scene_cache_key("video_production", dict(scene), (1080, 1920), 30, background="https://x/1.mp4")
+    assert base != scene_cache_key("video_production", {**scene, "text": "Changed"}, (1080, 1920), 30, background="https://x/1.mp4")
+    assert base != scene_cache_key("video_production", scene, (540, 960), 30, background="https://x/1.mp4")
+    assert base != scene_cache_key("video_production", scene, (1080, 1920), 30, background="https://x/2.mp4")
+    assert base != scene_cache_key("video_production_pro", scene, (1080, 1920), 30, background="https://x/1.mp4")
+
+
+def test_put_get_and_materialize(tmp_path):
+    """Test storing, retrieving and materializing a cached render."""
+    cache = RenderCache(root=tmp_path / "cache", max_bytes=10_000)
+    src = _write(tmp_path / "render.mp4", 100)
+
+    assert cache.get("ab" * 32) is None
+
+    cached = cache.put("ab" * 32, src, kind="video")
+    assert os.path.exists(cached)
+    assert os.path.exists(src)  # copy, not move
+    assert cache.get("ab" * 32, kind="video") == cached
+
+    dest = tmp_path / "out" / "final.mp4"
+    assert cache.materialize("ab" * 32, str(dest)) == str(dest)
+    assert dest.stat().st_size == 100
+    assert cache.materialize("cd" * 32, str(tmp_path / "missing.mp4")) is None
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    """Test that eviction removes least recently used entries first."""
+    cache = RenderCache(root=tmp_path / "cache", max_bytes=250)
+
+    old = cache.put("aa" * 32, _write(tmp_path / "a.mp4", 100))
+    cache.put("bb" * 32, _write(tmp_path / "b.mp4", 100))
+
+    # Make the first entry older, then touch it so it becomes most recent
+    past = time.time() - 100
+    os.utime(old, (past, past))
+    os.utime(cache.path_for("bb" * 32), (past + 10, past + 10))
+    assert cache.get("aa" * 32) == old
+
+    cache.put("cc" * 32, _write(tmp_path / "c.mp4", 100))
+
+    assert cache.get("aa" * 32) is not None
+    assert cache.get("bb" * 32) is None
+    assert cache.get("cc" * 32) is not None
+    assert cache.total_bytes() <= 250
+
+
+def test_failed_footage_download_is_not_cached(tmp_path):
+    """Test a solid stand-in for footage that failed to download is flagged and never cached."""
+    cache = RenderCache(root=tmp_path)
+    fallbacks = []
+    scene = {"type": "hook", "text": "Did you know?", "duration": 1}
+    with patch.object(competitor, "render_cache", cache):
+        clip = competitor.build_competitor_scene(
+            scene, ("https://x/1.mp4", None), size=(108, 192), fps=10, fallbacks=fallbacks
+        )
+    clip.close()
+
+    assert fallbacks == ["hook"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_cached_competitor_video_reports_its_real_duration(tmp_path):
+    """Test a cache hit returns the cached file's (speech-timed) length, not the 30s grid."""
+    cached = str(tmp_path / "cached.mp4")
+    subprocess.run([ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", "testsrc=size=90x160:rate=10:duration=2.5", "-pix_fmt", "yuv420p", cached],
+                   check=True)
+    cache = RenderCache(root=tmp_path / "cache")
+
+    with patch.object(competitor, "render_cache", cache), \
+            patch.object(cache, "materialize", side_effect=lambda key, dest: shutil.copyfile(cached, dest)):
+        result = asyncio.run(competitor._generate_exact_competitor_video(
+            "HOOK: Did you know?", "Title", output_path=str(tmp_path / "out.mp4")
+        ))
+
+    assert result["cached"] is True
+    assert result["duration"] == 2.5
+    assert result["scenes"] == 5
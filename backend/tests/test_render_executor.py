@@ -0,0 +1,137 @@
+"""
+Test suite for the render process pool (progress events and cancellation).
+"""
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app import render_executor as render_executor_module
+from app import render_worker
+from app.render_executor import RenderExecutor, render_logger, report
+from app.render_queue import RenderQueue
+
+
+# Render functions must be module-level so the pool can pickle them
+
+async def _render_steps(steps: int) -> int:
+    for i in range(steps):
+        report("scene", (i + 1) / steps, scene=i + 1)
+    return os.getpid()
+
+
+def _nested_render() -> int:
+    # A render calling another render entry point runs it in the same process
+    inner = asyncio.run(render_executor_module.render_executor.run(_render_steps, 1))
+    assert inner == os.getpid()
+    return inner
+
+
+def _slow_render(marker: str) -> None:
+    for _ in range(200):
+        report("encode", 0.0)
+        time.sleep(0.05)
+    with open(marker, "w") as f:
+        f.write("finished")
+
+
+def _encode_clip(path: str) -> str:
+    from moviepy.editor import VideoClip
+
+    clip = VideoClip(lambda t: np.zeros((64, 36, 3), dtype=np.uint8), duration=1)
+    clip.write_videofile(path, fps=10, codec="libx264", audio=False, logger=render_logger())
+    clip.close()
+    return path
+
+
+@pytest.fixture(scope="module")
+def pool():
+    executor = RenderExecutor(max_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+def test_inline_executor_reports_progress():
+    """Test max_workers=0 renders in the caller and still delivers progress."""
+    events = []
+    pid = asyncio.run(RenderExecutor(max_workers=0).run(_render_steps, 2, progress=events.append))
+
+    assert pid == os.getpid()
+    assert [e["fraction"] for e in events] == [0.5, 1.0]
+    assert events[0]["stage"] == "scene" and events[0]["scene"] == 1
+
+
+def test_pool_runs_renders_in_another_process(pool):
+    """Test renders run off the caller's process and progress is relayed back."""
+    events = []
+    pid = asyncio.run(pool.run(_render_steps, 3, progress=events.append))
+    nested_pid = asyncio.run(pool.run(_nested_render))
+
+    assert pid != os.getpid()
+    assert nested_pid != os.getpid()
+    assert [e["scene"] for e in events] == [1, 2, 3]
+
+
+def test_cancelling_the_caller_stops_the_render(pool, tmp_path):
+    """Test cancelling the awaiting task stops the render at its next report."""
+    marker = tmp_path / "finished.txt"
+
+    async def cancel_after_start():
+        started = asyncio.Event()
+        task = asyncio.ensure_future(pool.run(_slow_render, str(marker), progress=lambda e: started.set()))
+        await asyncio.wait_for(started.wait(), timeout=30)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The pool is free again once the cancelled render has stopped
+        return await asyncio.wait_for(pool.run(_render_steps, 1), timeout=30)
+
+    assert asyncio.run(cancel_after_start()) != os.getpid()
+    assert not marker.exists()
+
+
+def test_encode_progress_from_moviepy_logger(tmp_path):
+    """Test write_videofile frame progress is reported as encode events."""
+    events = []
+    path = asyncio.run(RenderExecutor(max_workers=0).run(
+        _encode_clip, str(tmp_path / "clip.mp4"), progress=events.append,
+    ))
+
+    encode = [e for e in events if e["stage"] == "encode"]
+    assert os.path.exists(path)
+    assert encode and encode[-1]["fraction"] == 1.0
+    assert [e["fraction"] for e in encode] == sorted(e["fraction"] for e in encode)
+    assert render_logger() == "bar"  # Outside a render: console progress bar
+
+
+def test_lost_lease_cancels_running_job(tmp_path):
+    """Test a job cancelled through the queue stops its render instead of finishing it."""
+    from sqlmodel import SQLModel, create_engine
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    queue = RenderQueue(db_engine=engine)
+    finished = []
+
+    async def long_render(job):
+        await asyncio.sleep(30)
+        finished.append(job.id)
+        return {}
+
+    async def run():
+        job = queue.enqueue("pro_video", post_id=1)
+        claimed = queue.claim("w1")
+        queue.cancel(job.id)
+        with patch.dict(render_worker.HANDLERS, {"pro_video": long_render}):
+            status = await asyncio.wait_for(
+                render_worker.run_job(queue, claimed, "w1", heartbeat_seconds=0.05), timeout=10,
+            )
+        return job.id, status
+
+    job_id, status = asyncio.run(run())
+    assert status is None
+    assert finished == []
+    assert queue.get(job_id).status == "cancelled"
@@ -0,0 +1,149 @@
+"""
+Test suite for the render task graph and the concurrent competitor render.
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.encoding_profiles import get_profile
+from app.render_executor import report, tracking
+from app.render_graph import RenderGraph
+
+
+def test_tasks_start_when_their_dependencies_finish():
+    """Test independent tasks overlap and dependents get results in deps order."""
+    async def slow(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    async def combine(a, b):
+        return a + b
+
+    graph = RenderGraph()
+    graph.add("a", slow, "x")
+    graph.add("b", slow, "y")
+    graph.add("ab", combine, deps=["b", "a"])
+
+    started = time.monotonic()
+    results = asyncio.run(graph.run())
+
+    assert results["ab"] == "yx"
+    assert time.monotonic() - started < 0.35
+    assert graph.critical_path()[-1] == "ab"
+
+
+def test_sync_tasks_run_in_threads_and_report_progress():
+    """Test CPU-bound tasks run concurrently in threads and can still report progress."""
+    events = []
+
+    def work(index):
+        time.sleep(0.2)
+        report("scene", None, scene=index)
+        return index
+
+    graph = RenderGraph(max_threads=3)
+    for i in range(3):
+        graph.add(f"scene_{i}", work, i)
+
+    async def run():
+        with tracking(events.append):
+            return await graph.run()
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+
+    assert results == {"scene_0": 0, "scene_1": 1, "scene_2": 2}
+    assert time.monotonic() - started < 0.5
+    assert sorted(e["scene"] for e in events) == [0, 1, 2]
+
+
+def test_failure_cancels_remaining_tasks():
+    """Test one failing task stops the graph and surfaces its error."""
+    finished = []
+
+    async def fail():
+        raise RuntimeError("tts failed")
+
+    async def long_download():
+        await asyncio.sleep(5)
+        finished.append("download")
+
+    graph = RenderGraph()
+    graph.add("tts", fail)
+    graph.add("download", long_download)
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="tts failed"):
+        asyncio.run(graph.run())
+
+    assert finished == [] and time.monotonic() - started < 1
+    with pytest.raises(ValueError):
+        graph.add("scene", fail, deps=["missing"])
+
+
+def test_competitor_scenes_overlap_tts_and_footage():
+    """Test footage is fetched while TTS runs, and scenes take the speech timing."""
+    from app import video_competitor_exact as competitor
+
+    calls = []
+    scenes = [{"type": t, "text": f"{t} text", "duration": 3} for t in ["hook", "demo", "cta"]]
+
+    async def voiceover(text, tier="publish"):
+        calls.append(f"tts start ({tier})")
+        await asyncio.sleep(0.2)
+        calls.append("tts end")
+        return "/tmp/voice.mp3"
+
+    async def footage(scene, title=""):
+        calls.append(f"footage {scene['type']}")
+        return None, None
+
+    def timed(scenes, audio_path):
+        return [{**scene, "duration": 1.5 + i, "timing": "speech"} for i, scene in enumerate(scenes)]
+
+    with patch.object(competitor, "generate_voiceover", side_effect=voiceover), \
+            patch.object(competitor, "fetch_scene_footage", side_effect=footage), \
+            patch.object(competitor, "retime_scenes", side_effect=timed), \
+            patch.object(competitor, "RENDER_CACHE_ENABLED", False):
+        clips, voice_path, timed_scenes = asyncio.run(
+            competitor.render_competitor_scenes(scenes, "Title", get_profile("draft"))
+        )
+
+    assert voice_path == "/tmp/voice.mp3"
+    assert "tts start (draft)" in calls  # draft profile: no paid voice
+    assert calls.index("footage cta") < calls.index("tts end")
+    assert [clip.duration for clip in clips] == [1.5, 2.5, 3.5]
+    assert [s["duration"] for s in timed_scenes] == [1.5, 2.5, 3.5]
+    for clip in clips:
+        clip.close()
+
+
+@pytest.mark.parametrize("enabled, degraded", [(True, True), (False, False)])
+def test_unmastered_voiceover_is_degraded_only_when_mastering_is_on(enabled, degraded):
+    """Test MASTERING_ENABLED=false renders stay cacheable; a failed master does not."""
+    from app import video_competitor_exact as competitor
+
+    scenes = [{"type": "hook", "text": "hook text", "duration": 1}]
+
+    async def voiceover(text, tier="publish"):
+        return "/tmp/voice.mp3"
+
+    async def footage(scene, title=""):
+        return None, None
+
+    fallbacks = []
+    with patch.object(competitor, "generate_voiceover", side_effect=voiceover), \
+            patch.object(competitor, "fetch_scene_footage", side_effect=footage), \
+            patch.object(competitor, "master_voiceover", return_value=None), \
+            patch.object(competitor, "retime_scenes", side_effect=lambda scenes, path: scenes), \
+            patch.object(competitor, "MASTERING_ENABLED", enabled), \
+            patch.object(competitor, "RENDER_CACHE_ENABLED", False):
+        clips, _, _ = asyncio.run(
+            competitor.render_competitor_scenes(scenes, "Title", get_profile("draft"), fallbacks=fallbacks)
+        )
+    for clip in clips:
+        clip.close()
+
+    assert ("mastering" in fallbacks) is degraded
@@ -0,0 +1,162 @@
+"""
+Test suite for render progress events, ETA and the SSE stream.
+"""
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import render_worker
+from app.models import RenderProgressEvent
+from app.render_executor import report
+from app.render_progress import (
+    DEFAULT_STAGE_WEIGHTS,
+    RenderProgressStore,
+    estimate_remaining,
+    overall_progress,
+    stream_progress,
+)
+from app.render_queue import RenderQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}")
+    SQLModel.metadata.create_all(engine)
+    return RenderQueue(db_engine=engine), RenderProgressStore(db_engine=engine, write_interval=60)
+
+
+def _add_events(store, job_id, start, timeline):
+    """Insert events at start + offset seconds: [(offset, stage, fraction), ...]."""
+    with Session(store.engine) as session:
+        for offset, stage, fraction in timeline:
+            session.add(RenderProgressEvent(
+                job_id=job_id, stage=stage, fraction=fraction,
+                created_at=start + timedelta(seconds=offset),
+            ))
+        session.commit()
+
+
+def test_encode_updates_are_throttled_per_stage(db):
+    """Test frequent encode updates are thinned while stage changes and completions are kept."""
+    _, store = db
+
+    written = [store.record(1, "encode", f / 100) for f in range(1, 100)]
+    assert written.count(True) == 1
+    assert store.record(1, "encode", 1.0)
+    assert store.record(1, "scene", 0.5)
+    assert [e.stage for e in store.events(1)] == ["encode", "encode", "scene"]
+
+
+def test_overall_progress_and_eta():
+    """Test stage fractions combine by weight and the ETA follows the average rate."""
+    assert overall_progress({}, DEFAULT_STAGE_WEIGHTS) == 0.0
+    done = {stage: 1.0 for stage in DEFAULT_STAGE_WEIGHTS}
+    assert overall_progress(done, DEFAULT_STAGE_WEIGHTS) == pytest.approx(1.0)
+    assert overall_progress({"encode": 0.5}, {"encode": 1.0}) == 0.5
+
+    assert estimate_remaining(30, 0.5) == 30
+    assert estimate_remaining(30, 0.01) is None
+
+
+def test_snapshot_times_stages_of_current_attempt(db):
+    """Test the snapshot reports time per stage and ignores a failed earlier attempt."""
+    queue, store = db
+    job = queue.enqueue("pro_video", post_id=1)
+    queue.claim("w1")
+    job = queue.get(job.id)
+    start = job.started_at
+
+    _add_events(store, job.id, start - timedelta(seconds=100), [
+        (0, "started", None), (5, "encode", 0.9), (6, "failed", None),
+    ])
+    _add_events(store, job.id, start, [
+        (0, "started", None), (1, "parse", 1.0), (5, "footage", 1.0), (20, "scene", 0.5),
+    ])
+
+    snapshot = store.snapshot(job)
+
+    assert snapshot["stage"] == "scene" and snapshot["stage_fraction"] == 0.5
+    assert "encode" not in snapshot["stages"]
+    assert snapshot["stages"]["footage"] == {"fraction": 1.0, "seconds": 4.0}
+    assert snapshot["stages"]["scene"]["seconds"] == 15.0
+    expected = (0.02 + 0.18 + 0.28 * 0.5) / sum(DEFAULT_STAGE_WEIGHTS.values())
+    assert snapshot["progress"] == pytest.approx(expected, abs=1e-3)
+    assert snapshot["eta_seconds"] is not None
+
+
+def test_stage_weights_learned_from_completed_jobs(db):
+    """Test the ETA weights follow where completed renders of a kind spent their time."""
+    queue, store = db
+    job = queue.enqueue("competitor_video", post_id=1)
+    queue.claim("w1")
+    queue.complete(job.id, "w1", {})
+    start = queue.get(job.id).started_at
+    _add_events(store, job.id, start, [(0, "started", None), (10, "scene", 1.0), (40, "encode", 1.0)])
+
+    weights = store.stage_weights("competitor_video")
+
+    assert weights == {"scene": pytest.approx(0.25), "encode": pytest.approx(0.75)}
+    assert store.stage_weights("pro_video") == DEFAULT_STAGE_WEIGHTS
+
+
+def test_worker_records_handler_progress(db):
+    """Test reports from a job handler land in the store between start and finish events."""
+    queue, store = db
+
+    async def handler(job):
+        report("parse", 1.0)
+        report("scene", 1.0, scene=1, scenes=1)
+        return {"video_path": "/tmp/v.mp4"}
+
+    job = queue.enqueue("pro_video", post_id=3)
+    claimed = queue.claim("w1")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(render_worker.HANDLERS, "pro_video", handler)
+        status = asyncio.run(render_worker.run_job(queue, claimed, "w1", progress_store=store))
+
+    events = store.events(job.id)
+    assert status == "completed"
+    assert [e.stage for e in events] == ["started", "parse", "scene", "completed"]
+    assert events[2].info == {"scene": 1, "scenes": 1}
+    assert all(e.post_id == 3 for e in events)
+    assert store.snapshot(queue.get(job.id))["progress"] == 1.0
+
+
+def test_stream_sends_progress_then_done(db):
+    """Test the SSE stream sends new events as they arrive and closes when the job ends."""
+    queue, store = db
+    job = queue.enqueue("pro_video", post_id=1)
+    queue.claim("w1")
+    store.record(job.id, "started")
+
+    async def collect():
+        messages = []
+        async for message in stream_progress(lambda: queue.get(job.id), _never, store=store, poll_seconds=0.01):
+            messages.append(message)
+            if len(messages) == 1:
+                store.record(job.id, "encode", 1.0)
+                queue.complete(job.id, "w1", {})
+        return messages
+
+    messages = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+
+    events = [_parse_sse(message) for message in messages]
+    assert [name for name, _, _ in events][0] == "progress"
+    name, event_id, data = events[-1]
+    assert name == "done" and data["status"] == "completed"
+    assert event_id == str(data["last_event_id"])
+    assert [e["stage"] for e in data["events"]] == ["encode"]
+    assert data["progress"] == 1.0
+
+
+async def _never():
+    return False
+
+
+def _parse_sse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], fields.get("id"), json.loads(fields["data"])
+
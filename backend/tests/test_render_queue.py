@@ -0,0 +1,239 @@
+"""
+Test suite for the render job queue and worker loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import render_worker
+from app.models import RenderJob
+from app.render_queue import RenderQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    return RenderQueue(db_engine=engine, lease_seconds=60)
+
+
+def _expire_lease(queue, job_id):
+    with Session(queue.engine) as session:
+        job = session.get(RenderJob, job_id)
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(job)
+        session.commit()
+
+
+def test_enqueue_dedupes_active_post_jobs(queue):
+    """Test a post is only queued once per kind while its job is active."""
+    first = queue.enqueue("pro_video", post_id=1, payload={"profile": "proxy"})
+    again = queue.enqueue("pro_video", post_id=1)
+    other_kind = queue.enqueue("competitor_video", post_id=1)
+
+    assert again.id == first.id
+    assert other_kind.id != first.id
+
+    claimed = queue.claim("w1", kinds=["pro_video"])
+    assert queue.complete(claimed.id, "w1", {"video_path": "/tmp/v.mp4"})
+    assert queue.enqueue("pro_video", post_id=1).id != first.id
+
+
+def test_claim_order_and_single_owner(queue):
+    """Test higher priority first, then FIFO, and each job goes to one worker."""
+    low = queue.enqueue("post_video", post_id=1)
+    high = queue.enqueue("post_video", post_id=2, priority=5)
+    queue.enqueue("post_video", post_id=3)
+
+    claims = [queue.claim(f"w{i}") for i in range(4)]
+
+    assert [job.id for job in claims[:2]] == [high.id, low.id]
+    assert claims[3] is None
+    assert len({job.id for job in claims[:3]}) == 3
+    assert claims[0].status == "running" and claims[0].attempts == 1
+
+
+def test_concurrent_claims_never_share_a_job(queue):
+    """Test racing workers each get a distinct job and nobody gets one twice."""
+    jobs = [queue.enqueue("post_video", post_id=i) for i in range(3)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda i: queue.claim(f"w{i}"), range(8)))
+
+    claimed = [job for job in claims if job is not None]
+    assert sorted(job.id for job in claimed) == sorted(job.id for job in jobs)
+    for job in claimed:
+        assert queue.get(job.id).worker_id == job.worker_id
+
+
+def test_expired_lease_is_reclaimed_then_failed(queue):
+    """Test a dead worker's job is retried, and fails once attempts run out."""
+    job = queue.enqueue("final_render", post_id=7, max_attempts=2)
+    queue.claim("dead-1")
+    assert queue.claim("w2") is None  # Lease still valid
+
+    _expire_lease(queue, job.id)
+    reclaimed = queue.claim("w2")
+    assert reclaimed.id == job.id and reclaimed.attempts == 2
+    assert not queue.heartbeat(job.id, "dead-1")
+    assert queue.heartbeat(job.id, "w2")
+
+    _expire_lease(queue, job.id)
+    assert queue.claim("w3") is None
+    failed = queue.get(job.id)
+    assert failed.status == "failed"
+    assert failed.dedupe_key is None
+
+
+def test_fail_retries_until_max_attempts(queue):
+    """Test handler errors requeue the job until its last attempt."""
+    job = queue.enqueue("pro_video", post_id=1, max_attempts=2)
+
+    assert queue.fail(queue.claim("w1").id, "w1", "boom") == "queued"
+    assert queue.fail(queue.claim("w1").id, "w1", "boom again") == "failed"
+    assert queue.get(job.id).error == "boom again"
+
+
+def test_cancel_stops_heartbeat_and_discards_result(queue):
+    """Test a cancelled running job cannot be completed by its worker."""
+    job = queue.enqueue("pro_video", post_id=1)
+    queue.claim("w1")
+
+    assert queue.cancel(job.id)
+    assert not queue.heartbeat(job.id, "w1")
+    assert not queue.complete(job.id, "w1", {})
+    assert queue.get(job.id).status == "cancelled"
+    assert not queue.cancel(job.id)
+
+
+def test_worker_loop_runs_handlers(queue):
+    """Test the worker completes successful jobs and records failures."""
+    ran = []
+
+    async def ok(job):
+        ran.append(job.id)
+        return {"video_path": f"/tmp/{job.id}.mp4"}
+
+    async def broken(job):
+        raise RuntimeError("render crashed")
+
+    good = queue.enqueue("pro_video", post_id=1)
+    bad = queue.enqueue("competitor_video", post_id=2, max_attempts=1)
+
+    with patch.dict(render_worker.HANDLERS, {"pro_video": ok, "competitor_video": broken}):
+        processed = asyncio.run(render_worker.worker_loop("w1", queue=queue, max_jobs=5))
+
+    assert processed == 2
+    assert ran == [good.id]
+    assert queue.get(good.id).status == "completed"
+    assert queue.get(good.id).result == {"video_path": f"/tmp/{good.id}.mp4"}
+    assert queue.get(bad.id).status == "failed"
+    assert queue.stats() == {"completed": 1, "failed": 1}
+
+
+@pytest.fixture
+def posts_db(tmp_path):
+    """Post table + queue on a temp database, wired into video_generator."""
+    from app import render_queue as render_queue_module
+    from app import video_generator
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    SQLModel.metadata.create_all(engine)
+    queue = RenderQueue(db_engine=engine)
+    with patch.object(video_generator, "engine", engine), \
+            patch.object(render_queue_module, "render_queue", queue):
+        yield engine, queue
+
+
+def _add_posts(engine, statuses):
+    from app.models import Post
+
+    with Session(engine) as session:
+        posts = [Post(kind="video", title=f"p{i}", body="Hook: hi", status=status)
+                 for i, status in enumerate(statuses)]
+        session.add_all(posts)
+        session.commit()
+        return [post.id for post in posts]
+
+
+def test_enqueue_posts_is_idempotent(posts_db):
+    """Test concurrent ticks claiming the same posts queue each only once."""
+    _, queue = posts_db
+
+    assert queue.enqueue_posts("post_video", [1, 2, 3]) == [1, 2, 3]
+    assert queue.enqueue_posts("post_video", [2, 3, 4]) == [4]
+    assert queue.stats() == {"queued": 4}
+
+
+def test_process_queue_respects_batch_limit(posts_db):
+    """Test each tick claims at most batch_size posts and skips queued ones."""
+    from app.video_generator import process_video_generation_queue
+
+    engine, queue = posts_db
+    ids = _add_posts(engine, ["video_production"] * 5 + ["draft"])
+
+    first = asyncio.run(process_video_generation_queue(batch_size=3))
+    second = asyncio.run(process_video_generation_queue(batch_size=3))
+    third = asyncio.run(process_video_generation_queue(batch_size=3))
+
+    assert first == ids[:3]
+    assert second == ids[3:5]
+    assert third == []
+
+
+def test_cancelled_or_failed_posts_leave_the_queue(posts_db):
+    """Test a cancelled or finally failed job moves its post out of video_production."""
+    from app.models import Post
+    from app.video_generator import process_video_generation_queue
+
+    engine, queue = posts_db
+    cancel_id, fail_id = _add_posts(engine, ["video_production", "video_production"])
+    asyncio.run(process_video_generation_queue())
+
+    cancel_job = queue.active_job("post_video", cancel_id)
+    assert queue.cancel(cancel_job.id)
+    fail_job = queue.claim("w1")
+    queue.fail(fail_job.id, "w1", "boom", retry=False)
+
+    with Session(engine) as session:
+        assert session.get(Post, cancel_id).status == "draft"
+        assert session.get(Post, fail_id).status == "failed"
+    assert asyncio.run(process_video_generation_queue()) == []
+
+
+def test_final_render_uses_the_previews_renderer(posts_db):
+    """Test approving a competitor preview renders the competitor video, not the M03 assembly."""
+    from app.models import Asset, Post
+
+    engine, queue = posts_db
+    [post_id] = _add_posts(engine, ["video_rendering"])
+    with Session(engine) as session:
+        post = session.get(Post, post_id)
+        post.extra_data = {"preview": {"renderer": "competitor_video", "video_path": "/tmp/preview.mp4"}}
+        session.add(post)
+        session.commit()
+
+    rendered = []
+
+    async def competitor(job):
+        rendered.append(job.payload)
+        return {"video_path": "/tmp/final.mp4", "profile": "publish"}
+
+    async def m03(post_id, profile=None):
+        raise AssertionError("M03 must not render a competitor preview")
+
+    job = queue.enqueue("final_render", post_id, payload={"profile": "publish"})
+    with patch.object(render_worker, "engine", engine), \
+            patch.dict(render_worker.SCRIPT_RENDERERS, {"competitor_video": competitor}), \
+            patch("app.jobs.m03_video_assembly.render_final_video", side_effect=m03):
+        result = asyncio.run(render_worker.render_final(job))
+
+    assert rendered == [{"profile": "publish"}]
+    assert result["renderer"] == "competitor_video"
+    with Session(engine) as session:
+        assert session.get(Post, post_id).status == "approved"
+        assert [a.path for a in session.exec(select(Asset).where(Asset.post_id == post_id))] == ["/tmp/final.mp4"]
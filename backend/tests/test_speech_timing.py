@@ -0,0 +1,136 @@
+"""
+Test suite for speech-driven scene timing (provider alignment and local aligner).
+"""
+import base64
+import json
+import wave
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app import video_production_pro
+from app.speech_timing import (
+    ALIGN_SAMPLE_RATE,
+    align_words_by_energy,
+    alignment_path,
+    apply_word_timings,
+    load_word_timings,
+    retime_scenes,
+    save_timestamped_speech,
+    words_from_characters,
+)
+
+# Tone bursts standing in for three spoken words, with pauses between them
+BURSTS = [(0.2, 0.6), (1.0, 1.4), (2.0, 2.4)]
+AUDIO_SECONDS = 3.0
+
+
+def _speech_samples():
+    t = np.arange(int(AUDIO_SECONDS * ALIGN_SAMPLE_RATE)) / ALIGN_SAMPLE_RATE
+    samples = 0.001 * np.sin(2 * np.pi * 50 * t)  # Quiet noise floor
+    for start, end in BURSTS:
+        mask = (t >= start) & (t < end)
+        samples[mask] = 0.5 * np.sin(2 * np.pi * 220 * t[mask])
+    return samples.astype(np.float32)
+
+
+@pytest.fixture
+def speech_wav(tmp_path):
+    path = str(tmp_path / "voice.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(ALIGN_SAMPLE_RATE)
+        f.writeframes((_speech_samples() * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def test_words_from_character_alignment():
+    """Test character timings are grouped into words at whitespace."""
+    chars = list("Hi there")
+    starts = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7]
+    ends = [s + 0.1 for s in starts]
+
+    words = words_from_characters(chars, starts, ends)
+
+    assert [w["word"] for w in words] == ["Hi", "there"]
+    assert words[1]["start"] == 0.3 and words[1]["end"] == pytest.approx(0.8)
+
+
+def test_timestamped_speech_saves_audio_and_alignment(tmp_path):
+    """Test a with-timestamps response is written as MP3 plus reusable word timings."""
+    text = "Big news."
+    response = {
+        "audio_base64": base64.b64encode(b"ID3fake").decode(),
+        "alignment": {
+            "characters": list(text),
+            "character_start_times_seconds": [i * 0.1 for i in range(len(text))],
+            "character_end_times_seconds": [i * 0.1 + 0.1 for i in range(len(text))],
+        },
+    }
+    path = save_timestamped_speech(response, str(tmp_path / "voice.mp3"), text)
+
+    assert open(path, "rb").read() == b"ID3fake"
+    assert json.load(open(alignment_path(path)))["source"] == "elevenlabs"
+    words = load_word_timings(path, text)
+    assert [w["word"] for w in words] == ["Big", "news."]
+    assert load_word_timings(path, "Other text.") is None
+
+
+def test_energy_aligner_finds_words_between_pauses():
+    """Test words land on the voiced bursts, not spread evenly over the clip."""
+    words = align_words_by_energy(["one", "two", "six"], _speech_samples())
+
+    for word, (start, end) in zip(words, BURSTS):
+        assert word["start"] == pytest.approx(start, abs=0.05)
+        assert word["end"] == pytest.approx(end, abs=0.05)
+
+
+def test_scenes_follow_word_timings():
+    """Test scene boundaries sit on each scene's first word and the last runs to the audio end."""
+    scenes = [{"type": "hook", "text": "Big news", "duration": 3},
+              {"type": "cta", "text": "", "duration": 3},
+              {"type": "main", "text": "today", "duration": 6}]
+    words = [{"word": "Big", "start": 0.1, "end": 0.4},
+             {"word": "news", "start": 0.5, "end": 0.9},
+             {"word": "today", "start": 1.3, "end": 1.8}]
+
+    timed = apply_word_timings(scenes, words, audio_duration=2.5)
+
+    assert [s["type"] for s in timed] == ["hook", "main"]  # Empty scene dropped
+    assert [(s["start_time"], s["end_time"]) for s in timed] == [(0.0, 1.3), (1.3, 2.5)]
+    assert timed[0]["word_times"] == [0.1, 0.5]
+    assert timed[1]["word_times"] == [0.0]
+    assert apply_word_timings(scenes, words[:2], 2.5) is scenes  # Mismatch keeps script timing
+
+
+def test_retime_scenes_matches_audio_length(speech_wav):
+    """Test local alignment makes the scenes exactly as long as the voiceover."""
+    scenes = [{"type": "hook", "text": "one", "duration": 3},
+              {"type": "main", "text": "two six", "duration": 6}]
+
+    timed = retime_scenes(scenes, speech_wav)
+
+    assert sum(s["duration"] for s in timed) == pytest.approx(AUDIO_SECONDS, abs=0.01)
+    assert timed[1]["start_time"] == pytest.approx(1.0, abs=0.05)
+    assert timed[1]["word_times"][1] == pytest.approx(1.0, abs=0.1)
+    assert load_word_timings(speech_wav, "one two six") is not None  # Cached alignment
+
+
+def test_word_by_word_pops_at_spoken_times():
+    """Test word overlays start at the given word times."""
+    starts = []
+    original = video_production_pro.OverlayLayer.from_image
+
+    def capture(*args, **kwargs):
+        starts.append(kwargs["start"])
+        return original(*args, **kwargs)
+
+    with patch.object(video_production_pro.OverlayLayer, "from_image", side_effect=capture):
+        clip = video_production_pro.create_word_by_word_clip(
+            ["AI", "is", "here"], duration=2.0, size=(108, 192), fontsize=20, word_times=[0.0, 0.2, 1.5],
+        )
+    clip.close()
+
+    assert starts == [0.0, 0.2, 1.5]
@@ -0,0 +1,128 @@
+"""
+Test suite for the cached stock footage search service.
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from app import stock_footage
+from app.stock_footage import SearchCache, prefetch, search_key, search_videos, search_videos_sync
+
+
+def _video(video_id, duration=10, width=1080):
+    return {
+        "id": video_id,
+        "duration": duration,
+        "user": {"name": "dropped"},
+        "video_files": [{"quality": "hd", "width": width, "height": 1920, "link": f"https://v/{video_id}.mp4"}],
+    }
+
+
+@pytest.fixture
+def pexels():
+    """Mock Pexels API on a fresh cache; records the queries searched."""
+    queries = []
+    results = {}
+
+    async def handler(request):
+        queries.append(request.url.params["query"])
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"videos": results.get(request.url.params["query"], [])})
+
+    clients = {}
+
+    def get_client():
+        loop = asyncio.get_running_loop()
+        if loop not in clients:
+            clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return clients[loop]
+
+    with patch.object(stock_footage, "search_cache", SearchCache()), \
+            patch.object(stock_footage, "get_async_client", get_client), \
+            patch.object(stock_footage, "PEXELS_API_KEY", "test-key"):
+        yield queries, results
+
+
+def test_search_key_normalizes_query():
+    """Test equivalent queries share a cache key, orientation does not."""
+    assert search_key("  AI   Robots ") == search_key("ai robots")
+    assert search_key("ai robots", "portrait") != search_key("ai robots", "landscape")
+
+
+def test_ttl_cache_expiry():
+    """Test entries expire after the TTL and LRU size is bounded."""
+    cache = SearchCache(ttl=0, max_entries=2)
+    cache.put(("a", "", ""), [])
+    with patch("app.stock_footage.time.monotonic", return_value=10**9):
+        assert cache.get(("a", "", "")) is None
+
+    cache = SearchCache(ttl=60, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put((name, "", ""), [name])
+    assert cache.get(("a", "", "")) is None
+    assert cache.get(("c", "", "")) == ["c"]
+
+
+def test_repeat_and_concurrent_searches_hit_api_once(pexels):
+    """Test cached and in-flight identical searches share one API call."""
+    queries, results = pexels
+    results["robot"] = [_video(1)]
+
+    async def run():
+        first = await asyncio.gather(*(search_videos(" Robot ") for _ in range(4)))
+        again = await search_videos("robot")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert queries == ["robot"]
+    assert again == first[0]
+    assert again[0]["id"] == 1
+    assert "user" not in again[0]
+
+
+def test_prefetch_dedupes_queries(pexels):
+    """Test prefetch issues each distinct uncached query once."""
+    queries, _ = pexels
+
+    issued = asyncio.run(prefetch(["AI", "ai", "robots", "", "AI "]))
+
+    assert issued == 2
+    assert sorted(queries) == ["ai", "robots"]
+    assert asyncio.run(prefetch(["ai", "robots"])) == 0
+
+
+def test_sync_search_shares_cache(pexels):
+    """Test the blocking search used by M02 reads and fills the same cache."""
+    response = MagicMock()
+    response.json.return_value = {"videos": [_video(7)]}
+
+    with patch("app.stock_footage.requests.get", return_value=response) as get:
+        assert search_videos_sync("city", size="medium")[0]["id"] == 7
+        assert search_videos_sync("CITY", size="medium")[0]["id"] == 7
+
+    assert get.call_count == 1
+
+
+def test_competitor_plan_only_searches_fallbacks_when_needed(pexels):
+    """Test a 5-scene plan searches primary queries, then fallbacks only for misses."""
+    from app import video_competitor_exact as competitor
+
+    queries, results = pexels
+    scenes = [{"type": t, "text": f"Scene about Robots {i}", "duration": 5} for i, t in enumerate(
+        ["hook", "demo", "proof", "impact", "cta"])]
+    keywords = competitor.extract_smart_keywords(scenes[0]["text"], "Robots")
+    primary, fallback, _ = competitor.build_search_queries(keywords)
+    results[fallback.lower()] = [_video(3)]
+
+    with patch.object(competitor, "PEXELS_API_KEY", "test-key"), \
+            patch.object(competitor, "MEDIA_LIBRARY_QUERY_REUSE", False):
+        asyncio.run(competitor.plan_footage_searches(scenes, "Robots"))
+
+    # Distinct primary queries, plus one shared fallback that resolves them all
+    distinct_primary = {
+        " ".join(competitor.extract_smart_keywords(s["text"], "Robots")).lower() for s in scenes
+    }
+    assert len(queries) == len(distinct_primary) + 1
+    assert queries[-1] == fallback.lower()
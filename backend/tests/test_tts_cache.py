@@ -0,0 +1,131 @@
+"""
+Test suite for the content-addressed TTS cache.
+"""
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app import tts_service
+from app.speech_timing import alignment_path
+from app.tts_cache import TTSCache, tts_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TTSCache(root=tmp_path / "tts", max_bytes=10**9)
+
+
+def synthesizer(calls, audio=b"ID3 audio", words=None):
+    async def synthesize(path):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        with open(path, "wb") as f:
+            f.write(audio)
+        if words is not None:
+            with open(alignment_path(path), "w") as f:
+                f.write(words)
+        return path
+    return synthesize
+
+
+def test_key_normalizes_text_but_not_voice_or_settings():
+    """Test whitespace/Unicode variants share a key; voice, model and settings do not."""
+    key = tts_cache_key("elevenlabs", "rachel", "Hello  world\n", model="m1", settings={"stability": 0.5})
+
+    assert key == tts_cache_key("elevenlabs", "rachel", " Hello world", model="m1", settings={"stability": 0.5})
+    assert key == tts_cache_key("elevenlabs", "rachel", "Ｈｅｌｌｏ world", model="m1", settings={"stability": 0.5})
+    assert key != tts_cache_key("elevenlabs", "adam", "Hello world", model="m1", settings={"stability": 0.5})
+    assert key != tts_cache_key("elevenlabs", "rachel", "Hello world", model="m2", settings={"stability": 0.5})
+    assert key != tts_cache_key("elevenlabs", "rachel", "Hello world", model="m1", settings={"stability": 0.2})
+    assert key != tts_cache_key("openai", "rachel", "Hello world", model="m1", settings={"stability": 0.5})
+
+
+def test_hit_skips_synthesis_and_carries_word_timings(cache, tmp_path):
+    """Test a second request is served from disk, word timings included."""
+    calls = []
+    key = tts_cache_key("elevenlabs", "rachel", "Hello world")
+    synthesize = synthesizer(calls, words='{"words": []}')
+
+    first = asyncio.run(cache.fetch(key, str(tmp_path / "a.mp3"), synthesize))
+    second = asyncio.run(cache.fetch(key, str(tmp_path / "b.mp3"), synthesize))
+
+    assert len(calls) == 1
+    assert first == str(tmp_path / "a.mp3") and second == str(tmp_path / "b.mp3")
+    assert open(second, "rb").read() == b"ID3 audio"
+    assert open(alignment_path(second)).read() == '{"words": []}'
+    assert not os.listdir(cache.root / "tmp")
+
+
+def test_concurrent_requests_synthesize_once(cache, tmp_path):
+    """Test simultaneous requests for the same key share one synthesis."""
+    calls = []
+    key = tts_cache_key("openai", "fable", "Same script")
+    synthesize = synthesizer(calls)
+
+    async def run():
+        return await asyncio.gather(*[
+            cache.fetch(key, str(tmp_path / f"{i}.mp3"), synthesize) for i in range(5)
+        ])
+
+    paths = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(os.path.exists(path) for path in paths)
+
+
+def test_failed_synthesis_is_not_cached(cache, tmp_path):
+    """Test a provider failure returns None and the next request retries."""
+    async def fail(path):
+        return None
+
+    key = tts_cache_key("elevenlabs", "rachel", "Hello")
+    assert asyncio.run(cache.fetch(key, str(tmp_path / "a.mp3"), fail)) is None
+
+    calls = []
+    assert asyncio.run(cache.fetch(key, str(tmp_path / "a.mp3"), synthesizer(calls)))
+    assert len(calls) == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """Test the cache stays under max_bytes, dropping the oldest-used entries first."""
+    cache = TTSCache(root=tmp_path / "tts", max_bytes=250)
+    keys = [tts_cache_key("gtts", "en", f"Line {i}") for i in range(3)]
+
+    for i, key in enumerate(keys):
+        asyncio.run(cache.fetch(key, str(tmp_path / f"{i}.mp3"), synthesizer([], audio=b"x" * 100)))
+        os.utime(cache.path_for(key), (1000 + i, 1000 + i))
+        if i == 1:
+            cache.get(keys[0])  # Touch the first entry so the second is oldest
+
+    assert cache.total_bytes() <= 250
+    assert cache.get(keys[0]) and cache.get(keys[2])
+    assert cache.get(keys[1]) is None
+    # Audio handed out earlier survives eviction
+    assert os.path.exists(tmp_path / "1.mp3")
+
+
+def test_generate_voiceover_reuses_cached_audio(cache, tmp_path):
+    """Test tts_service only calls the provider once for a repeated script and energy."""
+    calls = []
+
+    async def stream_to_file(url, path, headers, payload, **kwargs):
+        calls.append(payload)
+        with open(path, "wb") as f:
+            f.write(b"ID3 openai")
+        return path
+
+    with patch.object(tts_service, "tts_cache", cache), \
+            patch.object(tts_service, "OPENAI_API_KEY", "key"), \
+            patch.object(tts_service, "stream_to_file", side_effect=stream_to_file):
+        first = asyncio.run(tts_service.generate_voiceover(
+            "Big news today.", provider="openai", output_path=str(tmp_path / "a.mp3")))
+        second = asyncio.run(tts_service.generate_voiceover(
+            "Big news  today.", provider="openai", output_path=str(tmp_path / "b.mp3")))
+        viral = asyncio.run(tts_service.generate_voiceover(
+            "Big news today.", provider="openai", output_path=str(tmp_path / "c.mp3"), energy="viral"))
+
+    assert first and second and viral
+    assert len(calls) == 2
+    assert open(second, "rb").read() == b"ID3 openai"
@@ -0,0 +1,116 @@
+"""
+Test suite for chunked, streamed TTS synthesis.
+"""
+import asyncio
+import subprocess
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app import tts_stream
+from app.encoding_profiles import ffmpeg_exe
+from app.tts_stream import concat_audio, split_text, stream_to_file, synthesize_chunked
+
+SCRIPT = " ".join(
+    f"Sentence number {i} explains one more detail about the launch, its price and its rivals."
+    for i in range(80)
+)
+
+
+def make_tone(path, seconds):
+    subprocess.run(
+        [ffmpeg_exe(), "-y", "-v", "error", "-f", "lavfi",
+         "-i", f"sine=frequency=440:duration={seconds}", "-c:a", "libmp3lame", "-b:a", "64k", path],
+        check=True,
+    )
+    return path
+
+
+def audio_seconds(path):
+    result = subprocess.run([ffmpeg_exe(), "-i", path], capture_output=True, text=True)
+    hours, minutes, seconds = result.stderr.split("Duration: ")[1].split(",")[0].split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_split_keeps_whole_text_at_sentence_boundaries():
+    """Test long scripts are chunked below the limit, losslessly, ending on sentences."""
+    chunks = split_text(SCRIPT, max_chars=1000)
+
+    assert len(SCRIPT) > 5000 and len(chunks) > 5
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert " ".join(chunks) == SCRIPT
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_split_breaks_oversized_sentences():
+    """Test a sentence longer than the limit is split at clauses, then words."""
+    sentence = "First clause runs on, " * 20 + "and " + "word " * 100
+    chunks = split_text(sentence, max_chars=120)
+
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert " ".join(chunks) == " ".join(sentence.split())
+    assert split_text("   ") == []
+
+
+def test_chunks_run_concurrently_and_join(tmp_path):
+    """Test chunks are synthesized in parallel with their neighbours and joined in order."""
+    seen = []
+    active = {"now": 0, "peak": 0}
+
+    async def synthesize_chunk(chunk, path, previous, following):
+        seen.append((chunk, previous, following))
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        return await asyncio.to_thread(make_tone, path, 1)
+
+    output = str(tmp_path / "voice.mp3")
+    text = "One. Two. Three."
+    result = asyncio.run(synthesize_chunked(text, output, synthesize_chunk, max_chars=6))
+
+    assert result == output
+    assert active["peak"] == 3
+    assert ("Two.", "One.", "Three.") in seen
+    assert audio_seconds(output) == pytest.approx(3.0, abs=0.15)
+    assert [p.name for p in tmp_path.iterdir()] == ["voice.mp3"]
+
+
+def test_failed_chunk_fails_the_voiceover(tmp_path):
+    """Test one failed chunk returns None and leaves no partial files."""
+    async def synthesize_chunk(chunk, path, previous, following):
+        if chunk == "Two.":
+            return None
+        return await asyncio.to_thread(make_tone, path, 1)
+
+    output = str(tmp_path / "voice.mp3")
+    assert asyncio.run(synthesize_chunked("One. Two. Three.", output, synthesize_chunk, max_chars=6)) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_concat_is_gapless(tmp_path):
+    """Test joined segments last exactly as long as their sum."""
+    parts = [make_tone(str(tmp_path / f"{i}.mp3"), seconds) for i, seconds in enumerate((1, 2))]
+    joined = concat_audio(parts, str(tmp_path / "joined.mp3"))
+    assert audio_seconds(joined) == pytest.approx(3.0, abs=0.1)
+
+
+def test_stream_to_file_writes_body_and_reports_errors(tmp_path):
+    """Test a 200 body is streamed to disk and an API error returns None."""
+    def handler(request):
+        if b"bad" in request.content:
+            return httpx.Response(429, text="quota exceeded")
+        return httpx.Response(200, content=b"ID3" + b"\x00" * 200_000)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with patch.object(tts_stream, "get_async_client", return_value=client):
+                ok = await stream_to_file("https://tts/x", str(tmp_path / "ok.mp3"), {}, {"text": "hi"})
+                bad = await stream_to_file("https://tts/x", str(tmp_path / "bad.mp3"), {}, {"text": "bad"})
+        return ok, bad
+
+    ok, bad = asyncio.run(run())
+
+    assert ok and (tmp_path / "ok.mp3").stat().st_size == 200_003
+    assert bad is None and not (tmp_path / "bad.mp3").exists()
@@ -0,0 +1,113 @@
+"""
+Test suite for the local TTS engine and the draft/publish provider tiers.
+"""
+import asyncio
+import json
+import os
+import stat
+import sys
+import textwrap
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app import tts_service
+from app.tts_cache import TTSCache
+
+# Stand-in for espeak-ng: records its arguments and writes a short WAV
+FAKE_ESPEAK = textwrap.dedent(f"""\
+    #!{sys.executable}
+    import json, sys, wave
+    args = sys.argv[1:]
+    with open(args[args.index("-w") + 1] + ".args.json", "w") as f:
+        json.dump({{"args": args, "text": sys.stdin.read()}}, f)
+    with wave.open(args[args.index("-w") + 1], "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(22050)
+        out.writeframes(b"\\x00\\x10" * 22050)
+""")
+
+
+@pytest.fixture
+def espeak(tmp_path):
+    """Fake espeak-ng on PATH; yields the list of recorded invocations."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    binary = bin_dir / "espeak-ng"
+    binary.write_text(FAKE_ESPEAK)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+
+    runs = []
+    real_run = tts_service.subprocess.run
+
+    def run(cmd, *args, **kwargs):
+        result = real_run(cmd, *args, **kwargs)
+        if cmd[0] == str(binary):
+            with open(cmd[cmd.index("-w") + 1] + ".args.json") as f:
+                runs.append(json.load(f))
+        return result
+
+    with patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}), \
+            patch.object(tts_service, "PIPER_MODEL", ""), \
+            patch.object(tts_service, "LOCAL_TTS_ENGINE", "auto"), \
+            patch.object(tts_service, "tts_cache", TTSCache(root=tmp_path / "tts", max_bytes=10**9)), \
+            patch.object(tts_service.subprocess, "run", side_effect=run):
+        yield runs
+
+
+def test_local_engine_makes_mp3_offline(espeak, tmp_path):
+    """Test the local tier synthesizes with espeak-ng and converts to MP3, cached."""
+    output = str(tmp_path / "draft.mp3")
+    result = asyncio.run(tts_service.generate_tts_local("Draft narration.", output_path=output))
+    again = asyncio.run(tts_service.generate_tts_local("Draft narration.", output_path=str(tmp_path / "b.mp3")))
+
+    assert result == output and again
+    with open(output, "rb") as f:
+        header = f.read(3)
+    assert header == b"ID3" or header[0] == 0xFF
+    assert len(espeak) == 1
+    assert espeak[0]["text"] == "Draft narration."
+
+
+def test_energy_maps_to_rate_and_pitch(espeak, tmp_path):
+    """Test energy presets change the local engine's speed and pitch."""
+    for energy in ("professional", "viral"):
+        asyncio.run(tts_service.generate_tts_local("Same words.", str(tmp_path / f"{energy}.mp3"), energy))
+
+    calm, viral = (run["args"] for run in espeak)
+    assert int(viral[viral.index("-s") + 1]) > int(calm[calm.index("-s") + 1])
+    assert int(viral[viral.index("-p") + 1]) > int(calm[calm.index("-p") + 1])
+
+
+def test_draft_tier_never_calls_premium_providers(espeak, tmp_path):
+    """Test drafts use the local engine while publish keeps premium priority."""
+    premium = AsyncMock(return_value=str(tmp_path / "premium.mp3"))
+
+    with patch.object(tts_service, "generate_tts_elevenlabs", premium), \
+            patch.object(tts_service, "generate_tts_openai", premium):
+        draft = asyncio.run(tts_service.generate_voiceover(
+            "Hello there.", output_path=str(tmp_path / "draft.mp3"), tier="draft"
+        ))
+        assert draft == str(tmp_path / "draft.mp3") and not premium.called
+
+        published = asyncio.run(tts_service.generate_voiceover("Hello there.", tier="publish"))
+        assert published == str(tmp_path / "premium.mp3")
+
+
+def test_draft_falls_back_to_free_gtts_without_local_engine():
+    """Test a machine without a local engine still drafts without paid voices."""
+    premium = AsyncMock(return_value="/premium.mp3")
+    gtts = AsyncMock(return_value="/gtts.mp3")
+
+    with patch.object(tts_service, "local_engine", return_value=None), \
+            patch.object(tts_service, "generate_tts_elevenlabs", premium), \
+            patch.object(tts_service, "generate_tts_gtts", gtts):
+        assert asyncio.run(tts_service.generate_voiceover("Hi.", tier="draft")) == "/gtts.mp3"
+    assert not premium.called
+
+
+def test_only_publish_profile_is_premium():
+    """Test encoding profiles map to tiers."""
+    assert tts_service.tier_for_profile("publish") == "publish"
+    assert [tts_service.tier_for_profile(p) for p in ("proxy", "draft", "review")] == ["draft"] * 3
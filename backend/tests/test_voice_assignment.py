@@ -0,0 +1,162 @@
+"""
+Test suite for the bulk voice assignment job.
+"""
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.jobs import voice_assignment as job
+from app.models import Article, Asset, Post
+
+ARTICLE_SCRIPT = "Markets moved sharply today. " * 30  # longer than the analysis sample
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'voices.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Post(kind="video", title="Breaking: markets report", body="Officials announced today.",
+                 status="approved", source_url="https://news.example/markets"),
+            Post(kind="video", title="New AI chip", body="The software and algorithm tech.",
+                 status="draft"),
+            Post(kind="video", title="Picked by hand", body="Hook (0-3s): Anything.\nCTA (3-6s): Follow.",
+                 status="approved",
+                 extra_data={"selected_voice": "rachel", "voice_energy": "calm"}),
+            Post(kind="video", title="Already voiced", body="Done.", status="media_ready"),
+            Post(kind="video", title="Shipped", body="Old news.", status="published"),
+            Post(kind="text", title="Just text", body="No video.", status="approved"),
+            Article(source_name="mock", external_id="markets", title="Markets report",
+                    url="https://news.example/markets", published_at=datetime(2025, 1, 1),
+                    script=ARTICLE_SCRIPT),
+        ])
+        session.commit()
+        voiced = session.exec(select(Post).where(Post.title == "Already voiced")).one()
+        session.add(Asset(post_id=voiced.id, type="audio", path="media://audio/existing.mp3"))
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def synthesis():
+    """Fake TTS and storage that record calls and peak concurrency."""
+    state = {"calls": [], "active": 0, "peak": 0}
+
+    async def generate_voiceover(text, voice=None, energy="professional", tier=None):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        state["calls"].append((text, voice, energy, tier))
+        return f"/tmp/{voice}.mp3"
+
+    with patch.object(job.tts_service, "generate_voiceover", side_effect=generate_voiceover), \
+            patch.object(job.media_store, "store", side_effect=lambda path, kind: f"media://{kind}{path}"):
+        yield state
+
+
+def posts_by_title(engine):
+    with Session(engine) as session:
+        return {post.title: post for post in session.exec(select(Post))}
+
+
+def test_assigns_voices_in_one_pass_and_keeps_hand_picked(engine, synthesis):
+    """Test pending video posts get a voice and energy; chosen voices are left alone."""
+    with patch.object(job, "engine", engine):
+        result = asyncio.run(job.run_voice_assignment_job(presynthesize_audio=False))
+
+    assert result == {"posts_analyzed": 4, "voices_assigned": 3, "voiceovers_ready": 0, "failed": 0}
+    posts = posts_by_title(engine)
+    news = posts["Breaking: markets report"].extra_data
+    assert news["selected_voice"] == news["voice_analysis"]["recommended_voices"][0]["key"]
+    assert news["voice_energy"] == "professional"
+    assert posts["New AI chip"].extra_data["voice_energy"] == "energetic"
+    assert posts["Picked by hand"].extra_data["selected_voice"] == "rachel"
+    assert posts["Picked by hand"].extra_data["voice_energy"] == "calm"
+    assert posts["Shipped"].extra_data is None
+    assert posts["Just text"].extra_data is None
+    assert synthesis["calls"] == []
+
+
+def test_bulk_update_merges_writes_made_during_the_run(engine, synthesis):
+    """Test one UPDATE writes only changed posts, keeping extra_data written after the snapshot."""
+    with Session(engine) as session:
+        rows = session.execute(select(Post.id, Post.title, Post.body, Post.extra_data)
+                               .where(Post.kind == "video")).all()
+    posts = [job.SimpleNamespace(id=r.id, title=r.title, body=r.body, extra_data=r.extra_data or {})
+             for r in rows]
+    ids = {post.title: post.id for post in posts}
+
+    # Written by /api/voice/select and others while the job works on its snapshot
+    with Session(engine) as session:
+        chip = session.get(Post, ids["New AI chip"])
+        chip.extra_data = {"selected_voice": "charlotte", "voice_energy": "calm"}
+        news = session.get(Post, ids["Breaking: markets report"])
+        news.extra_data = {"thumbnail": "thumb.png"}
+        session.commit()
+
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(parameters)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            assignments, assigned = job.assign_voices(session, posts)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(updates) == 1 and len(updates[0]) == 5  # every analysis is new, one statement
+    assert assigned == 3  # not the chip: its hand-picked voice won
+    assert assignments[ids["New AI chip"]] == ("charlotte", "calm")
+    posts_now = posts_by_title(engine)
+    assert posts_now["New AI chip"].extra_data["selected_voice"] == "charlotte"
+    assert "voice_analysis" in posts_now["New AI chip"].extra_data
+    assert posts_now["Breaking: markets report"].extra_data["thumbnail"] == "thumb.png"
+    assert posts_now["Breaking: markets report"].extra_data["voice_assigned_by"] == "auto"
+
+    # Nothing changed: nothing written
+    fresh = [job.SimpleNamespace(id=p.id, title=p.title, body=p.body, extra_data=p.extra_data or {})
+             for p in posts_now.values() if p.kind == "video"]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with Session(engine) as session:
+            _, assigned = job.assign_voices(session, fresh)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(updates) == 1 and assigned == 0
+
+
+def test_approved_posts_are_presynthesized_concurrently(engine, synthesis):
+    """Test approved posts without audio get a stored voiceover with their voice; drafts do not."""
+    with patch.object(job, "engine", engine), patch.object(job, "VOICE_ASSIGN_CONCURRENCY", 2):
+        result = asyncio.run(job.run_voice_assignment_job(presynthesize_audio=True))
+
+    assert result["voiceovers_ready"] == 2
+    assert result["failed"] == 0
+    assert synthesis["peak"] == 2
+    # The full script the video narrates, not the analysis sample
+    assert {call[0] for call in synthesis["calls"]} == {ARTICLE_SCRIPT, "Anything. Follow."}
+    assert ("Anything. Follow.", "rachel", "calm", "publish") in synthesis["calls"]
+
+    posts = posts_by_title(engine)
+    with Session(engine) as session:
+        audio = {asset.post_id: asset.path for asset in session.exec(select(Asset).where(Asset.type == "audio"))}
+    assert audio[posts["Picked by hand"].id] == "media://audio/tmp/rachel.mp3"
+    assert posts["New AI chip"].id not in audio
+    assert audio[posts["Already voiced"].id] == "media://audio/existing.mp3"
+
+    # Voiced posts are skipped next time
+    synthesis["calls"].clear()
+    with patch.object(job, "engine", engine):
+        again = asyncio.run(job.run_voice_assignment_job(presynthesize_audio=True))
+    assert again["voiceovers_ready"] == 0
+    assert again["voices_assigned"] == 0
+    assert synthesis["calls"] == []
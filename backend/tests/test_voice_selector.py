@@ -0,0 +1,128 @@
+"""
+Test suite for voice selection: script analysis and cached voice previews.
+"""
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import http_pool, voice_selector
+from app.models import Post
+from app.tts_cache import TTSCache
+
+
+class FakeElevenLabs:
+    """Records requests and how many were in flight at once."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def post(self, url, headers=None, json=None, timeout=None):
+        self.calls.append((url, json["text"]))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return type("Response", (), {"status_code": 200, "content": b"ID3 " + url.encode()})()
+
+
+@pytest.fixture
+def elevenlabs(tmp_path):
+    client = FakeElevenLabs()
+    with patch.object(voice_selector, "ELEVENLABS_API_KEY", "key"), \
+            patch.object(voice_selector, "get_async_client", return_value=client), \
+            patch.object(voice_selector, "tts_cache", TTSCache(root=tmp_path / "tts")), \
+            patch.dict(http_pool.PROVIDER_CONCURRENCY, {"elevenlabs": 2}):
+        yield client
+
+
+def test_previews_run_concurrently_under_provider_cap(elevenlabs, tmp_path):
+    """Test all voices are requested in parallel, never above the provider limit."""
+    previews = asyncio.run(voice_selector.generate_previews(
+        voice_selector.RECOMMENDED_VOICES, "Breaking news today.", output_dir=str(tmp_path)))
+
+    assert set(previews) == set(voice_selector.RECOMMENDED_VOICES)
+    assert len(elevenlabs.calls) == len(voice_selector.RECOMMENDED_VOICES)
+    assert elevenlabs.peak == 2
+    adam = open(previews["adam"], "rb").read()
+    assert voice_selector.RECOMMENDED_VOICES["adam"]["id"].encode() in adam
+
+
+def test_previews_are_per_content_and_reused(elevenlabs, tmp_path):
+    """Test different posts get separate files and repeat requests hit the cache."""
+    voices = {"adam": voice_selector.RECOMMENDED_VOICES["adam"]}
+
+    first = asyncio.run(voice_selector.generate_previews(voices, "Post one script.", str(tmp_path)))
+    second = asyncio.run(voice_selector.generate_previews(voices, "Post two script.", str(tmp_path)))
+    again = asyncio.run(voice_selector.generate_previews(voices, "Post one script.", str(tmp_path)))
+
+    assert first["adam"] != second["adam"]
+    assert again == first
+    assert len(elevenlabs.calls) == 2
+    assert all(os.path.exists(path) for path in (first["adam"], second["adam"]))
+
+
+def test_single_pass_analysis_matches_keyword_scans():
+    """Test the compiled classifier agrees with a plain keyword scan per category."""
+    texts = [
+        "Breaking: the company announced record revenue.",
+        "A new app uses AI to edit photos.",
+        "Said again and again",  # 'ai' inside words counts, as before
+        "The CEO spoke to the market about technology.",
+        "A quiet walk in the park.",
+        "",
+    ]
+    for text in texts:
+        lowered = text.lower()
+        expected = tuple(
+            any(word in lowered for word in words) for words in voice_selector.STYLE_KEYWORDS.values()
+        )
+        result = voice_selector.analyze_script_style(text)
+        assert (result["is_news"], result["is_tech"], result["is_business"]) == expected
+
+
+def test_post_analysis_is_memoized_until_text_changes(tmp_path):
+    """Test recommendations are stored on the post and recomputed only for new text."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'posts.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        post = Post(kind="video", title="Market update", body="The company announced revenue.",
+                    extra_data={"selected_voice": "adam"})
+        session.add(post)
+        session.commit()
+        post_id = post.id
+
+    def run():
+        with Session(engine) as session:
+            post = session.get(Post, post_id)
+            analysis = voice_selector.analyze_post(post)
+            session.add(post)
+            session.commit()
+            return analysis
+
+    real = voice_selector.get_voice_recommendations
+    with patch.object(voice_selector, "get_voice_recommendations", side_effect=real) as recommend:
+        first = run()
+        second = run()
+        assert recommend.call_count == 1
+
+        with Session(engine) as session:
+            post = session.get(Post, post_id)
+            post.body = "A new AI app launched."
+            session.add(post)
+            session.commit()
+        third = run()
+        assert recommend.call_count == 2
+
+    assert second == first
+    assert first["style_analysis"]["style"] == "news-anchor"
+    assert third["style_analysis"]["style"] == "tech-narrator"
+    assert third["recommended_voices"][0]["score"] >= third["recommended_voices"][-1]["score"]
+    with Session(engine) as session:
+        extra_data = session.get(Post, post_id).extra_data
+    assert extra_data["selected_voice"] == "adam"
+    assert extra_data["voice_analysis"]["content_hash"] == third["content_hash"]
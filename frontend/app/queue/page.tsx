@@ -497,6 +497,14 @@ export default function QueuePage() {
                                             duration={post.video_duration || 18}
                                             title={post.title}
                                         />
+                                    ) : post.preview?.video_url ? (
+                                        /* Low-res proxy; full quality renders on approval */
+                                        <VideoPlayer
+                                            videoUrl={`/output/${post.preview.video_url}`}
+                                            thumbnailUrl={post.preview.poster_url ? `/output/${post.preview.poster_url}` : undefined}
+                                            duration={post.preview.duration || post.video_duration || 18}
+                                            title={`${post.title} (preview)`}
+                                        />
                                     ) : isGenerating ? (
                                         <div className="aspect-[9/16] max-w-[400px] mx-auto bg-gray-900 rounded-lg flex items-center justify-center">
                                             <div className="text-center">
@@ -14,12 +14,54 @@ interface Step {
   label: string
   duration: number
   status: 'pending' | 'in_progress' | 'complete'
+  stage?: string
+}
+
+// Server-sent snapshot from /api/content/{id}/video-status/stream
+interface RenderProgress {
+  status: string
+  stage: string | null
+  progress: number
+  elapsed_seconds: number
+  eta_seconds: number | null
+  stages: Record<string, { fraction: number | null; seconds: number }>
+}
+
+const BASE_URL = process.env.NEXT_PUBLIC_API_URL || ''
+
+// Render stages in pipeline order (labels for the live step list)
+const RENDER_STEPS: { stage: string; label: string }[] = [
+  { stage: 'parse', label: 'Analyzing script content' },
+  { stage: 'footage', label: 'Fetching stock footage' },
+  { stage: 'tts', label: 'Adding voiceover narration' },
+  { stage: 'scene', label: 'Rendering video scenes' },
+  { stage: 'encode', label: 'Encoding final video' },
+  { stage: 'done', label: 'Video ready for review!' }
+]
+
+const liveSteps = (snapshot: RenderProgress): Step[] => {
+  const current = snapshot.status === 'completed' ? 'done' : snapshot.stage
+  const currentIndex = RENDER_STEPS.findIndex(step => step.stage === current)
+  return RENDER_STEPS.map((step, index) => {
+    const fraction = snapshot.stages[step.stage]?.fraction ?? 0
+    const complete = step.stage === 'done'
+      ? snapshot.status === 'completed'
+      : fraction >= 1 || index < currentIndex
+    return {
+      id: index + 1,
+      label: step.label,
+      duration: snapshot.stages[step.stage]?.seconds ?? 0,
+      stage: step.stage,
+      status: complete ? 'complete' : index === currentIndex || (currentIndex < 0 && index === 0) ? 'in_progress' : 'pending'
+    }
+  })
 }
 
 export default function VideoGenerationProgress({ postId, isGenerating, onComplete }: VideoGenerationProgressProps) {
   const [progress, setProgress] = useState(0)
   const [currentStep, setCurrentStep] = useState(0)
   const [elapsedTime, setElapsedTime] = useState(0)
+  const [live, setLive] = useState<RenderProgress | null>(null)
   const [steps, setSteps] = useState<Step[]>([
     { id: 1, label: 'Analyzing script content', duration: 3, status: 'pending' },
     { id: 2, label: 'Generating video scenes', duration: 8, status: 'pending' },
@@ -33,7 +75,9 @@ export default function VideoGenerationProgress({ postId, isGenerating, onComple
   ])
 
   const totalDuration = steps.reduce((sum, step) => sum + step.duration, 0)
-  const remainingTime = Math.max(0, totalDuration - elapsedTime)
+  const remainingTime = live
+    ? live.eta_seconds
+    : Math.max(0, totalDuration - elapsedTime)
 
   // Play notification sound when complete
   const playNotificationSound = () => {
@@ -46,8 +90,39 @@ export default function VideoGenerationProgress({ postId, isGenerating, onComple
     }
   }
 
+  // Live progress from the render worker (server-sent events)
+  useEffect(() => {
+    if (!isGenerating || typeof EventSource === 'undefined') return
+
+    const source = new EventSource(`${BASE_URL}/api/content/${postId}/video-status/stream`)
+
+    const onProgress = (event: MessageEvent) => {
+      const snapshot: RenderProgress = JSON.parse(event.data)
+      setLive(snapshot)
+      setSteps(liveSteps(snapshot))
+      setProgress(Math.min(snapshot.progress * 100, snapshot.status === 'completed' ? 100 : 99))
+      setElapsedTime(snapshot.elapsed_seconds)
+    }
+
+    source.addEventListener('progress', onProgress as EventListener)
+    source.addEventListener('done', ((event: MessageEvent) => {
+      onProgress(event)
+      source.close()
+      const snapshot: RenderProgress = JSON.parse(event.data)
+      if (snapshot.status === 'completed') {
+        playNotificationSound()
+      }
+      setTimeout(() => {
+        onComplete?.()
+      }, 1000)
+    }) as EventListener)
+
+    return () => source.close()
+  }, [isGenerating, postId, onComplete])
+
+  // Estimated timeline until the first live update arrives
   useEffect(() => {
-    if (!isGenerating) return
+    if (!isGenerating || live) return
 
     const startTime = Date.now()
     const interval = setInterval(() => {
@@ -82,8 +157,8 @@ export default function VideoGenerationProgress({ postId, isGenerating, onComple
         }))
       )
 
-      // Complete
-      if (elapsed >= totalDuration) {
+      // Complete (estimate only without live updates; otherwise wait for "done")
+      if (elapsed >= totalDuration && typeof EventSource === 'undefined') {
         setProgress(100)
         setSteps(prevSteps =>
           prevSteps.map(step => ({ ...step, status: 'complete' as const }))
@@ -97,9 +172,10 @@ export default function VideoGenerationProgress({ postId, isGenerating, onComple
     }, 500)
 
     return () => clearInterval(interval)
-  }, [isGenerating, onComplete, totalDuration])
+  }, [isGenerating, onComplete, totalDuration, live])
 
-  const formatTime = (seconds: number) => {
+  const formatTime = (seconds: number | null) => {
+    if (seconds === null) return '--:--'
     const mins = Math.floor(seconds / 60)
     const secs = Math.floor(seconds % 60)
     return `${mins}:${secs.toString().padStart(2, '0')}`
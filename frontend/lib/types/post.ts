@@ -18,6 +18,18 @@ export interface Post {
     total_cost?: number;
     extra_data?: Record<string, any>;
     assets?: Asset[];
+    preview?: VideoPreview | null;
+}
+
+// Proxy render shown in the review queue before the full-quality render
+export interface VideoPreview {
+    profile: string;
+    video_url: string;
+    poster_url: string;
+    sprite_url: string;
+    sprite: { frames: number; thumb_width: number; thumb_height: number; interval: number };
+    duration: number;
+    rendered_at: string;
 }
 
 export type PostKind = 'text' | 'video';
@@ -28,6 +40,7 @@ export type PostStatus =
     | 'published'
     | 'failed'
     | 'video_production'
+    | 'video_rendering'
     | 'scheduled';
 
 export interface Asset {